@@ -1,10 +1,10 @@
 from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-import httpx
 import sys
 from app.schemas.auth import UserCreate, UserLogin, UserUpdate, UserResponse, UserListResponse, RoleUpdate, TokenResponse, RefreshTokenRequest
 from app.services.auth_service import AuthService
 from app.core.config import get_settings
+from app.core.http_clients import http_clients
 
 router = APIRouter()
 security = HTTPBearer()
@@ -176,13 +176,13 @@ async def refresh_token(token_request: RefreshTokenRequest):
 async def logout(token_request: RefreshTokenRequest):
     """Выйти из системы (отозвать refresh токен)"""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{settings.AUTH_SERVICE_URL}/auth/logout",
-                json={"refresh_token": token_request.refresh_token}
-            )
-            response.raise_for_status()
-            return {"message": "Successfully logged out"}
+        client = http_clients.client("auth")
+        response = await client.post(
+            f"{settings.AUTH_SERVICE_URL}/auth/logout",
+            json={"refresh_token": token_request.refresh_token}
+        )
+        response.raise_for_status()
+        return {"message": "Successfully logged out"}
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -6,6 +6,9 @@ from app.schemas.generator import (
     GenerateTemplateRequest, GenerateTemplateResponse,
     PreviewRequest, PreviewResponse
 )
+from app.api.auth import get_current_user
+from app.core.config import get_settings
+from app.core.orchestration import Flow
 from app.services.generator_client import GeneratorClient
 from app.services.files_service import FilesService
 from app.services.projects_service import ProjectsService
@@ -14,6 +17,8 @@ import json
 
 router = APIRouter()
 
+settings = get_settings()
+
 def get_generator_client():
     return GeneratorClient()
 
@@ -23,6 +28,57 @@ def get_files_service():
 def get_projects_service():
     return ProjectsService()
 
+# Поля маппинга, передаваемые в generator-service как MappingSuggestion
+MAPPING_FIELDS = (
+    "json_field_id", "json_field_path", "json_field_label",
+    "xml_element_name", "xml_element_path", "variable_name", "is_auto_mapped"
+)
+
+def _file_versions(project_files: list, file_type: str) -> list:
+    """Файлы проекта одного типа, от последней загруженной версии к первой"""
+    files = [f for f in project_files if f.get("file_type") == file_type]
+    return sorted(files, key=lambda f: f.get("created_at") or "", reverse=True)
+
+def _mapping_key(mapping: dict) -> tuple:
+    return mapping["json_field_id"], mapping["xml_element_name"], mapping.get("xml_element_path")
+
+def _previous_mappings(saved_mappings: list) -> list:
+    """Сохраненные маппинги проекта в формате generator-service"""
+    previous = []
+    for mapping in saved_mappings:
+        item = {field: mapping.get(field) for field in MAPPING_FIELDS}
+        score = mapping.get("confidence_score")
+        item["confidence_score"] = score if score is not None else (0.0 if mapping.get("is_auto_mapped") else 1.0)
+        previous.append(item)
+    return previous
+
+async def _sync_auto_mappings(
+    projects_service: ProjectsService,
+    project_id: str,
+    saved_mappings: list,
+    mappings: list
+):
+    """
+    Сохранение результата маппинга без дублей
+
+    Ручные маппинги не трогаются; из автоматических удаляются только
+    устаревшие и создаются только новые.
+    """
+    saved_auto = {_mapping_key(m): m for m in saved_mappings if m.get("is_auto_mapped", True)}
+    new_auto = [m for m in mappings if m.get("is_auto_mapped", True)]
+    new_keys = {_mapping_key(m) for m in new_auto}
+
+    # Удаления и создание не зависят друг от друга - выполняются одновременно
+    flow = Flow(timeout=settings.ORCHESTRATION_STEP_TIMEOUT)
+    for key, mapping in saved_auto.items():
+        if key not in new_keys:
+            flow.add(f"delete_{mapping['id']}", lambda mapping_id=mapping["id"]: projects_service.delete_field_mapping(mapping_id))
+
+    to_create = [m for m in new_auto if _mapping_key(m) not in saved_auto]
+    if to_create:
+        flow.add("create", lambda: projects_service.bulk_create_mappings(project_id, to_create))
+    await flow.run()
+
 @router.post("/parse-files", response_model=ParseFilesResponse)
 async def parse_project_files(
     request: ParseFilesRequest,
@@ -32,9 +88,11 @@ async def parse_project_files(
 ):
     """Парсинг JSON и XSD файлов проекта"""
     try:
-        project = await projects_service.get_project(request.project_id)
-
-        project_files = await files_service.get_project_files(request.project_id)
+        # Проверка проекта и список файлов - одновременно
+        lookup = Flow(timeout=settings.ORCHESTRATION_STEP_TIMEOUT)
+        lookup.add("project", lambda: projects_service.get_project(request.project_id))
+        lookup.add("project_files", lambda: files_service.get_project_files(request.project_id))
+        project_files = (await lookup.run())["project_files"]
 
         json_file = next((f for f in project_files if f.get("file_type") == "JSON_SCHEMA"), None)
         xsd_file = next((f for f in project_files if f.get("file_type") == "XSD_SCHEMA"), None)
@@ -51,20 +109,34 @@ async def parse_project_files(
                 detail="XSD schema file not found for this project"
             )
 
-        json_content_bytes = await files_service.download_file(json_file["id"])
-        xsd_content_bytes = await files_service.download_file(xsd_file["id"])
-
-        json_content = json_content_bytes.decode('utf-8')
-        xsd_content = xsd_content_bytes.decode('utf-8')
+        # Две независимые цепочки: скачивание -> парсинг для JSON и для XSD
+        flow = Flow(timeout=settings.ORCHESTRATION_STEP_TIMEOUT)
+        flow.add("json_content", lambda: files_service.download_file(json_file["id"]))
+        flow.add("xsd_content", lambda: files_service.download_file(xsd_file["id"]))
+        flow.add(
+            "json_parse_result",
+            lambda json_content: generator_client.parse_json_schema(
+                json_content.decode('utf-8'), checksum=json_file.get("checksum")
+            ),
+            after=["json_content"]
+        )
+        flow.add(
+            "xsd_parse_result",
+            lambda xsd_content: generator_client.parse_xsd_schema(
+                xsd_content.decode('utf-8'), checksum=xsd_file.get("checksum")
+            ),
+            after=["xsd_content"]
+        )
+        results = await flow.run()
+        json_parse_result = results["json_parse_result"]
+        xsd_parse_result = results["xsd_parse_result"]
 
-        json_parse_result = await generator_client.parse_json_schema(json_content)
         if not json_parse_result.get("success"):
             return ParseFilesResponse(
                 success=False,
                 error=f"Failed to parse JSON schema: {json_parse_result.get('error')}"
             )
 
-        xsd_parse_result = await generator_client.parse_xsd_schema(xsd_content)
         if not xsd_parse_result.get("success"):
             return ParseFilesResponse(
                 success=False,
@@ -74,7 +146,9 @@ async def parse_project_files(
         return ParseFilesResponse(
             success=True,
             json_schema=json_parse_result.get("data"),
-            xsd_schema=xsd_parse_result.get("data")
+            xsd_schema=xsd_parse_result.get("data"),
+            json_schema_handle=json_parse_result.get("handle"),
+            xsd_schema_handle=xsd_parse_result.get("handle")
         )
 
     except httpx.HTTPStatusError as e:
@@ -96,8 +170,11 @@ async def auto_map_fields(
     """Автоматическое сопоставление полей JSON и XML"""
     try:
         result = await generator_client.auto_map_fields(
-            json_schema=request.json_schema.dict(),
-            xsd_schema=request.xsd_schema.dict()
+            json_schema=request.json_schema.dict() if request.json_schema else None,
+            xsd_schema=request.xsd_schema.dict() if request.xsd_schema else None,
+            assignment=request.assignment,
+            json_schema_handle=request.json_schema_handle,
+            xsd_schema_handle=request.xsd_schema_handle
         )
         return AutoMapResponse(**result)
     except httpx.HTTPStatusError as e:
@@ -120,9 +197,10 @@ async def generate_template(
     try:
         result = await generator_client.generate_template(
             mappings=[m.dict() for m in request.mappings],
-            xsd_structure=request.xsd_structure.dict(),
+            xsd_structure=request.xsd_structure.dict() if request.xsd_structure else None,
             include_comments=request.include_comments,
-            include_null_checks=request.include_null_checks
+            include_null_checks=request.include_null_checks,
+            xsd_structure_handle=request.xsd_structure_handle
         )
         return GenerateTemplateResponse(**result)
     except httpx.HTTPStatusError as e:
@@ -166,12 +244,24 @@ async def generate_and_save_template(
     files_service: FilesService = Depends(get_files_service),
     projects_service: ProjectsService = Depends(get_projects_service)
 ):
-    """парсинг → маппинг → генерация → сохранение"""
-    try:
-        project_files = await files_service.get_project_files(request.project_id)
+    """парсинг → маппинг → генерация → сохранение
 
-        json_file = next((f for f in project_files if f.get("file_type") == "JSON_SCHEMA"), None)
-        xsd_file = next((f for f in project_files if f.get("file_type") == "XSD_SCHEMA"), None)
+    Если у проекта уже есть маппинги, пересчитывается только изменившаяся
+    часть (по сравнению с предыдущей загруженной версией схем), ручные
+    маппинги сохраняются.
+    """
+    try:
+        lookup = Flow(timeout=settings.ORCHESTRATION_STEP_TIMEOUT)
+        lookup.add("project_files", lambda: files_service.get_project_files(request.project_id))
+        lookup.add("saved_mappings", lambda: projects_service.get_project_mappings(request.project_id))
+        found = await lookup.run()
+        project_files = found["project_files"]
+        saved_mappings = found["saved_mappings"].get("mappings", [])
+
+        json_versions = _file_versions(project_files, "JSON_SCHEMA")
+        xsd_versions = _file_versions(project_files, "XSD_SCHEMA")
+        json_file = json_versions[0] if json_versions else None
+        xsd_file = xsd_versions[0] if xsd_versions else None
 
         if not json_file or not xsd_file:
             return GenerateAndSaveResponse(
@@ -179,11 +269,10 @@ async def generate_and_save_template(
                 error="Required files not found (JSON_SCHEMA or XSD_SCHEMA)"
             )
 
-        json_content_bytes = await files_service.download_file(json_file["id"])
-        xsd_content_bytes = await files_service.download_file(xsd_file["id"])
-
-        json_content = json_content_bytes.decode('utf-8')
-        xsd_content = xsd_content_bytes.decode('utf-8')
+        # Файлы скачиваются одновременно
+        downloads = Flow(timeout=settings.ORCHESTRATION_STEP_TIMEOUT)
+        downloads.add("json_content", lambda: files_service.download_file(json_file["id"]))
+        downloads.add("xsd_content", lambda: files_service.download_file(xsd_file["id"]))
 
         test_data = request.test_data
         if not test_data:
@@ -194,21 +283,35 @@ async def generate_and_save_template(
                 None
             )
             if test_data_file:
-                test_data_content_bytes = await files_service.download_file(test_data_file["id"])
-                test_data_content = test_data_content_bytes.decode('utf-8')
-                try:
-                    test_data = json.loads(test_data_content)
-                except json.JSONDecodeError:
-                    # Если файл не JSON - пропускаем test_data
-                    test_data = None
+                downloads.add("test_data_content", lambda: files_service.download_file(test_data_file["id"]))
+
+        contents = await downloads.run()
+        json_content = contents["json_content"].decode('utf-8')
+        xsd_content = contents["xsd_content"].decode('utf-8')
+
+        if "test_data_content" in contents:
+            try:
+                test_data = json.loads(contents["test_data_content"].decode('utf-8'))
+            except json.JSONDecodeError:
+                # Если файл не JSON - пропускаем test_data
+                test_data = None
+
+        previous_json = json_versions[1] if len(json_versions) > 1 else json_file
+        previous_xsd = xsd_versions[1] if len(xsd_versions) > 1 else xsd_file
 
         result = await generator_client.complete_generation(
             json_schema_content=json_content,
             xsd_schema_content=xsd_content,
+            json_schema_checksum=json_file.get("checksum"),
+            xsd_schema_checksum=xsd_file.get("checksum"),
             test_data=test_data,
             include_preview=bool(test_data),
             include_comments=request.include_comments,
-            include_null_checks=request.include_null_checks
+            include_null_checks=request.include_null_checks,
+            assignment=request.assignment,
+            previous_mappings=_previous_mappings(saved_mappings) if saved_mappings else None,
+            previous_json_schema_checksum=previous_json.get("checksum"),
+            previous_xsd_schema_checksum=previous_xsd.get("checksum")
         )
 
         if not result.get("success"):
@@ -218,23 +321,29 @@ async def generate_and_save_template(
             )
 
         mappings = result.get("mappings", [])
-        if mappings:
-            await projects_service.bulk_create_mappings(request.project_id, mappings)
-
         template = result.get("template", "")
+
+        # Маппинги и шаблон сохраняются одновременно, статус - после загрузки шаблона
+        save = Flow(timeout=settings.ORCHESTRATION_STEP_TIMEOUT)
+        save.add(
+            "mappings",
+            lambda: _sync_auto_mappings(projects_service, request.project_id, saved_mappings, mappings)
+        )
         if template:
-            file_upload_result = await files_service.upload_file_content(
+            save.add("template_file", lambda: files_service.upload_file_content(
                 project_id=request.project_id,
                 file_name="generated_template.vm",
                 file_content=template.encode('utf-8'),
                 file_type="VM_TEMPLATE"
-            )
-            template_file_id = file_upload_result.get("id")
-
-            await projects_service.update_project(
+            ))
+            save.add("status", lambda template_file: projects_service.update_project(
                 project_id=request.project_id,
                 update_data={"status": "COMPLETED"}
-            )
+            ), after=["template_file"])
+        saved = await save.run()
+
+        if template:
+            template_file_id = saved["template_file"].get("id")
 
             return GenerateAndSaveResponse(
                 success=True,
@@ -260,6 +369,93 @@ async def generate_and_save_template(
             detail=f"Failed to generate and save template: {str(e)}"
         )
 
+async def _get_owned_job(
+    job_id: str,
+    current_user: dict,
+    generator_client: GeneratorClient,
+    projects_service: ProjectsService
+) -> dict:
+    """
+    Задача генерации, доступная пользователю
+
+    Задачи BFF привязаны к проекту: доступ есть у автора проекта и у
+    администратора. Задачи без проекта через BFF не отдаются.
+
+    Raises:
+        HTTPException: 404 - задачи нет (или она без проекта), 403 - чужой проект
+    """
+    try:
+        job = await generator_client.get_generation_job(job_id)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+        raise
+
+    project_id = job.get("project_id")
+    if not project_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+
+    if current_user.get("role") != "ADMIN":
+        project, _ = await projects_service.get_project_detail(project_id, include_mappings=False)
+        if project.get("created_by") != current_user.get("email"):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not enough permissions"
+            )
+    return job
+
+@router.get("/jobs/{job_id}")
+async def get_generation_job(
+    job_id: str,
+    generator_client: GeneratorClient = Depends(get_generator_client),
+    projects_service: ProjectsService = Depends(get_projects_service),
+    current_user: dict = Depends(get_current_user)
+):
+    """Состояние фоновой генерации (задачи своих проектов)"""
+    try:
+        return await _get_owned_job(job_id, current_user, generator_client, projects_service)
+    except HTTPException:
+        raise
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(
+            status_code=e.response.status_code,
+            detail=f"Generator service error: {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get generation job: {str(e)}"
+        )
+
+@router.post("/jobs/{job_id}/resume", status_code=status.HTTP_202_ACCEPTED)
+async def resume_generation_job(
+    job_id: str,
+    generator_client: GeneratorClient = Depends(get_generator_client),
+    projects_service: ProjectsService = Depends(get_projects_service),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Продолжение упавшей или прерванной фоновой генерации
+
+    Задачи из create_full_project сохраняют результат в проект последним
+    этапом, поэтому после продолжения он попадает в проект так же.
+    """
+    try:
+        await _get_owned_job(job_id, current_user, generator_client, projects_service)
+        return await generator_client.resume_generation_job(job_id)
+    except HTTPException:
+        raise
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(
+            status_code=e.response.status_code,
+            detail=f"Generator service error: {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to resume generation job: {str(e)}"
+        )
+
 @router.get("/health")
 async def generator_health_check(
     generator_client: GeneratorClient = Depends(get_generator_client)
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Query, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Depends, status, Query, UploadFile, File, Form, Header, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from typing import Optional, List
+from typing import Optional, List, Dict, Any, Tuple
 from app.schemas.projects import (
     ProjectCreate, ProjectUpdate, ProjectResponse, ProjectListResponse, ProjectDetailedResponse,
     FieldMappingCreate, FieldMappingUpdate, FieldMappingResponse, FieldMappingListResponse,
@@ -11,6 +11,8 @@ from app.services.auth_service import AuthService
 from app.services.files_service import FilesService
 from app.services.generator_client import GeneratorClient
 from app.api.auth import get_current_user
+from app.core.config import get_settings
+from app.core.orchestration import Flow
 
 router = APIRouter()
 security = HTTPBearer()
@@ -20,6 +22,8 @@ auth_service = AuthService()
 files_service = FilesService()
 generator_client = GeneratorClient()
 
+settings = get_settings()
+
 # ============ PROJECTS ENDPOINTS ============
 
 @router.post("/", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
@@ -27,43 +31,11 @@ async def create_project(
     project: ProjectCreate,
     current_user: dict = Depends(get_current_user)
 ):
-    """Создать новый проект (с автоматическим версионированием если название существует)"""
-    import re
-
+    """Создать новый проект (если название существует - projects-service добавит версию)"""
     user_email = current_user.get("email")
 
-    # Проверяем существующие проекты с таким названием и добавляем версию
-    all_projects = await projects_service.get_projects(limit=250)
-    existing_projects = all_projects.get("projects", [])
-
-    # Базовое имя без версии
-    base_name = re.sub(r'\s+\(версия\s+\d+\)$', '', project.name)
-
-    # Находим все проекты с похожим названием
-    matching_projects = []
-    for proj in existing_projects:
-        proj_name = proj.get("name", "")
-        # Проверяем точное совпадение или с версией
-        if proj_name == base_name or re.match(rf'^{re.escape(base_name)}\s+\(версия\s+\d+\)$', proj_name):
-            matching_projects.append(proj_name)
-
-    # Если есть совпадения - добавляем версию
-    project_name = project.name
-    if matching_projects:
-        max_version = 1  # Если есть проект без версии, начинаем с версии 2
-
-        for proj_name in matching_projects:
-            # Ищем версию в названии
-            version_match = re.search(r'\(версия\s+(\d+)\)$', proj_name)
-            if version_match:
-                version = int(version_match.group(1))
-                max_version = max(max_version, version)
-
-        # Формируем новое название с версией
-        project_name = f"{base_name} (версия {max_version + 1})"
-
     result = await projects_service.create_project(
-        name=project_name,
+        name=project.name,
         description=project.description,
         created_by=user_email
     )
@@ -77,6 +49,8 @@ async def get_projects(
     limit: int = Query(100, ge=1, le=1000),
     sort_by: Optional[str] = Query(None, description="Поле для сортировки"),
     sort_order: Optional[str] = Query(None, description="Направление сортировки (asc/desc)"),
+    cursor: Optional[str] = Query(None, description="next_cursor предыдущей страницы (вместо skip)"),
+    count: str = Query("exact", pattern="^(exact|estimate|none)$", description="Подсчет total: exact/estimate/none"),
     current_user: dict = Depends(get_current_user)
 ):
     """Получить список проектов с поиском, фильтрацией и сортировкой"""
@@ -86,7 +60,9 @@ async def get_projects(
         skip=skip,
         limit=limit,
         sort_by=sort_by,
-        sort_order=sort_order
+        sort_order=sort_order,
+        cursor=cursor,
+        count=count
     )
     return ProjectListResponse(**result)
 
@@ -98,6 +74,8 @@ async def get_my_projects(
     limit: int = Query(100, ge=1, le=1000),
     sort_by: Optional[str] = Query(None, description="Поле для сортировки"),
     sort_order: Optional[str] = Query(None, description="Направление сортировки (asc/desc)"),
+    cursor: Optional[str] = Query(None, description="next_cursor предыдущей страницы (вместо skip)"),
+    count: str = Query("exact", pattern="^(exact|estimate|none)$", description="Подсчет total: exact/estimate/none"),
     current_user: dict = Depends(get_current_user)
 ):
     """Получить все проекты текущего пользователя с поиском и сортировкой"""
@@ -115,26 +93,83 @@ async def get_my_projects(
         skip=skip,
         limit=limit,
         sort_by=sort_by,
-        sort_order=sort_order
+        sort_order=sort_order,
+        cursor=cursor,
+        count=count
     )
     return ProjectListResponse(**result)
 
+async def _project_detail(
+    project_id: str,
+    include_mappings: bool = True,
+    include_history: bool = False,
+    include_files: bool = True,
+    if_none_match: Optional[str] = None
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Детальная информация о проекте: projects-service и файлы из files-service
+
+    Без If-None-Match проект и файлы запрашиваются одновременно. С ним
+    сначала проект: на 304 (ревизия не изменилась, в т.ч. файлы - они
+    меняют ревизию через уведомления files-service) файлы не нужны.
+
+    Returns:
+        (проект, ETag); проект None - не изменился (304)
+    """
+    async def project_files():
+        try:
+            return await files_service.get_project_files(project_id, include_templates=False)
+        except HTTPException:
+            # Как раньше в projects-service: без файлов, если files-service недоступен
+            return []
+
+    def project_detail():
+        return projects_service.get_project_detail(
+            project_id=project_id,
+            include_mappings=include_mappings,
+            include_history=include_history,
+            if_none_match=if_none_match
+        )
+
+    if if_none_match or not include_files:
+        project, etag = await project_detail()
+        if project is not None and include_files:
+            project["files"] = await project_files()
+        return project, etag
+
+    flow = Flow(timeout=settings.ORCHESTRATION_STEP_TIMEOUT)
+    flow.add("project", project_detail)
+    flow.add("files", project_files)
+    results = await flow.run()
+
+    project, etag = results["project"]
+    project["files"] = results["files"]
+    return project, etag
+
 @router.get("/{project_id}", response_model=ProjectDetailedResponse)
 async def get_project(
     project_id: str,
+    response: Response,
     include_mappings: bool = Query(True),
     include_history: bool = Query(False),
     include_files: bool = Query(True),
+    if_none_match: Optional[str] = Header(None),
     current_user: dict = Depends(get_current_user)
 ):
-    """Получить проект по ID с файлами"""
-    result = await projects_service.get_project(
+    """Получить проект по ID с файлами (ETag / If-None-Match -> 304, если проект не изменился)"""
+    project, etag = await _project_detail(
         project_id=project_id,
         include_mappings=include_mappings,
         include_history=include_history,
-        include_files=include_files
+        include_files=include_files,
+        if_none_match=if_none_match
     )
-    return ProjectDetailedResponse(**result)
+    if project is None:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag} if etag else None)
+
+    if etag:
+        response.headers["ETag"] = etag
+    return ProjectDetailedResponse(**project)
 
 @router.put("/{project_id}", response_model=ProjectResponse)
 async def update_project(
@@ -142,54 +177,10 @@ async def update_project(
     project_update: ProjectUpdate,
     current_user: dict = Depends(get_current_user)
 ):
-    """Обновить проект (с автоматическим версионированием если название существует)"""
-    import re
-
+    """Обновить проект (при переименовании в занятое название projects-service добавит версию)"""
     user_email = current_user.get("email")
     update_data = project_update.dict(exclude_unset=True)
 
-    # Если обновляется название, проверяем на дубликаты и добавляем версию
-    if "name" in update_data:
-        # Получаем текущий проект, чтобы исключить его из проверки
-        current_project = await projects_service.get_project(project_id)
-        if not current_project:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Project not found"
-            )
-
-        # Проверяем существующие проекты с таким названием и добавляем версию
-        all_projects = await projects_service.get_projects(limit=250)
-        existing_projects = all_projects.get("projects", [])
-
-        # Исключаем текущий проект из проверки
-        existing_projects = [p for p in existing_projects if p.get("id") != project_id]
-
-        # Базовое имя без версии
-        base_name = re.sub(r'\s+\(версия\s+\d+\)$', '', update_data["name"])
-
-        # Находим все проекты с похожим названием
-        matching_projects = []
-        for proj in existing_projects:
-            proj_name = proj.get("name", "")
-            # Проверяем точное совпадение или с версией
-            if proj_name == base_name or re.match(rf'^{re.escape(base_name)}\s+\(версия\s+\d+\)$', proj_name):
-                matching_projects.append(proj_name)
-
-        # Если есть совпадения - добавляем версию
-        if matching_projects:
-            max_version = 1  # Если есть проект без версии, начинаем с версии 2
-
-            for proj_name in matching_projects:
-                # Ищем версию в названии
-                version_match = re.search(r'\(версия\s+(\d+)\)$', proj_name)
-                if version_match:
-                    version = int(version_match.group(1))
-                    max_version = max(max_version, version)
-
-            # Формируем новое название с версией
-            update_data["name"] = f"{base_name} (версия {max_version + 1})"
-
     result = await projects_service.update_project(
         project_id=project_id,
         update_data=update_data,
@@ -267,6 +258,42 @@ async def delete_field_mapping(
 
 # ============ FULL PROJECT CREATION ENDPOINT ============
 
+async def _save_generation_result(project_id: str, result: Dict[str, Any], uploaded_by: str) -> Dict[str, Any]:
+    """Сохранение маппингов и шаблона результата генерации в проект"""
+    mappings = result.get("mappings") or []
+    template = result.get("template") or ""
+
+    # Маппинги и шаблон сохраняются одновременно, статус - после загрузки шаблона
+    flow = Flow(timeout=settings.ORCHESTRATION_STEP_TIMEOUT)
+    if mappings:
+        flow.add("mappings", lambda: projects_service.bulk_create_mappings(project_id, mappings))
+    if template:
+        flow.add("template_file", lambda: files_service.upload_file_content(
+            project_id=project_id,
+            file_name="generated_template.vm",
+            file_content=template.encode('utf-8'),
+            file_type="VM_TEMPLATE",
+            uploaded_by=uploaded_by
+        ))
+        flow.add("status", lambda template_file: projects_service.update_project(
+            project_id=project_id,
+            update_data={"status": "COMPLETED"}
+        ), after=["template_file"])
+    saved = await flow.run()
+
+    if not template:
+        return {
+            "success": False,
+            "error": "Template generation returned empty result"
+        }
+
+    return {
+        "success": True,
+        "template_file_id": saved["template_file"].get("id"),
+        "mappings_count": len(mappings),
+        "validation": result.get("validation")
+    }
+
 @router.post("/full", status_code=status.HTTP_201_CREATED)
 async def create_full_project(
     name: str = Form(...),
@@ -274,6 +301,7 @@ async def create_full_project(
     files: List[UploadFile] = File(...),
     file_types: str = Form(...),  # Принимаем как строку (для Swagger)
     generate: bool = Form(False),
+    async_generation: bool = Form(False),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -284,15 +312,17 @@ async def create_full_project(
     2. Загружает файлы
     3. Опционально генерирует VM шаблон (если generate=true)
 
-    - **name**: Название проекта (если уже существует, добавится v2, v3 и т.д.)
+    - **name**: Название проекта (если уже существует, добавится "(версия 2)", "(версия 3)" и т.д.)
     - **description**: Описание проекта (опционально)
     - **files**: Список файлов для загрузки
     - **file_types**: Типы файлов через запятую, например: "JSON_SCHEMA,XSD_SCHEMA,TEST_DATA"
     - **generate**: Запустить генерацию VM шаблона сразу (по умолчанию false)
+    - **async_generation**: Генерировать в фоне (по умолчанию false): ответ
+      возвращается сразу с job_id, прогресс приходит в комнату project:<id>
+      websocket-service, результат сохраняет в проект последний этап задачи
+      (в том числе после POST /generator/jobs/{job_id}/resume)
     """
     try:
-        import re
-
         user_email = current_user.get("email")
         user_uuid = current_user.get("uuid")
 
@@ -304,36 +334,16 @@ async def create_full_project(
                 detail=f"Number of files ({len(files)}) must match number of file_types ({len(file_types_list)})"
             )
 
-        # Проверяем существующие проекты с таким названием и добавляем версию
-        all_projects = await projects_service.get_projects(limit=250)
-        existing_projects = all_projects.get("projects", [])
-
-        # Базовое имя без версии
-        base_name = re.sub(r'\s+\(версия\s+\d+\)$', '', name)
-
-        # Находим все проекты с похожим названием
-        matching_projects = []
-        for proj in existing_projects:
-            proj_name = proj.get("name", "")
-            # Проверяем точное совпадение или с версией
-            if proj_name == base_name or re.match(rf'^{re.escape(base_name)}\s+\(версия\s+\d+\)$', proj_name):
-                matching_projects.append(proj_name)
-
-        # Если есть совпадения - добавляем версию
-        if matching_projects:
-            max_version = 1  # Если есть проект без версии, начинаем с версии 2
-
-            for proj_name in matching_projects:
-                # Ищем версию в названии
-                version_match = re.search(r'\(версия\s+(\d+)\)$', proj_name)
-                if version_match:
-                    version = int(version_match.group(1))
-                    max_version = max(max_version, version)
-
-            # Формируем новое название с версией
-            name = f"{base_name} (версия {max_version + 1})"
-
+        # Типы проверяются до создания проекта: загрузки идут одновременно
+        valid_types = ["JSON_SCHEMA", "XSD_SCHEMA", "TEST_DATA", "VM_TEMPLATE"]
+        for file_type in file_types_list:
+            if file_type not in valid_types:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Invalid file_type: {file_type}. Must be one of {valid_types}"
+                )
 
+        # Версия названия ("Имя (версия N)") выделяется в projects-service
         project = await projects_service.create_project(
             name=name,
             description=description,
@@ -341,22 +351,16 @@ async def create_full_project(
         )
         project_id = project["id"]
 
-        uploaded_files = []
-        for file, file_type in zip(files, file_types_list):
-            valid_types = ["JSON_SCHEMA", "XSD_SCHEMA", "TEST_DATA", "VM_TEMPLATE"]
-            if file_type not in valid_types:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Invalid file_type: {file_type}. Must be one of {valid_types}"
-                )
-
-            file_result = await files_service.upload_file(
+        uploads = Flow(timeout=settings.ORCHESTRATION_STEP_TIMEOUT)
+        for i, (file, file_type) in enumerate(zip(files, file_types_list)):
+            uploads.add(f"upload_{i}", lambda file=file, file_type=file_type: files_service.upload_file(
                 file=file,
                 project_id=project_id,
                 file_type=file_type,
                 uploaded_by=user_uuid
-            )
-            uploaded_files.append(file_result)
+            ))
+        uploaded = await uploads.run()
+        uploaded_files = [uploaded[f"upload_{i}"] for i in range(len(files))]
 
         generation_result = None
         if generate:
@@ -371,54 +375,55 @@ async def create_full_project(
                         "success": False,
                         "error": "JSON_SCHEMA and XSD_SCHEMA files are required for generation"
                     }
+                elif async_generation:
+                    test_data_file = next((f for f in project_files if f.get("file_type") == "TEST_DATA"), None)
+
+                    # Схемы генератор скачивает сам (потоково, с кэшем по checksum)
+                    job = await generator_client.submit_generation_job(
+                        project_id=project_id,
+                        json_file_id=json_file["id"],
+                        xsd_file_id=xsd_file["id"],
+                        test_data_file_id=test_data_file["id"] if test_data_file else None,
+                        include_preview=bool(test_data_file),
+                        save_to_project=True,
+                        uploaded_by=user_uuid
+                    )
+
+                    generation_result = {
+                        "success": True,
+                        "job_id": job["job_id"],
+                        "status": job["status"],
+                        "room": job["room"]
+                    }
                 else:
-                    json_content_bytes = await files_service.download_file(json_file["id"])
-                    xsd_content_bytes = await files_service.download_file(xsd_file["id"])
+                    # Файлы скачиваются одновременно
+                    downloads = Flow(timeout=settings.ORCHESTRATION_STEP_TIMEOUT)
+                    downloads.add("json_content", lambda: files_service.download_file(json_file["id"]))
+                    downloads.add("xsd_content", lambda: files_service.download_file(xsd_file["id"]))
+                    test_data_file = next((f for f in project_files if f.get("file_type") == "TEST_DATA"), None)
+                    if test_data_file:
+                        downloads.add("test_data_content", lambda: files_service.download_file(test_data_file["id"]))
+                    contents = await downloads.run()
 
-                    json_content = json_content_bytes.decode('utf-8')
-                    xsd_content = xsd_content_bytes.decode('utf-8')
+                    json_content = contents["json_content"].decode('utf-8')
+                    xsd_content = contents["xsd_content"].decode('utf-8')
 
                     test_data = None
-                    test_data_file = next((f for f in project_files if f.get("file_type") == "TEST_DATA"), None)
                     if test_data_file:
                         import json as json_lib
-                        test_data_content_bytes = await files_service.download_file(test_data_file["id"])
-                        test_data_content = test_data_content_bytes.decode('utf-8')
-                        test_data = json_lib.loads(test_data_content)
+                        test_data = json_lib.loads(contents["test_data_content"].decode('utf-8'))
 
                     result = await generator_client.complete_generation(
                         json_schema_content=json_content,
                         xsd_schema_content=xsd_content,
+                        json_schema_checksum=json_file.get("checksum"),
+                        xsd_schema_checksum=xsd_file.get("checksum"),
                         test_data=test_data,
                         include_preview=bool(test_data)
                     )
 
                     if result.get("success"):
-                        mappings = result.get("mappings", [])
-                        if mappings:
-                            await projects_service.bulk_create_mappings(project_id, mappings)
-
-                        template = result.get("template", "")
-                        if template:
-                            template_file = await files_service.upload_file_content(
-                                project_id=project_id,
-                                file_name="generated_template.vm",
-                                file_content=template.encode('utf-8'),
-                                file_type="VM_TEMPLATE",
-                                uploaded_by=user_uuid
-                            )
-
-                            await projects_service.update_project(
-                                project_id=project_id,
-                                update_data={"status": "COMPLETED"}
-                            )
-
-                            generation_result = {
-                                "success": True,
-                                "template_file_id": template_file.get("id"),
-                                "mappings_count": len(mappings),
-                                "validation": result.get("validation")
-                            }
+                        generation_result = await _save_generation_result(project_id, result, user_uuid)
                     else:
                         generation_result = {
                             "success": False,
@@ -431,7 +436,7 @@ async def create_full_project(
                     "error": f"Generation failed: {str(e)}"
                 }
 
-        final_project = await projects_service.get_project(
+        final_project, _ = await _project_detail(
             project_id=project_id,
             include_mappings=True,
             include_history=True,
@@ -16,6 +16,28 @@ class Settings(BaseSettings):
     PROJECTS_SERVICE_URL: str = "http://projects-service:8004"
     GENERATOR_SERVICE_URL: str = "http://generator-service:8005"
 
+    # Таймауты запросов к сервисам, с (клиенты создаются при старте BFF)
+    AUTH_SERVICE_TIMEOUT: float = 5.0
+    NOTIFICATION_SERVICE_TIMEOUT: float = 5.0
+    WEBSOCKET_SERVICE_TIMEOUT: float = 5.0
+    FILES_SERVICE_TIMEOUT: float = 30.0  # Загрузка и скачивание файлов
+    PROJECTS_SERVICE_TIMEOUT: float = 30.0
+    GENERATOR_SERVICE_TIMEOUT: float = 30.0
+
+    # Таймаут шага оркестрации (скачивание, парсинг, загрузка) в /generator и /projects/full
+    ORCHESTRATION_STEP_TIMEOUT: float = 120.0
+
+    # Передача тел в generator-service: gzip от GENERATOR_COMPRESS_MIN_BYTES
+    # (-1 - без сжатия), формат json | msgpack (msgpack - в обоих сервисах)
+    GENERATOR_COMPRESS_MIN_BYTES: int = 8192
+    GENERATOR_BODY_FORMAT: str = "json"
+
+    # Пулы соединений к внутренним сервисам (app/core/http_clients.py), на сервис
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 100
+    HTTP_CLIENT_MAX_KEEPALIVE: int = 20
+    HTTP_CLIENT_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_CLIENT_HTTP2: bool = False  # Нужен пакет h2 и HTTP/2 на стороне сервиса
+
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,174 @@
+import logging
+import time
+from typing import Any, Dict, Optional
+import httpx
+from app.core.config import get_settings
+
+settings = get_settings()
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamStats:
+    """Счетчики запросов к одному сервису"""
+
+    __slots__ = ("requests", "errors", "in_flight", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0  # Ответы 5xx и сетевые ошибки
+        self.in_flight = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+
+class _MeteredTransport(httpx.AsyncHTTPTransport):
+    """Транспорт с пулом соединений и счетчиками запросов (время - до заголовков ответа)"""
+
+    def __init__(self, stats: UpstreamStats, **kwargs):
+        super().__init__(**kwargs)
+        self.stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        stats = self.stats
+        stats.requests += 1
+        stats.in_flight += 1
+        started = time.perf_counter()
+        try:
+            response = await super().handle_async_request(request)
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            stats.in_flight -= 1
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+
+        if response.status_code >= 500:
+            stats.errors += 1
+        return response
+
+
+class HttpClientRegistry:
+    """
+    Общие httpx.AsyncClient для внутренних сервисов
+
+    Для каждого сервиса (auth, files, projects, generator, ...) - один
+    клиент со своим пулом соединений: keep-alive вместо нового TCP
+    соединения на каждый запрос, опционально HTTP/2. Клиенты создаются
+    при старте BFF (start() в lifespan main.py) с таймаутами сервисов из
+    настроек и живут до остановки.
+    """
+
+    def __init__(
+        self,
+        timeouts: Dict[str, float],
+        max_connections: int,
+        max_keepalive_connections: int,
+        keepalive_expiry: float,
+        http2: bool = False
+    ):
+        """
+        Args:
+            timeouts: Сервисы и таймауты их запросов по умолчанию, с
+            max_connections: Максимум соединений в пуле одного сервиса
+            max_keepalive_connections: Сколько простаивающих соединений держать
+            keepalive_expiry: Время жизни простаивающего соединения, с
+            http2: HTTP/2 (нужен пакет h2; без него - HTTP/1.1)
+        """
+        self.timeouts = dict(timeouts)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.http2 = http2 and self._h2_available()
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._stats: Dict[str, UpstreamStats] = {}
+
+    def start(self):
+        """Создание клиентов всех сервисов (при старте BFF)"""
+        for name in self.timeouts:
+            self.client(name)
+
+    def client(self, name: str) -> httpx.AsyncClient:
+        """
+        Клиент сервиса
+
+        Таймаут по умолчанию - из timeouts (отдельный запрос может передать
+        свой timeout). Вне lifespan (скрипты) клиент создается при первом
+        обращении с тем же таймаутом.
+
+        Raises:
+            KeyError: Сервис не зарегистрирован
+        """
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            timeout = self.timeouts[name]
+            stats = self._stats.setdefault(name, UpstreamStats())
+            client = httpx.AsyncClient(
+                timeout=timeout,
+                transport=_MeteredTransport(stats, limits=self.limits, http2=self.http2)
+            )
+            self._clients[name] = client
+        return client
+
+    async def aclose(self):
+        """Закрытие всех клиентов (соединения пулов закрываются)"""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        """Запросы и состояние пула соединений по сервисам"""
+        upstreams = {}
+        for name, stats in self._stats.items():
+            client = self._clients.get(name)
+            upstreams[name] = {
+                "requests": stats.requests,
+                "errors": stats.errors,
+                "in_flight": stats.in_flight,
+                "avg_ms": round(stats.total_ms / stats.requests, 2) if stats.requests else 0.0,
+                "max_ms": round(stats.max_ms, 2),
+                **self._pool_stats(client)
+            }
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "upstreams": upstreams
+        }
+
+    @staticmethod
+    def _pool_stats(client: Optional[httpx.AsyncClient]) -> Dict[str, int]:
+        """Соединения пула (пул httpcore транспорта; нет клиента - нули)"""
+        pool = getattr(getattr(client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []) or [])
+        idle = sum(1 for c in connections if c.is_idle())
+        return {"connections": len(connections), "idle_connections": idle, "active_connections": len(connections) - idle}
+
+    @staticmethod
+    def _h2_available() -> bool:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("HTTP_CLIENT_HTTP2 is set but the h2 package is not installed, using HTTP/1.1")
+            return False
+        return True
+
+
+http_clients = HttpClientRegistry(
+    timeouts={
+        "auth": settings.AUTH_SERVICE_TIMEOUT,
+        "notification": settings.NOTIFICATION_SERVICE_TIMEOUT,
+        "websocket": settings.WEBSOCKET_SERVICE_TIMEOUT,
+        "files": settings.FILES_SERVICE_TIMEOUT,
+        "projects": settings.PROJECTS_SERVICE_TIMEOUT,
+        "generator": settings.GENERATOR_SERVICE_TIMEOUT
+    },
+    max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE,
+    keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY,
+    http2=settings.HTTP_CLIENT_HTTP2
+)
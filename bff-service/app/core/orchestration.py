@@ -0,0 +1,119 @@
+import asyncio
+import inspect
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+
+class StepTimeoutError(asyncio.TimeoutError):
+    """Шаг не завершился за отведенное время"""
+
+    def __init__(self, step: str, timeout: float):
+        super().__init__(f"Step '{step}' timed out after {timeout:g}s")
+        self.step = step
+        self.timeout = timeout
+
+
+class Flow:
+    """
+    Граф асинхронных шагов оркестрации
+
+    Шаг - корутинная функция; зависимости передаются ей именованными
+    аргументами (имя шага -> его результат). Независимые шаги выполняются
+    одновременно, зависимый стартует сразу после своих зависимостей,
+    поэтому время всего графа близко к самой длинной цепочке, а не к
+    сумме шагов. Ошибка или таймаут шага отменяет остальные шаги и
+    пробрасывается из run() как есть (HTTPException, httpx.HTTPStatusError).
+
+    Example:
+        flow = Flow(timeout=60)
+        flow.add("json", lambda: files_service.download_file(json_id))
+        flow.add("xsd", lambda: files_service.download_file(xsd_id))
+        flow.add("parsed_json", lambda json: generator_client.parse_json_schema(json.decode()), after=["json"])
+        results = await flow.run()
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        """
+        Args:
+            timeout: Таймаут шага по умолчанию, с (None - без ограничения)
+        """
+        self.timeout = timeout
+        self._steps: Dict[str, Tuple[Callable[..., Awaitable[Any]], Tuple[str, ...], Optional[float]]] = {}
+
+    def add(
+        self,
+        name: str,
+        func: Callable[..., Awaitable[Any]],
+        after: Iterable[str] = (),
+        timeout: Optional[float] = None
+    ) -> "Flow":
+        """
+        Добавление шага
+
+        Args:
+            name: Имя шага (ключ результата и имя аргумента для зависимых шагов)
+            func: Корутинная функция; принимает результаты шагов after по именам
+            after: Шаги, результаты которых нужны этому шагу
+            timeout: Таймаут шага (по умолчанию - таймаут графа)
+
+        Raises:
+            ValueError: Шаг с таким именем уже есть или зависимость неизвестна
+        """
+        if name in self._steps:
+            raise ValueError(f"Duplicate step: {name}")
+        after = tuple(after)
+        for dependency in after:
+            if dependency not in self._steps:
+                raise ValueError(f"Step '{name}' depends on unknown step '{dependency}'")
+        self._steps[name] = (func, after, timeout if timeout is not None else self.timeout)
+        return self
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Выполнение всех шагов
+
+        Returns:
+            Результаты шагов по именам
+        """
+        tasks: Dict[str, asyncio.Task] = {}
+        for name, (func, after, timeout) in self._steps.items():
+            # Зависимости добавлены раньше - их задачи уже созданы
+            dependencies = {dependency: tasks[dependency] for dependency in after}
+            tasks[name] = asyncio.create_task(self._run_step(name, func, dependencies, timeout), name=name)
+
+        pending = set(tasks.values())
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_EXCEPTION)
+                for task in done:
+                    if not task.cancelled() and task.exception() is not None:
+                        raise task.exception()
+        finally:
+            # Ошибка шага или отмена запроса - остальные шаги отменяются
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        return {name: task.result() for name, task in tasks.items()}
+
+    @staticmethod
+    async def _run_step(
+        name: str,
+        func: Callable[..., Awaitable[Any]],
+        dependencies: Dict[str, asyncio.Task],
+        timeout: Optional[float]
+    ) -> Any:
+        kwargs = {}
+        for dependency, task in dependencies.items():
+            # Упавшая зависимость отменит этот шаг из run()
+            kwargs[dependency] = await asyncio.shield(task)
+
+        result = func(**kwargs)
+        if not inspect.isawaitable(result):
+            return result
+        try:
+            return await asyncio.wait_for(result, timeout)
+        except asyncio.TimeoutError as e:
+            if isinstance(e, StepTimeoutError):
+                raise
+            raise StepTimeoutError(name, timeout)
@@ -1,13 +1,25 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api import auth, files, projects, notification, generator
+from app.core.http_clients import http_clients
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Запуск и остановка сервиса"""
+    # Пулы соединений к внутренним сервисам (таймауты - из настроек)
+    http_clients.start()
+    yield
+    # Закрытие пулов соединений к внутренним сервисам
+    await http_clients.aclose()
 
 app = FastAPI(
     title="BFF Service",
     description="Backend for Frontend Service",
     version="1.0.0",
     docs_url="/docs",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -27,3 +39,11 @@ app.include_router(generator.router, prefix="/api/generator", tags=["generator"]
 @app.get("/")
 async def root():
     return {"message": "BFF Service is running"}
+
+@app.get("/health")
+async def health_check():
+    """Состояние BFF и пулов соединений к внутренним сервисам"""
+    return {
+        "status": "healthy",
+        "http_clients": http_clients.stats()
+    }
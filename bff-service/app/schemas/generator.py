@@ -52,9 +52,12 @@ class MappingSuggestion(BaseModel):
     data_type: Optional[str] = None
 
 class AutoMapRequest(BaseModel):
-    """Запрос автоматического маппинга"""
-    json_schema: ParsedJsonSchema
-    xsd_schema: ParsedXsdSchema
+    """Запрос автоматического маппинга (схемы - целиком и/или по handle из parse-files)"""
+    json_schema: Optional[ParsedJsonSchema] = None
+    xsd_schema: Optional[ParsedXsdSchema] = None
+    json_schema_handle: Optional[str] = None
+    xsd_schema_handle: Optional[str] = None
+    assignment: Optional[str] = None  # greedy | optimal (None - по умолчанию генератора)
 
 class AutoMapResponse(BaseModel):
     """Ответ автоматического маппинга"""
@@ -70,7 +73,8 @@ class AutoMapResponse(BaseModel):
 class GenerateTemplateRequest(BaseModel):
     """Запрос генерации VM-шаблона"""
     mappings: List[MappingSuggestion]
-    xsd_structure: ParsedXsdSchema
+    xsd_structure: Optional[ParsedXsdSchema] = None
+    xsd_structure_handle: Optional[str] = None  # xsd_schema_handle из parse-files
     include_comments: bool = True
     include_null_checks: bool = True
 
@@ -139,6 +143,9 @@ class ParseFilesResponse(BaseModel):
     success: bool
     json_schema: Optional[ParsedJsonSchema] = None
     xsd_schema: Optional[ParsedXsdSchema] = None
+    # Ссылки на результаты парсинга в кэше generator-service (для auto-map и generate-template)
+    json_schema_handle: Optional[str] = None
+    xsd_schema_handle: Optional[str] = None
     error: Optional[str] = None
 
 class GenerateAndSaveRequest(BaseModel):
@@ -148,6 +155,7 @@ class GenerateAndSaveRequest(BaseModel):
     test_data: Optional[Dict[str, Any]] = None 
     include_comments: bool = True
     include_null_checks: bool = True
+    assignment: Optional[str] = None  # greedy | optimal
 
 class GenerateAndSaveResponse(BaseModel):
     """Ответ генерации и сохранения"""
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 from enum import Enum
 
@@ -23,16 +23,21 @@ class ProjectUpdate(BaseModel):
 class ProjectResponse(BaseModel):
     id: str
     name: str
+    base_name: Optional[str] = None  # Название без суффикса "(версия N)"
+    version: int = 1
     description: Optional[str] = None
     status: str
     created_by: Optional[str] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
     total_size: int = 0
+    file_counts: Dict[str, int] = {}
 
 class ProjectListResponse(BaseModel):
     projects: List[ProjectResponse]
-    total: int
+    total: Optional[int] = None  # None при count=none
+    total_is_estimate: bool = False
+    next_cursor: Optional[str] = None  # Курсор следующей страницы (None - последняя)
 
 # ============ FIELD MAPPING SCHEMAS ============
 
@@ -2,13 +2,13 @@ import httpx
 from typing import Dict, Any, Optional
 from fastapi import HTTPException, status, UploadFile
 from app.core.config import get_settings
+from app.core.http_clients import http_clients
 
 settings = get_settings()
 
 class FilesService:
     def __init__(self):
         self.files_service_url = settings.FILES_SERVICE_URL
-        self.timeout = 30.0  # Увеличенный таймаут для загрузки файлов
 
     async def upload_file(
         self,
@@ -29,26 +29,26 @@ class FilesService:
             if uploaded_by:
                 data["uploaded_by"] = uploaded_by
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.files_service_url}/files/upload",
-                    files=files,
-                    data=data
-                )
+            client = http_clients.client("files")
+            response = await client.post(
+                f"{self.files_service_url}/files/upload",
+                files=files,
+                data=data
+            )
 
-                if response.status_code == 413:
-                    raise HTTPException(
-                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                        detail="File size exceeds maximum allowed size"
-                    )
-                elif response.status_code == 400:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail=response.json().get("detail", "Bad request")
-                    )
+            if response.status_code == 413:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail="File size exceeds maximum allowed size"
+                )
+            elif response.status_code == 400:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=response.json().get("detail", "Bad request")
+                )
 
-                response.raise_for_status()
-                return response.json()
+            response.raise_for_status()
+            return response.json()
 
         except httpx.HTTPStatusError as e:
             raise HTTPException(
@@ -71,19 +71,19 @@ class FilesService:
     async def download_file(self, file_id: str) -> bytes:
         """Скачать файл через files-service"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.files_service_url}/files/{file_id}/download"
-                )
+            client = http_clients.client("files")
+            response = await client.get(
+                f"{self.files_service_url}/files/{file_id}/download"
+            )
 
-                if response.status_code == 404:
-                    raise HTTPException(
-                        status_code=status.HTTP_404_NOT_FOUND,
-                        detail="File not found"
-                    )
+            if response.status_code == 404:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="File not found"
+                )
 
-                response.raise_for_status()
-                return response.content
+            response.raise_for_status()
+            return response.content
 
         except httpx.HTTPStatusError as e:
             raise HTTPException(
@@ -106,19 +106,19 @@ class FilesService:
     async def get_file_metadata(self, file_id: str) -> Dict[str, Any]:
         """Получить метаданные файла через files-service"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.files_service_url}/files/{file_id}"
-                )
+            client = http_clients.client("files")
+            response = await client.get(
+                f"{self.files_service_url}/files/{file_id}"
+            )
 
-                if response.status_code == 404:
-                    raise HTTPException(
-                        status_code=status.HTTP_404_NOT_FOUND,
-                        detail="File not found"
-                    )
+            if response.status_code == 404:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="File not found"
+                )
 
-                response.raise_for_status()
-                return response.json()
+            response.raise_for_status()
+            return response.json()
 
         except httpx.HTTPStatusError as e:
             raise HTTPException(
@@ -133,28 +133,28 @@ class FilesService:
         except HTTPException:
             raise
 
-    async def get_project_files(self, project_id: str) -> list:
-        """Получить все файлы проекта через files-service"""
+    async def get_project_files(self, project_id: str, include_templates: bool = True) -> list:
+        """Получить все файлы проекта через files-service (include_templates - с содержимым VM_TEMPLATE)"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.files_service_url}/files/project/{project_id}"
-                )
-                response.raise_for_status()
-                result = response.json()
-                files = result.get("files", [])
+            client = http_clients.client("files")
+            response = await client.get(
+                f"{self.files_service_url}/files/project/{project_id}"
+            )
+            response.raise_for_status()
+            result = response.json()
+            files = result.get("files", [])
 
-                # Для VM_TEMPLATE файлов загружаем содержимое
-                for file in files:
-                    if file.get("file_type") == "VM_TEMPLATE":
-                        try:
-                            file_content = await self.download_file(file["id"])
-                            file["template"] = file_content.decode('utf-8')
-                        except Exception as e:
-                            # Если не удалось загрузить содержимое, просто пропускаем
-                            file["template"] = None
+            # Для VM_TEMPLATE файлов загружаем содержимое
+            for file in files:
+                if include_templates and file.get("file_type") == "VM_TEMPLATE":
+                    try:
+                        file_content = await self.download_file(file["id"])
+                        file["template"] = file_content.decode('utf-8')
+                    except Exception as e:
+                        # Если не удалось загрузить содержимое, просто пропускаем
+                        file["template"] = None
 
-                return files
+            return files
 
         except httpx.HTTPStatusError as e:
             raise HTTPException(
@@ -170,19 +170,19 @@ class FilesService:
     async def delete_file(self, file_id: str) -> bool:
         """Удалить файл через files-service"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.delete(
-                    f"{self.files_service_url}/files/{file_id}"
-                )
+            client = http_clients.client("files")
+            response = await client.delete(
+                f"{self.files_service_url}/files/{file_id}"
+            )
 
-                if response.status_code == 404:
-                    raise HTTPException(
-                        status_code=status.HTTP_404_NOT_FOUND,
-                        detail="File not found"
-                    )
+            if response.status_code == 404:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="File not found"
+                )
 
-                response.raise_for_status()
-                return True
+            response.raise_for_status()
+            return True
 
         except httpx.HTTPStatusError as e:
             raise HTTPException(
@@ -220,26 +220,26 @@ class FilesService:
             if uploaded_by:
                 data["uploaded_by"] = uploaded_by
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.files_service_url}/files/upload",
-                    files=files,
-                    data=data
-                )
+            client = http_clients.client("files")
+            response = await client.post(
+                f"{self.files_service_url}/files/upload",
+                files=files,
+                data=data
+            )
 
-                if response.status_code == 413:
-                    raise HTTPException(
-                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                        detail="File size exceeds maximum allowed size"
-                    )
-                elif response.status_code == 400:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail=response.json().get("detail", "Bad request")
-                    )
+            if response.status_code == 413:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail="File size exceeds maximum allowed size"
+                )
+            elif response.status_code == 400:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=response.json().get("detail", "Bad request")
+                )
 
-                response.raise_for_status()
-                return response.json()
+            response.raise_for_status()
+            return response.json()
 
         except httpx.HTTPStatusError as e:
             raise HTTPException(
@@ -1,81 +1,177 @@
+import gzip
+import json
 import httpx
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from app.core.config import get_settings
+from app.core.http_clients import http_clients
+
+# Необязательные зависимости: без них тела - JSON (stdlib) и gzip
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 settings = get_settings()
 
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+def _dumps(payload: Dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
 class GeneratorClient:    
     def __init__(self):
         self.base_url = settings.GENERATOR_SERVICE_URL
-        self.timeout = 30.0
-    
-    async def parse_json_schema(self, file_content: str) -> Dict[str, Any]:
-        """Парсинг JSON-схемы"""
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                f"{self.base_url}/api/parse/json-schema",
-                json={"file_content": file_content}
-            )
-            response.raise_for_status()
-            return response.json()
-    
-    async def parse_xsd_schema(self, file_content: str) -> Dict[str, Any]:
-        """Парсинг XSD-схемы"""
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                f"{self.base_url}/api/parse/xsd-schema",
-                json={"file_content": file_content}
-            )
+        self.compress_min_bytes = settings.GENERATOR_COMPRESS_MIN_BYTES
+        self.use_msgpack = settings.GENERATOR_BODY_FORMAT == "msgpack" and msgpack is not None
+    
+    def _encode(self, payload: Dict[str, Any]) -> Tuple[bytes, Dict[str, str]]:
+        """
+        Тело запроса и заголовки
+        
+        Содержимое файлов и схемы сжимаются gzip (generator-service
+        распаковывает их в TransportMiddleware), ответы generator-service
+        сжимает по Accept-Encoding - httpx распаковывает их сам.
+        """
+        if self.use_msgpack:
+            body = msgpack.packb(payload, use_bin_type=True)
+            headers = {"Content-Type": MSGPACK_MEDIA_TYPE, "Accept": MSGPACK_MEDIA_TYPE}
+        else:
+            body = _dumps(payload)
+            headers = {"Content-Type": "application/json"}
+        
+        if self.compress_min_bytes >= 0 and len(body) >= self.compress_min_bytes:
+            body = gzip.compress(body, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+        return body, headers
+    
+    @staticmethod
+    def _decode(response: httpx.Response) -> Any:
+        if response.headers.get("content-type", "").startswith(MSGPACK_MEDIA_TYPE):
+            return msgpack.unpackb(response.content, raw=False)
+        if orjson is not None:
+            return orjson.loads(response.content)
+        return response.json()
+    
+    async def _post(self, path: str, payload: Dict[str, Any], raise_for_status: bool = True) -> httpx.Response:
+        body, headers = self._encode(payload)
+        client = http_clients.client("generator")
+        response = await client.post(f"{self.base_url}{path}", content=body, headers=headers)
+        if raise_for_status:
             response.raise_for_status()
-            return response.json()
+        return response
+    
+    async def parse_json_schema(
+        self,
+        file_content: str,
+        checksum: Optional[str] = None,
+        include_data: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Парсинг JSON-схемы (checksum из files-service - ключ кэша генератора)
+        
+        В ответе handle - ссылка на результат в кэше генератора; с
+        include_data=False схема в ответ не включается.
+        """
+        response = await self._post(
+            "/api/parse/json-schema",
+            {"file_content": file_content, "checksum": checksum, "include_data": include_data}
+        )
+        return self._decode(response)
+    
+    async def parse_xsd_schema(
+        self,
+        file_content: str,
+        checksum: Optional[str] = None,
+        include_data: bool = True
+    ) -> Dict[str, Any]:
+        """Парсинг XSD-схемы (checksum из files-service - ключ кэша генератора)"""
+        response = await self._post(
+            "/api/parse/xsd-schema",
+            {"file_content": file_content, "checksum": checksum, "include_data": include_data}
+        )
+        return self._decode(response)
+    
+    async def _post_with_handles(
+        self,
+        path: str,
+        payload: Dict[str, Any],
+        schemas: Dict[str, Optional[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        Запрос со схемами по handle
+        
+        Схемы, для которых есть handle, сначала не передаются; если
+        генератор уже вытеснил их из кэша (410), запрос повторяется со
+        схемами целиком.
+        
+        Args:
+            path: Путь API генератора
+            payload: Тело запроса с полями *_handle
+            schemas: Поле схемы -> схема (None - схемы нет у вызывающего)
+        """
+        handled = {name for name in schemas if payload.get(f"{name}_handle")}
+        first = {**payload, **{name: schema for name, schema in schemas.items() if name not in handled}}
+        response = await self._post(path, first, raise_for_status=False)
+        
+        if response.status_code == 410 and handled and all(schemas[name] is not None for name in handled):
+            response = await self._post(path, {**payload, **schemas}, raise_for_status=False)
+        
+        response.raise_for_status()
+        return self._decode(response)
     
     async def auto_map_fields(
         self, 
-        json_schema: Dict[str, Any], 
-        xsd_schema: Dict[str, Any]
+        json_schema: Optional[Dict[str, Any]] = None, 
+        xsd_schema: Optional[Dict[str, Any]] = None,
+        assignment: Optional[str] = None,
+        json_schema_handle: Optional[str] = None,
+        xsd_schema_handle: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Автоматическое сопоставление полей"""
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                f"{self.base_url}/api/mapper/auto-map",
-                json={
-                    "json_schema": json_schema,
-                    "xsd_schema": xsd_schema
-                }
-            )
-            response.raise_for_status()
-            return response.json()
+        """Автоматическое сопоставление полей (схемы - целиком и/или по handle из parse_*)"""
+        return await self._post_with_handles(
+            "/api/mapper/auto-map",
+            {
+                "assignment": assignment,
+                "json_schema_handle": json_schema_handle,
+                "xsd_schema_handle": xsd_schema_handle
+            },
+            {"json_schema": json_schema, "xsd_schema": xsd_schema}
+        )
     
     async def calculate_similarity(self, source: str, target: str) -> Dict[str, Any]:
         """Вычисление схожести двух строк"""
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                f"{self.base_url}/api/mapper/calculate-similarity",
-                json={"source": source, "target": target}
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await self._post(
+            "/api/mapper/calculate-similarity",
+            {"source": source, "target": target}
+        )
+        return self._decode(response)
     
     async def generate_template(
         self,
         mappings: list,
-        xsd_structure: Dict[str, Any],
+        xsd_structure: Optional[Dict[str, Any]] = None,
         include_comments: bool = True,
-        include_null_checks: bool = True
+        include_null_checks: bool = True,
+        xsd_structure_handle: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Генерация VM-шаблона"""
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                f"{self.base_url}/api/generate/template",
-                json={
-                    "mappings": mappings,
-                    "xsd_structure": xsd_structure,
-                    "include_comments": include_comments,
-                    "include_null_checks": include_null_checks
-                }
-            )
-            response.raise_for_status()
-            return response.json()
+        """Генерация VM-шаблона (XSD - целиком и/или по handle из parse_xsd_schema)"""
+        return await self._post_with_handles(
+            "/api/generate/template",
+            {
+                "mappings": mappings,
+                "include_comments": include_comments,
+                "include_null_checks": include_null_checks,
+                "xsd_structure_handle": xsd_structure_handle
+            },
+            {"xsd_structure": xsd_structure}
+        )
     
     async def preview_transformation(
         self,
@@ -83,16 +179,14 @@ class GeneratorClient:
         test_data: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Предпросмотр результата трансформации"""
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                f"{self.base_url}/api/generate/preview",
-                json={
-                    "template": template,
-                    "test_data": test_data
-                }
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await self._post(
+            "/api/generate/preview",
+            {
+                "template": template,
+                "test_data": test_data
+            }
+        )
+        return self._decode(response)
     
     async def validate_template(
         self,
@@ -100,16 +194,14 @@ class GeneratorClient:
         mappings: Optional[list] = None
     ) -> Dict[str, Any]:
         """Валидация VM-шаблона"""
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                f"{self.base_url}/api/validate/template",
-                json={
-                    "template": template,
-                    "mappings": mappings
-                }
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await self._post(
+            "/api/validate/template",
+            {
+                "template": template,
+                "mappings": mappings
+            }
+        )
+        return self._decode(response)
     
     async def validate_output(
         self,
@@ -117,16 +209,14 @@ class GeneratorClient:
         xsd_schema: str
     ) -> Dict[str, Any]:
         """Валидация выходного XML"""
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                f"{self.base_url}/api/validate/output",
-                json={
-                    "xml_output": xml_output,
-                    "xsd_schema": xsd_schema
-                }
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await self._post(
+            "/api/validate/output",
+            {
+                "xml_output": xml_output,
+                "xsd_schema": xsd_schema
+            }
+        )
+        return self._decode(response)
     
     async def complete_generation(
         self,
@@ -135,28 +225,88 @@ class GeneratorClient:
         test_data: Optional[Dict[str, Any]] = None,
         include_preview: bool = False,
         include_comments: bool = True,
-        include_null_checks: bool = True
+        include_null_checks: bool = True,
+        assignment: Optional[str] = None,
+        json_schema_checksum: Optional[str] = None,
+        xsd_schema_checksum: Optional[str] = None,
+        previous_mappings: Optional[list] = None,
+        previous_json_schema_checksum: Optional[str] = None,
+        previous_xsd_schema_checksum: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Полный цикл генерации"""
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                f"{self.base_url}/api/complete/generate",
-                json={
-                    "json_schema_content": json_schema_content,
-                    "xsd_schema_content": xsd_schema_content,
-                    "test_data": test_data,
-                    "include_preview": include_preview,
-                    "include_comments": include_comments,
-                    "include_null_checks": include_null_checks
-                }
-            )
-            response.raise_for_status()
-            return response.json()
+        """Полный цикл генерации (с previous_mappings - инкрементальный маппинг)"""
+        response = await self._post(
+            "/api/complete/generate",
+            {
+                "json_schema_content": json_schema_content,
+                "xsd_schema_content": xsd_schema_content,
+                "json_schema_checksum": json_schema_checksum,
+                "xsd_schema_checksum": xsd_schema_checksum,
+                "test_data": test_data,
+                "include_preview": include_preview,
+                "include_comments": include_comments,
+                "include_null_checks": include_null_checks,
+                "assignment": assignment,
+                "previous_mappings": previous_mappings,
+                "previous_json_schema_checksum": previous_json_schema_checksum,
+                "previous_xsd_schema_checksum": previous_xsd_schema_checksum
+            }
+        )
+        return self._decode(response)
+    
+    async def submit_generation_job(
+        self,
+        project_id: Optional[str] = None,
+        json_file_id: Optional[str] = None,
+        xsd_file_id: Optional[str] = None,
+        test_data_file_id: Optional[str] = None,
+        include_preview: bool = False,
+        include_comments: bool = True,
+        include_null_checks: bool = True,
+        assignment: Optional[str] = None,
+        save_to_project: bool = False,
+        uploaded_by: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Постановка фоновой генерации (прогресс - в комнату project:<project_id>)
+
+        save_to_project - маппинги и шаблон сохраняет в проект сам генератор
+        (последний этап задачи, выполняется и после продолжения задачи)
+        """
+        response = await self._post(
+            "/api/jobs/",
+            {
+                "project_id": project_id,
+                "json_file_id": json_file_id,
+                "xsd_file_id": xsd_file_id,
+                "test_data_file_id": test_data_file_id,
+                "include_preview": include_preview,
+                "include_comments": include_comments,
+                "include_null_checks": include_null_checks,
+                "assignment": assignment,
+                "save_to_project": save_to_project,
+                "uploaded_by": uploaded_by
+            }
+        )
+        return self._decode(response)
+    
+    async def get_generation_job(self, job_id: str) -> Dict[str, Any]:
+        """Состояние фоновой генерации"""
+        client = http_clients.client("generator")
+        response = await client.get(f"{self.base_url}/api/jobs/{job_id}")
+        response.raise_for_status()
+        return response.json()
+    
+    async def resume_generation_job(self, job_id: str) -> Dict[str, Any]:
+        """Продолжение фоновой генерации с первого незавершенного этапа"""
+        client = http_clients.client("generator")
+        response = await client.post(f"{self.base_url}/api/jobs/{job_id}/resume")
+        response.raise_for_status()
+        return response.json()
     
     async def health_check(self) -> Dict[str, Any]:
         """Проверка здоровья сервиса"""
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(f"{self.base_url}/health")
-            response.raise_for_status()
-            return response.json()
+        client = http_clients.client("generator")
+        response = await client.get(f"{self.base_url}/health", timeout=5.0)
+        response.raise_for_status()
+        return response.json()
 
@@ -1,14 +1,14 @@
 import httpx
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from fastapi import HTTPException, status
 from app.core.config import get_settings
+from app.core.http_clients import http_clients
 
 settings = get_settings()
 
 class ProjectsService:
     def __init__(self):
         self.projects_service_url = settings.PROJECTS_SERVICE_URL
-        self.timeout = 30.0
 
     async def create_project(
         self,
@@ -26,14 +26,14 @@ class ProjectsService:
             if created_by:
                 params["created_by"] = created_by
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.projects_service_url}/projects/",
-                    json=data,
-                    params=params
-                )
-                response.raise_for_status()
-                return response.json()
+            client = http_clients.client("projects")
+            response = await client.post(
+                f"{self.projects_service_url}/projects/",
+                json=data,
+                params=params
+            )
+            response.raise_for_status()
+            return response.json()
 
         except httpx.HTTPStatusError as e:
             raise HTTPException(
@@ -54,7 +54,9 @@ class ProjectsService:
         skip: int = 0,
         limit: int = 100,
         sort_by: Optional[str] = None,
-        sort_order: Optional[str] = None
+        sort_order: Optional[str] = None,
+        cursor: Optional[str] = None,
+        count: str = "exact"
     ) -> Dict[str, Any]:
         """Получить список проектов через projects-service"""
         try:
@@ -69,14 +71,18 @@ class ProjectsService:
                 params["sort_by"] = sort_by
             if sort_order:
                 params["sort_order"] = sort_order
-
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.projects_service_url}/projects/",
-                    params=params
-                )
-                response.raise_for_status()
-                return response.json()
+            if cursor:
+                params["cursor"] = cursor
+            if count != "exact":
+                params["count"] = count
+
+            client = http_clients.client("projects")
+            response = await client.get(
+                f"{self.projects_service_url}/projects/",
+                params=params
+            )
+            response.raise_for_status()
+            return response.json()
 
         except httpx.HTTPStatusError as e:
             raise HTTPException(
@@ -97,7 +103,9 @@ class ProjectsService:
         skip: int = 0,
         limit: int = 100,
         sort_by: Optional[str] = None,
-        sort_order: Optional[str] = None
+        sort_order: Optional[str] = None,
+        cursor: Optional[str] = None,
+        count: str = "exact"
     ) -> Dict[str, Any]:
         """Получить все проекты конкретного пользователя через projects-service"""
         try:
@@ -110,14 +118,18 @@ class ProjectsService:
                 params["sort_by"] = sort_by
             if sort_order:
                 params["sort_order"] = sort_order
-
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.projects_service_url}/projects/user/{user_email}",
-                    params=params
-                )
-                response.raise_for_status()
-                return response.json()
+            if cursor:
+                params["cursor"] = cursor
+            if count != "exact":
+                params["count"] = count
+
+            client = http_clients.client("projects")
+            response = await client.get(
+                f"{self.projects_service_url}/projects/user/{user_email}",
+                params=params
+            )
+            response.raise_for_status()
+            return response.json()
 
         except httpx.HTTPStatusError as e:
             raise HTTPException(
@@ -145,20 +157,20 @@ class ProjectsService:
                 "include_files": include_files
             }
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.projects_service_url}/projects/{project_id}",
-                    params=params
-                )
+            client = http_clients.client("projects")
+            response = await client.get(
+                f"{self.projects_service_url}/projects/{project_id}",
+                params=params
+            )
 
-                if response.status_code == 404:
-                    raise HTTPException(
-                        status_code=status.HTTP_404_NOT_FOUND,
-                        detail="Project not found"
-                    )
+            if response.status_code == 404:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Project not found"
+                )
 
-                response.raise_for_status()
-                return response.json()
+            response.raise_for_status()
+            return response.json()
 
         except httpx.HTTPStatusError as e:
             raise HTTPException(
@@ -173,6 +185,57 @@ class ProjectsService:
         except HTTPException:
             raise
 
+    async def get_project_detail(
+        self,
+        project_id: str,
+        include_mappings: bool = True,
+        include_history: bool = False,
+        if_none_match: Optional[str] = None
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Детальная информация о проекте без файлов (файлы BFF запрашивает сам)
+
+        Returns:
+            (проект, ETag); проект None - не изменился с if_none_match (304)
+        """
+        try:
+            params = {
+                "include_mappings": include_mappings,
+                "include_history": include_history,
+                "include_files": False
+            }
+            headers = {"If-None-Match": if_none_match} if if_none_match else None
+
+            client = http_clients.client("projects")
+            response = await client.get(
+                f"{self.projects_service_url}/projects/{project_id}",
+                params=params,
+                headers=headers
+            )
+
+            if response.status_code == 304:
+                return None, response.headers.get("etag")
+
+            if response.status_code == 404:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Project not found"
+                )
+
+            response.raise_for_status()
+            return response.json(), response.headers.get("etag")
+
+        except httpx.HTTPStatusError as e:
+            raise HTTPException(
+                status_code=e.response.status_code,
+                detail=f"Projects service error: {e.response.text}"
+            )
+        except httpx.RequestError as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Cannot connect to projects service: {str(e)}"
+            )
+
     async def update_project(
         self,
         project_id: str,
@@ -185,21 +248,21 @@ class ProjectsService:
             if user_id:
                 params["user_id"] = user_id
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.put(
-                    f"{self.projects_service_url}/projects/{project_id}",
-                    json=update_data,
-                    params=params
-                )
+            client = http_clients.client("projects")
+            response = await client.put(
+                f"{self.projects_service_url}/projects/{project_id}",
+                json=update_data,
+                params=params
+            )
 
-                if response.status_code == 404:
-                    raise HTTPException(
-                        status_code=status.HTTP_404_NOT_FOUND,
-                        detail="Project not found"
-                    )
+            if response.status_code == 404:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Project not found"
+                )
 
-                response.raise_for_status()
-                return response.json()
+            response.raise_for_status()
+            return response.json()
 
         except httpx.HTTPStatusError as e:
             raise HTTPException(
@@ -217,19 +280,19 @@ class ProjectsService:
     async def delete_project(self, project_id: str) -> bool:
         """Удалить проект через projects-service"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.delete(
-                    f"{self.projects_service_url}/projects/{project_id}"
-                )
+            client = http_clients.client("projects")
+            response = await client.delete(
+                f"{self.projects_service_url}/projects/{project_id}"
+            )
 
-                if response.status_code == 404:
-                    raise HTTPException(
-                        status_code=status.HTTP_404_NOT_FOUND,
-                        detail="Project not found"
-                    )
+            if response.status_code == 404:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Project not found"
+                )
 
-                response.raise_for_status()
-                return True
+            response.raise_for_status()
+            return True
 
         except httpx.HTTPStatusError as e:
             raise HTTPException(
@@ -253,14 +316,14 @@ class ProjectsService:
     ) -> Dict[str, Any]:
         """Создать маппинг поля через projects-service"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.projects_service_url}/mappings/",
-                    json=mapping_data,
-                    params={"project_id": project_id}
-                )
-                response.raise_for_status()
-                return response.json()
+            client = http_clients.client("projects")
+            response = await client.post(
+                f"{self.projects_service_url}/mappings/",
+                json=mapping_data,
+                params={"project_id": project_id}
+            )
+            response.raise_for_status()
+            return response.json()
 
         except httpx.HTTPStatusError as e:
             raise HTTPException(
@@ -280,14 +343,14 @@ class ProjectsService:
     ) -> Dict[str, Any]:
         """Массовое создание маппингов через projects-service"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.projects_service_url}/mappings/bulk",
-                    json=mappings,
-                    params={"project_id": project_id}
-                )
-                response.raise_for_status()
-                return response.json()
+            client = http_clients.client("projects")
+            response = await client.post(
+                f"{self.projects_service_url}/mappings/bulk",
+                json=mappings,
+                params={"project_id": project_id}
+            )
+            response.raise_for_status()
+            return response.json()
 
         except httpx.HTTPStatusError as e:
             raise HTTPException(
@@ -303,12 +366,12 @@ class ProjectsService:
     async def get_project_mappings(self, project_id: str) -> Dict[str, Any]:
         """Получить маппинги проекта через projects-service"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.projects_service_url}/mappings/{project_id}"
-                )
-                response.raise_for_status()
-                return response.json()
+            client = http_clients.client("projects")
+            response = await client.get(
+                f"{self.projects_service_url}/mappings/{project_id}"
+            )
+            response.raise_for_status()
+            return response.json()
 
         except httpx.HTTPStatusError as e:
             raise HTTPException(
@@ -328,20 +391,20 @@ class ProjectsService:
     ) -> Dict[str, Any]:
         """Обновить маппинг через projects-service"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.put(
-                    f"{self.projects_service_url}/mappings/{mapping_id}",
-                    json=update_data
-                )
+            client = http_clients.client("projects")
+            response = await client.put(
+                f"{self.projects_service_url}/mappings/{mapping_id}",
+                json=update_data
+            )
 
-                if response.status_code == 404:
-                    raise HTTPException(
-                        status_code=status.HTTP_404_NOT_FOUND,
-                        detail="Mapping not found"
-                    )
+            if response.status_code == 404:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Mapping not found"
+                )
 
-                response.raise_for_status()
-                return response.json()
+            response.raise_for_status()
+            return response.json()
 
         except httpx.HTTPStatusError as e:
             raise HTTPException(
@@ -359,19 +422,19 @@ class ProjectsService:
     async def delete_field_mapping(self, mapping_id: str) -> bool:
         """Удалить маппинг через projects-service"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.delete(
-                    f"{self.projects_service_url}/mappings/{mapping_id}"
-                )
+            client = http_clients.client("projects")
+            response = await client.delete(
+                f"{self.projects_service_url}/mappings/{mapping_id}"
+            )
 
-                if response.status_code == 404:
-                    raise HTTPException(
-                        status_code=status.HTTP_404_NOT_FOUND,
-                        detail="Mapping not found"
-                    )
+            if response.status_code == 404:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Mapping not found"
+                )
 
-                response.raise_for_status()
-                return True
+            response.raise_for_status()
+            return True
 
         except httpx.HTTPStatusError as e:
             raise HTTPException(
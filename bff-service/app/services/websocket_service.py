@@ -1,9 +1,9 @@
-import httpx
 import jwt
 from datetime import datetime, timedelta
 from typing import Dict, Any
 from fastapi import HTTPException, status
 from app.core.config import get_settings
+from app.core.http_clients import http_clients
 
 settings = get_settings()
 
@@ -14,10 +14,10 @@ class WebSocketService:
     async def get_websocket_connections(self) -> Dict[str, Any]:
         """Получить информацию о WebSocket соединениях"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.websocket_service_url}/connections")
-                response.raise_for_status()
-                return response.json()
+            client = http_clients.client("websocket")
+            response = await client.get(f"{self.websocket_service_url}/connections")
+            response.raise_for_status()
+            return response.json()
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
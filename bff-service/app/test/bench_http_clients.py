@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный тест клиентов BFF: httpx.AsyncClient на каждый запрос vs общий пул
+
+- Локальный upstream (uvicorn в отдельном процессе) с задержкой ответа,
+  как у внутреннего сервиса
+- REQUESTS запросов с CONCURRENCY одновременных, p50/p99 и число соединений
+
+Запуск: python app/test/bench_http_clients.py
+"""
+
+import asyncio
+import multiprocessing
+import socket
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import uvicorn
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.http_clients import HttpClientRegistry
+
+REQUESTS = 1000
+CONCURRENCY = 20
+UPSTREAM_DELAY = 0.002  # Время обработки запроса upstream, с
+
+# Адреса клиентов (host, port) в процессе upstream: каждое TCP соединение - свой порт
+client_addresses = set()
+
+
+async def upstream(scope, receive, send):
+    """
+    Минимальный сервис: JSON ответ после задержки
+
+    GET /connections - число соединений с прошлого запроса /connections.
+    """
+    if scope["path"] == "/connections":
+        body = str(len(client_addresses)).encode()
+        client_addresses.clear()
+    else:
+        client_addresses.add(tuple(scope["client"]))
+        await asyncio.sleep(UPSTREAM_DELAY)
+        body = b'{"ok": true}'
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": body})
+
+
+def serve(port: int):
+    uvicorn.run(upstream, host="127.0.0.1", port=port, log_level="error", lifespan="off")
+
+
+def start_upstream() -> tuple:
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+
+    process = multiprocessing.Process(target=serve, args=(port,), daemon=True)
+    process.start()
+    url = f"http://127.0.0.1:{port}/"
+    for _ in range(500):
+        try:
+            httpx.get(url + "connections")
+            break
+        except httpx.TransportError:
+            time.sleep(0.01)
+    return url, process
+
+
+async def connections(url: str) -> int:
+    async with httpx.AsyncClient() as client:
+        return int((await client.get(url + "connections")).text)
+
+
+async def run(label: str, url: str, request):
+    await connections(url)
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            response = await request()
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(REQUESTS)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p50 = statistics.median(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{label:<28} {REQUESTS / elapsed:8.0f} req/s   p50 {p50:6.2f} ms   p99 {p99:7.2f} ms   "
+          f"соединений: {await connections(url)}")
+
+
+async def main():
+    url, process = start_upstream()
+    print(f"{REQUESTS} запросов, {CONCURRENCY} одновременно, upstream {UPSTREAM_DELAY * 1000:.0f} мс\n")
+
+    async def per_call():
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            return await client.get(url)
+
+    registry = HttpClientRegistry(
+        timeouts={"upstream": 30.0}, max_connections=100, max_keepalive_connections=CONCURRENCY, keepalive_expiry=30.0
+    )
+    registry.start()
+
+    async def pooled():
+        return await registry.client("upstream").get(url)
+
+    await run("AsyncClient на запрос", url, per_call)
+    await run("HttpClientRegistry (пул)", url, pooled)
+    print("\nСтатистика пула:", registry.stats()["upstreams"]["upstream"])
+    await registry.aclose()
+    process.terminate()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
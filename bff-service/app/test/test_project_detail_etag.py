@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Тест проброса ETag / If-None-Match детальной информации о проекте через BFF
+"""
+
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.api import projects
+from app.api.auth import get_current_user
+from app.core.http_clients import http_clients
+
+PROJECT_ID = "6c1c0a52-2b43-4f55-9d35-6c0f3c0a8e11"
+ETAG = f'"{PROJECT_ID}-3-100-20"'
+
+PROJECT = {
+    "id": PROJECT_ID,
+    "name": "Отчет",
+    "status": "DRAFT",
+    "created_by": "user@example.com",
+    "created_at": "2026-01-01T10:00:00",
+    "mappings": [],
+    "history": []
+}
+
+FILE = {
+    "id": "f1",
+    "file_name": "template.vm",
+    "file_type": "VM_TEMPLATE",
+    "file_size": 10,
+    "mime_type": "text/plain",
+    "created_at": "2026-01-01T10:00:00"
+}
+
+
+class Upstreams:
+    """projects-service отвечает 304 на актуальный ETag; запросы записываются"""
+
+    def __init__(self):
+        self.requests = []
+
+    def projects(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match in (ETAG, f"W/{ETAG}"):
+            return httpx.Response(304, headers={"ETag": ETAG})
+        return httpx.Response(200, json=PROJECT, headers={"ETag": ETAG})
+
+    def files(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        return httpx.Response(200, json={"files": [FILE]})
+
+    def paths(self):
+        return [request.url.path for request in self.requests]
+
+
+@pytest.fixture
+def upstreams():
+    upstreams = Upstreams()
+    saved = dict(http_clients._clients)
+    http_clients._clients["projects"] = httpx.AsyncClient(transport=httpx.MockTransport(upstreams.projects))
+    http_clients._clients["files"] = httpx.AsyncClient(transport=httpx.MockTransport(upstreams.files))
+    yield upstreams
+    http_clients._clients.clear()
+    http_clients._clients.update(saved)
+
+
+@pytest.fixture
+def client(upstreams):
+    app = FastAPI()
+    app.include_router(projects.router, prefix="/api/projects")
+    app.dependency_overrides[get_current_user] = lambda: {"email": "user@example.com", "role": "USER"}
+    return TestClient(app)
+
+
+def test_etag_of_projects_service_is_returned(client, upstreams):
+    response = client.get(f"/api/projects/{PROJECT_ID}")
+
+    assert response.status_code == 200
+    assert response.headers["etag"] == ETAG
+    assert [f["id"] for f in response.json()["files"]] == ["f1"]
+    # Без If-None-Match - проект и файлы; файлы projects-service не запрашивает
+    project_request = next(r for r in upstreams.requests if r.url.path.startswith("/projects/"))
+    assert "if-none-match" not in project_request.headers
+    assert project_request.url.params["include_files"] == "false"
+    assert sorted(upstreams.paths()) == [f"/files/project/{PROJECT_ID}", f"/projects/{PROJECT_ID}"]
+
+
+@pytest.mark.parametrize("if_none_match", [ETAG, f"W/{ETAG}"])
+def test_not_modified_is_forwarded_without_files_request(client, upstreams, if_none_match):
+    response = client.get(f"/api/projects/{PROJECT_ID}", headers={"If-None-Match": if_none_match})
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == ETAG
+    assert response.content == b""
+    assert upstreams.requests[0].headers["if-none-match"] == if_none_match
+    # Проект не изменился - файлы не запрашиваются
+    assert upstreams.paths() == [f"/projects/{PROJECT_ID}"]
+
+
+def test_stale_etag_returns_project_with_files(client, upstreams):
+    response = client.get(f"/api/projects/{PROJECT_ID}", headers={"If-None-Match": '"stale"'})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] == ETAG
+    assert [f["id"] for f in response.json()["files"]] == ["f1"]
+    assert upstreams.paths() == [f"/projects/{PROJECT_ID}", f"/files/project/{PROJECT_ID}"]
@@ -1,19 +1,46 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, status, Form, Query
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, status, Form, Query, BackgroundTasks
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 from uuid import UUID, uuid4
-from typing import Optional
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
 from app.database import get_db
-from app.schemas import FileUploadResponse, FileResponse as FileResponseSchema, FileListResponse, FileType
+from app.schemas import (
+    FileUploadResponse, FileResponse as FileResponseSchema, FileListResponse, FileType,
+    ProjectSizesRequest, ProjectSizesResponse, ProjectSize
+)
 from app.services.storage import StorageService
+from app.services.projects_notifier import projects_notifier
 import app.crud as crud
 from app.models import FileType as FileTypeEnum
 
 router = APIRouter()
 storage_service = StorageService()
 
+def _project_size(by_type: Dict[FileTypeEnum, Tuple[int, int, int]]) -> ProjectSize:
+    """Размеры проекта из результата crud.get_project_sizes"""
+    template = by_type.get(FileTypeEnum.VM_TEMPLATE)
+    return ProjectSize(
+        template_size=template[2] if template else 0,
+        total_size=sum(total for _, total, _ in by_type.values()),
+        file_counts={file_type.value: count for file_type, (count, _, _) in by_type.items()}
+    )
+
+def _notify_projects(background_tasks: BackgroundTasks, db: Session, project_uuid: UUID):
+    """Отправить projects-service актуальные размеры проекта после ответа клиенту"""
+    # Время берется до подсчета: более позднее уведомление видит не более старое состояние
+    as_of = datetime.now(timezone.utc)
+    try:
+        stats = _project_size(crud.get_project_sizes(db, [project_uuid]).get(project_uuid, {}))
+    except Exception as e:
+        # Файл уже сохранен; projects-service догонит через resync
+        print(f"Error counting files of project {project_uuid}: {e}")
+        return
+    background_tasks.add_task(projects_notifier.send_file_stats, str(project_uuid), stats, as_of)
+
 @router.post("/upload", response_model=FileUploadResponse, status_code=status.HTTP_201_CREATED)
 async def upload_file(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     project_id: str = Form(...),
     file_type: str = Form(...),
@@ -56,6 +83,8 @@ async def upload_file(
             uploaded_by=uploaded_by_uuid
         )
 
+        _notify_projects(background_tasks, db, project_uuid)
+
         return FileUploadResponse(
             id=str(db_file.id),
             project_id=str(db_file.project_id),
@@ -193,9 +222,40 @@ async def get_project_files(
             detail="Invalid project_id format"
         )
 
+@router.post("/sizes", response_model=ProjectSizesResponse)
+async def get_project_sizes(
+    request: ProjectSizesRequest,
+    db: Session = Depends(get_db)
+):
+    """Размеры файлов нескольких проектов (для списков проектов) одним SQL запросом"""
+    try:
+        project_uuids = [UUID(project_id) for project_id in request.project_ids]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid project_id format"
+        )
+
+    try:
+        rows = crud.get_project_sizes(db, list(set(project_uuids)))
+
+        sizes = {
+            project_id: _project_size(rows.get(project_uuid, {}))
+            for project_id, project_uuid in zip(request.project_ids, project_uuids)
+        }
+
+        return ProjectSizesResponse(sizes=sizes)
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get project sizes: {str(e)}"
+        )
+
 @router.delete("/{file_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_file(
     file_id: str,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """Удалить файл"""
@@ -209,10 +269,14 @@ async def delete_file(
                 detail="File not found"
             )
 
+        project_uuid = db_file.project_id
+
         storage_service.delete_file(db_file.file_path)
 
         crud.delete_file(db, file_uuid)
 
+        _notify_projects(background_tasks, db, project_uuid)
+
         return None
 
     except ValueError:
@@ -15,6 +15,11 @@ class Settings(BaseSettings):
     ALLOWED_TEST_DATA_EXTENSIONS: set = {".json", ".txt"}
     ALLOWED_VM_EXTENSIONS: set = {".vm", ".txt"}
 
+    # Уведомление projects-service об изменении файлов проекта
+    # (размер и число файлов хранятся в projects; пусто - не уведомлять)
+    PROJECTS_SERVICE_URL: Optional[str] = "http://projects-service:8004"
+    PROJECTS_NOTIFY_TIMEOUT: float = 5.0
+
     class Config:
         env_file = ".env"
 
@@ -1,7 +1,8 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, func
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg
 from uuid import UUID
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from app.models import File, FileType
 from app.schemas import FileUploadResponse
 
@@ -59,6 +60,41 @@ def count_files_by_project(db: Session, project_id: UUID) -> int:
     """Подсчитать общее количество файлов проекта"""
     return db.query(File).filter(File.project_id == project_id).count()
 
+def get_project_sizes(
+    db: Session,
+    project_ids: List[UUID]
+) -> Dict[UUID, Dict[FileType, Tuple[int, int, int]]]:
+    """
+    Размеры файлов нескольких проектов одним запросом
+
+    Группировка по проекту и типу файла: количество, сумма размеров и
+    размер последнего загруженного файла типа.
+
+    Returns:
+        project_id -> тип файла -> (количество, сумма размеров, размер последнего)
+    """
+    if not project_ids:
+        return {}
+
+    latest_size = array_agg(aggregate_order_by(File.file_size, File.created_at.desc()))[1]
+    rows = db.query(
+        File.project_id,
+        File.file_type,
+        func.count(File.id),
+        func.coalesce(func.sum(File.file_size), 0),
+        latest_size
+    ).filter(
+        File.project_id.in_(project_ids)
+    ).group_by(
+        File.project_id,
+        File.file_type
+    ).all()
+
+    sizes: Dict[UUID, Dict[FileType, Tuple[int, int, int]]] = {}
+    for project_id, file_type, count, total, latest in rows:
+        sizes.setdefault(project_id, {})[file_type] = (count, int(total), latest or 0)
+    return sizes
+
 def get_file_by_project_and_type(
     db: Session,
     project_id: UUID,
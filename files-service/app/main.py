@@ -1,8 +1,10 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api import files
 from app.database import engine, Base
 from app.core.config import get_settings
+from app.services.projects_notifier import projects_notifier
 from pathlib import Path
 
 settings = get_settings()
@@ -13,12 +15,21 @@ storage_path.mkdir(parents=True, exist_ok=True)
 
 Base.metadata.create_all(bind=engine)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Запуск и остановка сервиса"""
+    # Соединения с projects-service для уведомлений о файлах (keep-alive)
+    projects_notifier.start()
+    yield
+    await projects_notifier.aclose()
+
 app = FastAPI(
     title="Files Service",
     description="File Storage and Management Service",
     version="1.0.0",
     docs_url="/docs",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    lifespan=lifespan
 )
 
 app.add_middleware(
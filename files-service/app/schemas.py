@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Dict, List, Optional
 from uuid import UUID
 from datetime import datetime
 from enum import Enum
@@ -44,3 +44,13 @@ class FileListResponse(BaseModel):
     files: list[FileResponse]
     total: int
 
+class ProjectSizesRequest(BaseModel):
+    project_ids: List[str] = Field(..., max_length=1000)
+
+class ProjectSize(BaseModel):
+    template_size: int = 0  # Размер последнего VM_TEMPLATE (total_size в списке проектов)
+    total_size: int = 0  # Сумма размеров всех файлов проекта
+    file_counts: Dict[str, int] = {}  # Тип файла -> количество
+
+class ProjectSizesResponse(BaseModel):
+    sizes: Dict[str, ProjectSize]  # project_id -> размеры (для всех запрошенных проектов)
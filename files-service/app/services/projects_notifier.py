@@ -0,0 +1,70 @@
+import httpx
+from datetime import datetime
+from typing import Optional
+from app.core.config import get_settings
+from app.schemas import ProjectSize
+
+settings = get_settings()
+
+class ProjectsNotifier:
+    """
+    Уведомления projects-service об изменении файлов проекта
+
+    После загрузки или удаления файла projects-service получает актуальные
+    размер и число файлов проекта (не дельту), поэтому повтор или потеря
+    уведомления не накапливают ошибку - следующее уведомление ее исправляет.
+    Уведомления идут через один httpx.AsyncClient (keep-alive соединения),
+    созданный при старте сервиса (lifespan в main.py).
+    """
+
+    def __init__(self):
+        self.projects_service_url = settings.PROJECTS_SERVICE_URL
+        self.timeout = settings.PROJECTS_NOTIFY_TIMEOUT
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def start(self):
+        """Создание клиента (при старте сервиса)"""
+        self._get_client()
+
+    async def aclose(self):
+        """Закрытие клиента (соединения пула закрываются)"""
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Вне lifespan (скрипты) - создается при первом уведомлении
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+        return self._client
+
+    async def send_file_stats(self, project_id: str, stats: ProjectSize, as_of: datetime) -> bool:
+        """
+        Отправить статистику файлов проекта
+
+        Args:
+            project_id: ID проекта
+            stats: Размеры и число файлов проекта
+            as_of: Момент подсчета (projects-service игнорирует более старые)
+
+        Returns:
+            True если projects-service принял статистику
+        """
+        if not self.projects_service_url:
+            return False
+
+        try:
+            response = await self._get_client().put(
+                f"{self.projects_service_url}/projects/{project_id}/file-stats",
+                json={**stats.model_dump(), "as_of": as_of.isoformat()}
+            )
+            # 404 - проект уже удален, обновлять нечего
+            if response.status_code == 404:
+                return False
+            response.raise_for_status()
+            return True
+        except Exception as e:
+            print(f"Error notifying projects-service about files of {project_id}: {e}")
+            return False
+
+projects_notifier = ProjectsNotifier()
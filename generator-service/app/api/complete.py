@@ -1,74 +1,83 @@
+from typing import Dict
 from fastapi import APIRouter, HTTPException, status
 from app.schemas import CompleteGenerationRequest, CompleteGenerationResponse
-from app.services import (
-    JsonSchemaParser, XsdSchemaParser, 
-    FieldMapper, VmTemplateGenerator, TemplateValidator
-)
+from app.services import pipeline
+from app.services.compact import expand
+from app.services.pipeline import cached_version, parse_cached, pipeline_executor
 
 router = APIRouter()
 
-# Инициализация сервисов
-json_parser = JsonSchemaParser()
-xsd_parser = XsdSchemaParser()
-field_mapper = FieldMapper()
-vm_generator = VmTemplateGenerator()
-validator = TemplateValidator()
-
 @router.post("/generate", response_model=CompleteGenerationResponse)
 async def complete_generation(request: CompleteGenerationRequest):
     """Полный цикл генерации: парсинг -> маппинг -> генерация"""
+    # Этапы выполняются в пуле (event loop не блокируется), замеры - в ответе
+    timings: Dict[str, float] = {}
     try:
-        parsed_json = json_parser.parse(request.json_schema_content)
-        parsed_xsd = xsd_parser.parse(request.xsd_schema_content)
-        mappings, _, _ = field_mapper.auto_map(parsed_json, parsed_xsd)
-        
-        template = vm_generator.generate(
-            mappings=mappings,
-            xsd_structure=parsed_xsd,
-            include_comments=request.include_comments,
-            include_null_checks=request.include_null_checks
+        parsed_json = await parse_cached(
+            "json", request.json_schema_content, request.json_schema_checksum, timings
         )
+        parsed_xsd = await parse_cached(
+            "xsd", request.xsd_schema_content, request.xsd_schema_checksum, timings
+        )
+        remap_summary = None
+        if request.previous_mappings is not None:
+            # Пересчет только изменившейся части маппинга, ручные маппинги сохраняются
+            previous_json = cached_version("json", request.previous_json_schema_checksum, parsed_json)
+            previous_xsd = cached_version("xsd", request.previous_xsd_schema_checksum, parsed_xsd)
+            mappings, _, _, remap_summary = await pipeline_executor.run(
+                "auto_map", pipeline.remap,
+                previous_json, previous_xsd, parsed_json, parsed_xsd,
+                request.previous_mappings, request.assignment,
+                timings=timings
+            )
+        else:
+            mappings, _, _ = await pipeline_executor.run(
+                "auto_map", pipeline.auto_map, parsed_json, parsed_xsd, request.assignment,
+                timings=timings
+            )
         
-        is_valid, validation_errors = validator.validate_syntax(template)
-        _, var_errors = validator.validate_variables(template, mappings)
-        
-        all_errors = validation_errors + var_errors
-        errors_only = [e for e in all_errors if e.severity == "error"]
-        warnings_only = [e for e in all_errors if e.severity == "warning"]
+        template, _ = await pipeline_executor.run(
+            "generate", pipeline.generate_template,
+            mappings, parsed_xsd, request.include_comments, request.include_null_checks,
+            timings=timings
+        )
         
-        from app.schemas import ValidateTemplateResponse
-        validation = ValidateTemplateResponse(
-            is_valid=len(errors_only) == 0,
-            errors=errors_only,
-            warnings=warnings_only
+        validation = await pipeline_executor.run(
+            "validate", pipeline.validate_template, template, mappings, timings=timings
         )
         
         preview_output = None
         if request.include_preview and request.test_data:
             try:
-                preview_output = validator.test_transformation(
-                    template=template,
-                    test_data=request.test_data
+                preview_output = await pipeline_executor.run(
+                    "preview", pipeline.preview, template, request.test_data, timings=timings
                 )
+            except HTTPException:
+                raise
             except Exception as e:
                 preview_output = f"Preview failed: {str(e)}"
         
         return CompleteGenerationResponse(
             success=True,
-            parsed_json=parsed_json,
-            parsed_xsd=parsed_xsd,
+            parsed_json=expand(parsed_json),
+            parsed_xsd=expand(parsed_xsd),
             mappings=mappings,
             template=template,
             preview_output=preview_output,
             validation=validation,
-            error=None
+            error=None,
+            timings=timings,
+            remap=remap_summary
         )
         
     except ValueError as e:
         return CompleteGenerationResponse(
             success=False,
-            error=str(e)
+            error=str(e),
+            timings=timings
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
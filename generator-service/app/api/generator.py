@@ -1,34 +1,38 @@
-from fastapi import APIRouter
+import tempfile
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
 from app.schemas import (
     GenerateTemplateRequest, GenerateTemplateResponse,
     PreviewRequest, PreviewResponse
 )
-from app.services import VmTemplateGenerator, TemplateValidator
+from app.services import pipeline
+from app.services.batch_preview import batch_preview_runner
+from app.services.pipeline import pipeline_executor, resolve_schema
 
 router = APIRouter()
 
-vm_generator = VmTemplateGenerator()
-validator = TemplateValidator()
-
 @router.post("/template", response_model=GenerateTemplateResponse)
 async def generate_template(request: GenerateTemplateRequest):
     """Генерация VM-шаблона"""
     try:
-        template = vm_generator.generate(
-            mappings=request.mappings,
-            xsd_structure=request.xsd_structure,
-            include_comments=request.include_comments,
-            include_null_checks=request.include_null_checks
+        template, line_count = await pipeline_executor.run(
+            "generate", pipeline.generate_template,
+            request.mappings,
+            resolve_schema("xsd", request.xsd_structure, request.xsd_structure_handle),
+            request.include_comments, request.include_null_checks
         )
         
-        line_count = vm_generator.count_lines(template)
-        
         return GenerateTemplateResponse(
             success=True,
             template=template,
             error=None,
             line_count=line_count
         )
+    except HTTPException:
+        raise
     except Exception as e:
         return GenerateTemplateResponse(
             success=False,
@@ -41,9 +45,8 @@ async def generate_template(request: GenerateTemplateRequest):
 async def preview_transformation(request: PreviewRequest):
     """Предпросмотр результата трансформации"""
     try:
-        output = validator.test_transformation(
-            template=request.template,
-            test_data=request.test_data
+        output = await pipeline_executor.run(
+            "preview", pipeline.preview, request.template, request.test_data
         )
         
         return PreviewResponse(
@@ -51,6 +54,8 @@ async def preview_transformation(request: PreviewRequest):
             output=output,
             error=None
         )
+    except HTTPException:
+        raise
     except Exception as e:
         return PreviewResponse(
             success=False,
@@ -58,3 +63,34 @@ async def preview_transformation(request: PreviewRequest):
             error=str(e)
         )
 
+@router.post("/preview-batch")
+async def preview_batch(request: Request):
+    """
+    Пакетный рендеринг шаблона по NDJSON записям
+    
+    Тело (application/x-ndjson): первая строка - PreviewBatchHeader
+    (template, xsd_schema, include_output), далее по JSON объекту данных
+    на строку. Ответ - NDJSON: PreviewBatchRecord на каждую запись в
+    исходном порядке и PreviewBatchSummary последней строкой.
+    """
+    # Тело буферизуется целиком до начала ответа: StreamingResponse сам
+    # читает receive() (ожидание disconnect). Крупные пакеты - на диске.
+    spool = tempfile.SpooledTemporaryFile(max_size=settings.STREAM_SPOOL_MAX_BYTES)
+    try:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        
+        header = await run_in_threadpool(batch_preview_runner.read_header, spool)
+    except ValueError as e:
+        spool.close()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception:
+        spool.close()
+        raise
+    
+    return StreamingResponse(
+        batch_preview_runner.run(header, spool),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(spool.close)
+    )
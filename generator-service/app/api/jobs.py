@@ -0,0 +1,40 @@
+from fastapi import APIRouter, HTTPException, status
+from app.schemas import GenerationJob, GenerationJobRequest, GenerationJobSubmitResponse
+from app.services.generation_jobs import generation_jobs
+
+router = APIRouter()
+
+@router.post("/", response_model=GenerationJobSubmitResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_job(request: GenerationJobRequest):
+    """
+    Постановка фоновой генерации
+
+    Прогресс по этапам публикуется в комнату websocket-service
+    (поле room), итоговое состояние - GET /api/jobs/{job_id}.
+    """
+    try:
+        job = generation_jobs.submit(request)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return GenerationJobSubmitResponse(job_id=job.job_id, status=job.status, room=job.room)
+
+@router.get("/{job_id}", response_model=GenerationJob)
+async def get_job(job_id: str):
+    """Состояние задачи и результаты завершенных этапов"""
+    job = generation_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Job {job_id} not found")
+    return job
+
+@router.post("/{job_id}/resume", response_model=GenerationJobSubmitResponse, status_code=status.HTTP_202_ACCEPTED)
+async def resume_job(job_id: str):
+    """Продолжение упавшей или прерванной задачи с первого незавершенного этапа"""
+    try:
+        job = generation_jobs.resume(job_id)
+    except KeyError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Job {job_id} not found")
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    return GenerationJobSubmitResponse(job_id=job.job_id, status=job.status, room=job.room)
@@ -1,9 +1,13 @@
+from typing import Dict
 from fastapi import APIRouter, HTTPException, status
 from app.schemas import (
     AutoMapRequest, AutoMapResponse,
+    RemapRequest, RemapResponse,
     SimilarityRequest, SimilarityResponse
 )
-from app.services import FieldMapper
+from app.services import FieldMapper, pipeline
+from app.services.field_mapper import semantic_dictionaries
+from app.services.pipeline import pipeline_executor, resolve_schema
 
 router = APIRouter()
 
@@ -12,10 +16,14 @@ field_mapper = FieldMapper()
 @router.post("/auto-map", response_model=AutoMapResponse)
 async def auto_map_fields(request: AutoMapRequest):
     """Автоматическое сопоставление полей JSON и XML. Использует алгоритмы схожести строк для нахождения соответствий"""
+    timings: Dict[str, float] = {}
     try:
-        mappings, unmapped_json, unmapped_xml = field_mapper.auto_map(
-            request.json_schema,
-            request.xsd_schema
+        mappings, unmapped_json, unmapped_xml = await pipeline_executor.run(
+            "auto_map", pipeline.auto_map,
+            resolve_schema("json", request.json_schema, request.json_schema_handle),
+            resolve_schema("xsd", request.xsd_schema, request.xsd_schema_handle),
+            request.assignment,
+            timings=timings
         )
         
         return AutoMapResponse(
@@ -24,14 +32,48 @@ async def auto_map_fields(request: AutoMapRequest):
             total_mapped=len(mappings),
             total_unmapped=len(unmapped_json) + len(unmapped_xml),
             unmapped_json_fields=unmapped_json,
-            unmapped_xml_elements=unmapped_xml
+            unmapped_xml_elements=unmapped_xml,
+            timings=timings
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to map fields: {str(e)}"
         )
 
+@router.post("/remap", response_model=RemapResponse)
+async def remap_fields(request: RemapRequest):
+    """Пересчет маппинга после изменения схем: оцениваются только затронутые поля и элементы, ручные маппинги сохраняются"""
+    timings: Dict[str, float] = {}
+    try:
+        mappings, unmapped_json, unmapped_xml, summary = await pipeline_executor.run(
+            "auto_map", pipeline.remap,
+            request.previous_json_schema, request.previous_xsd_schema,
+            request.json_schema, request.xsd_schema,
+            request.previous_mappings, request.assignment,
+            timings=timings
+        )
+        
+        return RemapResponse(
+            success=True,
+            mappings=mappings,
+            total_mapped=len(mappings),
+            total_unmapped=len(unmapped_json) + len(unmapped_xml),
+            unmapped_json_fields=unmapped_json,
+            unmapped_xml_elements=unmapped_xml,
+            timings=timings,
+            summary=summary
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to remap fields: {str(e)}"
+        )
+
 @router.post("/calculate-similarity", response_model=SimilarityResponse)
 async def calculate_similarity(request: SimilarityRequest):
     """Вычисление схожести двух строк. Полезно для ручной проверки качества маппинга"""
@@ -51,3 +93,19 @@ async def calculate_similarity(request: SimilarityRequest):
             detail=f"Failed to calculate similarity: {str(e)}"
         )
 
+@router.get("/dictionary")
+async def dictionary_stats():
+    """Версия и размер семантического словаря"""
+    return semantic_dictionaries.stats()
+
+@router.post("/dictionary/reload")
+async def reload_dictionary():
+    """Перезагрузка словаря из файлов терминов (процессы пула подхватят изменения сами при следующей проверке)"""
+    semantic_dictionaries.reload()
+    stats = semantic_dictionaries.stats()
+    if stats["last_error"]:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Failed to reload dictionary: {stats['last_error']}"
+        )
+    return stats
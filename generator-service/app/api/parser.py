@@ -1,32 +1,45 @@
+from typing import Dict
 from fastapi import APIRouter, HTTPException, status
 from app.schemas import (
     JsonSchemaParseRequest, JsonSchemaParseResponse,
-    XsdSchemaParseRequest, XsdSchemaParseResponse
+    XsdSchemaParseRequest, XsdSchemaParseResponse,
+    SchemaFileParseRequest, CacheStatsResponse
 )
-from app.services import JsonSchemaParser, XsdSchemaParser
+from app.services import pipeline
+from app.services.files_client import FilesClient
+from app.services.compact import expand
+from app.services.parse_cache import parse_cache
+from app.services.pipeline import parse_cached, parse_stored, pipeline_executor
 
 router = APIRouter()
 
-json_parser = JsonSchemaParser()
-xsd_parser = XsdSchemaParser()
+files_client = FilesClient()
 
 @router.post("/json-schema", response_model=JsonSchemaParseResponse)
 async def parse_json_schema(request: JsonSchemaParseRequest):
     """Парсинг JSON-схемы формы ЕПГУ"""
+    timings: Dict[str, float] = {}
     try:
-        parsed_schema = json_parser.parse(request.file_content)
+        handle = parse_cache.make_key("json", request.file_content, request.checksum)
+        parsed_schema = await parse_cached("json", request.file_content, timings=timings, key=handle)
         
         return JsonSchemaParseResponse(
             success=True,
-            data=parsed_schema,
-            error=None
+            data=expand(parsed_schema) if request.include_data else None,
+            handle=handle,
+            total_fields=parsed_schema.total_fields,
+            error=None,
+            timings=timings
         )
     except ValueError as e:
         return JsonSchemaParseResponse(
             success=False,
             data=None,
-            error=str(e)
+            error=str(e),
+            timings=timings
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -36,23 +49,90 @@ async def parse_json_schema(request: JsonSchemaParseRequest):
 @router.post("/xsd-schema", response_model=XsdSchemaParseResponse)
 async def parse_xsd_schema(request: XsdSchemaParseRequest):
     """Парсинг XSD-схемы ведомственной системы"""
+    timings: Dict[str, float] = {}
     try:
-        parsed_schema = xsd_parser.parse(request.file_content)
+        if request.includes:
+            # Результат зависит от подключаемых схем - мимо кэша (и без handle)
+            handle = None
+            parsed_schema = await pipeline_executor.run(
+                "parse_xsd", pipeline.parse_xsd, request.file_content, request.includes,
+                timings=timings
+            )
+        else:
+            handle = parse_cache.make_key("xsd", request.file_content, request.checksum)
+            parsed_schema = await parse_cached("xsd", request.file_content, timings=timings, key=handle)
         
         return XsdSchemaParseResponse(
             success=True,
-            data=parsed_schema,
-            error=None
+            data=expand(parsed_schema) if request.include_data or handle is None else None,
+            handle=handle,
+            total_elements=parsed_schema.total_elements,
+            error=None,
+            timings=timings
         )
     except ValueError as e:
         return XsdSchemaParseResponse(
             success=False,
             data=None,
-            error=str(e)
+            error=str(e),
+            timings=timings
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to parse XSD schema: {str(e)}"
         )
 
+
+@router.post("/json-schema/file", response_model=JsonSchemaParseResponse)
+async def parse_json_schema_file(request: SchemaFileParseRequest):
+    """Потоковый парсинг JSON-схемы, сохраненной в files-service"""
+    try:
+        parsed_schema, handle = await parse_stored("json", request.file_id, files_client)
+        return JsonSchemaParseResponse(
+            success=True,
+            data=expand(parsed_schema) if request.include_data or handle is None else None,
+            handle=handle,
+            total_fields=parsed_schema.total_fields,
+            error=None
+        )
+    except ValueError as e:
+        return JsonSchemaParseResponse(success=False, data=None, error=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to parse JSON schema: {str(e)}"
+        )
+
+
+@router.post("/xsd-schema/file", response_model=XsdSchemaParseResponse)
+async def parse_xsd_schema_file(request: SchemaFileParseRequest):
+    """Потоковый парсинг XSD-схемы, сохраненной в files-service"""
+    try:
+        parsed_schema, handle = await parse_stored("xsd", request.file_id, files_client)
+        return XsdSchemaParseResponse(
+            success=True,
+            data=expand(parsed_schema) if request.include_data or handle is None else None,
+            handle=handle,
+            total_elements=parsed_schema.total_elements,
+            error=None
+        )
+    except ValueError as e:
+        return XsdSchemaParseResponse(success=False, data=None, error=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to parse XSD schema: {str(e)}"
+        )
+
+
+@router.get("/cache/stats", response_model=CacheStatsResponse)
+async def parse_cache_stats():
+    """Статистика кэша результатов парсинга (hit/miss, вытеснения, размер)"""
+    return CacheStatsResponse(**parse_cache.stats())
@@ -1,48 +1,30 @@
 from fastapi import APIRouter, HTTPException, status
+from lxml import etree
+from starlette.concurrency import run_in_threadpool
 from app.schemas import (
     ValidateTemplateRequest, ValidateTemplateResponse,
-    ValidateOutputRequest, ValidateOutputResponse
+    ValidateOutputRequest, ValidateOutputResponse,
+    ValidateOutputFileRequest, ValidationError, CacheStatsResponse
 )
-from app.services import TemplateValidator
+from app.services import TemplateValidator, pipeline
+from app.services.files_client import FilesClient
+from app.services.pipeline import pipeline_executor
+from app.services.schema_cache import CompiledSchema, schema_cache
 
 router = APIRouter()
 
 validator = TemplateValidator()
+files_client = FilesClient()
 
 @router.post("/template", response_model=ValidateTemplateResponse)
 async def validate_template(request: ValidateTemplateRequest):
     """Валидация VM-шаблона"""
     try:
-        is_syntax_valid, syntax_errors = validator.validate_syntax(request.template)
-        
-        errors = []
-        warnings = []
-        
-        for error in syntax_errors:
-            if error.severity == "error":
-                errors.append(error)
-            else:
-                warnings.append(error)
-        
-        if request.mappings:
-            is_vars_valid, var_errors = validator.validate_variables(
-                request.template,
-                request.mappings
-            )
-            
-            for error in var_errors:
-                if error.severity == "error":
-                    errors.append(error)
-                else:
-                    warnings.append(error)
-        
-        is_valid = len(errors) == 0
-        
-        return ValidateTemplateResponse(
-            is_valid=is_valid,
-            errors=errors,
-            warnings=warnings
+        return await pipeline_executor.run(
+            "validate", pipeline.validate_template, request.template, request.mappings or None
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -53,7 +35,10 @@ async def validate_template(request: ValidateTemplateRequest):
 async def validate_output(request: ValidateOutputRequest):
     """Валидация выходного XML"""
     try:
-        is_valid, errors = validator.validate_output(
+        # В потоке основного процесса: скомпилированные схемы из schema_cache
+        # разделяются между запросами
+        is_valid, errors = await run_in_threadpool(
+            validator.validate_output,
             request.xml_output,
             request.xsd_schema
         )
@@ -68,3 +53,58 @@ async def validate_output(request: ValidateOutputRequest):
             detail=f"Failed to validate output: {str(e)}"
         )
 
+async def _compiled_stored_schema(file_id: str) -> CompiledSchema:
+    """
+    Скомпилированная XSD из files-service
+    
+    Сначала кэш проверяется по checksum из метаданных - при попадании
+    файл не скачивается.
+    """
+    metadata = await files_client.get_metadata(file_id)
+    checksum = metadata.get("checksum")
+    
+    if checksum:
+        cached = schema_cache.get(schema_cache.checksum_key(checksum))
+        if cached is not None:
+            return cached
+    
+    spool = await files_client.download_to_spool(file_id)
+    try:
+        return await run_in_threadpool(schema_cache.get_or_compile_stream, spool, checksum)
+    finally:
+        spool.close()
+
+@router.post("/output/file", response_model=ValidateOutputResponse)
+async def validate_output_file(request: ValidateOutputFileRequest):
+    """Валидация выходного XML по XSD из files-service (без передачи текста схемы)"""
+    try:
+        compiled = await _compiled_stored_schema(request.xsd_file_id)
+    except HTTPException:
+        raise
+    except etree.XMLSyntaxError as e:
+        return ValidateOutputResponse(is_valid=False, errors=[ValidationError(
+            line=e.lineno,
+            message=f"XML syntax error: {str(e)}",
+            severity="error"
+        )])
+    except Exception as e:
+        return ValidateOutputResponse(is_valid=False, errors=[ValidationError(
+            message=f"Validation error: {str(e)}",
+            severity="error"
+        )])
+    
+    try:
+        is_valid, errors = await run_in_threadpool(
+            validator.validate_compiled, request.xml_output, compiled
+        )
+        return ValidateOutputResponse(is_valid=is_valid, errors=errors)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to validate output: {str(e)}"
+        )
+
+@router.get("/schema-cache/stats", response_model=CacheStatsResponse)
+async def schema_cache_stats():
+    """Статистика кэша скомпилированных XSD схем"""
+    return CacheStatsResponse(**schema_cache.stats())
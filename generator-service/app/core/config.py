@@ -9,10 +9,73 @@ class Settings(BaseSettings):
     # Service URLs
     PROJECTS_SERVICE_URL: str = "http://projects-service:8000"
     FILES_SERVICE_URL: str = "http://files-service:8000"
+    WEBSOCKET_SERVICE_URL: str = "http://websocket-service:8008"
+    INTERNAL_API_TOKEN: Optional[str] = None  # X-Internal-Token для websocket-service
     
     # Mapper Configuration
     MIN_CONFIDENCE_SCORE: float = 0.5
     AUTO_MAP_THRESHOLD: float = 0.7
+    MAPPER_USE_CANDIDATE_INDEX: bool = True
+    MAPPER_CANDIDATE_TOP_K: int = 25
+    MAPPER_BATCH_SCORING: bool = True
+    MAPPER_ASSIGNMENT_MODE: str = "greedy"  # greedy | optimal
+    MAPPER_ASSIGNMENT_MAX_CELLS: int = 4_000_000
+    
+    # Векторный матчинг (хэшированные n-граммы + концепты словаря, CPU)
+    MAPPER_EMBEDDINGS: bool = False
+    MAPPER_EMBEDDING_DIM: int = 512
+    MAPPER_EMBEDDING_WEIGHT: float = 0.2  # Доля косинусной близости в итоговой оценке
+    MAPPER_EMBEDDING_CACHE_ENTRIES: int = 32  # Индексов XSD в кэше
+    
+    # Файлы терминов семантического словаря (*.json); пусто - app/data/semantic
+    SEMANTIC_DICTIONARY_DIR: Optional[str] = None
+    SEMANTIC_DICTIONARY_RELOAD_SECONDS: float = 5.0  # Период проверки изменений файлов
+    
+    # Parse Cache (результаты парсинга по хэшу содержимого)
+    PARSE_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    PARSE_CACHE_MAX_ENTRIES: int = 512
+    
+    # Транспорт: сжатие тел (gzip; zstd - если установлен zstandard) и msgpack
+    TRANSPORT_COMPRESSION: bool = True
+    TRANSPORT_COMPRESS_MIN_BYTES: int = 1024  # Меньшие ответы не сжимаются
+    TRANSPORT_MAX_BODY_BYTES: int = 256 * 1024 * 1024  # Предел тела запроса (и после распаковки)
+    TRANSPORT_GZIP_LEVEL: int = 5
+    TRANSPORT_ZSTD_LEVEL: int = 3
+    
+    # Потоковый парсинг файлов из files-service
+    FILES_SERVICE_TIMEOUT: float = 60.0
+    PROJECTS_SERVICE_TIMEOUT: float = 30.0  # Сохранение результата фоновой генерации
+    STREAM_SPOOL_MAX_BYTES: int = 8 * 1024 * 1024  # Больше - буфер на диске
+    
+    # Пулы соединений к внутренним сервисам (app/core/http_clients.py)
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 50
+    HTTP_CLIENT_MAX_KEEPALIVE: int = 10
+    HTTP_CLIENT_KEEPALIVE_EXPIRY: float = 30.0
+    
+    # Кэш скомпилированных VM-шаблонов (по SHA-256 шаблона)
+    TEMPLATE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    TEMPLATE_CACHE_MAX_ENTRIES: int = 256
+    
+    # Кэш скомпилированных XSD схем для валидации XML (по MD5 схемы)
+    SCHEMA_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    SCHEMA_CACHE_MAX_ENTRIES: int = 64
+    SCHEMA_CACHE_TTL_SECONDS: float = 3600.0
+    
+    # Пул для CPU-тяжелых этапов (парсинг, маппинг, генерация, валидация)
+    EXECUTOR_MODE: str = "process"  # process | thread
+    EXECUTOR_WORKERS: int = 4
+    EXECUTOR_MAX_QUEUE: int = 32  # Сверх workers + очереди - 503
+    
+    # Фоновые задачи генерации (/api/jobs)
+    JOBS_DIR: str = "/tmp/generator-jobs"  # Снимки задач для продолжения после рестарта
+    JOB_MAX_CONCURRENT: int = 4
+    JOB_TTL_SECONDS: float = 24 * 3600.0
+    PROGRESS_PUBLISH_TIMEOUT: float = 2.0
+    
+    # Пакетный рендеринг /api/generate/preview-batch
+    PREVIEW_BATCH_WORKERS: int = 4  # Процессов в пуле (0 - без пула, в потоке)
+    PREVIEW_BATCH_CHUNK_SIZE: int = 200  # Записей в пачке на процесс
+    PREVIEW_BATCH_MAX_IN_FLIGHT: int = 8  # Пачек в работе одновременно
     
     class Config:
         env_file = ".env"
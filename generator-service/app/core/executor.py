@@ -0,0 +1,121 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from fastapi import HTTPException, status
+
+
+def _timed(fn: Callable[..., Any], args: Tuple[Any, ...]) -> Tuple[Any, float]:
+    """Выполнение этапа в воркере с замером чистого времени (мс)"""
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+
+class PipelineExecutor:
+    """
+    Выполнение CPU-тяжелых этапов генерации вне event loop
+
+    Этапы (парсинг, маппинг, генерация, валидация) отправляются в пул
+    процессов (или потоков, mode="thread"). Одновременно принимается не
+    больше workers + max_queue этапов: сверх этого запрос сразу получает
+    503, а не копится в очереди и не держит event loop.
+
+    Функции этапов должны быть объявлены на уровне модуля, а аргументы и
+    результаты - сериализуемы pickle (для пула процессов).
+    """
+
+    def __init__(self, workers: int, max_queue: int, mode: str = "process"):
+        """
+        Args:
+            workers: Число процессов (потоков) пула
+            max_queue: Сколько этапов может ждать свободного воркера
+            mode: "process" или "thread"
+        """
+        if mode not in ("process", "thread"):
+            raise ValueError(f"Unknown executor mode: {mode}")
+
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.mode = mode
+        self._executor: Optional[Executor] = None
+
+        # Счетчики меняются только из event loop
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.max_queue
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pipeline")
+        return self._executor
+
+    async def run(
+        self,
+        stage: str,
+        fn: Callable[..., Any],
+        *args: Any,
+        timings: Optional[Dict[str, float]] = None
+    ) -> Any:
+        """
+        Выполнение этапа в пуле
+
+        Args:
+            stage: Название этапа (ключ в timings)
+            fn: Функция этапа (уровня модуля)
+            *args: Аргументы функции
+            timings: Словарь замеров: stage -> время работы, мс;
+                queue_wait - суммарное ожидание воркера и передача данных
+
+        Raises:
+            HTTPException: 503, если пул перегружен
+        """
+        if self._in_flight >= self.capacity:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Generator service is overloaded, retry later",
+                headers={"Retry-After": "1"}
+            )
+
+        loop = asyncio.get_running_loop()
+        self._in_flight += 1
+        started = time.perf_counter()
+        try:
+            result, compute_ms = await loop.run_in_executor(self._get_executor(), _timed, fn, args)
+        finally:
+            self._in_flight -= 1
+
+        self.completed += 1
+        if timings is not None:
+            wall_ms = (time.perf_counter() - started) * 1000
+            record_timing(timings, stage, compute_ms)
+            record_timing(timings, "queue_wait", max(0.0, wall_ms - compute_ms))
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def record_timing(timings: Dict[str, float], stage: str, elapsed_ms: float):
+    """Добавление замера этапа (мс, с накоплением при повторе этапа)"""
+    timings[stage] = round(timings.get(stage, 0.0) + elapsed_ms, 2)
@@ -0,0 +1,75 @@
+from typing import Dict
+import httpx
+from app.core.config import settings
+
+
+class HttpClientRegistry:
+    """
+    Общие httpx.AsyncClient для внутренних сервисов (files, projects, websocket)
+
+    Для каждого сервиса - один клиент со своим пулом соединений (keep-alive
+    вместо нового TCP соединения на каждый запрос). Клиенты создаются при
+    старте (start() в lifespan main.py) с таймаутами сервисов из настроек
+    и закрываются при остановке.
+    """
+
+    def __init__(
+        self,
+        timeouts: Dict[str, float],
+        max_connections: int,
+        max_keepalive_connections: int,
+        keepalive_expiry: float
+    ):
+        """
+        Args:
+            timeouts: Имя сервиса -> таймаут его запросов (секунды)
+            max_connections: Максимум соединений в пуле одного сервиса
+            max_keepalive_connections: Сколько простаивающих соединений держать
+            keepalive_expiry: Через сколько секунд простоя соединение закрывается
+        """
+        self.timeouts = dict(timeouts)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def start(self):
+        """Создание клиентов всех сервисов (при старте)"""
+        for name in self.timeouts:
+            self.client(name)
+
+    def client(self, name: str) -> httpx.AsyncClient:
+        """
+        Клиент сервиса
+
+        Вне lifespan (тесты, скрипты) создается при первом обращении с
+        тем же таймаутом.
+
+        Raises:
+            KeyError: Сервис не зарегистрирован
+        """
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(timeout=self.timeouts[name], limits=self.limits)
+            self._clients[name] = client
+        return client
+
+    async def aclose(self):
+        """Закрытие всех клиентов (соединения пулов закрываются)"""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+
+http_clients = HttpClientRegistry(
+    timeouts={
+        "files": settings.FILES_SERVICE_TIMEOUT,
+        "projects": settings.PROJECTS_SERVICE_TIMEOUT,
+        "websocket": settings.PROGRESS_PUBLISH_TIMEOUT
+    },
+    max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE,
+    keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY
+)
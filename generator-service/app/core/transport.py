@@ -0,0 +1,277 @@
+import gzip
+import json
+import zlib
+from io import BytesIO
+from typing import Any, List, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Необязательные зависимости: без них остаются gzip и JSON
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - зависит от окружения
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+JSON_MEDIA_TYPE = "application/json"
+
+
+def supported_encodings() -> List[str]:
+    """Доступные сжатия тела (в порядке предпочтения)"""
+    return (["zstd"] if zstandard is not None else []) + ["gzip"]
+
+
+def supported_formats() -> List[str]:
+    """Доступные кодировки тела"""
+    return [JSON_MEDIA_TYPE] + ([MSGPACK_MEDIA_TYPES[0]] if msgpack is not None else [])
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Сжатие ответа по заголовку Accept-Encoding
+
+    Берется первое поддерживаемое сервисом сжатие (zstd, gzip), которое
+    клиент не запретил через q=0.
+    """
+    if not accept_encoding:
+        return None
+
+    accepted = set()
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        params = params.replace(" ", "")
+        if params in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip().lower())
+
+    for encoding in supported_encodings():
+        if encoding in accepted or "*" in accepted:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str, gzip_level: int = 5, zstd_level: int = 3) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=zstd_level).compress(body)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def decompress(body: bytes, encoding: str, max_size: int) -> bytes:
+    """
+    Распаковка тела запроса с ограничением размера результата
+
+    Raises:
+        ValueError: Неподдерживаемое сжатие, поврежденные данные или
+            распакованное тело больше max_size
+    """
+    if encoding in ("gzip", "x-gzip"):
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            data = decompressor.decompress(body, max_size + 1)
+        except zlib.error as e:
+            raise ValueError(f"Invalid gzip body: {e}")
+        if not decompressor.eof and len(data) <= max_size:
+            raise ValueError("Invalid gzip body: unexpected end of data")
+    elif encoding == "zstd" and zstandard is not None:
+        try:
+            with zstandard.ZstdDecompressor().stream_reader(BytesIO(body)) as reader:
+                data = reader.read(max_size + 1)
+        except zstandard.ZstdError as e:
+            raise ValueError(f"Invalid zstd body: {e}")
+    else:
+        raise ValueError(f"Unsupported content encoding: {encoding}")
+
+    if len(data) > max_size:
+        raise ValueError(f"Decompressed body exceeds {max_size} bytes")
+    return data
+
+
+def json_dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def json_loads(body: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def is_msgpack(media_type: Optional[str]) -> bool:
+    return bool(media_type) and media_type.split(";")[0].strip().lower() in MSGPACK_MEDIA_TYPES
+
+
+class TransportMiddleware:
+    """
+    Сжатие и бинарная кодировка тел запросов и ответов
+
+    Запрос: тело с Content-Encoding gzip/zstd распаковывается, msgpack
+    (Content-Type application/msgpack) перекодируется в JSON - роутеры
+    и схемы ничего не знают о транспорте. Ответ: JSON перекодируется в
+    msgpack, если клиент указал его в Accept, и сжимается по
+    Accept-Encoding, если тело не меньше minimum_size. Потоковые ответы
+    (NDJSON preview-batch) и уже сжатые тела передаются как есть.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        max_body_bytes: int = 256 * 1024 * 1024,
+        gzip_level: int = 5,
+        zstd_level: int = 3
+    ):
+        """
+        Args:
+            app: ASGI приложение
+            minimum_size: Минимальный размер ответа для сжатия, байт
+            max_body_bytes: Максимальный размер тела запроса (и после распаковки)
+            gzip_level: Уровень сжатия gzip
+            zstd_level: Уровень сжатия zstd
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.max_body_bytes = max_body_bytes
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        content_encoding = headers.get("content-encoding", "").strip().lower()
+        request_msgpack = is_msgpack(headers.get("content-type"))
+
+        if content_encoding not in ("", "identity") or request_msgpack:
+            try:
+                body = await self._decode_request(receive, content_encoding, request_msgpack)
+            except ValueError as e:
+                status_code = 415 if str(e).startswith("Unsupported") else 400
+                await JSONResponse({"detail": str(e)}, status_code=status_code)(scope, receive, send)
+                return
+            scope = self._rewrite_request_scope(scope, body, request_msgpack)
+            receive = _replay(body, receive)
+
+        accept = headers.get("accept", "")
+        responder = _Responder(
+            send,
+            encoding=choose_encoding(headers.get("accept-encoding")),
+            to_msgpack=msgpack is not None and any(t in accept for t in MSGPACK_MEDIA_TYPES),
+            middleware=self
+        )
+        await self.app(scope, receive, responder.send)
+
+    async def _decode_request(self, receive: Receive, content_encoding: str, request_msgpack: bool) -> bytes:
+        body = bytearray()
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+            body.extend(message.get("body", b""))
+            more_body = message.get("more_body", False)
+            if len(body) > self.max_body_bytes:
+                raise ValueError(f"Request body exceeds {self.max_body_bytes} bytes")
+
+        data = bytes(body)
+        if content_encoding not in ("", "identity"):
+            data = decompress(data, content_encoding, self.max_body_bytes)
+
+        if request_msgpack:
+            if msgpack is None:
+                raise ValueError("Unsupported content type: msgpack is not installed")
+            try:
+                data = json_dumps(msgpack.unpackb(data, raw=False))
+            except (msgpack.UnpackException, ValueError, TypeError) as e:
+                raise ValueError(f"Invalid msgpack body: {e}")
+        return data
+
+    @staticmethod
+    def _rewrite_request_scope(scope: Scope, body: bytes, request_msgpack: bool) -> Scope:
+        skip = {b"content-encoding", b"content-length"}
+        if request_msgpack:
+            skip.add(b"content-type")
+        raw = [(k, v) for k, v in scope["headers"] if k.lower() not in skip]
+        raw.append((b"content-length", str(len(body)).encode("latin-1")))
+        if request_msgpack:
+            raw.append((b"content-type", JSON_MEDIA_TYPE.encode("latin-1")))
+        return {**scope, "headers": raw}
+
+
+def _replay(body: bytes, receive: Receive) -> Receive:
+    """receive, отдающий уже прочитанное тело (далее - исходный receive)"""
+    sent = False
+
+    async def replay() -> Message:
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return replay
+
+
+class _Responder:
+    """Перехват ответа: целое тело перекодируется и сжимается, поток - без изменений"""
+
+    def __init__(self, send: Send, encoding: Optional[str], to_msgpack: bool, middleware: TransportMiddleware):
+        self._send = send
+        self.encoding = encoding
+        self.to_msgpack = to_msgpack
+        self.middleware = middleware
+        self._start: Optional[Message] = None
+        self._passthrough = False
+
+    async def send(self, message: Message):
+        if self._passthrough:
+            await self._send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            self._start = message
+            return
+
+        if message["type"] != "http.response.body" or self._start is None:
+            await self._send(message)
+            return
+
+        start, self._start = self._start, None
+        headers = MutableHeaders(raw=start["headers"])
+        if message.get("more_body", False) or "content-encoding" in headers:
+            self._passthrough = True
+            await self._send(start)
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+
+        if self.to_msgpack and media_type == JSON_MEDIA_TYPE and body:
+            body = msgpack.packb(json_loads(body), use_bin_type=True)
+            headers["content-type"] = MSGPACK_MEDIA_TYPES[0]
+
+        if self.encoding and len(body) >= self.middleware.minimum_size:
+            body = compress(body, self.encoding, self.middleware.gzip_level, self.middleware.zstd_level)
+            headers["content-encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+
+        headers["content-length"] = str(len(body))
+        await self._send(start)
+        await self._send({"type": "http.response.body", "body": body, "more_body": False})
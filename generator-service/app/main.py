@@ -1,13 +1,37 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
+from app.core import transport
 from app.core.config import settings
-from app.api import parser, mapper, generator, validator, complete
+from app.core.http_clients import http_clients
+from app.core.transport import TransportMiddleware
+from app.api import parser, mapper, generator, validator, complete, jobs
+from app.services.batch_preview import batch_preview_runner
+from app.services.generation_jobs import generation_jobs
+from app.services.pipeline import pipeline_executor
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Запуск и остановка сервиса"""
+    # Пулы соединений к files/projects/websocket-service
+    http_clients.start()
+    yield
+    # Фоновые задачи прерываются (продолжение - POST /api/jobs/{id}/resume)
+    await generation_jobs.shutdown()
+    await http_clients.aclose()
+    # Остановка пулов процессов
+    pipeline_executor.shutdown()
+    batch_preview_runner.shutdown()
 
 # Создание FastAPI приложения
 app = FastAPI(
     title="Generator Service",
     description="VM Template Generator for EPGU-VIS Integration",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    # orjson (если установлен) сериализует крупные ответы парсинга в разы быстрее
+    default_response_class=ORJSONResponse if transport.orjson is not None else JSONResponse
 )
 
 # CORS настройки
@@ -19,12 +43,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Сжатие и msgpack тел запросов/ответов (BFF передает схемы и содержимое файлов)
+if settings.TRANSPORT_COMPRESSION:
+    app.add_middleware(
+        TransportMiddleware,
+        minimum_size=settings.TRANSPORT_COMPRESS_MIN_BYTES,
+        max_body_bytes=settings.TRANSPORT_MAX_BODY_BYTES,
+        gzip_level=settings.TRANSPORT_GZIP_LEVEL,
+        zstd_level=settings.TRANSPORT_ZSTD_LEVEL
+    )
+
 # Подключение роутеров
 app.include_router(parser.router, prefix="/api/parse", tags=["Parser"])
 app.include_router(mapper.router, prefix="/api/mapper", tags=["Mapper"])
 app.include_router(generator.router, prefix="/api/generate", tags=["Generator"])
 app.include_router(validator.router, prefix="/api/validate", tags=["Validator"])
 app.include_router(complete.router, prefix="/api/complete", tags=["Complete Flow"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["Generation Jobs"])
 
 @app.get("/")
 async def root():
@@ -46,7 +81,13 @@ async def health_check():
             "mapper": "/api/v1/mapper",
             "generate": "/api/v1/generate",
             "validate": "/api/v1/validate",
-            "complete": "/api/v1/complete"
+            "complete": "/api/v1/complete",
+            "jobs": "/api/v1/jobs"
+        },
+        "executor": pipeline_executor.stats(),
+        "transport": {
+            "encodings": transport.supported_encodings(),
+            "formats": transport.supported_formats()
         }
     }
 
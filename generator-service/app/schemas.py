@@ -20,6 +20,10 @@ class DataType(str, Enum):
     ARRAY = "array"
     OBJECT = "object"
 
+class AssignmentMode(str, Enum):
+    GREEDY = "greedy"    # Лучший элемент для каждого поля независимо
+    OPTIMAL = "optimal"  # Взаимно-однозначное назначение
+
 # ============ JSON SCHEMA PARSING ============
 
 class JsonField(BaseModel):
@@ -30,22 +34,30 @@ class JsonField(BaseModel):
     required: bool = False
     path: str  # JSONPath: $request.fieldName
     description: Optional[str] = None
+    screen: Optional[str] = None  # ЕПГУ: ID экрана, на котором находится компонент
+    group: Optional[str] = None  # ЕПГУ: ID повторяющейся группы (attrs.components)
 
 class ParsedJsonSchema(BaseModel):
     """Результат парсинга JSON-схемы"""
     fields: List[JsonField]
     total_fields: int
     schema_version: Optional[str] = None
+    orphan_components: List[str] = []  # ЕПГУ: компоненты, на которые не ссылается ни один экран
 
 class JsonSchemaParseRequest(BaseModel):
     """Запрос на парсинг JSON-схемы"""
     file_content: str  # JSON в виде строки
+    checksum: Optional[str] = None  # MD5 содержимого из files-service (ключ кэша)
+    include_data: bool = True  # False - в ответе только handle (схема остается в кэше)
     
 class JsonSchemaParseResponse(BaseModel):
     """Ответ парсинга JSON-схемы"""
     success: bool
     data: Optional[ParsedJsonSchema] = None
+    handle: Optional[str] = None  # Ключ кэша парсинга - вместо схемы в auto-map
+    total_fields: Optional[int] = None
     error: Optional[str] = None
+    timings: Dict[str, float] = {}  # Этап -> время, мс
 
 # ============ XSD SCHEMA PARSING ============
 
@@ -70,12 +82,35 @@ class ParsedXsdSchema(BaseModel):
 class XsdSchemaParseRequest(BaseModel):
     """Запрос на парсинг XSD-схемы"""
     file_content: str  # XSD в виде строки
+    checksum: Optional[str] = None  # MD5 содержимого из files-service (ключ кэша)
+    includes: Optional[Dict[str, str]] = None  # Подключаемые схемы: schemaLocation -> содержимое
+    include_data: bool = True  # False - в ответе только handle (схема остается в кэше)
 
 class XsdSchemaParseResponse(BaseModel):
     """Ответ парсинга XSD-схемы"""
     success: bool
     data: Optional[ParsedXsdSchema] = None
+    handle: Optional[str] = None  # Ключ кэша парсинга - вместо схемы в auto-map и generate
+    total_elements: Optional[int] = None
     error: Optional[str] = None
+    timings: Dict[str, float] = {}  # Этап -> время, мс
+
+class SchemaFileParseRequest(BaseModel):
+    """Запрос на потоковый парсинг файла из files-service"""
+    file_id: str
+    include_data: bool = True
+
+class CacheStatsResponse(BaseModel):
+    """Статистика кэша"""
+    entries: int
+    bytes: int
+    max_bytes: int
+    max_entries: Optional[int] = None
+    hits: int
+    misses: int
+    hit_rate: float
+    evictions: int
+    expirations: int = 0
 
 # ============ FIELD MAPPING ============
 
@@ -92,9 +127,18 @@ class MappingSuggestion(BaseModel):
     data_type: Optional[DataType] = None
 
 class AutoMapRequest(BaseModel):
-    """Запрос автоматического маппинга"""
-    json_schema: ParsedJsonSchema
-    xsd_schema: ParsedXsdSchema
+    """
+    Запрос автоматического маппинга
+
+    Схема передается целиком или ссылкой на результат парсинга (handle
+    из ответа /api/parse/*). Если по handle схемы уже нет в кэше,
+    используется переданная схема, а без нее - ответ 410.
+    """
+    json_schema: Optional[ParsedJsonSchema] = None
+    xsd_schema: Optional[ParsedXsdSchema] = None
+    json_schema_handle: Optional[str] = None
+    xsd_schema_handle: Optional[str] = None
+    assignment: Optional[AssignmentMode] = None  # None - из настроек сервиса
 
 class AutoMapResponse(BaseModel):
     """Ответ автоматического маппинга"""
@@ -104,6 +148,33 @@ class AutoMapResponse(BaseModel):
     total_unmapped: int = 0
     unmapped_json_fields: List[str] = []
     unmapped_xml_elements: List[str] = []
+    timings: Dict[str, float] = {}  # Этап -> время, мс
+
+class RemapSummary(BaseModel):
+    """Что изменилось между версиями схем и что пересчитано"""
+    added_fields: int = 0
+    changed_fields: int = 0
+    removed_fields: int = 0
+    added_elements: int = 0
+    changed_elements: int = 0
+    removed_elements: int = 0
+    rescored_fields: int = 0  # Поля, оцененные по всем элементам
+    kept_mappings: int = 0  # Автоматические маппинги, перенесенные без пересчета
+    manual_mappings: int = 0  # Сохраненные ручные маппинги
+    dropped_manual_mappings: List[str] = []  # ID полей: поле или элемент удалены из схемы
+
+class RemapRequest(BaseModel):
+    """Запрос пересчета маппинга после изменения схем"""
+    json_schema: ParsedJsonSchema
+    xsd_schema: ParsedXsdSchema
+    previous_json_schema: ParsedJsonSchema
+    previous_xsd_schema: ParsedXsdSchema
+    previous_mappings: List[MappingSuggestion]  # Включая ручные (is_auto_mapped=False)
+    assignment: Optional[AssignmentMode] = None
+
+class RemapResponse(AutoMapResponse):
+    """Ответ пересчета маппинга"""
+    summary: Optional[RemapSummary] = None
 
 class SimilarityRequest(BaseModel):
     """Запрос вычисления схожести"""
@@ -120,7 +191,8 @@ class SimilarityResponse(BaseModel):
 class GenerateTemplateRequest(BaseModel):
     """Запрос генерации VM-шаблона"""
     mappings: List[MappingSuggestion]
-    xsd_structure: ParsedXsdSchema
+    xsd_structure: Optional[ParsedXsdSchema] = None
+    xsd_structure_handle: Optional[str] = None  # Handle из /api/parse/xsd-schema (как в AutoMapRequest)
     include_comments: bool = True
     include_null_checks: bool = True
 
@@ -142,6 +214,29 @@ class PreviewResponse(BaseModel):
     output: Optional[str] = None  # Сгенерированный XML
     error: Optional[str] = None
 
+class PreviewBatchHeader(BaseModel):
+    """Первая строка NDJSON тела /preview-batch (далее - по JSON данным на строку)"""
+    template: str
+    xsd_schema: Optional[str] = None  # Если задана - каждый результат валидируется
+    include_output: bool = True  # False - только статусы (регрессионные прогоны)
+
+class PreviewBatchRecord(BaseModel):
+    """Результат рендеринга одной записи пакета"""
+    index: int  # Номер записи (с 0, без строки заголовка)
+    success: bool
+    output: Optional[str] = None
+    error: Optional[str] = None
+    is_valid: Optional[bool] = None  # None - валидация не запрашивалась
+    validation_errors: List["ValidationError"] = []
+
+class PreviewBatchSummary(BaseModel):
+    """Последняя строка ответа /preview-batch"""
+    total: int
+    rendered: int
+    failed: int
+    invalid: int
+    duration_ms: float
+
 # ============ TEMPLATE VALIDATION ============
 
 class ValidationError(BaseModel):
@@ -166,6 +261,11 @@ class ValidateOutputRequest(BaseModel):
     xml_output: str
     xsd_schema: str
 
+class ValidateOutputFileRequest(BaseModel):
+    """Запрос валидации выходного XML по XSD, сохраненной в files-service"""
+    xml_output: str
+    xsd_file_id: str
+
 class ValidateOutputResponse(BaseModel):
     """Ответ валидации выходного XML"""
     is_valid: bool
@@ -177,10 +277,18 @@ class CompleteGenerationRequest(BaseModel):
     """Полный цикл: парсинг -> маппинг -> генерация"""
     json_schema_content: str
     xsd_schema_content: str
+    json_schema_checksum: Optional[str] = None  # MD5 из files-service (ключ кэша)
+    xsd_schema_checksum: Optional[str] = None
     test_data: Optional[Dict[str, Any]] = None
     include_preview: bool = False
     include_comments: bool = True  # Добавить комментарии в шаблон
     include_null_checks: bool = True  # Добавить проверки на null
+    assignment: Optional[AssignmentMode] = None  # Режим маппинга (greedy/optimal)
+    # Инкрементальный маппинг: сохраненные маппинги проекта и MD5 предыдущих
+    # версий схем (если версия есть в кэше парсинга - пересчитываются только изменения)
+    previous_mappings: Optional[List[MappingSuggestion]] = None
+    previous_json_schema_checksum: Optional[str] = None
+    previous_xsd_schema_checksum: Optional[str] = None
 
 class CompleteGenerationResponse(BaseModel):
     """Результат полного цикла"""
@@ -192,4 +300,79 @@ class CompleteGenerationResponse(BaseModel):
     preview_output: Optional[str] = None
     validation: Optional[ValidateTemplateResponse] = None
     error: Optional[str] = None
+    timings: Dict[str, float] = {}  # Этап -> время, мс (queue_wait - ожидание пула)
+    remap: Optional[RemapSummary] = None  # Если передан previous_mappings
+
+
+# ============ GENERATION JOBS ============
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    INTERRUPTED = "interrupted"  # Сервис перезапущен во время выполнения
+
+class StageStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+
+class GenerationJobRequest(BaseModel):
+    """Запрос фоновой генерации: содержимое схем или ID файлов в files-service"""
+    project_id: Optional[str] = None  # Комната websocket-service: project:<id>
+    json_schema_content: Optional[str] = None
+    xsd_schema_content: Optional[str] = None
+    json_file_id: Optional[str] = None
+    xsd_file_id: Optional[str] = None
+    json_schema_checksum: Optional[str] = None  # MD5 из files-service (ключ кэша)
+    xsd_schema_checksum: Optional[str] = None
+    test_data: Optional[Dict[str, Any]] = None
+    test_data_file_id: Optional[str] = None
+    include_preview: bool = False
+    include_comments: bool = True
+    include_null_checks: bool = True
+    assignment: Optional[AssignmentMode] = None
+    # Этап save: маппинги и шаблон сохраняются в проект project_id
+    save_to_project: bool = False
+    uploaded_by: Optional[str] = None
+
+class JobStage(BaseModel):
+    """Состояние этапа фоновой генерации"""
+    name: str
+    status: StageStatus = StageStatus.PENDING
+    duration_ms: Optional[float] = None
+    error: Optional[str] = None
 
+class GenerationJobResult(BaseModel):
+    """Результаты завершенных этапов (сохраняются для продолжения)"""
+    parsed_json: Optional[ParsedJsonSchema] = None
+    parsed_xsd: Optional[ParsedXsdSchema] = None
+    mappings: Optional[List[MappingSuggestion]] = None
+    template: Optional[str] = None
+    validation: Optional[ValidateTemplateResponse] = None
+    preview_output: Optional[str] = None
+    # Сохраненное в проект (при продолжении этапа save не повторяется)
+    saved_mappings: Optional[int] = None
+    template_file_id: Optional[str] = None
+
+class GenerationJob(BaseModel):
+    """Фоновая задача генерации"""
+    job_id: str
+    project_id: Optional[str] = None
+    room: str  # Комната websocket-service для событий прогресса
+    status: JobStatus = JobStatus.QUEUED
+    stages: List[JobStage] = []
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    result: GenerationJobResult = GenerationJobResult()
+    timings: Dict[str, float] = {}
+
+class GenerationJobSubmitResponse(BaseModel):
+    """Ответ на постановку (или продолжение) задачи"""
+    job_id: str
+    status: JobStatus
+    room: str
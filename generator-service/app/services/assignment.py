@@ -0,0 +1,94 @@
+from typing import List, Tuple
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+
+class AssignmentSolver:
+    """
+    Взаимно-однозначное назначение JSON полей на XML элементы
+
+    Максимизирует суммарную уверенность маппинга (венгерский алгоритм,
+    scipy.optimize.linear_sum_assignment) среди пар не ниже порога.
+
+    Чтобы время было ограничено и на тысячах полей, двудольный граф пар
+    выше порога разбивается на компоненты связности, и задача решается
+    для каждой компоненты отдельно. Компоненты больше max_cells ячеек
+    решаются жадно по убыванию оценки.
+    """
+
+    def __init__(self, min_score: float, max_cells: int):
+        """
+        Args:
+            min_score: Минимальная оценка пары (MIN_CONFIDENCE_SCORE)
+            max_cells: Максимальный размер (строки x столбцы) компоненты
+                для точного решения
+        """
+        self.min_score = min_score
+        self.max_cells = max_cells
+
+    def solve(self, scores: np.ndarray) -> List[Tuple[int, int, float]]:
+        """
+        Назначение по матрице оценок
+
+        Args:
+            scores: Матрица поле x элемент с оценками от 0.0 до 1.0
+
+        Returns:
+            Список (row, col, score), каждая строка и столбец не более одного раза,
+            отсортированный по row
+        """
+        eligible = scores >= self.min_score
+        edge_rows, edge_cols = np.nonzero(eligible)
+        if not edge_rows.size:
+            return []
+
+        n_rows, n_cols = scores.shape
+
+        # Вершины графа: сначала строки, затем столбцы (со сдвигом n_rows)
+        graph = coo_matrix(
+            (np.ones(edge_rows.size, dtype=np.int8), (edge_rows, edge_cols + n_rows)),
+            shape=(n_rows + n_cols, n_rows + n_cols)
+        )
+        _, labels = connected_components(graph, directed=False)
+
+        row_labels = labels[:n_rows]
+        col_labels = labels[n_rows:]
+
+        result = []
+        for component in np.unique(row_labels[edge_rows]):
+            rows = np.flatnonzero(row_labels == component)
+            cols = np.flatnonzero(col_labels == component)
+
+            block = np.where(eligible[np.ix_(rows, cols)], scores[np.ix_(rows, cols)], 0.0)
+
+            if block.size > self.max_cells:
+                pairs = self._solve_greedy(block)
+            else:
+                pairs = zip(*linear_sum_assignment(block, maximize=True))
+
+            for r, c in pairs:
+                if block[r, c] >= self.min_score:
+                    result.append((int(rows[r]), int(cols[c]), float(block[r, c])))
+
+        result.sort()
+        return result
+
+    def _solve_greedy(self, block: np.ndarray) -> List[Tuple[int, int]]:
+        """Жадное назначение: пары по убыванию оценки, если строка и столбец свободны"""
+        edge_rows, edge_cols = np.nonzero(block >= self.min_score)
+        order = np.argsort(-block[edge_rows, edge_cols], kind="stable")
+
+        used_rows = set()
+        used_cols = set()
+        pairs = []
+        for k in order:
+            r, c = int(edge_rows[k]), int(edge_cols[k])
+            if r in used_rows or c in used_cols:
+                continue
+            used_rows.add(r)
+            used_cols.add(c)
+            pairs.append((r, c))
+
+        return pairs
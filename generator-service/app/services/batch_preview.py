@@ -0,0 +1,197 @@
+import asyncio
+import json
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import AsyncIterator, BinaryIO, Deque, Iterator, List, Optional
+from app.core.config import settings
+from app.schemas import PreviewBatchHeader, PreviewBatchRecord, PreviewBatchSummary
+from app.services.schema_cache import schema_cache
+from app.services.template_validator import TemplateValidator
+from app.services.velocity_engine import velocity_engine
+
+
+def render_chunk(
+    template: str,
+    xsd_schema: Optional[str],
+    include_output: bool,
+    lines: List[bytes],
+    start_index: int
+) -> List[PreviewBatchRecord]:
+    """
+    Рендеринг пачки записей (выполняется в процессе-воркере)
+
+    Шаблон компилируется через velocity_engine процесса и берется из его
+    кэша для следующих пачек; XSD схема - через schema_cache процесса.
+
+    Args:
+        template: VM шаблон
+        xsd_schema: XSD схема для валидации результатов (или None)
+        include_output: Возвращать ли сам XML
+        lines: Строки NDJSON (по JSON объекту на строку)
+        start_index: Номер первой записи пачки
+
+    Returns:
+        Результаты по записям в исходном порядке
+    """
+    validator = TemplateValidator()
+    compiled = velocity_engine.compile(template)
+    schema = schema_cache.get_or_compile(xsd_schema) if xsd_schema else None
+
+    records = []
+    for offset, line in enumerate(lines):
+        index = start_index + offset
+        try:
+            payload = json.loads(line)
+            if not isinstance(payload, dict):
+                raise ValueError("Payload must be a JSON object")
+            output = compiled.render(validator.build_context(payload))
+        except ValueError as e:
+            records.append(PreviewBatchRecord(index=index, success=False, error=str(e)))
+            continue
+        except Exception as e:
+            records.append(PreviewBatchRecord(
+                index=index, success=False, error=f"Template rendering failed: {str(e)}"
+            ))
+            continue
+
+        record = PreviewBatchRecord(index=index, success=True, output=output if include_output else None)
+        if schema is not None:
+            record.is_valid, record.validation_errors = validator.validate_compiled(output, schema)
+        records.append(record)
+
+    return records
+
+
+class BatchPreviewRunner:
+    """
+    Рендеринг одного VM шаблона по множеству JSON записей
+
+    Записи читаются из NDJSON (первая строка - PreviewBatchHeader),
+    режутся на пачки и рендерятся в пуле процессов. Одновременно в работе
+    не больше max_in_flight пачек: чтение входа притормаживает, пока
+    результаты не отданы клиенту. Порядок результатов совпадает со входом.
+    """
+
+    def __init__(self, workers: int, chunk_size: int, max_in_flight: int):
+        """
+        Args:
+            workers: Число процессов (0 - рендеринг в потоке, без пула)
+            chunk_size: Записей в одной пачке
+            max_in_flight: Максимум пачек в работе одновременно
+        """
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.max_in_flight = max(1, max_in_flight)
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Optional[Executor]:
+        if self.workers <= 0:
+            return None
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    @staticmethod
+    def read_header(source: BinaryIO) -> PreviewBatchHeader:
+        """
+        Заголовок пакета из первой непустой строки
+
+        Raises:
+            ValueError: Нет заголовка или он некорректен
+        """
+        for line in source:
+            if line.strip():
+                try:
+                    header = PreviewBatchHeader.model_validate_json(line)
+                except Exception as e:
+                    raise ValueError(f"Invalid batch header: {str(e)}")
+                break
+        else:
+            raise ValueError("Empty batch: header line with template is required")
+
+        # Ошибки синтаксиса шаблона и схемы - до запуска пакета
+        velocity_engine.compile(header.template)
+        if header.xsd_schema:
+            try:
+                schema_cache.get_or_compile(header.xsd_schema)
+            except Exception as e:
+                raise ValueError(f"Invalid XSD schema: {str(e)}")
+        return header
+
+    def _chunks(self, source: BinaryIO) -> Iterator[List[bytes]]:
+        chunk: List[bytes] = []
+        for line in source:
+            if not line.strip():
+                continue
+            chunk.append(line)
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    async def run(self, header: PreviewBatchHeader, source: BinaryIO) -> AsyncIterator[bytes]:
+        """
+        Строки NDJSON ответа: PreviewBatchRecord на запись и PreviewBatchSummary в конце
+
+        Args:
+            header: Заголовок пакета (read_header)
+            source: Оставшиеся строки NDJSON
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        started = time.perf_counter()
+        summary = {"total": 0, "rendered": 0, "failed": 0, "invalid": 0}
+
+        pending: Deque[asyncio.Future] = deque()
+        chunks = self._chunks(source)
+        index = 0
+
+        async def next_chunk() -> Optional[List[bytes]]:
+            # Чтение входа (возможно, с диска) - вне event loop
+            return await loop.run_in_executor(None, next, chunks, None)
+
+        def drain(records: List[PreviewBatchRecord]) -> bytes:
+            for record in records:
+                summary["total"] += 1
+                if not record.success:
+                    summary["failed"] += 1
+                else:
+                    summary["rendered"] += 1
+                    if record.is_valid is False:
+                        summary["invalid"] += 1
+            return b"".join(record.model_dump_json().encode("utf-8") + b"\n" for record in records)
+
+        while True:
+            chunk = await next_chunk()
+            if chunk is None:
+                break
+            pending.append(loop.run_in_executor(
+                executor, render_chunk,
+                header.template, header.xsd_schema, header.include_output, chunk, index
+            ))
+            index += len(chunk)
+
+            if len(pending) >= self.max_in_flight:
+                yield drain(await pending.popleft())
+
+        while pending:
+            yield drain(await pending.popleft())
+
+        summary_line = PreviewBatchSummary(
+            duration_ms=round((time.perf_counter() - started) * 1000, 1), **summary
+        )
+        yield summary_line.model_dump_json().encode("utf-8") + b"\n"
+
+
+batch_preview_runner = BatchPreviewRunner(
+    workers=settings.PREVIEW_BATCH_WORKERS,
+    chunk_size=settings.PREVIEW_BATCH_CHUNK_SIZE,
+    max_in_flight=settings.PREVIEW_BATCH_MAX_IN_FLIGHT
+)
@@ -0,0 +1,279 @@
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from rapidfuzz import process
+from rapidfuzz.distance import Indel, Levenshtein
+from app.schemas import JsonField, XmlElement
+from app.services.features import FeatureExtractor
+
+if TYPE_CHECKING:
+    from app.services.embedding_matcher import ElementVectorIndex
+
+
+class BatchSimilarityScorer:
+    """
+    Пакетный расчет схожести JSON полей и XML элементов
+
+    Каждая строка (ID, label, имя, описание) нормализуется один раз,
+    после чего метрики считаются сразу для матрицы поле x элемент:
+    Levenshtein и token sort - через rapidfuzz.process.cdist,
+    partial ratio - тем же алгоритмом, что и в fuzzywuzzy.
+
+    Результат совпадает с FieldMapper.calculate_similarity для каждой пары.
+    """
+
+    def __init__(
+        self,
+        json_fields: List[JsonField],
+        xml_elements: List[XmlElement],
+        features: FeatureExtractor,
+        label_weights: Dict[str, float],
+        id_weights: Dict[str, float],
+        embeddings: Optional[Tuple[np.ndarray, "ElementVectorIndex"]] = None,
+        embedding_weight: float = 0.0
+    ):
+        """
+        Args:
+            json_fields: JSON поля (строки матрицы)
+            xml_elements: XML элементы (столбцы матрицы)
+            features: Признаки полей и элементов из FieldMapper
+            label_weights: Веса метрик для полей с осмысленным label
+            id_weights: Веса метрик для полей без label
+            embeddings: Векторы полей и индекс векторов элементов
+                (None - векторный матчинг выключен)
+            embedding_weight: Доля косинусной близости в итоговой оценке
+        """
+        self.json_fields = json_fields
+        self.xml_elements = xml_elements
+        self.embeddings = embeddings
+        self._label_weights = label_weights
+        self._id_weights = id_weights
+        self._embedding_weight = embedding_weight
+
+        # ---- Признаки JSON полей ----
+        field_features = features.fields(json_fields)
+        self._id_lower = self._array(f.id_lower for f in field_features)
+        self._id_norm = self._array(f.id_norm for f in field_features)
+        self._id_sorted = self._array(f.id_sorted for f in field_features)
+
+        self._has_label = np.array([f.has_label for f in field_features], dtype=bool)
+        self._long_label = np.array([f.long_label for f in field_features], dtype=bool)
+        self._label_norm = self._array(f.label_norm for f in field_features)
+        self._label_sorted = self._array(f.label_sorted for f in field_features)
+
+        # ---- Признаки XML элементов ----
+        element_features = features.elements(xml_elements)
+        self._name_lower = self._array(e.name_lower for e in element_features)
+        self._name_norm = self._array(e.name_norm for e in element_features)
+        self._name_sorted = self._array(e.name_sorted for e in element_features)
+
+        self._has_desc = np.array([e.has_desc for e in element_features], dtype=bool)
+        self._desc_norm = self._array(e.desc_norm for e in element_features)
+        self._desc_sorted = self._array(e.desc_sorted for e in element_features)
+
+        # ---- Семантика: поле -> концепты, концепт -> элементы ----
+        n_concepts = len(features.semantic.concepts)
+        self._field_concepts = self._concept_matrix(field_features, n_concepts)
+        self._element_concepts = self._concept_matrix(element_features, n_concepts)
+
+    @staticmethod
+    def _concept_matrix(records, n_concepts: int) -> np.ndarray:
+        """Матрица запись x концепт (True - концепт есть у записи)"""
+        matrix = np.zeros((len(records), n_concepts), dtype=bool)
+        for i, record in enumerate(records):
+            if record.concepts:
+                matrix[i, list(record.concepts)] = True
+        return matrix
+
+    @staticmethod
+    def _array(values) -> np.ndarray:
+        """Массив строк (dtype=object, чтобы сравнения шли поэлементно)"""
+        items = list(values)
+        array = np.empty(len(items), dtype=object)
+        array[:] = items
+        return array
+
+    def score_matrix(
+        self,
+        rows: Optional[Sequence[int]] = None,
+        cols: Optional[Sequence[int]] = None
+    ) -> np.ndarray:
+        """
+        Матрица итоговых оценок схожести
+
+        Args:
+            rows: Индексы JSON полей (None - все)
+            cols: Индексы XML элементов (None - все)
+
+        Returns:
+            np.ndarray формы (len(rows), len(cols)) с оценками от 0.0 до 1.0
+        """
+        rows = np.arange(len(self.json_fields)) if rows is None else np.asarray(rows, dtype=int)
+        cols = np.arange(len(self.xml_elements)) if cols is None else np.asarray(cols, dtype=int)
+
+        shape = (len(rows), len(cols))
+        if not shape[0] or not shape[1]:
+            return np.zeros(shape)
+
+        id_norm = self._id_norm[rows]
+        name_norm = self._name_norm[cols]
+
+        # 1-3. Метрики по ID
+        levenshtein = self._ratio_matrix(id_norm, name_norm)
+        token_sort = self._token_sort_matrix(self._id_sorted[rows], self._name_sorted[cols])
+        partial = self._partial_matrix(id_norm, name_norm)
+
+        # 4. label vs имя и label vs описание
+        has_label = self._has_label[rows]
+        label_vs_name = np.zeros(shape)
+        label_vs_desc = np.zeros(shape)
+
+        label_rows = np.flatnonzero(has_label)
+        if label_rows.size:
+            label_norm = self._label_norm[rows][label_rows]
+            label_sorted = self._label_sorted[rows][label_rows]
+
+            label_vs_name[label_rows] = self._max_matrix(
+                label_norm, label_sorted, name_norm, self._name_sorted[cols]
+            )
+
+            desc_cols = np.flatnonzero(self._has_desc[cols])
+            if desc_cols.size:
+                label_vs_desc[np.ix_(label_rows, desc_cols)] = self._max_matrix(
+                    label_norm,
+                    label_sorted,
+                    self._desc_norm[cols][desc_cols],
+                    self._desc_sorted[cols][desc_cols]
+                )
+
+        # 5. Семантика
+        semantic = (
+            self._field_concepts[rows].astype(np.int32)
+            @ self._element_concepts[cols].T.astype(np.int32)
+        ) > 0
+        semantic = semantic.astype(float)
+
+        # Итоговая оценка (тот же порядок операций, что и в calculate_similarity)
+        lw = self._label_weights
+        label_score = (
+            lw['label_vs_name'] * label_vs_name +
+            lw['label_vs_desc'] * label_vs_desc +
+            lw['semantic'] * semantic +
+            lw['token_sort'] * token_sort +
+            lw['partial'] * partial +
+            lw['levenshtein'] * levenshtein
+        )
+
+        iw = self._id_weights
+        id_score = (
+            iw['levenshtein'] * levenshtein +
+            iw['token_sort'] * token_sort +
+            iw['partial'] * partial +
+            iw['label_vs_name'] * label_vs_name +
+            iw['semantic'] * semantic
+        )
+
+        scores = np.where(self._long_label[rows][:, None], label_score, id_score)
+        scores = np.minimum(scores, 1.0)
+
+        # Векторная близость - добавка к оставшемуся до 1.0 запасу
+        if self.embeddings is not None:
+            field_vectors, index = self.embeddings
+            cosine = index.similarity(field_vectors[rows], cols).astype(np.float64)
+            scores = scores + self._embedding_weight * cosine * (1.0 - scores)
+
+        # Точные совпадения имеют приоритет над взвешенной оценкой
+        scores[id_norm[:, None] == name_norm[None, :]] = 0.95
+        scores[self._id_lower[rows][:, None] == self._name_lower[cols][None, :]] = 1.0
+
+        return scores
+
+    def _max_matrix(
+        self,
+        source_norm: np.ndarray,
+        source_sorted: np.ndarray,
+        target_norm: np.ndarray,
+        target_sorted: np.ndarray
+    ) -> np.ndarray:
+        """max(Levenshtein, token sort, partial) для блока строк"""
+        return np.maximum(
+            np.maximum(
+                self._ratio_matrix(source_norm, target_norm),
+                self._token_sort_matrix(source_sorted, target_sorted)
+            ),
+            self._partial_matrix(source_norm, target_norm)
+        )
+
+    @staticmethod
+    def _ratio_matrix(source: np.ndarray, target: np.ndarray) -> np.ndarray:
+        """Levenshtein.ratio для всех пар строк"""
+        return process.cdist(
+            list(source), list(target),
+            scorer=Indel.normalized_similarity,
+            dtype=np.float64
+        )
+
+    @staticmethod
+    def _token_sort_matrix(source_sorted: np.ndarray, target_sorted: np.ndarray) -> np.ndarray:
+        """
+        fuzz.token_sort_ratio / 100 для всех пар
+
+        Строки уже обработаны и отсортированы; правила fuzzywuzzy:
+        равные строки - 100, пустая строка - 0, иначе округленный ratio.
+        """
+        ratio = process.cdist(
+            list(source_sorted), list(target_sorted),
+            scorer=Indel.normalized_similarity,
+            dtype=np.float64
+        )
+        scores = np.rint(100 * ratio)
+
+        source_empty = np.array([not s for s in source_sorted], dtype=bool)
+        target_empty = np.array([not s for s in target_sorted], dtype=bool)
+        scores[source_empty[:, None] | target_empty[None, :]] = 0
+        scores[source_sorted[:, None] == target_sorted[None, :]] = 100
+
+        return scores / 100.0
+
+    @classmethod
+    def _partial_matrix(cls, source: np.ndarray, target: np.ndarray) -> np.ndarray:
+        """fuzz.partial_ratio / 100 для всех пар"""
+        scores = np.empty((len(source), len(target)))
+        for i, a in enumerate(source):
+            row = scores[i]
+            for j, b in enumerate(target):
+                row[j] = cls._partial_ratio(a, b)
+        return scores / 100.0
+
+    @staticmethod
+    def _partial_ratio(s1: str, s2: str) -> int:
+        """
+        Повторяет fuzzywuzzy.fuzz.partial_ratio (с python-Levenshtein)
+
+        rapidfuzz.fuzz.partial_ratio ищет оптимальное выравнивание и дает
+        другие значения, поэтому используется исходная эвристика по блокам.
+        """
+        if s1 == s2:
+            return 100
+        if not s1 or not s2:
+            return 0
+
+        if len(s1) <= len(s2):
+            shorter, longer = s1, s2
+        else:
+            shorter, longer = s2, s1
+
+        # python-Levenshtein строит блоки из тех же opcodes rapidfuzz
+        blocks = Levenshtein.opcodes(shorter, longer).as_matching_blocks()
+        ratio = Indel.normalized_similarity
+        size = len(shorter)
+
+        best = 0.0
+        for block in blocks:
+            long_start = max(block.b - block.a, 0)
+            r = ratio(shorter, longer[long_start:long_start + size])
+            if r > .995:
+                return 100
+            if r > best:
+                best = r
+
+        return int(round(100 * best))
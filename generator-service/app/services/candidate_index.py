@@ -0,0 +1,166 @@
+import math
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+from app.schemas import JsonField, XmlElement
+from app.services.features import FeatureExtractor
+
+
+class CandidateIndex:
+    """
+    Индекс кандидатов XML элементов для маппинга
+
+    Строится один раз на набор XSD элементов: триграммы нормализованных
+    имен и описаний раскладываются в инвертированные списки (postings).
+    Для JSON поля индекс возвращает top-K правдоподобных элементов,
+    и точная (дорогая) оценка схожести считается только для них.
+
+    Элементы с одинаковыми именем и описанием (один тип, развернутый по
+    разным путям) получают одинаковую оценку, поэтому индексируются
+    одной группой: top-K считается по различным группам, а в кандидаты
+    попадают все элементы группы.
+    """
+
+    # Длина символьной n-граммы
+    GRAM_SIZE = 3
+
+    # Источник триграммы элемента
+    NAME = 0
+    DESCRIPTION = 1
+
+    def __init__(self, elements: List[XmlElement], features: FeatureExtractor):
+        """
+        Args:
+            elements: XML элементы, среди которых ищутся кандидаты
+            features: Признаки полей и элементов (те же, что в FieldMapper)
+        """
+        self.elements = elements
+        self._features = features
+
+        # Группы элементов с одинаковыми именем и описанием
+        self._groups: List[List[int]] = []
+
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._idf: Dict[str, float] = {}
+        self._totals: List[Tuple[float, float]] = []
+        # ID концепта словаря -> индексы групп
+        self._concept_postings: Dict[int, Set[int]] = defaultdict(set)
+        # Группы с очень короткими именами: partial ratio дает им высокую
+        # оценку почти против любого label, поэтому они всегда кандидаты
+        self._short_elements: Set[int] = set()
+
+        self._build()
+
+    def _build(self):
+        """Построение инвертированных списков по группам элементов"""
+        group_ids: Dict[Tuple[str, str], int] = {}
+        representatives: List[XmlElement] = []
+        for element_idx, element in enumerate(self.elements):
+            signature = (element.name, element.description or "")
+            group = group_ids.get(signature)
+            if group is None:
+                group = group_ids[signature] = len(self._groups)
+                self._groups.append([])
+                representatives.append(element)
+            self._groups[group].append(element_idx)
+
+        element_grams = []
+        for idx, element in enumerate(representatives):
+            features = self._features.element(element)
+            name_normalized = features.name_norm
+            desc_normalized = features.desc_norm
+
+            if len(name_normalized.replace(" ", "")) <= self.GRAM_SIZE:
+                self._short_elements.add(idx)
+
+            name_grams = self._grams(name_normalized)
+            desc_grams = self._grams(desc_normalized)
+            element_grams.append((name_grams, desc_grams))
+
+            for gram in name_grams:
+                self._postings[gram].append((idx, self.NAME))
+            for gram in desc_grams:
+                self._postings[gram].append((idx, self.DESCRIPTION))
+
+            for concept in features.concepts:
+                self._concept_postings[concept].add(idx)
+
+        total = len(representatives) or 1
+        document_frequency: Dict[str, int] = {
+            gram: len({idx for idx, _ in postings})
+            for gram, postings in self._postings.items()
+        }
+        self._idf = {
+            gram: math.log(1.0 + total / df)
+            for gram, df in document_frequency.items()
+        }
+
+        # Суммарный вес триграмм имени и описания каждого элемента
+        self._totals = [
+            (
+                sum(self._idf[g] for g in name_grams) or 1.0,
+                sum(self._idf[g] for g in desc_grams) or 1.0
+            )
+            for name_grams, desc_grams in element_grams
+        ]
+
+    def _grams(self, text: str) -> Set[str]:
+        """Символьные триграммы строки (с граничными пробелами)"""
+        if not text:
+            return set()
+        padded = f" {text} "
+        size = self.GRAM_SIZE
+        return {padded[i:i + size] for i in range(len(padded) - size + 1)}
+
+    def query_grams(self, json_field: JsonField) -> Set[str]:
+        """Триграммы JSON поля (ID + label)"""
+        features = self._features.field(json_field)
+        grams = self._grams(features.id_norm)
+        if features.has_label:
+            grams |= self._grams(features.label_norm)
+        return grams
+
+    def candidates(self, json_field: JsonField, top_k: int) -> List[int]:
+        """
+        Индексы элементов-кандидатов для JSON поля
+
+        Группы ранжируются по покрытию: доле (по IDF) триграмм имени
+        и описания элемента, встретившихся в ID или label поля. Так же
+        устроен partial ratio - короткая строка ищется внутри длинной.
+        Элементы, связанные с полем через семантический словарь, и
+        элементы с короткими именами добавляются всегда.
+
+        Args:
+            json_field: JSON поле
+            top_k: Сколько лучших по триграммам групп элементов вернуть
+
+        Returns:
+            Список индексов в self.elements (без повторов)
+        """
+        shared = defaultdict(lambda: [0.0, 0.0])
+        for gram in self.query_grams(json_field):
+            postings = self._postings.get(gram)
+            if not postings:
+                continue
+            weight = self._idf[gram]
+            for idx, source in postings:
+                shared[idx][source] += weight
+
+        scores = {
+            idx: name_weight / self._totals[idx][self.NAME]
+            + desc_weight / self._totals[idx][self.DESCRIPTION]
+            for idx, (name_weight, desc_weight) in shared.items()
+        }
+
+        ranked: List[Tuple[int, float]] = sorted(
+            scores.items(), key=lambda item: (-item[1], item[0])
+        )
+        selected = {idx for idx, _ in ranked[:top_k]}
+
+        selected |= self._short_elements
+
+        for concept in self._features.field(json_field).concepts:
+            selected |= self._concept_postings.get(concept, set())
+
+        # Сохраняем исходный порядок элементов: при равных оценках
+        # выигрывает тот же элемент, что и при полном переборе
+        return sorted(idx for group in selected for idx in self._groups[group])
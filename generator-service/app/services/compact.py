@@ -0,0 +1,304 @@
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Union
+from app.schemas import DataType, JsonField, ParsedJsonSchema, ParsedXsdSchema, XmlElement
+
+# Отсутствующее значение в столбцах-индексах и числовых столбцах
+_NONE = -1
+
+_DATA_TYPES = list(DataType)
+_DATA_TYPE_CODES = {data_type: code for code, data_type in enumerate(_DATA_TYPES)}
+
+
+class StringPool:
+    """
+    Интернирование строк: каждая уникальная строка хранится один раз
+
+    Пути XSD элементов повторяют пути родителей, имена и описания одного
+    типа повторяются по всем местам разворачивания - в столбцах таблиц
+    хранятся только индексы строк в пуле.
+    """
+
+    __slots__ = ("strings", "_index")
+
+    def __init__(self, strings: Sequence[str] = ()):
+        self.strings: List[str] = list(strings)
+        self._index: Dict[str, int] = {s: i for i, s in enumerate(self.strings)}
+
+    def add(self, value: Optional[str]) -> int:
+        """Индекс строки (-1 для None)"""
+        if value is None:
+            return _NONE
+        index = self._index.get(value)
+        if index is None:
+            index = len(self.strings)
+            self._index[value] = index
+            self.strings.append(value)
+        return index
+
+    def get(self, index: int) -> Optional[str]:
+        return None if index == _NONE else self.strings[index]
+
+    def lookup(self) -> List[Optional[str]]:
+        """Список для выборки по индексу: последний элемент (индекс -1) - None"""
+        return self.strings + [None]
+
+    def nbytes(self) -> int:
+        """Размер строк в UTF-8"""
+        return sum(len(s.encode("utf-8")) for s in self.strings)
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    # Для передачи в пул процессов достаточно списка строк
+    def __getstate__(self):
+        return self.strings
+
+    def __setstate__(self, strings):
+        self.strings = strings
+        self._index = {s: i for i, s in enumerate(strings)}
+
+
+class ElementTable:
+    """
+    Столбцовое хранение XSD элементов
+
+    Строки (имя, тип, путь, родитель, описание) - индексы в StringPool,
+    флаги и числа - компактные массивы array. XmlElement создается только
+    при выдаче наружу (API, FieldMapper). Модели создаются обычным
+    конструктором: в pydantic v2 он быстрее model_construct.
+    """
+
+    __slots__ = ("pool", "name", "type", "path", "parent", "description",
+                 "required", "min_occurs", "max_occurs")
+
+    def __init__(self, pool: Optional[StringPool] = None):
+        self.pool = pool or StringPool()
+        self.name = array("i")
+        self.type = array("i")
+        self.path = array("i")
+        self.parent = array("i")
+        self.description = array("i")
+        self.required = array("b")
+        self.min_occurs = array("i")
+        self.max_occurs = array("i")
+
+    @classmethod
+    def from_models(cls, elements: Iterable[XmlElement], pool: Optional[StringPool] = None) -> "ElementTable":
+        table = cls(pool)
+        for element in elements:
+            table.append(element)
+        return table
+
+    def append(self, element: XmlElement):
+        add = self.pool.add
+        self.name.append(add(element.name))
+        self.type.append(add(element.type))
+        self.path.append(add(element.path))
+        self.parent.append(add(element.parent))
+        self.description.append(add(element.description))
+        self.required.append(element.required)
+        self.min_occurs.append(element.min_occurs)
+        self.max_occurs.append(_NONE if element.max_occurs is None else element.max_occurs)
+
+    def __len__(self) -> int:
+        return len(self.name)
+
+    def __getitem__(self, i: int) -> XmlElement:
+        get = self.pool.get
+        max_occurs = self.max_occurs[i]
+        return XmlElement(
+            name=get(self.name[i]),
+            type=get(self.type[i]),
+            path=get(self.path[i]),
+            required=bool(self.required[i]),
+            min_occurs=self.min_occurs[i],
+            max_occurs=None if max_occurs == _NONE else max_occurs,
+            parent=get(self.parent[i]),
+            description=get(self.description[i])
+        )
+
+    def __iter__(self) -> Iterator[XmlElement]:
+        return (self[i] for i in range(len(self)))
+
+    def to_models(self) -> List[XmlElement]:
+        strings = self.pool.lookup()
+        return [
+            XmlElement(
+                name=strings[name],
+                type=strings[type_],
+                path=strings[path],
+                required=bool(required),
+                min_occurs=min_occurs,
+                max_occurs=None if max_occurs == _NONE else max_occurs,
+                parent=strings[parent],
+                description=strings[description]
+            )
+            for name, type_, path, parent, description, required, min_occurs, max_occurs in zip(
+                self.name, self.type, self.path, self.parent, self.description,
+                self.required, self.min_occurs, self.max_occurs
+            )
+        ]
+
+    def nbytes(self) -> int:
+        """Размер столбцов (без строк пула)"""
+        return sum(getattr(self, column).itemsize * len(self) for column in self.__slots__[1:])
+
+
+class FieldTable:
+    """Столбцовое хранение полей JSON схемы (как ElementTable)"""
+
+    __slots__ = ("pool", "id", "label", "type", "required", "path", "description", "screen", "group")
+
+    def __init__(self, pool: Optional[StringPool] = None):
+        self.pool = pool or StringPool()
+        self.id = array("i")
+        self.label = array("i")
+        self.type = array("b")
+        self.required = array("b")
+        self.path = array("i")
+        self.description = array("i")
+        self.screen = array("i")
+        self.group = array("i")
+
+    @classmethod
+    def from_models(cls, fields: Iterable[JsonField], pool: Optional[StringPool] = None) -> "FieldTable":
+        table = cls(pool)
+        for field in fields:
+            table.append(field)
+        return table
+
+    def append(self, field: JsonField):
+        add = self.pool.add
+        self.id.append(add(field.id))
+        self.label.append(add(field.label))
+        self.type.append(_DATA_TYPE_CODES[field.type])
+        self.required.append(field.required)
+        self.path.append(add(field.path))
+        self.description.append(add(field.description))
+        self.screen.append(add(field.screen))
+        self.group.append(add(field.group))
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    def __getitem__(self, i: int) -> JsonField:
+        get = self.pool.get
+        extra = {}
+        # Раскладка ЕПГУ передается, только если она есть (как у парсера)
+        if self.screen[i] != _NONE:
+            extra["screen"] = get(self.screen[i])
+        if self.group[i] != _NONE:
+            extra["group"] = get(self.group[i])
+        return JsonField(
+            id=get(self.id[i]),
+            label=get(self.label[i]),
+            type=_DATA_TYPES[self.type[i]],
+            required=bool(self.required[i]),
+            path=get(self.path[i]),
+            description=get(self.description[i]),
+            **extra
+        )
+
+    def __iter__(self) -> Iterator[JsonField]:
+        return (self[i] for i in range(len(self)))
+
+    def to_models(self) -> List[JsonField]:
+        return [self[i] for i in range(len(self))]
+
+    def nbytes(self) -> int:
+        return sum(getattr(self, column).itemsize * len(self) for column in self.__slots__[1:])
+
+
+class CompactJsonSchema:
+    """Компактная ParsedJsonSchema (кэш парсинга, передача между процессами)"""
+
+    __slots__ = ("fields", "schema_version", "orphan_components")
+
+    def __init__(self, fields: FieldTable, schema_version: Optional[str], orphan_components: List[str]):
+        self.fields = fields
+        self.schema_version = schema_version
+        self.orphan_components = orphan_components
+
+    @property
+    def total_fields(self) -> int:
+        return len(self.fields)
+
+    @classmethod
+    def from_parsed(cls, parsed: ParsedJsonSchema) -> "CompactJsonSchema":
+        return cls(FieldTable.from_models(parsed.fields), parsed.schema_version, list(parsed.orphan_components))
+
+    def to_parsed(self) -> ParsedJsonSchema:
+        fields = self.fields.to_models()
+        return ParsedJsonSchema(
+            fields=fields,
+            total_fields=len(fields),
+            schema_version=self.schema_version,
+            orphan_components=list(self.orphan_components)
+        )
+
+    def nbytes(self) -> int:
+        """Оценка занимаемой памяти (столбцы + строки пула)"""
+        return self.fields.nbytes() + self.fields.pool.nbytes() + sum(len(c) for c in self.orphan_components)
+
+    def __getstate__(self):
+        return self.fields, self.schema_version, self.orphan_components
+
+    def __setstate__(self, state):
+        self.fields, self.schema_version, self.orphan_components = state
+
+
+class CompactXsdSchema:
+    """Компактная ParsedXsdSchema (кэш парсинга, передача между процессами)"""
+
+    __slots__ = ("elements", "root_element", "namespace")
+
+    def __init__(self, elements: ElementTable, root_element: Optional[str], namespace: Optional[str]):
+        self.elements = elements
+        self.root_element = root_element
+        self.namespace = namespace
+
+    @property
+    def total_elements(self) -> int:
+        return len(self.elements)
+
+    @classmethod
+    def from_parsed(cls, parsed: ParsedXsdSchema) -> "CompactXsdSchema":
+        return cls(ElementTable.from_models(parsed.elements), parsed.root_element, parsed.namespace)
+
+    def to_parsed(self) -> ParsedXsdSchema:
+        elements = self.elements.to_models()
+        return ParsedXsdSchema(
+            elements=elements,
+            total_elements=len(elements),
+            root_element=self.root_element,
+            namespace=self.namespace
+        )
+
+    def nbytes(self) -> int:
+        return self.elements.nbytes() + self.elements.pool.nbytes()
+
+    def __getstate__(self):
+        return self.elements, self.root_element, self.namespace
+
+    def __setstate__(self, state):
+        self.elements, self.root_element, self.namespace = state
+
+
+ParsedSchema = Union[ParsedJsonSchema, ParsedXsdSchema]
+CompactSchema = Union[CompactJsonSchema, CompactXsdSchema]
+
+
+def compact(parsed: Union[ParsedSchema, CompactSchema]) -> CompactSchema:
+    """Компактное представление распарсенной схемы"""
+    if isinstance(parsed, ParsedJsonSchema):
+        return CompactJsonSchema.from_parsed(parsed)
+    if isinstance(parsed, ParsedXsdSchema):
+        return CompactXsdSchema.from_parsed(parsed)
+    return parsed
+
+
+def expand(schema: Union[ParsedSchema, CompactSchema]) -> ParsedSchema:
+    """Pydantic модель схемы (для API и FieldMapper)"""
+    if isinstance(schema, (CompactJsonSchema, CompactXsdSchema)):
+        return schema.to_parsed()
+    return schema
@@ -0,0 +1,186 @@
+import hashlib
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.schemas import JsonField, XmlElement
+from app.services.features import FeatureExtractor, normalize_name
+from app.services.semantic_dictionary import stem
+
+_TOKEN = re.compile(r'\w+')
+_CYRILLIC = re.compile(r'[а-яё]')
+# Разметка в label ЕПГУ (HTML теги, подстановки ${...}) - не текст поля
+_MARKUP = re.compile(r'<[^>]*>|\$\{[^}]*\}')
+
+# Транслитерация: русские заимствования ("паспорт", "адрес", "телефон")
+# получают общие n-граммы с английскими именами элементов
+_TRANSLIT = str.maketrans({
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "e",
+    "ж": "zh", "з": "z", "и": "i", "й": "i", "к": "k", "л": "l", "м": "m",
+    "н": "n", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u",
+    "ф": "f", "х": "h", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "sch", "ъ": "",
+    "ы": "y", "ь": "", "э": "e", "ю": "yu", "я": "ya",
+})
+
+
+class HashingEmbedder:
+    """
+    Векторы текста без модели: хэширование признаков в пространство dim
+
+    Признаки текста - основы слов, символьные n-граммы слов (русские
+    слова дополнительно транслитерируются) и концепты семантического
+    словаря. Концепты связывают русский label с английским именем
+    элемента ("Дата выдачи паспорта" и PassportIssueDate), n-граммы -
+    близкие написания. Индекс признака - CRC32 (одинаков во всех
+    процессах), знак - старший бит хэша. Векторы нормированы (L2).
+    """
+
+    GRAM_SIZE = 3
+
+    # Веса групп признаков
+    TOKEN_WEIGHT = 1.0
+    GRAM_WEIGHT = 0.5
+    CONCEPT_WEIGHT = 2.0
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def embed(self, parts: Iterable[Tuple[Optional[str], float]], concepts: Iterable[str]) -> np.ndarray:
+        """
+        Вектор текста
+
+        Args:
+            parts: Фрагменты текста с весами (label, описание, имя)
+            concepts: Названия концептов словаря, найденных в тексте
+        """
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for text, weight in parts:
+            if not text:
+                continue
+            text = _MARKUP.sub(' ', text)
+            for token in _TOKEN.findall(normalize_name(text)):
+                self._add(vector, "w:" + stem(token), self.TOKEN_WEIGHT * weight)
+                latin = token.translate(_TRANSLIT) if _CYRILLIC.search(token) else token
+                padded = f"#{latin}#"
+                for i in range(len(padded) - self.GRAM_SIZE + 1):
+                    self._add(vector, "g:" + padded[i:i + self.GRAM_SIZE], self.GRAM_WEIGHT * weight)
+
+        for concept in concepts:
+            self._add(vector, "c:" + concept, self.CONCEPT_WEIGHT)
+
+        norm = float(np.linalg.norm(vector))
+        if norm > 0.0:
+            vector /= norm
+        return vector
+
+    def _add(self, vector: np.ndarray, feature: str, weight: float):
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % self.dim] += weight if h & 0x80000000 else -weight
+
+
+class ElementVectorIndex:
+    """
+    Векторы XML элементов (строка матрицы на элемент) и поиск top-K по косинусу
+
+    Векторы нормированы, поэтому косинус - скалярное произведение;
+    запрос для всех полей сразу - одно матричное умножение.
+    """
+
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = vectors
+
+    def similarity(self, field_vectors: np.ndarray, cols: Optional[np.ndarray] = None) -> np.ndarray:
+        """Косинусная близость поле x элемент (отрицательные значения -> 0)"""
+        vectors = self.vectors if cols is None else self.vectors[cols]
+        return np.clip(field_vectors @ vectors.T, 0.0, 1.0)
+
+    def top_k(self, field_vectors: np.ndarray, k: int) -> np.ndarray:
+        """Индексы k ближайших элементов для каждого поля (без порядка внутри top-K)"""
+        scores = field_vectors @ self.vectors.T
+        k = min(k, scores.shape[1])
+        if k <= 0:
+            return np.zeros((scores.shape[0], 0), dtype=int)
+        return np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+
+class EmbeddingMatcher:
+    """
+    Семантический матчинг по векторам (опционально, MAPPER_EMBEDDINGS)
+
+    Векторы элементов XSD строятся один раз и кэшируются по хэшу
+    набора элементов (имена, описания) и версии словаря.
+    """
+
+    # Вес описания поля относительно label
+    FIELD_DESCRIPTION_WEIGHT = 0.5
+
+    # Верхняя оценка размера одного индекса (20к элементов x 512 x float32)
+    MAX_INDEX_BYTES = 64 * 1024 * 1024
+
+    def __init__(self, dim: int, cache_entries: int):
+        """
+        Args:
+            dim: Размерность векторов
+            cache_entries: Сколько индексов XSD держать в кэше
+        """
+        self.embedder = HashingEmbedder(dim)
+        self._indexes = LRUCache(max_bytes=cache_entries * self.MAX_INDEX_BYTES, max_entries=cache_entries)
+
+    def field_vectors(self, json_fields: List[JsonField], features: FeatureExtractor) -> np.ndarray:
+        """Матрица векторов JSON полей"""
+        vectors = np.zeros((len(json_fields), self.embedder.dim), dtype=np.float32)
+        for i, json_field in enumerate(json_fields):
+            vectors[i] = self.field_vector(json_field, features)
+        return vectors
+
+    def field_vector(self, json_field: JsonField, features: FeatureExtractor) -> np.ndarray:
+        parts = [
+            (json_field.label or json_field.id, 1.0),
+            (json_field.description, self.FIELD_DESCRIPTION_WEIGHT),
+        ]
+        return self.embedder.embed(parts, self._concept_names(features, features.field(json_field).concepts))
+
+    def element_vector(self, xml_element: XmlElement, features: FeatureExtractor) -> np.ndarray:
+        parts = [(xml_element.name, 1.0), (xml_element.description, 1.0)]
+        return self.embedder.embed(parts, self._concept_names(features, features.element(xml_element).concepts))
+
+    def element_index(self, xml_elements: List[XmlElement], features: FeatureExtractor) -> ElementVectorIndex:
+        """Индекс векторов элементов (из кэша по хэшу XSD)"""
+        key = self._elements_key(xml_elements, features)
+        index = self._indexes.get(key)
+        if index is None:
+            vectors = np.zeros((len(xml_elements), self.embedder.dim), dtype=np.float32)
+            # Одинаковые элементы (один тип по разным путям) считаются один раз
+            computed: Dict[Tuple[str, Optional[str]], np.ndarray] = {}
+            for i, xml_element in enumerate(xml_elements):
+                signature = (xml_element.name, xml_element.description)
+                if signature not in computed:
+                    computed[signature] = self.element_vector(xml_element, features)
+                vectors[i] = computed[signature]
+            index = ElementVectorIndex(vectors)
+            self._indexes.put(key, index, vectors.nbytes)
+        return index
+
+    def stats(self) -> Dict[str, object]:
+        return self._indexes.stats()
+
+    @staticmethod
+    def _concept_names(features: FeatureExtractor, concepts) -> List[str]:
+        names = features.semantic.concepts
+        return [names[c] for c in concepts]
+
+    @staticmethod
+    def _elements_key(xml_elements: List[XmlElement], features: FeatureExtractor) -> str:
+        digest = hashlib.md5(features.semantic.version.encode("utf-8"))
+        for xml_element in xml_elements:
+            digest.update(xml_element.name.encode("utf-8"))
+            digest.update(b"\x00")
+            digest.update((xml_element.description or "").encode("utf-8"))
+            digest.update(b"\x01")
+        return digest.hexdigest()
+
+
+# Векторы XSD процесса (используются, если MAPPER_EMBEDDINGS включен)
+embedding_matcher = EmbeddingMatcher(settings.MAPPER_EMBEDDING_DIM, settings.MAPPER_EMBEDDING_CACHE_ENTRIES)
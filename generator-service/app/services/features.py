@@ -0,0 +1,119 @@
+import re
+from functools import lru_cache
+from typing import TYPE_CHECKING, FrozenSet, List, NamedTuple, Optional
+from fuzzywuzzy import utils as fuzz_utils
+from app.schemas import JsonField, XmlElement
+
+if TYPE_CHECKING:
+    from app.services.semantic_dictionary import SemanticDictionary
+
+# Границы camelCase / PascalCase и разделители в именах
+_CAMEL_BOUNDARY = re.compile(r'([a-z0-9])([A-Z])')
+_SEPARATORS = re.compile(r'[-_]')
+
+
+@lru_cache(maxsize=65536)
+def normalize_name(name: str) -> str:
+    """
+    Нормализация названия для сравнения
+
+    Examples:
+        lastName -> last name
+        LastName -> last name
+        last-name -> last name
+        LAST_NAME -> last name
+    """
+    name = _CAMEL_BOUNDARY.sub(r'\1 \2', name)
+    name = _SEPARATORS.sub(' ', name)
+    return ' '.join(name.lower().split())
+
+
+def process_and_sort(value: str) -> str:
+    """Предобработка fuzz.token_sort_ratio (force_ascii + сортировка токенов)"""
+    tokens = fuzz_utils.full_process(value, force_ascii=True).split()
+    return " ".join(sorted(tokens)).strip()
+
+
+class FieldFeatures(NamedTuple):
+    """Признаки JSON поля для оценки схожести"""
+    id_lower: str
+    id_norm: str
+    id_sorted: str
+    label_norm: str  # "" - label нет
+    label_sorted: str
+    has_label: bool
+    long_label: bool  # label длиннее 3 символов - веса LABEL_WEIGHTS
+    concepts: FrozenSet[int]
+
+
+class ElementFeatures(NamedTuple):
+    """Признаки XML элемента для оценки схожести"""
+    name_lower: str
+    name_norm: str
+    name_sorted: str
+    desc_norm: str  # "" - описания нет
+    desc_sorted: str
+    has_desc: bool
+    concepts: FrozenSet[int]
+
+
+class FeatureExtractor:
+    """
+    Признаки полей и элементов, вычисляемые один раз
+
+    Нормализованные строки, отсортированные токены и концепты словаря
+    считаются при первом обращении и кэшируются по содержимому (ID и
+    label поля, имя и описание элемента): один и тот же тип XSD,
+    развернутый по разным путям, обрабатывается один раз.
+    """
+
+    def __init__(self, semantic: "SemanticDictionary", cache_size: int = 65536):
+        """
+        Args:
+            semantic: Скомпилированный словарь соответствий (кэш признаков
+                действителен только для него)
+            cache_size: Размер кэша признаков (записей каждого вида)
+        """
+        self.semantic = semantic
+        self._field = lru_cache(maxsize=cache_size)(self._build_field)
+        self._element = lru_cache(maxsize=cache_size)(self._build_element)
+
+    def field(self, json_field: JsonField) -> FieldFeatures:
+        return self._field(json_field.id, json_field.label)
+
+    def element(self, xml_element: XmlElement) -> ElementFeatures:
+        return self._element(xml_element.name, xml_element.description)
+
+    def fields(self, json_fields: List[JsonField]) -> List[FieldFeatures]:
+        return [self.field(f) for f in json_fields]
+
+    def elements(self, xml_elements: List[XmlElement]) -> List[ElementFeatures]:
+        return [self.element(e) for e in xml_elements]
+
+    def _build_field(self, field_id: str, label: Optional[str]) -> FieldFeatures:
+        id_norm = normalize_name(field_id)
+        label_norm = normalize_name(label) if label else ""
+        return FieldFeatures(
+            id_lower=field_id.lower(),
+            id_norm=id_norm,
+            id_sorted=process_and_sort(id_norm),
+            label_norm=label_norm,
+            label_sorted=process_and_sort(label_norm),
+            has_label=bool(label),
+            long_label=bool(label) and len(label) > 3,
+            concepts=self.semantic.concepts_of(label)
+        )
+
+    def _build_element(self, name: str, description: Optional[str]) -> ElementFeatures:
+        desc_norm = normalize_name(description) if description else ""
+        name_lower = name.lower()
+        name_norm = normalize_name(name)
+        return ElementFeatures(
+            name_lower=name_lower,
+            name_norm=name_norm,
+            name_sorted=process_and_sort(name_norm),
+            desc_norm=desc_norm,
+            desc_sorted=process_and_sort(desc_norm),
+            has_desc=bool(description),
+            concepts=self.semantic.concepts_of(name) | self.semantic.concepts_of(description)
+        )
@@ -1,12 +1,22 @@
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 from fuzzywuzzy import fuzz
 import Levenshtein
+import numpy as np
 import re
 from app.schemas import (
     JsonField, XmlElement, MappingSuggestion, 
-    ParsedJsonSchema, ParsedXsdSchema, DataType
+    ParsedJsonSchema, ParsedXsdSchema, DataType, AssignmentMode, RemapSummary
 )
 from app.core.config import settings
+from app.services.candidate_index import CandidateIndex
+from app.services.batch_similarity import BatchSimilarityScorer
+from app.services.embedding_matcher import EmbeddingMatcher, ElementVectorIndex, embedding_matcher
+from app.services.assignment import AssignmentSolver
+from app.services.schema_diff import diff_schemas, element_key
+from app.services.features import (
+    ElementFeatures, FeatureExtractor, FieldFeatures, normalize_name
+)
+from app.services.semantic_dictionary import SemanticDictionaryRegistry, create_registry
 
 class FieldMapper:
     """
@@ -15,14 +25,93 @@ class FieldMapper:
     Использует алгоритмы схожести строк для нахождения соответствий.
     """
     
-    def __init__(self):
+    # Встроенный словарь семантических соответствий (дополняется файлами
+    # терминов из SEMANTIC_DICTIONARY_DIR, см. semantic_dictionary)
+    SEMANTIC_MAP = {
+        # ФИО
+        'фамилия': ['lastname', 'family', 'surname'],
+        'имя': ['firstname', 'given', 'name'],
+        'отчество': ['middlename', 'patronymic', 'middle'],
+        
+        # Даты
+        'дата рождения': ['birthdate', 'birth', 'dateofbirth'],
+        'дата выдачи': ['issuedate', 'issue', 'date'],
+        
+        # Документы
+        'паспорт': ['passport', 'document', 'doc'],
+        'серия': ['series', 'serial'],
+        'номер': ['number', 'num'],
+        'снилс': ['snils', 'insurance'],
+        
+        # Контакты
+        'телефон': ['phone', 'mobile', 'tel'],
+        'email': ['email', 'mail', 'e-mail'],
+        'адрес': ['address', 'addr'],
+        
+        # Общие
+        'пол': ['gender', 'sex'],
+        'возраст': ['age'],
+    }
+    
+    # Веса метрик, если у JSON поля есть осмысленный label (приоритет на label для ЕПГУ)
+    LABEL_WEIGHTS = {
+        'label_vs_name': 0.40,      # Главное: label vs имя элемента
+        'label_vs_desc': 0.25,      # Дополнительно: label vs description
+        'semantic': 0.15,            # Семантическая схожесть
+        'token_sort': 0.10,          # Token sort по ID
+        'partial': 0.05,             # Частичное совпадение ID
+        'levenshtein': 0.05          # Levenshtein по ID
+    }
+    
+    # Веса метрик, если label нет или он короткий
+    ID_WEIGHTS = {
+        'levenshtein': 0.30,
+        'token_sort': 0.30,
+        'partial': 0.20,
+        'label_vs_name': 0.15,
+        'semantic': 0.05
+    }
+    
+    def __init__(
+        self,
+        dictionaries: Optional[SemanticDictionaryRegistry] = None,
+        embeddings: Optional[EmbeddingMatcher] = None
+    ):
+        """
+        Args:
+            dictionaries: Реестр семантического словаря (по умолчанию общий)
+            embeddings: Векторный матчинг (по умолчанию общий, если
+                включен MAPPER_EMBEDDINGS)
+        """
         self.min_confidence = settings.MIN_CONFIDENCE_SCORE
         self.auto_map_threshold = settings.AUTO_MAP_THRESHOLD
+        self.use_candidate_index = settings.MAPPER_USE_CANDIDATE_INDEX
+        self.candidate_top_k = settings.MAPPER_CANDIDATE_TOP_K
+        self.batch_scoring = settings.MAPPER_BATCH_SCORING
+        self.assignment = AssignmentMode(settings.MAPPER_ASSIGNMENT_MODE)
+        self.assignment_max_cells = settings.MAPPER_ASSIGNMENT_MAX_CELLS
+        # Признаки полей и элементов (нормализация, токены, концепты словаря)
+        self.dictionaries = dictionaries or semantic_dictionaries
+        self.features = FeatureExtractor(self.dictionaries.current())
+        # Векторная близость label/описаний (None - выключена)
+        if embeddings is None and settings.MAPPER_EMBEDDINGS:
+            embeddings = embedding_matcher
+        self.embeddings = embeddings
+        self.embedding_weight = settings.MAPPER_EMBEDDING_WEIGHT
+    
+    def refresh_dictionary(self):
+        """Пересоздание признаков, если словарь перезагружен"""
+        dictionary = self.dictionaries.current()
+        if dictionary is not self.features.semantic:
+            self.features = FeatureExtractor(dictionary)
     
     def auto_map(
         self, 
         json_schema: ParsedJsonSchema, 
-        xsd_schema: ParsedXsdSchema
+        xsd_schema: ParsedXsdSchema,
+        use_candidate_index: Optional[bool] = None,
+        batch_scoring: Optional[bool] = None,
+        assignment: Optional[AssignmentMode] = None
     ) -> Tuple[List[MappingSuggestion], List[str], List[str]]:
         """
         Автоматическое сопоставление полей
@@ -30,6 +119,12 @@ class FieldMapper:
         Args:
             json_schema: Распарсенная JSON схема
             xsd_schema: Распарсенная XSD схема
+            use_candidate_index: Оценивать только top-K кандидатов из индекса
+                (None - значение из настроек, False - полный перебор)
+            batch_scoring: Считать оценки матрицей через BatchSimilarityScorer
+                (None - значение из настроек, False - попарно)
+            assignment: greedy - лучший элемент для каждого поля независимо,
+                optimal - взаимно-однозначное назначение (None - из настроек)
             
         Returns:
             Tuple (mappings, unmapped_json, unmapped_xml)
@@ -38,25 +133,48 @@ class FieldMapper:
         mapped_json_ids = set()
         mapped_xml_names = set()
         
+        self.refresh_dictionary()
+        
+        if use_candidate_index is None:
+            use_candidate_index = self.use_candidate_index
+        if batch_scoring is None:
+            batch_scoring = self.batch_scoring
+        if assignment is None:
+            assignment = self.assignment
+        
+        # Индекс строится один раз на все JSON поля
+        candidate_index = None
+        if use_candidate_index:
+            candidate_index = self.build_candidate_index(xsd_schema.elements)
+        
         # Для каждого JSON поля ищем наилучшее совпадение в XML
-        for json_field in json_schema.fields:
-            best_match = self.find_best_match(json_field, xsd_schema.elements)
-            
+        if assignment == AssignmentMode.OPTIMAL:
+            best_matches = self.find_optimal_matches(
+                json_schema.fields,
+                xsd_schema.elements,
+                candidate_index=candidate_index
+            )
+        elif batch_scoring:
+            best_matches = self.find_best_matches_batch(
+                json_schema.fields,
+                xsd_schema.elements,
+                candidate_index=candidate_index
+            )
+        else:
+            best_matches = [
+                self.find_best_match(
+                    json_field,
+                    xsd_schema.elements,
+                    candidate_index=candidate_index
+                )
+                for json_field in json_schema.fields
+            ]
+        
+        for json_field, best_match in zip(json_schema.fields, best_matches):
             if best_match and best_match[1] >= self.min_confidence:
                 xml_element, confidence = best_match
                 
-                # Создаем маппинг
-                mapping = MappingSuggestion(
-                    json_field_id=json_field.id,
-                    json_field_path=json_field.path,
-                    json_field_label=json_field.label,
-                    xml_element_name=xml_element.name,
-                    xml_element_path=xml_element.path,
-                    variable_name=self._generate_variable_name(json_field.id),
-                    confidence_score=round(confidence, 2),
-                    is_auto_mapped=True,
-                    data_type=json_field.type
-                )
+                mapping = self._make_mapping(json_field, xml_element, confidence)
                 
                 mappings.append(mapping)
                 mapped_json_ids.add(json_field.id)
@@ -69,16 +187,397 @@ class FieldMapper:
         ]
         
         unmapped_xml = [
-            e.name for e in xsd_schema.elements 
-            if e.name not in mapped_xml_names and not e.parent
+            e.name for e in self._target_elements(xsd_schema.elements)
+            if e.name not in mapped_xml_names
         ]
         
         return mappings, unmapped_json, unmapped_xml
     
+    def remap(
+        self,
+        previous_json: ParsedJsonSchema,
+        previous_xsd: ParsedXsdSchema,
+        json_schema: ParsedJsonSchema,
+        xsd_schema: ParsedXsdSchema,
+        previous_mappings: List[MappingSuggestion],
+        assignment: Optional[AssignmentMode] = None
+    ) -> Tuple[List[MappingSuggestion], List[str], List[str], RemapSummary]:
+        """
+        Инкрементальный пересчет маппинга после изменения схем
+        
+        Схемы сравниваются с предыдущей версией, и заново оцениваются
+        только затронутые пары:
+        - новые и измененные поля, а также поля, чей элемент удален или
+          изменен, - по всем элементам;
+        - остальные поля - только по новым и измененным элементам
+          (прежняя оценка сравнивается с лучшей из новых).
+        Ручные маппинги (is_auto_mapped=False) сохраняются, пока их поле
+        и элемент есть в новых схемах.
+        
+        В режиме greedy результат совпадает с auto_map по новым схемам,
+        если previous_mappings - результат auto_map по предыдущим.
+        В режиме optimal перенесенные маппинги закреплены, назначение
+        решается только для затронутых полей на свободных элементах.
+        
+        Args:
+            previous_json: Предыдущая версия JSON схемы
+            previous_xsd: Предыдущая версия XSD схемы
+            json_schema: Новая JSON схема
+            xsd_schema: Новая XSD схема
+            previous_mappings: Сохраненные маппинги (автоматические и ручные)
+            assignment: Режим назначения (None - из настроек)
+            
+        Returns:
+            Tuple (mappings, unmapped_json, unmapped_xml, summary)
+        """
+        if assignment is None:
+            assignment = self.assignment
+        
+        self.refresh_dictionary()
+        
+        previous_targets = self._target_elements(previous_xsd.elements)
+        target_elements = self._target_elements(xsd_schema.elements)
+        diff = diff_schemas(previous_json.fields, json_schema.fields, previous_targets, target_elements)
+        
+        targets_by_key = {element_key(e): e for e in target_elements}
+        fields_by_id = {f.id: f for f in json_schema.fields}
+        
+        # Ручные маппинги переносятся, если поле и элемент остались в схемах
+        element_paths = {e.path for e in xsd_schema.elements if e.path}
+        element_names = {e.name for e in xsd_schema.elements}
+        manual: Dict[str, MappingSuggestion] = {}
+        dropped_manual = []
+        for mapping in previous_mappings:
+            if mapping.is_auto_mapped:
+                continue
+            if mapping.xml_element_path:
+                element_exists = mapping.xml_element_path in element_paths
+            else:
+                element_exists = mapping.xml_element_name in element_names
+            if mapping.json_field_id in fields_by_id and element_exists:
+                manual[mapping.json_field_id] = mapping
+            else:
+                dropped_manual.append(mapping.json_field_id)
+        
+        previous_auto = {m.json_field_id: m for m in previous_mappings if m.is_auto_mapped}
+        
+        # Поля, требующие полной оценки, и поля с действительной прежней оценкой
+        full_fields: List[JsonField] = []
+        delta_fields: List[JsonField] = []
+        kept: Dict[str, Tuple[XmlElement, float]] = {}
+        for json_field in json_schema.fields:
+            if json_field.id in manual:
+                continue
+            if (json_field.id in diff.added_fields or json_field.id in diff.changed_fields
+                    or json_field.id in dropped_manual):
+                full_fields.append(json_field)
+                continue
+            
+            previous = previous_auto.get(json_field.id)
+            if previous is not None:
+                key = previous.xml_element_path or previous.xml_element_name
+                if key in diff.stale_elements or key not in targets_by_key:
+                    full_fields.append(json_field)
+                    continue
+                kept[json_field.id] = (targets_by_key[key], previous.confidence_score)
+            
+            delta_fields.append(json_field)
+        
+        fresh_elements = [e for e in target_elements if element_key(e) in diff.fresh_elements]
+        
+        if assignment == AssignmentMode.OPTIMAL:
+            # Несопоставленным полям могут достаться новые или освободившиеся элементы
+            elements_released = bool(full_fields or fresh_elements or diff.removed_fields)
+            matches = self._remap_optimal(
+                full_fields, delta_fields, kept, manual, target_elements, elements_released
+            )
+        else:
+            matches = self._remap_greedy(full_fields, delta_fields, kept, fresh_elements, xsd_schema)
+        
+        mappings = []
+        mapped_xml_names = set()
+        for json_field in json_schema.fields:
+            if json_field.id in manual:
+                mapping = manual[json_field.id]
+            elif json_field.id in matches:
+                mapping = self._make_mapping(json_field, *matches[json_field.id])
+            else:
+                continue
+            mappings.append(mapping)
+            mapped_xml_names.add(mapping.xml_element_name)
+        
+        mapped_json_ids = {m.json_field_id for m in mappings}
+        unmapped_json = [f.id for f in json_schema.fields if f.id not in mapped_json_ids]
+        unmapped_xml = [e.name for e in target_elements if e.name not in mapped_xml_names]
+        
+        summary = RemapSummary(
+            added_fields=len(diff.added_fields),
+            changed_fields=len(diff.changed_fields),
+            removed_fields=len(diff.removed_fields),
+            added_elements=len(diff.added_elements),
+            changed_elements=len(diff.changed_elements),
+            removed_elements=len(diff.removed_elements),
+            rescored_fields=len(full_fields),
+            kept_mappings=sum(
+                1 for field_id, (element, _) in kept.items()
+                if field_id in matches and matches[field_id][0] is element
+            ),
+            manual_mappings=len(manual),
+            dropped_manual_mappings=dropped_manual
+        )
+        return mappings, unmapped_json, unmapped_xml, summary
+    
+    def _remap_greedy(
+        self,
+        full_fields: List[JsonField],
+        delta_fields: List[JsonField],
+        kept: Dict[str, Tuple[XmlElement, float]],
+        fresh_elements: List[XmlElement],
+        xsd_schema: ParsedXsdSchema
+    ) -> Dict[str, Tuple[XmlElement, float]]:
+        """Greedy: полная оценка затронутых полей, дельта-оценка остальных"""
+        matches = dict(kept)
+        
+        if full_fields:
+            candidate_index = None
+            if self.use_candidate_index:
+                candidate_index = self.build_candidate_index(xsd_schema.elements)
+            best_matches = self.find_best_matches_batch(full_fields, xsd_schema.elements, candidate_index)
+            for json_field, best_match in zip(full_fields, best_matches):
+                if best_match:
+                    matches[json_field.id] = best_match
+        
+        if delta_fields and fresh_elements:
+            matrix = self.build_scorer(delta_fields, fresh_elements).score_matrix()
+            for json_field, row in zip(delta_fields, matrix):
+                best = int(row.argmax())
+                best_score = float(row[best])
+                if best_score <= 0.0 or best_score < self.min_confidence:
+                    continue
+                # Новый элемент вытесняет прежний только при строго лучшей оценке
+                current = matches.get(json_field.id)
+                if current is None or best_score > current[1]:
+                    matches[json_field.id] = (fresh_elements[best], best_score)
+        
+        return matches
+    
+    def _remap_optimal(
+        self,
+        full_fields: List[JsonField],
+        delta_fields: List[JsonField],
+        kept: Dict[str, Tuple[XmlElement, float]],
+        manual: Dict[str, MappingSuggestion],
+        target_elements: List[XmlElement],
+        elements_released: bool
+    ) -> Dict[str, Tuple[XmlElement, float]]:
+        """Optimal: назначение затронутых полей на свободные элементы"""
+        matches = dict(kept)
+        
+        occupied = {element.name for element, _ in kept.values()}
+        occupied.update(m.xml_element_name for m in manual.values())
+        free_elements = [e for e in target_elements if e.name not in occupied]
+        
+        pending = list(full_fields)
+        if elements_released:
+            pending += [f for f in delta_fields if f.id not in kept]
+        
+        if pending and free_elements:
+            best_matches = self.find_optimal_matches(pending, free_elements)
+            for json_field, best_match in zip(pending, best_matches):
+                if best_match:
+                    matches[json_field.id] = best_match
+        
+        return matches
+    
+    def build_candidate_index(self, xml_elements: List[XmlElement]) -> Optional[CandidateIndex]:
+        """
+        Построение индекса кандидатов по XML элементам
+        
+        Args:
+            xml_elements: Список XML элементов
+            
+        Returns:
+            CandidateIndex или None, если элементов не больше top-K
+            (тогда полный перебор не дороже индекса)
+        """
+        target_elements = self._target_elements(xml_elements)
+        
+        if len(target_elements) <= self.candidate_top_k:
+            return None
+        
+        return CandidateIndex(target_elements, self.features)
+    
+    def build_scorer(
+        self,
+        json_fields: List[JsonField],
+        xml_elements: List[XmlElement]
+    ) -> BatchSimilarityScorer:
+        """
+        Пакетный расчетчик схожести для набора полей и элементов
+        
+        Args:
+            json_fields: JSON поля (строки матрицы)
+            xml_elements: XML элементы (столбцы матрицы)
+            
+        Returns:
+            BatchSimilarityScorer с предварительно нормализованными строками
+        """
+        embeddings = None
+        if self.embeddings is not None:
+            embeddings = (
+                self.embeddings.field_vectors(json_fields, self.features),
+                self.embeddings.element_index(xml_elements, self.features)
+            )
+        
+        return BatchSimilarityScorer(
+            json_fields,
+            xml_elements,
+            self.features,
+            self.LABEL_WEIGHTS,
+            self.ID_WEIGHTS,
+            embeddings=embeddings,
+            embedding_weight=self.embedding_weight
+        )
+    
+    def score_matrix(
+        self,
+        json_fields: List[JsonField],
+        xml_elements: List[XmlElement],
+        candidate_index: Optional[CandidateIndex] = None
+    ) -> Tuple[np.ndarray, List[XmlElement]]:
+        """
+        Матрица оценок схожести JSON полей и конечных XML элементов
+        
+        С индексом кандидатов строка матрицы считается только по top-K
+        столбцам, остальные ячейки остаются нулевыми. При векторном
+        матчинге к кандидатам добавляются top-K ближайших по косинусу.
+        
+        Args:
+            json_fields: JSON поля
+            xml_elements: Список XML элементов
+            candidate_index: Индекс кандидатов (если None - полный перебор)
+            
+        Returns:
+            Tuple (матрица поле x элемент, элементы-столбцы)
+        """
+        if candidate_index is not None:
+            target_elements = candidate_index.elements
+        else:
+            target_elements = self._target_elements(xml_elements)
+        
+        if not json_fields or not target_elements:
+            return np.zeros((len(json_fields), len(target_elements))), target_elements
+        
+        scorer = self.build_scorer(json_fields, target_elements)
+        
+        if candidate_index is None:
+            return scorer.score_matrix(), target_elements
+        
+        nearest = None
+        if scorer.embeddings is not None:
+            field_vectors, index = scorer.embeddings
+            nearest = index.top_k(field_vectors, self.candidate_top_k)
+        
+        matrix = np.zeros((len(json_fields), len(target_elements)))
+        for i, json_field in enumerate(json_fields):
+            cols = candidate_index.candidates(json_field, self.candidate_top_k)
+            if cols and nearest is not None:
+                cols = sorted(set(cols).union(nearest[i].tolist()))
+            # Точная оценка по всем элементам, если индекс не дал кандидатов
+            cols = cols or list(range(len(target_elements)))
+            matrix[i, cols] = scorer.score_matrix([i], cols)[0]
+        
+        return matrix, target_elements
+    
+    def find_best_matches_batch(
+        self,
+        json_fields: List[JsonField],
+        xml_elements: List[XmlElement],
+        candidate_index: Optional[CandidateIndex] = None
+    ) -> List[Optional[Tuple[XmlElement, float]]]:
+        """
+        Наилучшие совпадения для всех JSON полей сразу
+        
+        Оценки считаются матрицей поле x элемент, для каждой строки
+        выбирается argmax.
+        
+        Args:
+            json_fields: JSON поля
+            xml_elements: Список XML элементов
+            candidate_index: Индекс кандидатов (если None - полный перебор)
+            
+        Returns:
+            Для каждого поля Tuple (best_element, confidence) или None
+        """
+        matrix, target_elements = self.score_matrix(json_fields, xml_elements, candidate_index)
+        
+        results = []
+        for row in matrix:
+            if not row.size:
+                results.append(None)
+                continue
+            
+            # argmax берет первый максимум - как строгое сравнение при переборе
+            best = int(row.argmax())
+            best_score = float(row[best])
+            
+            if best_score > 0.0 and best_score >= self.min_confidence:
+                results.append((target_elements[best], best_score))
+            else:
+                results.append(None)
+        
+        return results
+    
+    def find_optimal_matches(
+        self,
+        json_fields: List[JsonField],
+        xml_elements: List[XmlElement],
+        candidate_index: Optional[CandidateIndex] = None
+    ) -> List[Optional[Tuple[XmlElement, float]]]:
+        """
+        Взаимно-однозначные совпадения (глобально оптимальное назначение)
+        
+        Каждый XML элемент (по имени - так их различает VmTemplateGenerator)
+        достается не более чем одному JSON полю, суммарная уверенность
+        по парам не ниже MIN_CONFIDENCE_SCORE максимальна.
+        
+        Args:
+            json_fields: JSON поля
+            xml_elements: Список XML элементов
+            candidate_index: Индекс кандидатов (если None - полный перебор)
+            
+        Returns:
+            Для каждого поля Tuple (element, confidence) или None
+        """
+        matrix, target_elements = self.score_matrix(json_fields, xml_elements, candidate_index)
+        
+        # Элементы с одинаковым именем схлопываются в один столбец
+        name_columns = {}
+        for col, element in enumerate(target_elements):
+            name_columns.setdefault(element.name, []).append(col)
+        
+        groups = list(name_columns.values())
+        if matrix.size and len(groups) < len(target_elements):
+            grouped = np.stack([matrix[:, cols].max(axis=1) for cols in groups], axis=1)
+        else:
+            grouped = matrix
+        
+        solver = AssignmentSolver(self.min_confidence, self.assignment_max_cells)
+        
+        results: List[Optional[Tuple[XmlElement, float]]] = [None] * len(json_fields)
+        for row, group, score in solver.solve(grouped):
+            cols = groups[group]
+            # Внутри группы - первый элемент с максимальной оценкой
+            col = cols[int(matrix[row, cols].argmax())]
+            results[row] = (target_elements[col], score)
+        
+        return results
+    
     def find_best_match(
         self, 
         json_field: JsonField, 
-        xml_elements: List[XmlElement]
+        xml_elements: List[XmlElement],
+        candidate_index: Optional[CandidateIndex] = None
     ) -> Optional[Tuple[XmlElement, float]]:
         """
         Находит наилучшее совпадение для JSON поля среди XML элементов
@@ -86,6 +585,7 @@ class FieldMapper:
         Args:
             json_field: JSON поле
             xml_elements: Список XML элементов
+            candidate_index: Индекс кандидатов (если None - полный перебор)
             
         Returns:
             Tuple (best_element, confidence) или None
@@ -93,14 +593,35 @@ class FieldMapper:
         best_match = None
         best_score = 0.0
         
-        # Фильтруем только элементы без parent (root level)
-        root_elements = [e for e in xml_elements if not e.parent]
-        
-        if not root_elements:
-            root_elements = xml_elements
-        
-        for xml_element in root_elements:
-            score = self.calculate_similarity(json_field, xml_element)
+        if candidate_index is not None:
+            target_elements = candidate_index.elements
+            positions = candidate_index.candidates(json_field, self.candidate_top_k)
+        else:
+            target_elements = self._target_elements(xml_elements)
+            positions = []
+        
+        # Косинусная близость поля ко всем элементам (векторный матчинг)
+        embedding_row = None
+        if self.embeddings is not None and target_elements:
+            field_vector = self.embeddings.field_vector(json_field, self.features)[None, :]
+            index = self.embeddings.element_index(target_elements, self.features)
+            embedding_row = index.similarity(field_vector)[0].astype(np.float64)
+            if positions:
+                nearest = index.top_k(field_vector, self.candidate_top_k)[0]
+                positions = sorted(set(positions).union(nearest.tolist()))
+        
+        # Точная оценка по всем элементам, если индекс не дал кандидатов
+        if not positions:
+            positions = range(len(target_elements))
+        
+        field_features = self.features.field(json_field)
+        for position in positions:
+            xml_element = target_elements[position]
+            score = self.score_features(
+                field_features,
+                self.features.element(xml_element),
+                None if embedding_row is None else float(embedding_row[position])
+            )
             
             if score > best_score:
                 best_score = score
@@ -111,6 +632,30 @@ class FieldMapper:
         
         return None
     
+    def _make_mapping(self, json_field: JsonField, xml_element: XmlElement, confidence: float) -> MappingSuggestion:
+        """Автоматический маппинг поля на элемент"""
+        return MappingSuggestion(
+            json_field_id=json_field.id,
+            json_field_path=json_field.path,
+            json_field_label=json_field.label,
+            xml_element_name=xml_element.name,
+            xml_element_path=xml_element.path,
+            variable_name=self._generate_variable_name(json_field.id),
+            confidence_score=round(confidence, 2),
+            is_auto_mapped=True,
+            data_type=json_field.type
+        )
+    
+    def _target_elements(self, xml_elements: List[XmlElement]) -> List[XmlElement]:
+        """Конечные элементы (без дочерних) - цели маппинга, либо все, если таких нет"""
+        parent_paths = {e.parent for e in xml_elements if e.parent}
+        target_elements = [e for e in xml_elements if e.path not in parent_paths]
+        
+        if not target_elements:
+            target_elements = xml_elements
+        
+        return target_elements
+    
     def calculate_similarity(self, json_field: JsonField, xml_element: XmlElement) -> float:
         """
         Вычисляет схожесть между JSON полем и XML элементом
@@ -129,62 +674,83 @@ class FieldMapper:
         Returns:
             Оценка схожести от 0.0 до 1.0
         """
-        json_name = json_field.id
-        xml_name = xml_element.name
+        self.refresh_dictionary()
+        
+        embedding = None
+        if self.embeddings is not None:
+            field_vector = self.embeddings.field_vector(json_field, self.features)[None, :]
+            element_index = ElementVectorIndex(self.embeddings.element_vector(xml_element, self.features)[None, :])
+            embedding = float(element_index.similarity(field_vector)[0, 0])
+        
+        return self.score_features(
+            self.features.field(json_field), self.features.element(xml_element), embedding
+        )
+    
+    def score_features(
+        self,
+        field: FieldFeatures,
+        element: ElementFeatures,
+        embedding: Optional[float] = None
+    ) -> float:
+        """
+        Оценка схожести по предвычисленным признакам поля и элемента
         
+        Args:
+            field: Признаки JSON поля
+            element: Признаки XML элемента
+            embedding: Косинусная близость векторов поля и элемента
+                (None - векторный матчинг выключен)
+            
+        Returns:
+            Оценка схожести от 0.0 до 1.0
+        """
         # 1. Exact match по ID (точное совпадение)
-        if json_name.lower() == xml_name.lower():
+        if field.id_lower == element.name_lower:
             return 1.0
         
-        # 2. Нормализуем названия (camelCase -> snake_case -> lowercase)
-        json_normalized = self._normalize_name(json_name)
-        xml_normalized = self._normalize_name(xml_name)
+        # 2. Нормализованные названия (camelCase -> snake_case -> lowercase)
+        json_normalized = field.id_norm
+        xml_normalized = element.name_norm
         
         if json_normalized == xml_normalized:
             return 0.95
         
         # 3. Базовые метрики по ID
         levenshtein_score = Levenshtein.ratio(json_normalized, xml_normalized)
-        token_sort_score = fuzz.token_sort_ratio(json_normalized, xml_normalized) / 100.0
+        # token sort по заранее отсортированным токенам (= fuzz.token_sort_ratio)
+        token_sort_score = fuzz.ratio(field.id_sorted, element.name_sorted) / 100.0
         partial_score = fuzz.partial_ratio(json_normalized, xml_normalized) / 100.0
         
         # 4. УЛУЧШЕНО: Приоритет на label (для ЕПГУ с техническими ID типа "c58")
         label_vs_name_score = 0.0
         label_vs_desc_score = 0.0
         
-        if json_field.label:
-            label_normalized = self._normalize_name(json_field.label)
+        if field.has_label:
+            label_normalized = field.label_norm
             
             # Сравниваем label с именем XML элемента
             label_vs_name_score = max(
                 Levenshtein.ratio(label_normalized, xml_normalized),
-                fuzz.token_sort_ratio(label_normalized, xml_normalized) / 100.0,
+                fuzz.ratio(field.label_sorted, element.name_sorted) / 100.0,
                 fuzz.partial_ratio(label_normalized, xml_normalized) / 100.0
             )
             
             # Сравниваем label с description XML элемента
-            if xml_element.description:
-                desc_normalized = self._normalize_name(xml_element.description)
+            if element.has_desc:
+                desc_normalized = element.desc_norm
                 label_vs_desc_score = max(
                     Levenshtein.ratio(label_normalized, desc_normalized),
-                    fuzz.token_sort_ratio(label_normalized, desc_normalized) / 100.0,
+                    fuzz.ratio(field.label_sorted, element.desc_sorted) / 100.0,
                     fuzz.partial_ratio(label_normalized, desc_normalized) / 100.0
                 )
         
-        # 5. Проверяем ключевые слова в label (семантический матчинг)
-        semantic_score = self._calculate_semantic_similarity(json_field, xml_element)
+        # 5. Ключевые слова в label (семантический матчинг): общий концепт словаря
+        semantic_score = 1.0 if field.concepts & element.concepts else 0.0
         
         # УЛУЧШЕННЫЕ ВЕСА: больший приоритет на label для ЕПГУ
-        if json_field.label and len(json_field.label) > 3:
+        if field.long_label:
             # Если есть осмысленный label, используем его как основу
-            weights = {
-                'label_vs_name': 0.40,      # Главное: label vs имя элемента
-                'label_vs_desc': 0.25,      # Дополнительно: label vs description
-                'semantic': 0.15,            # Семантическая схожесть
-                'token_sort': 0.10,          # Token sort по ID
-                'partial': 0.05,             # Частичное совпадение ID
-                'levenshtein': 0.05          # Levenshtein по ID
-            }
+            weights = self.LABEL_WEIGHTS
             
             final_score = (
                 weights['label_vs_name'] * label_vs_name_score +
@@ -196,13 +762,7 @@ class FieldMapper:
             )
         else:
             # Если label нет или он короткий, используем старые веса
-            weights = {
-                'levenshtein': 0.30,
-                'token_sort': 0.30,
-                'partial': 0.20,
-                'label_vs_name': 0.15,
-                'semantic': 0.05
-            }
+            weights = self.ID_WEIGHTS
             
             final_score = (
                 weights['levenshtein'] * levenshtein_score +
@@ -212,86 +772,14 @@ class FieldMapper:
                 weights['semantic'] * semantic_score
             )
         
-        return min(final_score, 1.0)
-    
-    def _calculate_semantic_similarity(self, json_field: JsonField, xml_element: XmlElement) -> float:
-        """
-        Семантическая схожесть на основе ключевых слов
+        final_score = min(final_score, 1.0)
         
-        Проверяет наличие общих ключевых слов в label и описании.
-        Например: "Фамилия" в label должна матчиться с "lastName" или "FamilyName"
+        # 6. Векторная близость label/описаний (если включена): добавка к
+        # оставшемуся до 1.0 запасу - оценку только повышает
+        if embedding is not None:
+            final_score += self.embedding_weight * embedding * (1.0 - final_score)
         
-        Args:
-            json_field: JSON поле
-            xml_element: XML элемент
-            
-        Returns:
-            Оценка от 0.0 до 1.0
-        """
-        # Словарь семантических соответствий (можно расширять)
-        semantic_map = {
-            # ФИО
-            'фамилия': ['lastname', 'family', 'surname'],
-            'имя': ['firstname', 'given', 'name'],
-            'отчество': ['middlename', 'patronymic', 'middle'],
-            
-            # Даты
-            'дата рождения': ['birthdate', 'birth', 'dateofbirth'],
-            'дата выдачи': ['issuedate', 'issue', 'date'],
-            
-            # Документы
-            'паспорт': ['passport', 'document', 'doc'],
-            'серия': ['series', 'serial'],
-            'номер': ['number', 'num'],
-            'снилс': ['snils', 'insurance'],
-            
-            # Контакты
-            'телефон': ['phone', 'mobile', 'tel'],
-            'email': ['email', 'mail', 'e-mail'],
-            'адрес': ['address', 'addr'],
-            
-            # Общие
-            'пол': ['gender', 'sex'],
-            'возраст': ['age'],
-        }
-        
-        if not json_field.label:
-            return 0.0
-        
-        label_lower = json_field.label.lower()
-        xml_name_lower = xml_element.name.lower()
-        xml_desc_lower = (xml_element.description or "").lower()
-        
-        # Проверяем каждое семантическое правило
-        for key_russian, key_english_variants in semantic_map.items():
-            if key_russian in label_lower:
-                # Проверяем наличие английских вариантов в XML
-                for variant in key_english_variants:
-                    if variant in xml_name_lower or variant in xml_desc_lower:
-                        return 1.0  # Нашли семантическое соответствие
-        
-        return 0.0
-    
-    def _normalize_name(self, name: str) -> str:
-        """
-        Нормализация названия для сравнения
-        
-        Examples:
-            lastName -> last name
-            LastName -> last name
-            last-name -> last name
-            LAST_NAME -> last name
-        """
-        # Разбиваем camelCase и PascalCase
-        name = re.sub('([a-z0-9])([A-Z])', r'\1 \2', name)
-        
-        # Заменяем разделители на пробелы
-        name = re.sub(r'[-_]', ' ', name)
-        
-        # Приводим к нижнему регистру и убираем лишние пробелы
-        name = ' '.join(name.lower().split())
-        
-        return name
+        return final_score
     
     def _generate_variable_name(self, field_id: str) -> str:
         """
@@ -328,11 +816,14 @@ class FieldMapper:
         Returns:
             Оценка схожести от 0.0 до 1.0
         """
-        source_norm = self._normalize_name(source)
-        target_norm = self._normalize_name(target)
+        source_norm = normalize_name(source)
+        target_norm = normalize_name(target)
         
         levenshtein_score = Levenshtein.ratio(source_norm, target_norm)
         token_sort_score = fuzz.token_sort_ratio(source_norm, target_norm) / 100.0
         
         return (levenshtein_score + token_sort_score) / 2.0
 
+
+# Словарь семантических соответствий процесса (перезагружается при изменении файлов)
+semantic_dictionaries = create_registry(FieldMapper.SEMANTIC_MAP)
@@ -0,0 +1,111 @@
+import tempfile
+from typing import Any, Dict, Optional
+import httpx
+from fastapi import HTTPException, status
+from app.core.config import settings
+from app.core.http_clients import http_clients
+
+
+class FilesClient:
+    """
+    Клиент files-service
+
+    Файлы скачиваются потоком во временный буфер (SpooledTemporaryFile):
+    небольшие остаются в памяти, крупные сбрасываются на диск, и
+    содержимое целиком не копируется через строки и тела запросов.
+    Запросы идут через общий клиент files-service (http_clients).
+    """
+
+    def __init__(self):
+        self.files_service_url = settings.FILES_SERVICE_URL
+        self.spool_max_bytes = settings.STREAM_SPOOL_MAX_BYTES
+
+    async def get_metadata(self, file_id: str) -> Dict[str, Any]:
+        """Метаданные файла (включая checksum)"""
+        try:
+            response = await http_clients.client("files").get(f"{self.files_service_url}/files/{file_id}")
+            self._raise_for_status(response)
+            return response.json()
+        except httpx.RequestError as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Cannot connect to files service: {str(e)}"
+            )
+
+    async def download_to_spool(self, file_id: str) -> tempfile.SpooledTemporaryFile:
+        """
+        Скачивание файла потоком
+
+        Args:
+            file_id: ID файла в files-service
+
+        Returns:
+            Бинарный буфер, установленный на начало (закрывает вызывающий код)
+        """
+        spool = tempfile.SpooledTemporaryFile(max_size=self.spool_max_bytes)
+        try:
+            async with http_clients.client("files").stream(
+                "GET", f"{self.files_service_url}/files/{file_id}/download"
+            ) as response:
+                if response.status_code >= 400:
+                    await response.aread()
+                self._raise_for_status(response)
+
+                async for chunk in response.aiter_bytes():
+                    spool.write(chunk)
+        except httpx.RequestError as e:
+            spool.close()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Cannot connect to files service: {str(e)}"
+            )
+        except Exception:
+            spool.close()
+            raise
+
+        spool.seek(0)
+        return spool
+
+    async def upload_file(
+        self,
+        project_id: str,
+        file_name: str,
+        content: bytes,
+        file_type: str,
+        uploaded_by: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Загрузка файла в проект
+
+        Returns:
+            Метаданные созданного файла
+        """
+        data = {"project_id": project_id, "file_type": file_type}
+        if uploaded_by:
+            data["uploaded_by"] = uploaded_by
+        try:
+            response = await http_clients.client("files").post(
+                f"{self.files_service_url}/files/upload",
+                files={"file": (file_name, content, "application/octet-stream")},
+                data=data
+            )
+            self._raise_for_status(response)
+            return response.json()
+        except httpx.RequestError as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Cannot connect to files service: {str(e)}"
+            )
+
+    @staticmethod
+    def _raise_for_status(response: httpx.Response):
+        if response.status_code == 404:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="File not found"
+            )
+        if response.status_code >= 400:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Files service error: {response.text}"
+            )
@@ -0,0 +1,462 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+from fastapi import HTTPException, status
+from app.core.config import settings
+from app.core.executor import PipelineExecutor
+from app.schemas import (
+    GenerationJob, GenerationJobRequest, JobStage, JobStatus, StageStatus
+)
+from app.services import pipeline
+from app.services.compact import expand
+from app.services.files_client import FilesClient
+from app.services.pipeline import parse_cached, parse_stored, pipeline_executor
+from app.services.progress_publisher import ProgressPublisher, progress_publisher
+from app.services.projects_client import ProjectsClient
+
+# Этапы фоновой генерации в порядке выполнения
+STAGES = ["parse_json", "parse_xsd", "auto_map", "generate", "validate", "preview", "save"]
+
+
+class JobStore:
+    """
+    Хранилище задач генерации
+
+    Задачи держатся в памяти; если задан каталог, после каждого этапа
+    снимок задачи (состояние, результаты этапов и исходный запрос)
+    записывается в <directory>/<job_id>.json. После перезапуска сервиса
+    задача читается из снимка и может быть продолжена.
+    """
+
+    def __init__(self, directory: Optional[str], ttl_seconds: float):
+        self.directory = Path(directory) if directory else None
+        self.ttl_seconds = ttl_seconds
+        self._jobs: Dict[str, Tuple[GenerationJob, GenerationJobRequest]] = {}
+
+    def save(self, job: GenerationJob, request: GenerationJobRequest):
+        job.updated_at = datetime.utcnow()
+        self._jobs[job.job_id] = (job, request)
+        if self.directory is None:
+            return
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        snapshot = {
+            "job": job.model_dump(mode="json"),
+            "request": request.model_dump(mode="json"),
+        }
+        path = self._path(job.job_id)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(snapshot, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def get(self, job_id: str) -> Optional[Tuple[GenerationJob, GenerationJobRequest]]:
+        """Задача и ее запрос (из памяти или снимка) либо None"""
+        if not self._valid_id(job_id):
+            return None
+
+        entry = self._jobs.get(job_id)
+        if entry is not None or self.directory is None:
+            return entry
+
+        path = self._path(job_id)
+        if not path.exists():
+            return None
+
+        snapshot = json.loads(path.read_text(encoding="utf-8"))
+        job = GenerationJob.model_validate(snapshot["job"])
+        request = GenerationJobRequest.model_validate(snapshot["request"])
+
+        # Задача выполнялась до перезапуска сервиса
+        if job.status in (JobStatus.QUEUED, JobStatus.RUNNING):
+            job.status = JobStatus.INTERRUPTED
+            for stage in job.stages:
+                if stage.status == StageStatus.RUNNING:
+                    stage.status = StageStatus.PENDING
+
+        self._jobs[job_id] = (job, request)
+        return job, request
+
+    def purge_expired(self, active: Iterable[str] = ()):
+        """
+        Удаление задач старше ttl_seconds (в памяти и на диске)
+
+        Args:
+            active: ID выполняющихся задач - их снимки не удаляются, даже если
+                этап идет дольше ttl_seconds (иначе задачу нельзя продолжить)
+        """
+        active = set(active)
+        now = datetime.utcnow()
+        for job_id, (job, _) in list(self._jobs.items()):
+            if job_id not in active and (now - job.updated_at).total_seconds() > self.ttl_seconds:
+                del self._jobs[job_id]
+
+        if self.directory is None or not self.directory.exists():
+            return
+        deadline = time.time() - self.ttl_seconds
+        for path in self.directory.glob("*.json"):
+            if path.stem in active:
+                continue
+            try:
+                if path.stat().st_mtime < deadline:
+                    path.unlink()
+            except OSError:
+                pass
+
+    def _path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.json"
+
+    @staticmethod
+    def _valid_id(job_id: str) -> bool:
+        try:
+            return uuid.UUID(job_id).hex == job_id
+        except ValueError:
+            return False
+
+
+class GenerationJobManager:
+    """
+    Фоновые задачи генерации: парсинг -> маппинг -> генерация -> валидация -> предпросмотр -> сохранение
+
+    Этапы выполняются в PipelineExecutor; после каждого этапа результат
+    сохраняется в JobStore, а событие прогресса отправляется в комнату
+    websocket-service (project:<project_id> или job:<job_id>). Упавшую или
+    прерванную задачу можно продолжить с первого незавершенного этапа.
+    С save_to_project последний этап записывает маппинги и шаблон в проект,
+    поэтому результат попадает в проект и после продолжения задачи.
+    """
+
+    # Повтор этапа при перегрузке пула (503)
+    OVERLOAD_RETRY_DELAY = 0.5
+    OVERLOAD_MAX_RETRIES = 120
+
+    def __init__(
+        self,
+        store: JobStore,
+        publisher: ProgressPublisher,
+        executor: PipelineExecutor,
+        files_client: FilesClient,
+        projects_client: ProjectsClient,
+        max_concurrent: int
+    ):
+        self.store = store
+        self.publisher = publisher
+        self.executor = executor
+        self.files_client = files_client
+        self.projects_client = projects_client
+        self._slots = asyncio.Semaphore(max(1, max_concurrent))
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def submit(self, request: GenerationJobRequest) -> GenerationJob:
+        """
+        Постановка задачи (выполняется в фоне)
+
+        Raises:
+            ValueError: Не указаны JSON или XSD схема
+        """
+        if not (request.json_schema_content or request.json_file_id):
+            raise ValueError("json_schema_content or json_file_id is required")
+        if not (request.xsd_schema_content or request.xsd_file_id):
+            raise ValueError("xsd_schema_content or xsd_file_id is required")
+
+        self.store.purge_expired(active=self._tasks.keys())
+
+        job_id = uuid.uuid4().hex
+        now = datetime.utcnow()
+        job = GenerationJob(
+            job_id=job_id,
+            project_id=request.project_id,
+            room=f"project:{request.project_id}" if request.project_id else f"job:{job_id}",
+            stages=[JobStage(name=name) for name in STAGES],
+            created_at=now,
+            updated_at=now
+        )
+        self.store.save(job, request)
+        self._start(job, request)
+        return job
+
+    def resume(self, job_id: str) -> GenerationJob:
+        """
+        Продолжение задачи с первого незавершенного этапа
+
+        Raises:
+            KeyError: Задача не найдена
+            ValueError: Задача выполняется или уже завершена
+        """
+        entry = self.store.get(job_id)
+        if entry is None:
+            raise KeyError(job_id)
+
+        job, request = entry
+        if job_id in self._tasks:
+            raise ValueError("Job is already running")
+        if job.status == JobStatus.COMPLETED:
+            raise ValueError("Job is already completed")
+
+        job.status = JobStatus.QUEUED
+        job.error = None
+        for stage in job.stages:
+            if stage.status in (StageStatus.FAILED, StageStatus.RUNNING):
+                stage.status = StageStatus.PENDING
+                stage.error = None
+        self.store.save(job, request)
+        self._start(job, request)
+        return job
+
+    def get(self, job_id: str) -> Optional[GenerationJob]:
+        entry = self.store.get(job_id)
+        return entry[0] if entry else None
+
+    async def wait(self, job_id: str):
+        """Ожидание завершения фоновой задачи (если она выполняется)"""
+        task = self._tasks.get(job_id)
+        if task is not None:
+            await asyncio.shield(task)
+
+    async def shutdown(self):
+        """Отмена выполняющихся задач (снимки остаются для продолжения)"""
+        for task in list(self._tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    def _start(self, job: GenerationJob, request: GenerationJobRequest):
+        task = asyncio.create_task(self._run(job, request))
+        self._tasks[job.job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job.job_id, None))
+
+    async def _run(self, job: GenerationJob, request: GenerationJobRequest):
+        async with self._slots:
+            job.status = JobStatus.RUNNING
+            self.store.save(job, request)
+
+            for stage in job.stages:
+                if stage.status in (StageStatus.COMPLETED, StageStatus.SKIPPED):
+                    continue
+
+                if not await self._run_stage(job, request, stage):
+                    job.status = JobStatus.FAILED
+                    job.error = f"Stage '{stage.name}' failed: {stage.error}"
+                    self.store.save(job, request)
+                    await self._publish(job, "job_failed", error=job.error)
+                    return
+
+            job.status = JobStatus.COMPLETED
+            self.store.save(job, request)
+            await self._publish(job, "job_completed")
+
+    async def _run_stage(self, job: GenerationJob, request: GenerationJobRequest, stage: JobStage) -> bool:
+        """Выполнение этапа; False - задача не может продолжаться"""
+        stage.status = StageStatus.RUNNING
+        self.store.save(job, request)
+        await self._publish(job, "stage_started", stage)
+
+        started = time.perf_counter()
+        try:
+            summary = await self._with_overload_retry(job, request, stage.name)
+        except Exception as e:
+            stage.duration_ms = round((time.perf_counter() - started) * 1000, 2)
+            stage.error = e.detail if isinstance(e, HTTPException) else str(e)
+
+            # Ошибка предпросмотра не делает шаблон недействительным
+            if stage.name == "preview":
+                stage.status = StageStatus.FAILED
+                job.result.preview_output = f"Preview failed: {stage.error}"
+                self.store.save(job, request)
+                await self._publish(job, "stage_failed", stage, error=stage.error)
+                return True
+
+            stage.status = StageStatus.FAILED
+            self.store.save(job, request)
+            await self._publish(job, "stage_failed", stage, error=stage.error)
+            return False
+
+        stage.duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        stage.status = StageStatus.SKIPPED if summary is None else StageStatus.COMPLETED
+        self.store.save(job, request)
+        await self._publish(job, "stage_skipped" if summary is None else "stage_completed", stage, result=summary)
+        return True
+
+    async def _with_overload_retry(self, job: GenerationJob, request: GenerationJobRequest, name: str):
+        for _ in range(self.OVERLOAD_MAX_RETRIES):
+            try:
+                return await self._execute(job, request, name)
+            except HTTPException as e:
+                if e.status_code != status.HTTP_503_SERVICE_UNAVAILABLE:
+                    raise
+                # Пул занят синхронными запросами - задача подождет
+                await asyncio.sleep(self.OVERLOAD_RETRY_DELAY)
+        raise RuntimeError("Generator service is overloaded")
+
+    async def _execute(
+        self,
+        job: GenerationJob,
+        request: GenerationJobRequest,
+        name: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Этап задачи; результат сохраняется в job.result
+
+        Returns:
+            Краткая сводка для события прогресса (None - этап пропущен)
+        """
+        result = job.result
+        timings = job.timings
+
+        if name == "parse_json":
+            if request.json_file_id:
+                parsed, _ = await parse_stored("json", request.json_file_id, self.files_client, timings)
+            else:
+                parsed = await parse_cached(
+                    "json", request.json_schema_content, request.json_schema_checksum, timings, self.executor
+                )
+            # Результат задачи сохраняется в снимок - нужна модель
+            result.parsed_json = expand(parsed)
+            return {"total_fields": result.parsed_json.total_fields}
+
+        if name == "parse_xsd":
+            if request.xsd_file_id:
+                parsed, _ = await parse_stored("xsd", request.xsd_file_id, self.files_client, timings)
+            else:
+                parsed = await parse_cached(
+                    "xsd", request.xsd_schema_content, request.xsd_schema_checksum, timings, self.executor
+                )
+            result.parsed_xsd = expand(parsed)
+            return {
+                "total_elements": result.parsed_xsd.total_elements,
+                "root_element": result.parsed_xsd.root_element
+            }
+
+        if name == "auto_map":
+            mappings, unmapped_json, unmapped_xml = await self.executor.run(
+                "auto_map", pipeline.auto_map, result.parsed_json, result.parsed_xsd, request.assignment,
+                timings=timings
+            )
+            result.mappings = mappings
+            return {
+                "total_mapped": len(mappings),
+                "unmapped_json_fields": len(unmapped_json),
+                "unmapped_xml_elements": len(unmapped_xml)
+            }
+
+        if name == "generate":
+            result.template, line_count = await self.executor.run(
+                "generate", pipeline.generate_template,
+                result.mappings, result.parsed_xsd, request.include_comments, request.include_null_checks,
+                timings=timings
+            )
+            return {"line_count": line_count}
+
+        if name == "validate":
+            result.validation = await self.executor.run(
+                "validate", pipeline.validate_template, result.template, result.mappings, timings=timings
+            )
+            return {
+                "is_valid": result.validation.is_valid,
+                "errors": len(result.validation.errors),
+                "warnings": len(result.validation.warnings)
+            }
+
+        if name == "preview":
+            test_data = await self._test_data(request)
+            if not request.include_preview or not test_data:
+                return None
+            result.preview_output = await self.executor.run(
+                "preview", pipeline.preview, result.template, test_data, timings=timings
+            )
+            return {"output_length": len(result.preview_output)}
+
+        if name == "save":
+            if not request.save_to_project or not job.project_id:
+                return None
+            return await self._save_to_project(job, request)
+
+        raise ValueError(f"Unknown stage: {name}")
+
+    async def _save_to_project(self, job: GenerationJob, request: GenerationJobRequest) -> Dict[str, Any]:
+        """
+        Сохранение маппингов и шаблона в проект
+
+        Каждая часть отмечается в снимке задачи, поэтому продолжение после
+        сбоя не создает маппинги и файл шаблона повторно.
+        """
+        result = job.result
+        if not result.template:
+            raise ValueError("Template generation returned empty result")
+
+        async def save_mappings():
+            if result.saved_mappings is not None:
+                return
+            mappings = [m.model_dump(mode="json", exclude={"data_type"}) for m in result.mappings or []]
+            if mappings:
+                await self.projects_client.bulk_create_mappings(job.project_id, mappings)
+            result.saved_mappings = len(mappings)
+            self.store.save(job, request)
+
+        async def save_template():
+            if result.template_file_id is not None:
+                return
+            saved = await self.files_client.upload_file(
+                project_id=job.project_id,
+                file_name="generated_template.vm",
+                content=result.template.encode("utf-8"),
+                file_type="VM_TEMPLATE",
+                uploaded_by=request.uploaded_by
+            )
+            result.template_file_id = saved.get("id")
+            self.store.save(job, request)
+
+        # Маппинги и шаблон сохраняются одновременно, статус - после обоих
+        outcomes = await asyncio.gather(save_mappings(), save_template(), return_exceptions=True)
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                raise outcome
+        await self.projects_client.update_project_status(job.project_id, "COMPLETED")
+
+        return {"template_file_id": result.template_file_id, "mappings_count": result.saved_mappings}
+
+    async def _test_data(self, request: GenerationJobRequest) -> Optional[Dict[str, Any]]:
+        if request.test_data or not request.test_data_file_id or not request.include_preview:
+            return request.test_data
+
+        spool = await self.files_client.download_to_spool(request.test_data_file_id)
+        try:
+            return json.load(spool)
+        except ValueError:
+            raise ValueError("Test data file is not valid JSON")
+        finally:
+            spool.close()
+
+    async def _publish(
+        self,
+        job: GenerationJob,
+        event: str,
+        stage: Optional[JobStage] = None,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None
+    ):
+        done = sum(1 for s in job.stages if s.status in (StageStatus.COMPLETED, StageStatus.SKIPPED))
+        await self.publisher.publish(job.room, {
+            "type": "generation_job",
+            "event": event,
+            "job_id": job.job_id,
+            "project_id": job.project_id,
+            "status": job.status.value,
+            "stage": stage.name if stage else None,
+            "progress": {"completed": done, "total": len(job.stages)},
+            "result": result,
+            "error": error,
+        })
+
+
+generation_jobs = GenerationJobManager(
+    store=JobStore(settings.JOBS_DIR, settings.JOB_TTL_SECONDS),
+    publisher=progress_publisher,
+    executor=pipeline_executor,
+    files_client=FilesClient(),
+    projects_client=ProjectsClient(),
+    max_concurrent=settings.JOB_MAX_CONCURRENT
+)
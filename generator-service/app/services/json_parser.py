@@ -1,5 +1,8 @@
 import json
-from typing import List, Dict, Any, Optional
+import os
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+import ijson
+from ijson.common import ObjectBuilder
 from jsonschema import ValidationError as JsonSchemaValidationError
 from app.schemas import JsonField, ParsedJsonSchema, DataType
 
@@ -14,6 +17,12 @@ class JsonSchemaParser:
     - Сложные схемы ЕПГУ (screens + components)
     """
     
+    # Экраны и служебные компоненты (не поля формы)
+    EXCLUDED_COMPONENT_TYPES = {"QUESTION", "INFO", "UNIQUE", "CUSTOM", "QuestionScr"}
+    
+    # Глубина запасного поиска компонентов ЕПГУ
+    DEEP_MAX_DEPTH = 10
+    
     def parse(self, file_content: str) -> ParsedJsonSchema:
         """
         Парсинг JSON-схемы
@@ -30,7 +39,7 @@ class JsonSchemaParser:
             data = json.loads(file_content)
             
             # Определяем формат схемы и извлекаем поля
-            fields = self.extract_fields(data)
+            fields, orphans = self._extract(data)
             
             # Конвертируем version в строку (может быть int или str)
             version = data.get("version")
@@ -40,13 +49,60 @@ class JsonSchemaParser:
             return ParsedJsonSchema(
                 fields=fields,
                 total_fields=len(fields),
-                schema_version=version
+                schema_version=version,
+                orphan_components=orphans
             )
         except json.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON format: {str(e)}")
         except Exception as e:
             raise ValueError(f"Error parsing JSON schema: {str(e)}")
     
+    def parse_stream(self, source: Union[str, os.PathLike, BinaryIO]) -> ParsedJsonSchema:
+        """
+        Потоковый парсинг JSON-схемы из файла или бинарного потока
+
+        Args:
+            source: Путь к файлу или бинарный поток
+
+        Returns:
+            ParsedJsonSchema с извлеченными полями
+        """
+        stream = _JsonFieldStream(self)
+        fields = list(stream.iter_fields(source))
+
+        return ParsedJsonSchema(
+            fields=fields,
+            total_fields=len(fields),
+            schema_version=stream.version,
+            orphan_components=stream.orphans
+        )
+
+    def iter_fields(
+        self,
+        source: Union[str, os.PathLike, BinaryIO],
+        prefix: str = "$request"
+    ) -> Iterator[JsonField]:
+        """
+        Потоковое извлечение полей (ijson)
+
+        Документ читается событиями, в памяти держится только текущий
+        элемент массива верхнего уровня (компонент ЕПГУ, поле fields,
+        свойство properties). Отличия от parse:
+        - формат определяется по первому встреченному ключу screens/service,
+          fields или properties;
+        - компоненты ЕПГУ раскладываются по экранам после чтения всего
+          документа (в памяти держатся готовые поля, а не компоненты); если
+          экраны ни на что не ссылаются, поля отдаются сразу.
+
+        Args:
+            source: Путь к файлу или бинарный поток
+            prefix: Префикс для JSONPath
+
+        Yields:
+            JsonField по мере чтения
+        """
+        yield from _JsonFieldStream(self, prefix).iter_fields(source)
+
     def extract_fields(self, schema: Dict[str, Any], prefix: str = "$request") -> List[JsonField]:
         """
         Рекурсивное извлечение полей из схемы
@@ -63,11 +119,15 @@ class JsonSchemaParser:
         Returns:
             Список полей
         """
+        return self._extract(schema, prefix)[0]
+    
+    def _extract(self, schema: Dict[str, Any], prefix: str = "$request") -> Tuple[List[JsonField], List[str]]:
+        """Поля схемы и ID компонентов ЕПГУ без ссылок с экранов"""
         fields = []
         
         # 1. Проверяем формат ЕПГУ (screens + components)
         if "screens" in schema or "service" in schema:
-            fields = self._extract_epgu_fields(schema, prefix)
+            return self._extract_epgu_fields(schema, prefix)
         
         # 2. Формат с явным списком полей
         elif "fields" in schema:
@@ -83,7 +143,7 @@ class JsonSchemaParser:
                 if field:
                     fields.append(field)
         
-        return fields
+        return fields, []
     
     def _parse_field(self, field_data: Dict[str, Any], prefix: str) -> JsonField:
         """Парсинг поля из формата ЕПГУ"""
@@ -132,124 +192,120 @@ class JsonSchemaParser:
         }
         return type_mapping.get(type_str.lower(), DataType.STRING)
     
-    def _extract_epgu_fields(self, schema: Dict[str, Any], prefix: str) -> List[JsonField]:
+    def _extract_epgu_fields(self, schema: Dict[str, Any], prefix: str) -> Tuple[List[JsonField], List[str]]:
         """
         Извлечение полей из формата ЕПГУ
         
         Формат ЕПГУ содержит:
-        - screens[] с component IDs
-        - Отдельный список компонентов с полным описанием
+        - screens[] с ID компонентов экрана (components)
+        - Отдельные списки компонентов с полным описанием (applicationFields)
+        
+        Документ обходится один раз (явный стек вместо рекурсии): компоненты
+        списков верхнего уровня собираются по ID (первый экземпляр), заодно
+        запоминаются кандидаты запасного глубокого поиска. Полями становятся
+        компоненты, на которые ссылаются экраны, и элементы их повторяющихся
+        групп, в порядке экранов; остальные возвращаются как orphans.
         
         Args:
             schema: Схема ЕПГУ
             prefix: Префикс для path
             
         Returns:
-            Список извлеченных полей
+            Tuple (поля, ID компонентов без ссылок с экранов)
         """
-        fields = []
-        components_dict = {}
-        
-        # Ищем все компоненты в схеме (они могут быть в разных местах)
-        # Обычно они идут после screens как отдельный массив элементов
-        
-        # Способ 1: Прямой поиск компонентов в корне (после screens)
-        if isinstance(schema, dict):
-            for key, value in schema.items():
-                if isinstance(value, list):
-                    for item in value:
-                        if isinstance(item, dict) and "id" in item and "type" in item:
-                            # Это похоже на компонент
-                            comp_id = item.get("id")
-                            if comp_id:
-                                components_dict[comp_id] = item
-        
-        # Способ 2: Собираем компоненты из первых элементов после screens
-        # В ЕПГУ файлах компоненты идут как отдельный массив
-        screens = schema.get("screens", [])
-        
-        # Находим все уникальные component IDs из screens
-        component_ids = set()
-        for screen in screens:
-            for comp_id in screen.get("components", []):
-                component_ids.add(comp_id)
+        layout = _EpguLayout()
+        for screen in schema.get("screens") or []:
+            if isinstance(screen, dict):
+                layout.add_screen(screen)
         
-        # Создаем поля из найденных компонентов
-        for comp_id, component in components_dict.items():
-            # Извлекаем информацию о поле
-            field_type = self._map_component_type(component.get("type", "string"))
-            label = component.get("label") or component.get("name")
+        # Стек (узел, глубина, элемент списка верхнего уровня)
+        deep: List[Dict[str, Any]] = []
+        stack: List[Tuple[Any, int, bool]] = [(schema, 0, False)]
+        while stack:
+            node, depth, top_item = stack.pop()
             
-            # Получаем дополнительную информацию из attrs
-            attrs = component.get("attrs") or {}
-            required = component.get("required", False) or (attrs.get("required", False) if isinstance(attrs, dict) else False)
-            
-            field = JsonField(
-                id=comp_id,
-                label=label,
-                type=field_type,
-                required=required,
-                path=f"{prefix}.{comp_id}",
-                description=component.get("description")
-            )
-            fields.append(field)
+            if isinstance(node, dict):
+                if "id" in node and "type" in node:
+                    if top_item and node.get("id"):
+                        layout.add_component(
+                            node["id"],
+                            self._component_field(node["id"], node, prefix),
+                            self._group_children(node)
+                        )
+                    deep.append(node)
+                if depth < self.DEEP_MAX_DEPTH:
+                    # Экраны разобраны отдельно; обратный порядок - обход в порядке документа
+                    stack.extend(
+                        (value, depth + 1, False) for key, value in reversed(list(node.items()))
+                        if key != "screens" and isinstance(value, (dict, list))
+                    )
+            elif isinstance(node, list) and depth < self.DEEP_MAX_DEPTH:
+                stack.extend(
+                    (item, depth + 1, depth == 1) for item in reversed(node)
+                    if isinstance(item, (dict, list))
+                )
         
-        # Если не нашли компонентов стандартным способом, пробуем более агрессивный поиск
-        if not fields:
-            fields = self._deep_search_components(schema, prefix)
+        # Компонентов в списках нет - запасной глубокий поиск
+        if not layout.components:
+            seen = set()
+            fields = []
+            for data in deep:
+                field = self._deep_component_field(data, prefix)
+                if field and field.id not in seen:
+                    seen.add(field.id)
+                    fields.append(field)
+            return fields, []
         
-        return fields
+        return layout.resolve()
     
-    def _deep_search_components(self, data: Any, prefix: str, depth: int = 0, max_depth: int = 10) -> List[JsonField]:
-        """
-        Глубокий рекурсивный поиск компонентов в структуре
+    def _component_field(self, comp_id: str, component: Dict[str, Any], prefix: str) -> JsonField:
+        """Поле из компонента ЕПГУ"""
+        # Извлекаем информацию о поле
+        field_type = self._map_component_type(component.get("type", "string"))
+        label = component.get("label") or component.get("name")
         
-        Args:
-            data: Данные для поиска
-            prefix: Префикс пути
-            depth: Текущая глубина
-            max_depth: Максимальная глубина поиска
-            
-        Returns:
-            Список найденных полей
-        """
-        if depth > max_depth:
-            return []
+        # Получаем дополнительную информацию из attrs
+        attrs = component.get("attrs") or {}
+        required = component.get("required", False) or (attrs.get("required", False) if isinstance(attrs, dict) else False)
         
-        fields = []
+        return JsonField(
+            id=comp_id,
+            label=label,
+            type=field_type,
+            required=required,
+            path=f"{prefix}.{comp_id}",
+            description=component.get("description")
+        )
+    
+    @staticmethod
+    def _group_children(component: Dict[str, Any]) -> List[str]:
+        """ID компонентов повторяющейся группы (attrs.components)"""
+        attrs = component.get("attrs")
+        children = attrs.get("components") if isinstance(attrs, dict) else None
+        if not isinstance(children, list):
+            return []
+        return [child for child in children if isinstance(child, str)]
+    
+    def _deep_component_field(self, data: Dict[str, Any], prefix: str) -> Optional[JsonField]:
+        """Поле из компонента, найденного глубоким поиском (None для экранов и служебных)"""
+        comp_id = data.get("id")
+        comp_type = data.get("type")
         
-        if isinstance(data, dict):
-            # Если это похоже на компонент
-            if "id" in data and "type" in data:
-                comp_id = data.get("id")
-                comp_type = data.get("type")
-                
-                # Исключаем экраны и служебные компоненты
-                excluded_types = {"QUESTION", "INFO", "UNIQUE", "CUSTOM", "QuestionScr"}
-                if comp_type not in excluded_types:
-                    label = data.get("label") or data.get("name")
-                    field_type = self._map_component_type(comp_type)
-                    
-                    field = JsonField(
-                        id=comp_id,
-                        label=label,
-                        type=field_type,
-                        required=data.get("required", False),
-                        path=f"{prefix}.{comp_id}",
-                        description=data.get("description")
-                    )
-                    fields.append(field)
-            
-            # Рекурсивно обходим вложенные объекты
-            for key, value in data.items():
-                if key not in ["screens"]:  # Не проваливаемся в screens повторно
-                    fields.extend(self._deep_search_components(value, prefix, depth + 1, max_depth))
+        # Исключаем экраны и служебные компоненты
+        if comp_type in self.EXCLUDED_COMPONENT_TYPES:
+            return None
         
-        elif isinstance(data, list):
-            for item in data:
-                fields.extend(self._deep_search_components(item, prefix, depth + 1, max_depth))
+        label = data.get("label") or data.get("name")
+        field_type = self._map_component_type(comp_type)
         
-        return fields
+        return JsonField(
+            id=comp_id,
+            label=label,
+            type=field_type,
+            required=data.get("required", False),
+            path=f"{prefix}.{comp_id}",
+            description=data.get("description")
+        )
     
     def _map_component_type(self, comp_type: str) -> DataType:
         """
@@ -325,3 +381,280 @@ class JsonSchemaParser:
         
         return True
 
+
+class _EpguLayout:
+    """
+    Компоненты ЕПГУ и ссылки на них с экранов
+
+    Общая часть parse и потокового парсинга: компоненты копятся по ID
+    (первый экземпляр) в виде готовых полей, ссылки - в порядке экранов.
+    resolve раскладывает поля по экранам и повторяющимся группам.
+    """
+
+    def __init__(self):
+        self.screens: List[Tuple[Optional[str], List[str]]] = []
+        self.components: Dict[str, Tuple[JsonField, List[str]]] = {}
+
+    @property
+    def has_references(self) -> bool:
+        return any(refs for _, refs in self.screens)
+
+    def add_screen(self, screen: Dict[str, Any]):
+        refs = screen.get("components") or []
+        self.screens.append((screen.get("id"), [ref for ref in refs if isinstance(ref, str)]))
+
+    def add_component(self, comp_id: str, field: JsonField, children: List[str]) -> bool:
+        """Добавление компонента (False - компонент с таким ID уже есть)"""
+        if comp_id in self.components:
+            return False
+        self.components[comp_id] = (field, children)
+        return True
+
+    def resolve(self) -> Tuple[List[JsonField], List[str]]:
+        """
+        Поля в порядке экранов и компоненты без ссылок
+
+        Компонент экрана идет вместе с элементами своей повторяющейся
+        группы (attrs.components, с вложенностью). Если экраны не
+        ссылаются ни на один найденный компонент, поля - все компоненты
+        в порядке документа.
+
+        Returns:
+            Tuple (поля, ID компонентов без ссылок с экранов)
+        """
+        placed: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        for screen_id, refs in self.screens:
+            for ref in refs:
+                stack: List[Tuple[str, Optional[str]]] = [(ref, None)]
+                while stack:
+                    comp_id, group = stack.pop()
+                    if comp_id in placed or comp_id not in self.components:
+                        continue
+                    placed[comp_id] = (screen_id, group)
+                    children = self.components[comp_id][1]
+                    stack.extend((child, comp_id) for child in reversed(children))
+
+        if not placed:
+            return [field for field, _ in self.components.values()], []
+
+        fields = [
+            self.components[comp_id][0].model_copy(update={"screen": screen_id, "group": group})
+            for comp_id, (screen_id, group) in placed.items()
+        ]
+        orphans = [comp_id for comp_id in self.components if comp_id not in placed]
+        return fields, orphans
+
+
+class _JsonFieldStream:
+    """
+    Извлечение полей по событиям ijson
+
+    Компоненты ЕПГУ, экраны и поля fields/properties собираются
+    ObjectBuilder по одному. Для запасного глубокого поиска одновременно
+    отслеживаются только скалярные ключи открытых объектов.
+
+    Компоненты ЕПГУ копятся в _EpguLayout и отдаются в конце документа.
+    Если экраны уже прочитаны и ни на что не ссылаются, раскладывать нечего:
+    компоненты отдаются сразу, по мере чтения.
+    """
+
+    # Ключи компонента, нужные глубокому поиску
+    DEEP_KEYS = {"id", "type", "label", "name", "required", "description"}
+    DEEP_MAX_DEPTH = JsonSchemaParser.DEEP_MAX_DEPTH
+
+    SCALAR_EVENTS = {"string", "number", "boolean", "null"}
+
+    def __init__(self, parser: JsonSchemaParser, prefix: str = "$request"):
+        self.parser = parser
+        self.prefix = prefix
+        self.version: Optional[str] = None
+        self.orphans: List[str] = []
+
+        self._mode: Optional[str] = None  # epgu | fields | properties
+        self._layout = _EpguLayout()
+        self._screens = False  # Читается список screens
+        self._unreferenced = False  # Экраны прочитаны, ссылок нет - поля отдаются сразу
+        self._seen_ids = set()  # ID отданных сразу компонентов
+        self._pending: List[Tuple[str, Dict[str, Any]]] = []
+        self._deep_fields: List[Tuple[int, JsonField]] = []
+
+    def iter_fields(self, source: Union[str, os.PathLike, BinaryIO]) -> Iterator[JsonField]:
+        try:
+            if isinstance(source, (str, os.PathLike)):
+                with open(source, "rb") as stream:
+                    yield from self._run(stream)
+            else:
+                yield from self._run(source)
+        except ijson.JSONError as e:
+            raise ValueError(f"Invalid JSON format: {str(e)}")
+
+    def _run(self, stream: BinaryIO) -> Iterator[JsonField]:
+        containers: List[str] = []
+        top_key: Optional[str] = None
+        property_name: Optional[str] = None
+
+        builder: Optional[ObjectBuilder] = None
+        builder_level = 0
+
+        # Глубокий поиск: открытые объекты [порядковый номер, ключ, скаляры] или None
+        deep_stack: List[Optional[list]] = []
+        deep_seq = 0
+        screens_level: Optional[int] = None
+
+        for _, event, value in ijson.parse(stream, use_float=True):
+            level = len(containers)
+
+            # ---- Верхний уровень документа ----
+            if level == 1 and event == "map_key":
+                top_key = value
+                yield from self._on_top_key(value)
+            elif level == 1 and top_key == "version" and event in self.SCALAR_EVENTS:
+                self.version = str(value) if value is not None else None
+            elif level == 2 and top_key == "properties" and event == "map_key":
+                property_name = value
+
+            # ---- Элементы массивов верхнего уровня / свойства ----
+            if builder is None and level == 2 and event == "start_map":
+                builder = ObjectBuilder()
+                builder_level = level
+            if builder is not None:
+                builder.event(event, value)
+
+            # ---- Глубокий поиск ----
+            if event == "map_key":
+                record = deep_stack[-1] if deep_stack else None
+                if record is not None:
+                    record[1] = value
+                if value == "screens" and screens_level is None:
+                    screens_level = level
+                elif screens_level == level:
+                    screens_level = None
+            elif event in self.SCALAR_EVENTS:
+                record = deep_stack[-1] if deep_stack and containers[-1] == "map" else None
+                if record is not None and record[1] in self.DEEP_KEYS:
+                    record[2][record[1]] = value
+
+            if event == "start_map":
+                tracked = level <= self.DEEP_MAX_DEPTH and (
+                    screens_level is None or level <= screens_level
+                )
+                deep_stack.append([deep_seq, None, {}] if tracked else None)
+                deep_seq += 1
+                containers.append("map")
+            elif event == "start_array":
+                containers.append("array")
+            elif event == "end_array":
+                containers.pop()
+            elif event == "end_map":
+                containers.pop()
+                record = deep_stack.pop()
+                if record is not None and not self._has_components and self._mode in (None, "epgu"):
+                    self._on_deep_object(record)
+                if screens_level is not None and len(containers) < screens_level:
+                    screens_level = None
+
+                if builder is not None and len(containers) == builder_level:
+                    item = builder.value
+                    builder = None
+                    yield from self._on_item(top_key, property_name, containers, item)
+
+                    # Компоненты найдены - запасной глубокий поиск не понадобится
+                    if self._has_components and self._deep_fields:
+                        self._deep_fields = []
+
+        if self._mode != "epgu":
+            return
+
+        if self._has_components:
+            if not self._unreferenced:
+                fields, self.orphans = self._layout.resolve()
+                yield from fields
+            return
+
+        # Компоненты не найдены - результаты глубокого поиска в порядке документа
+        seen = set()
+        for _, field in sorted(self._deep_fields, key=lambda item: item[0]):
+            if field.id not in seen:
+                seen.add(field.id)
+                yield field
+
+    def _on_top_key(self, key: str) -> Iterator[JsonField]:
+        """Определение формата по первому ключу-признаку, конец списка экранов"""
+        if self._screens and self._mode == "epgu" and not self._layout.has_references:
+            # Экраны без ссылок: накопленные компоненты отдаются, дальше - сразу
+            self._unreferenced = True
+            self._seen_ids = set(self._layout.components)
+            for field, _ in self._layout.components.values():
+                yield field
+            self._layout.components = {}
+        self._screens = key == "screens" and not self._unreferenced
+
+        if self._mode is not None:
+            return
+
+        if key in ("screens", "service"):
+            self._mode = "epgu"
+            for comp_id, component in self._pending:
+                yield from self._component(comp_id, component)
+            self._pending = []
+        elif key in ("fields", "properties"):
+            self._mode = key
+            self._pending = []
+
+    def _on_item(
+        self,
+        top_key: Optional[str],
+        property_name: Optional[str],
+        containers: List[str],
+        item: Dict[str, Any]
+    ) -> Iterator[JsonField]:
+        """Обработка собранного элемента массива или свойства верхнего уровня"""
+        if containers == ["map", "map"] and top_key == "properties":
+            if self._mode == "properties" and property_name is not None:
+                field = self.parser._parse_property(property_name, item, self.prefix)
+                if field:
+                    yield field
+            return
+
+        if containers != ["map", "array"]:
+            return
+
+        if self._mode == "fields" and top_key == "fields":
+            field = self.parser._parse_field(item, self.prefix)
+            if field:
+                yield field
+            return
+
+        if top_key == "screens":
+            if self._mode == "epgu":
+                self._layout.add_screen(item)
+            return
+
+        if "id" in item and "type" in item and item.get("id"):
+            if self._mode == "epgu":
+                yield from self._component(item["id"], item)
+            elif self._mode is None:
+                self._pending.append((item["id"], item))
+
+    def _component(self, comp_id: str, component: Dict[str, Any]) -> Iterator[JsonField]:
+        if self._unreferenced:
+            if comp_id not in self._seen_ids:
+                self._seen_ids.add(comp_id)
+                yield self.parser._component_field(comp_id, component, self.prefix)
+            return
+
+        field = self.parser._component_field(comp_id, component, self.prefix)
+        self._layout.add_component(comp_id, field, self.parser._group_children(component))
+
+    @property
+    def _has_components(self) -> bool:
+        return bool(self._layout.components or self._seen_ids)
+
+    def _on_deep_object(self, record: list):
+        """Закрытый объект-кандидат глубокого поиска"""
+        seq, _, scalars = record
+        if "id" not in scalars or "type" not in scalars:
+            return
+        field = self.parser._deep_component_field(scalars, self.prefix)
+        if field:
+            self._deep_fields.append((seq, field))
@@ -0,0 +1,112 @@
+import hashlib
+from typing import Callable, Optional, Tuple, TypeVar
+from pydantic import BaseModel
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.services.compact import CompactJsonSchema, CompactXsdSchema
+
+ParsedSchema = TypeVar("ParsedSchema", bound=BaseModel)
+
+
+class ParseCache:
+    """
+    Кэш результатов парсинга схем по хэшу содержимого
+
+    BFF многократно отправляет одни и те же файлы проекта (parse-files,
+    generate-and-save, /projects/full). Ключ - MD5 содержимого в UTF-8,
+    тот же, что files-service хранит в поле checksum, поэтому клиент может
+    передать checksum и избавить сервис от хэширования.
+
+    Закэшированные схемы (pipeline хранит компактное представление,
+    CompactJsonSchema/CompactXsdSchema) разделяются между запросами и не
+    должны изменяться вызывающим кодом.
+    """
+
+    def __init__(self, max_bytes: int, max_entries: Optional[int] = None):
+        self._cache = LRUCache(max_bytes=max_bytes, max_entries=max_entries)
+
+    @staticmethod
+    def content_hash(file_content: str) -> str:
+        """MD5 содержимого (как checksum в files-service)"""
+        return hashlib.md5(file_content.encode("utf-8")).hexdigest()
+
+    def make_key(self, kind: str, file_content: str, checksum: Optional[str] = None) -> str:
+        """
+        Ключ кэша: вид схемы + хэш содержимого
+
+        Args:
+            kind: Вид схемы ("json" или "xsd")
+            file_content: Содержимое файла
+            checksum: MD5 из files-service (если известен)
+        """
+        if checksum:
+            return self.checksum_key(kind, checksum)
+        return f"{kind}:{self.content_hash(file_content)}"
+
+    @staticmethod
+    def checksum_key(kind: str, checksum: str) -> str:
+        """Ключ кэша по MD5 из files-service (без содержимого файла)"""
+        return f"{kind}:{checksum.lower()}"
+
+    def get(self, key: str):
+        """Распарсенная схема по ключу кэша или None"""
+        return self._cache.get(key)
+
+    def put(self, key: str, parsed):
+        """Сохранение распарсенной схемы под ключом"""
+        self._cache.put(key, parsed, self._estimate_size(parsed))
+
+    def get_or_parse(
+        self,
+        kind: str,
+        file_content: str,
+        parse: Callable[[str], ParsedSchema],
+        checksum: Optional[str] = None
+    ) -> Tuple[ParsedSchema, str]:
+        """
+        Результат парсинга из кэша или свежий парсинг
+
+        Ошибки парсинга (ValueError) не кэшируются.
+
+        Args:
+            kind: Вид схемы ("json" или "xsd")
+            file_content: Содержимое файла
+            parse: Функция парсинга (JsonSchemaParser.parse / XsdSchemaParser.parse)
+            checksum: MD5 из files-service (если известен)
+
+        Returns:
+            Tuple (распарсенная схема, ключ кэша)
+        """
+        key = self.make_key(kind, file_content, checksum)
+
+        cached = self.get(key)
+        if cached is not None:
+            return cached, key
+
+        parsed = parse(file_content)
+        self.put(key, parsed)
+        return parsed, key
+
+    def stats(self):
+        return self._cache.stats()
+
+    def clear(self):
+        self._cache.clear()
+
+    @staticmethod
+    def _estimate_size(parsed) -> int:
+        """
+        Оценка занимаемой памяти
+
+        Компактная схема - размер столбцов и строк пула, модель - размер
+        JSON представления x2 (объекты Python)
+        """
+        if isinstance(parsed, (CompactJsonSchema, CompactXsdSchema)):
+            return parsed.nbytes()
+        return 2 * len(parsed.model_dump_json())
+
+
+parse_cache = ParseCache(
+    max_bytes=settings.PARSE_CACHE_MAX_BYTES,
+    max_entries=settings.PARSE_CACHE_MAX_ENTRIES
+)
@@ -0,0 +1,251 @@
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.executor import PipelineExecutor, record_timing
+from app.schemas import (
+    AssignmentMode, MappingSuggestion, ParsedJsonSchema, ParsedXsdSchema,
+    RemapSummary, ValidateTemplateResponse
+)
+from app.services.compact import CompactJsonSchema, CompactXsdSchema, compact, expand
+from app.services.field_mapper import FieldMapper
+from app.services.files_client import FilesClient
+from app.services.json_parser import JsonSchemaParser
+from app.services.parse_cache import parse_cache
+from app.services.template_validator import TemplateValidator
+from app.services.vm_generator import VmTemplateGenerator
+from app.services.xsd_parser import XsdSchemaParser
+
+# Сервисы процесса-воркера (в пуле процессов - свои в каждом процессе)
+json_parser = JsonSchemaParser()
+xsd_parser = XsdSchemaParser()
+field_mapper = FieldMapper()
+vm_generator = VmTemplateGenerator()
+validator = TemplateValidator()
+
+
+JsonSchema = Union[ParsedJsonSchema, CompactJsonSchema]
+XsdSchema = Union[ParsedXsdSchema, CompactXsdSchema]
+
+
+# ============ Этапы (выполняются в пуле) ============
+#
+# Результаты парсинга передаются между процессами и хранятся в кэше в
+# компактном виде (CompactJsonSchema/CompactXsdSchema): строки интернированы,
+# столбцы - массивы. Pydantic модели создаются внутри этапа (FieldMapper,
+# генератор) и в обработчиках API при формировании ответа (expand).
+
+def parse_json(file_content: str) -> CompactJsonSchema:
+    return compact(json_parser.parse(file_content))
+
+
+def parse_xsd(file_content: str, includes: Optional[Dict[str, str]] = None) -> CompactXsdSchema:
+    return compact(xsd_parser.parse(file_content, includes=includes))
+
+
+def auto_map(
+    parsed_json: JsonSchema,
+    parsed_xsd: XsdSchema,
+    assignment: Optional[AssignmentMode] = None
+) -> Tuple[List[MappingSuggestion], List[str], List[str]]:
+    return field_mapper.auto_map(expand(parsed_json), expand(parsed_xsd), assignment=assignment)
+
+
+def remap(
+    previous_json: JsonSchema,
+    previous_xsd: XsdSchema,
+    parsed_json: JsonSchema,
+    parsed_xsd: XsdSchema,
+    previous_mappings: List[MappingSuggestion],
+    assignment: Optional[AssignmentMode] = None
+) -> Tuple[List[MappingSuggestion], List[str], List[str], RemapSummary]:
+    return field_mapper.remap(
+        expand(previous_json), expand(previous_xsd), expand(parsed_json), expand(parsed_xsd),
+        previous_mappings, assignment=assignment
+    )
+
+
+def generate_template(
+    mappings: List[MappingSuggestion],
+    xsd_structure: XsdSchema,
+    include_comments: bool = True,
+    include_null_checks: bool = True
+) -> Tuple[str, int]:
+    """VM шаблон и число строк в нем"""
+    template = vm_generator.generate(
+        mappings=mappings,
+        xsd_structure=expand(xsd_structure),
+        include_comments=include_comments,
+        include_null_checks=include_null_checks
+    )
+    return template, vm_generator.count_lines(template)
+
+
+def validate_template(
+    template: str,
+    mappings: Optional[List[MappingSuggestion]] = None
+) -> ValidateTemplateResponse:
+    """Синтаксис шаблона и (если переданы маппинги) использование переменных"""
+    _, all_errors = validator.validate_syntax(template)
+    if mappings is not None:
+        _, var_errors = validator.validate_variables(template, mappings)
+        all_errors = all_errors + var_errors
+
+    errors_only = [e for e in all_errors if e.severity == "error"]
+    warnings_only = [e for e in all_errors if e.severity == "warning"]
+
+    return ValidateTemplateResponse(
+        is_valid=len(errors_only) == 0,
+        errors=errors_only,
+        warnings=warnings_only
+    )
+
+
+def preview(template: str, test_data: Dict[str, Any]) -> str:
+    return validator.test_transformation(template=template, test_data=test_data)
+
+
+# ============ Вызов из обработчиков запросов ============
+
+_PARSERS = {"json": parse_json, "xsd": parse_xsd}
+
+
+async def parse_cached(
+    kind: str,
+    file_content: str,
+    checksum: Optional[str] = None,
+    timings: Optional[Dict[str, float]] = None,
+    executor: Optional[PipelineExecutor] = None,
+    key: Optional[str] = None
+):
+    """
+    Парсинг схемы через кэш (в основном процессе) и пул (при промахе)
+
+    Args:
+        kind: Вид схемы ("json" или "xsd")
+        file_content: Содержимое файла
+        checksum: MD5 из files-service (если известен)
+        timings: Словарь замеров этапов (parse_json / parse_xsd)
+        executor: Пул (по умолчанию pipeline_executor)
+        key: Ключ кэша, если уже вычислен (parse_cache.make_key)
+
+    Returns:
+        CompactJsonSchema / CompactXsdSchema (для ответа API - expand)
+    """
+    stage = f"parse_{kind}"
+    started = time.perf_counter()
+    key = key or parse_cache.make_key(kind, file_content, checksum)
+    cached = parse_cache.get(key)
+    if cached is not None:
+        if timings is not None:
+            record_timing(timings, stage, (time.perf_counter() - started) * 1000)
+        return cached
+
+    parsed = await (executor or pipeline_executor).run(stage, _PARSERS[kind], file_content, timings=timings)
+    parse_cache.put(key, parsed)
+    return parsed
+
+
+def cached_version(kind: str, checksum: Optional[str], current):
+    """
+    Распарсенная предыдущая версия схемы из кэша парсинга
+
+    Returns:
+        current, если checksum не передан или совпадает с текущей версией;
+        пустую схему, если версии нет в кэше (тогда все ее поля или
+        элементы считаются новыми и оцениваются заново)
+    """
+    if checksum is None:
+        return current
+
+    cached = parse_cache.get(parse_cache.checksum_key(kind, checksum))
+    if cached is not None:
+        return cached
+
+    if kind == "json":
+        return compact(ParsedJsonSchema(fields=[], total_fields=0))
+    return compact(ParsedXsdSchema(elements=[], total_elements=0))
+
+
+async def parse_stored(
+    kind: str,
+    file_id: str,
+    files_client: FilesClient,
+    timings: Optional[Dict[str, float]] = None
+) -> Tuple[Union[CompactJsonSchema, CompactXsdSchema], Optional[str]]:
+    """
+    Потоковый парсинг файла из files-service
+
+    Файл скачивается потоком во временный буфер и разбирается без
+    загрузки документа в память (в потоке: буфер не передается в пул
+    процессов). Кэш - по checksum из метаданных.
+
+    Returns:
+        Tuple (CompactJsonSchema / CompactXsdSchema, ключ кэша или None,
+        если у файла нет checksum)
+    """
+    started = time.perf_counter()
+    metadata = await files_client.get_metadata(file_id)
+    checksum = metadata.get("checksum")
+
+    key = parse_cache.checksum_key(kind, checksum) if checksum else None
+    parsed = parse_cache.get(key) if key else None
+    if parsed is None:
+        parse_stream = json_parser.parse_stream if kind == "json" else xsd_parser.parse_stream
+        spool = await files_client.download_to_spool(file_id)
+        try:
+            parsed = compact(await run_in_threadpool(parse_stream, spool))
+        finally:
+            spool.close()
+
+        if key:
+            parse_cache.put(key, parsed)
+
+    if timings is not None:
+        record_timing(timings, f"parse_{kind}", (time.perf_counter() - started) * 1000)
+    return parsed, key
+
+
+def resolve_schema(kind: str, schema: Optional[BaseModel], handle: Optional[str]):
+    """
+    Схема запроса: по handle из кэша парсинга или переданная целиком
+
+    Handle - ключ кэша из ответа /api/parse/* ("json:<md5>", "xsd:<md5>").
+    Схема из кэша передается в этап в компактном виде (без сериализации
+    pydantic модели).
+
+    Raises:
+        HTTPException: 400 - нет ни схемы, ни handle (или handle другого
+            вида); 410 - схемы по handle уже нет в кэше, а сама схема не
+            передана (клиент должен отправить ее заново)
+    """
+    if handle:
+        if not handle.startswith(f"{kind}:"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid {kind} schema handle: {handle}"
+            )
+        cached = parse_cache.get(handle)
+        if cached is not None:
+            return cached
+        if schema is None:
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail=f"Schema handle expired: {handle}"
+            )
+
+    if schema is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Either the {kind} schema or its handle is required"
+        )
+    return schema
+
+
+pipeline_executor = PipelineExecutor(
+    workers=settings.EXECUTOR_WORKERS,
+    max_queue=settings.EXECUTOR_MAX_QUEUE,
+    mode=settings.EXECUTOR_MODE
+)
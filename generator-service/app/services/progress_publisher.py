@@ -0,0 +1,39 @@
+from typing import Any, Dict
+import httpx
+from app.core.config import settings
+from app.core.http_clients import http_clients
+
+
+class ProgressPublisher:
+    """
+    Публикация событий в комнаты websocket-service
+
+    Прогресс - вспомогательная информация: ошибки доставки не прерывают
+    генерацию (клиент всегда может запросить состояние задачи по ID).
+    События идут через общий клиент websocket-service (http_clients).
+    """
+
+    def __init__(self):
+        self.websocket_service_url = settings.WEBSOCKET_SERVICE_URL
+        # Рассылка в комнаты - внутренний API websocket-service
+        self.headers = {"X-Internal-Token": settings.INTERNAL_API_TOKEN} if settings.INTERNAL_API_TOKEN else {}
+
+    async def publish(self, room: str, message: Dict[str, Any]) -> bool:
+        """
+        Отправка сообщения всем участникам комнаты
+
+        Returns:
+            True, если websocket-service принял сообщение
+        """
+        try:
+            response = await http_clients.client("websocket").post(
+                f"{self.websocket_service_url}/rooms/{room}/broadcast",
+                json=message,
+                headers=self.headers
+            )
+            return response.status_code < 400
+        except httpx.HTTPError:
+            return False
+
+
+progress_publisher = ProgressPublisher()
@@ -0,0 +1,45 @@
+from typing import Any, Dict, List
+import httpx
+from fastapi import HTTPException, status
+from app.core.config import settings
+from app.core.http_clients import http_clients
+
+
+class ProjectsClient:
+    """Клиент projects-service (сохранение результата фоновой генерации в проект)"""
+
+    def __init__(self):
+        self.projects_service_url = settings.PROJECTS_SERVICE_URL
+
+    async def bulk_create_mappings(self, project_id: str, mappings: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Массовое создание маппингов проекта"""
+        return await self._request(
+            "POST", "/mappings/bulk", json=mappings, params={"project_id": project_id}
+        )
+
+    async def update_project_status(self, project_id: str, project_status: str) -> Dict[str, Any]:
+        """Смена статуса проекта"""
+        return await self._request("PUT", f"/projects/{project_id}", json={"status": project_status})
+
+    async def _request(self, method: str, path: str, **kwargs) -> Dict[str, Any]:
+        try:
+            response = await http_clients.client("projects").request(
+                method, f"{self.projects_service_url}{path}", **kwargs
+            )
+        except httpx.RequestError as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Cannot connect to projects service: {str(e)}"
+            )
+
+        if response.status_code == 404:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Project not found"
+            )
+        if response.status_code >= 400:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Projects service error: {response.text}"
+            )
+        return response.json()
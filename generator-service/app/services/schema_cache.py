@@ -0,0 +1,122 @@
+import hashlib
+import threading
+from typing import Any, BinaryIO, Callable, Dict, Optional
+from lxml import etree
+from app.core.cache import LRUCache
+from app.core.config import settings
+
+
+class CompiledSchema:
+    """
+    Скомпилированная XSD схема из кэша
+
+    etree.XMLSchema хранит error_log последней валидации в самом объекте,
+    поэтому validate на общей схеме выполняется под lock записи.
+    """
+
+    def __init__(self, schema: etree.XMLSchema, key: str, source_size: int):
+        self.schema = schema
+        self.key = key
+        self.source_size = source_size
+        self.lock = threading.Lock()
+
+
+class SchemaCache:
+    """
+    Кэш скомпилированных XSD схем (etree.XMLSchema) для валидации XML
+
+    Ключ - MD5 текста схемы (как checksum в files-service), поэтому схема,
+    загруженная по file_id, и та же схема, присланная текстом, - одна
+    запись. Одновременные запросы одной схемы компилируют ее один раз:
+    компиляция идет под lock конкретного ключа.
+    """
+
+    # Скомпилированная схема в памяти заметно больше исходного текста
+    SIZE_FACTOR = 10
+
+    def __init__(
+        self,
+        max_bytes: int,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None
+    ):
+        self._cache = LRUCache(max_bytes=max_bytes, max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self._compile_locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    @staticmethod
+    def checksum_key(checksum: str) -> str:
+        """Ключ кэша по MD5 схемы (checksum из files-service)"""
+        return f"xsd:{checksum.lower()}"
+
+    def get(self, key: str) -> Optional[CompiledSchema]:
+        """Скомпилированная схема по ключу кэша или None"""
+        return self._cache.get(key)
+
+    def get_or_compile(self, xsd_schema: str) -> CompiledSchema:
+        """
+        Скомпилированная схема по тексту XSD
+
+        Raises:
+            etree.XMLSyntaxError: XSD не является корректным XML
+            etree.XMLSchemaParseError: Некорректная XSD схема
+        """
+        data = xsd_schema.encode("utf-8")
+        key = self.checksum_key(hashlib.md5(data).hexdigest())
+        return self._get_or_compile(key, lambda: etree.fromstring(data), len(data))
+
+    def get_or_compile_stream(self, source: BinaryIO, checksum: Optional[str] = None) -> CompiledSchema:
+        """
+        Скомпилированная схема из бинарного потока (файл из files-service)
+
+        Args:
+            source: Поток с XSD (читается с текущей позиции)
+            checksum: MD5 файла из files-service; без него хэш считается по потоку
+        """
+        if not checksum:
+            start = source.tell()
+            digest = hashlib.md5()
+            for block in iter(lambda: source.read(1024 * 1024), b""):
+                digest.update(block)
+            checksum = digest.hexdigest()
+            source.seek(start)
+
+        start = source.tell()
+        size = source.seek(0, 2) - start
+        source.seek(start)
+        return self._get_or_compile(self.checksum_key(checksum), lambda: etree.parse(source), size)
+
+    def stats(self):
+        return self._cache.stats()
+
+    def clear(self):
+        self._cache.clear()
+
+    def _get_or_compile(self, key: str, load: Callable[[], Any], source_size: int) -> CompiledSchema:
+        compiled = self._cache.get(key)
+        if compiled is not None:
+            return compiled
+
+        with self._locks_guard:
+            lock = self._compile_locks.setdefault(key, threading.Lock())
+
+        try:
+            with lock:
+                # Пока ждали lock, схему мог скомпилировать другой запрос
+                if key in self._cache:
+                    compiled = self._cache.get(key)
+                if compiled is None:
+                    compiled = CompiledSchema(etree.XMLSchema(load()), key, source_size)
+                    self._cache.put(key, compiled, self.SIZE_FACTOR * source_size)
+                return compiled
+        finally:
+            with self._locks_guard:
+                if self._compile_locks.get(key) is lock and not lock.locked():
+                    del self._compile_locks[key]
+
+
+schema_cache = SchemaCache(
+    max_bytes=settings.SCHEMA_CACHE_MAX_BYTES,
+    max_entries=settings.SCHEMA_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.SCHEMA_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,83 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Set
+from app.schemas import JsonField, XmlElement
+
+
+def element_key(element: XmlElement) -> str:
+    """Ключ XML элемента между версиями схемы (XPath, без него - имя)"""
+    return element.path or element.name
+
+
+@dataclass
+class SchemaDiff:
+    """
+    Изменения JSON полей и целевых XML элементов между версиями схем
+
+    Поля сравниваются по id, элементы - по element_key. Изменением
+    считается любое отличие атрибутов, от которых зависит оценка
+    схожести или маппинг (label, описание, тип, путь).
+    """
+    added_fields: Set[str] = field(default_factory=set)
+    changed_fields: Set[str] = field(default_factory=set)
+    removed_fields: Set[str] = field(default_factory=set)
+    added_elements: Set[str] = field(default_factory=set)
+    changed_elements: Set[str] = field(default_factory=set)
+    removed_elements: Set[str] = field(default_factory=set)
+
+    @property
+    def fresh_elements(self) -> Set[str]:
+        """Элементы, оценок по которым в предыдущем маппинге нет"""
+        return self.added_elements | self.changed_elements
+
+    @property
+    def stale_elements(self) -> Set[str]:
+        """Элементы, прежние оценки по которым недействительны"""
+        return self.removed_elements | self.changed_elements
+
+    @property
+    def is_empty(self) -> bool:
+        return not (
+            self.added_fields or self.changed_fields or self.removed_fields
+            or self.added_elements or self.changed_elements or self.removed_elements
+        )
+
+
+def diff_schemas(
+    previous_fields: List[JsonField],
+    fields: List[JsonField],
+    previous_elements: List[XmlElement],
+    elements: List[XmlElement]
+) -> SchemaDiff:
+    """
+    Сравнение двух версий JSON полей и XML элементов
+
+    Args:
+        previous_fields: Поля предыдущей JSON схемы
+        fields: Поля новой JSON схемы
+        previous_elements: Целевые элементы предыдущей XSD схемы
+        elements: Целевые элементы новой XSD схемы
+
+    Returns:
+        SchemaDiff
+    """
+    diff = SchemaDiff()
+
+    diff.added_fields, diff.changed_fields, diff.removed_fields = _diff(
+        {f.id: f for f in previous_fields},
+        {f.id: f for f in fields}
+    )
+    diff.added_elements, diff.changed_elements, diff.removed_elements = _diff(
+        {element_key(e): e for e in previous_elements},
+        {element_key(e): e for e in elements}
+    )
+    return diff
+
+
+def _diff(previous: Dict[str, object], current: Dict[str, object]):
+    added = current.keys() - previous.keys()
+    removed = previous.keys() - current.keys()
+    changed = {
+        key for key in current.keys() & previous.keys()
+        if current[key] != previous[key]
+    }
+    return set(added), changed, set(removed)
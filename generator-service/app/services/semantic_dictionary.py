@@ -0,0 +1,243 @@
+import json
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from app.core.config import settings
+from app.services.features import normalize_name
+
+# Каталог словарей по умолчанию (поставляется с сервисом)
+DEFAULT_DICTIONARY_DIR = Path(__file__).parent.parent / "data" / "semantic"
+
+_TOKEN = re.compile(r'\w+')
+_CYRILLIC = re.compile(r'[а-яё]')
+
+# Окончания русских слов (от длинных к коротким) для легкого стемминга
+_RU_ENDINGS = sorted({
+    "иями", "ями", "ами", "ией", "иях",
+    "ого", "его", "ому", "ему", "ыми", "ими", "ых", "их",
+    "ах", "ях", "ов", "ев", "ей", "ий", "ый", "ой", "ая", "яя",
+    "ое", "ее", "ые", "ие", "ую", "юю", "ом", "ем", "ам", "ям",
+    "ия", "ья", "ию", "ью", "ии",
+    "а", "я", "о", "е", "ы", "и", "у", "ю", "ь", "й",
+}, key=len, reverse=True)
+
+# Минимальная длина основы после отсечения окончания
+_MIN_STEM = 3
+
+# Сколько соседних латинских токенов склеивается при поиске составных
+# терминов (LastName -> "last name" -> "lastname")
+_MAX_COMPOUND = 4
+
+
+def stem(token: str) -> str:
+    """
+    Основа слова: у русских слов отсекается окончание
+
+    Легкий стеммер без словаря: "фамилия", "фамилии", "фамилией" -> "фамил";
+    короткие слова ("имя", "пол") не меняются. Латиница возвращается как есть.
+    """
+    if not _CYRILLIC.search(token):
+        return token
+    token = token.replace("ё", "е")
+    for ending in _RU_ENDINGS:
+        if token.endswith(ending) and len(token) - len(ending) >= _MIN_STEM:
+            return token[:-len(ending)]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Основы слов текста (camelCase и разделители разбиваются)"""
+    return [stem(token) for token in _TOKEN.findall(normalize_name(text))]
+
+
+class SemanticDictionary:
+    """
+    Скомпилированный словарь семантических соответствий
+
+    Концепт - набор терминов на русском и английском ("фамилия",
+    "lastname", "surname"). Термины индексируются по основам слов:
+    однословные - в словаре основа -> концепты, многословные - в
+    списке фраз по первой основе. Текст (label поля, имя или описание
+    элемента) разбивается на основы один раз, поиск концептов - по
+    индексу, без перебора словаря. Поле и элемент семантически связаны,
+    если у них есть общий концепт.
+    """
+
+    def __init__(self, concepts: Dict[str, Iterable[str]], version: str = "builtin"):
+        """
+        Args:
+            concepts: Концепт -> термины
+            version: Метка версии (для статистики и перезагрузки)
+        """
+        self.concepts = list(concepts.keys())
+        self.version = version
+
+        self._terms: Dict[str, Set[int]] = {}
+        self._phrases: Dict[str, List[Tuple[Tuple[str, ...], int]]] = {}
+        self.term_count = 0
+
+        for concept_id, concept in enumerate(self.concepts):
+            for term in {concept, *concepts[concept]}:
+                stems = tuple(tokenize(term))
+                if not stems:
+                    continue
+                self.term_count += 1
+                if len(stems) == 1:
+                    self._terms.setdefault(stems[0], set()).add(concept_id)
+                else:
+                    self._phrases.setdefault(stems[0], []).append((stems, concept_id))
+                    # Составной латинский термин пишется и слитно (e-mail -> email)
+                    if all(not _CYRILLIC.search(s) for s in stems):
+                        self._terms.setdefault("".join(stems), set()).add(concept_id)
+
+    def concepts_of(self, text: Optional[str]) -> FrozenSet[int]:
+        """ID концептов, термины которых встречаются в тексте"""
+        if not text:
+            return frozenset()
+
+        stems = tokenize(text)
+        found: Set[int] = set()
+        for i, token in enumerate(stems):
+            found.update(self._terms.get(token, ()))
+
+            for phrase, concept_id in self._phrases.get(token, ()):
+                if tuple(stems[i:i + len(phrase)]) == phrase:
+                    found.add(concept_id)
+
+            # Составные латинские имена: last + name -> lastname
+            compound = token
+            for j in range(i + 1, min(i + _MAX_COMPOUND, len(stems))):
+                compound += stems[j]
+                found.update(self._terms.get(compound, ()))
+
+        return frozenset(found)
+
+    @classmethod
+    def load(cls, base: Dict[str, List[str]], directory: Optional[Path]) -> "SemanticDictionary":
+        """
+        Словарь из встроенных соответствий и файлов терминов
+
+        Файлы - *.json в каталоге, в одном из форматов:
+        {"концепт": ["термин", ...]} или
+        {"concepts": [{"id": "концепт", "terms": ["термин", ...]}]}.
+        Термины одного концепта из разных файлов объединяются.
+
+        Raises:
+            ValueError: Файл не является словарем терминов
+        """
+        concepts: Dict[str, List[str]] = {key: list(terms) for key, terms in base.items()}
+        files = sorted(directory.glob("*.json")) if directory and directory.is_dir() else []
+
+        for path in files:
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except ValueError as e:
+                raise ValueError(f"Invalid dictionary file {path.name}: {e}")
+
+            if isinstance(data, dict) and isinstance(data.get("concepts"), list):
+                entries = [(item["id"], item.get("terms", [])) for item in data["concepts"]]
+            elif isinstance(data, dict):
+                entries = list(data.items())
+            else:
+                raise ValueError(f"Invalid dictionary file {path.name}: expected an object")
+
+            for concept, terms in entries:
+                if not isinstance(terms, list):
+                    raise ValueError(f"Invalid dictionary file {path.name}: terms of '{concept}' must be a list")
+                concepts.setdefault(str(concept).lower(), []).extend(str(t).lower() for t in terms)
+
+        return cls(concepts, version=_signature(files))
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "version": self.version,
+            "concepts": len(self.concepts),
+            "terms": self.term_count,
+        }
+
+
+def _signature(files: List[Path]) -> str:
+    """Версия набора файлов: имена, размеры и время изменения"""
+    if not files:
+        return "builtin"
+    parts = []
+    for path in files:
+        stat = path.stat()
+        parts.append(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}")
+    return "|".join(parts)
+
+
+class SemanticDictionaryRegistry:
+    """
+    Текущий словарь с перезагрузкой без рестарта
+
+    Каталог с файлами терминов проверяется не чаще раза в
+    reload_interval секунд; если файлы изменились, словарь
+    перестраивается. Каждый процесс пула проверяет каталог сам,
+    поэтому новые термины доходят и до воркеров. Ошибочный файл не
+    ломает маппинг: остается предыдущая версия словаря.
+    """
+
+    def __init__(self, base: Dict[str, List[str]], directory: Optional[Path], reload_interval: float):
+        """
+        Args:
+            base: Встроенные соответствия (концепт -> термины)
+            directory: Каталог файлов терминов (None - только встроенные)
+            reload_interval: Период проверки файлов, с (0 - при каждом обращении)
+        """
+        self.base = base
+        self.directory = directory
+        self.reload_interval = reload_interval
+        self.last_error: Optional[str] = None
+
+        self._lock = threading.Lock()
+        self._dictionary: Optional[SemanticDictionary] = None
+        self._checked_at = 0.0
+
+    def current(self) -> SemanticDictionary:
+        """Актуальный словарь (перезагружается, если файлы изменились)"""
+        now = time.monotonic()
+        if self._dictionary is not None and now - self._checked_at < self.reload_interval:
+            return self._dictionary
+
+        with self._lock:
+            if self._dictionary is None or now - self._checked_at >= self.reload_interval:
+                self._checked_at = now
+                if self._dictionary is None or self._dictionary.version != self._version():
+                    self._reload()
+        return self._dictionary
+
+    def reload(self) -> SemanticDictionary:
+        """Принудительная перезагрузка словаря"""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            self._reload()
+        return self._dictionary
+
+    def stats(self) -> Dict[str, object]:
+        stats = dict(self.current().stats())
+        stats["directory"] = str(self.directory) if self.directory else None
+        stats["last_error"] = self.last_error
+        return stats
+
+    def _version(self) -> str:
+        if not self.directory or not self.directory.is_dir():
+            return "builtin"
+        return _signature(sorted(self.directory.glob("*.json")))
+
+    def _reload(self):
+        try:
+            self._dictionary = SemanticDictionary.load(self.base, self.directory)
+            self.last_error = None
+        except (OSError, ValueError, KeyError) as e:
+            self.last_error = str(e)
+            if self._dictionary is None:
+                self._dictionary = SemanticDictionary(self.base)
+
+
+def create_registry(base: Dict[str, List[str]]) -> SemanticDictionaryRegistry:
+    """Реестр словаря по настройкам сервиса"""
+    directory = Path(settings.SEMANTIC_DICTIONARY_DIR) if settings.SEMANTIC_DICTIONARY_DIR else DEFAULT_DICTIONARY_DIR
+    return SemanticDictionaryRegistry(base, directory, settings.SEMANTIC_DICTIONARY_RELOAD_SECONDS)
@@ -1,8 +1,9 @@
 from typing import List, Dict, Any
 import re
 from lxml import etree
-from jinja2 import Environment, TemplateSyntaxError
 from app.schemas import ValidationError, MappingSuggestion
+from app.services.schema_cache import CompiledSchema, schema_cache
+from app.services.velocity_engine import DateTool, velocity_engine
 
 class TemplateValidator:
     """
@@ -91,6 +92,47 @@ class TemplateValidator:
             xml_output: Сгенерированный XML
             xsd_schema: XSD схема для валидации
             
+        Returns:
+            Tuple (is_valid, errors)
+        """
+        try:
+            compiled = schema_cache.get_or_compile(xsd_schema)
+        except etree.XMLSyntaxError as e:
+            return False, [ValidationError(
+                line=e.lineno,
+                message=f"XML syntax error: {str(e)}",
+                severity="error"
+            )]
+        except Exception as e:
+            return False, [ValidationError(
+                message=f"Validation error: {str(e)}",
+                severity="error"
+            )]
+        
+        return self.validate_compiled(xml_output, compiled)
+    
+    def validate_compiled(self, xml_output: str, compiled: CompiledSchema) -> tuple[bool, List[ValidationError]]:
+        """
+        Валидация выходного XML против схемы из SchemaCache
+        
+        Args:
+            xml_output: Сгенерированный XML
+            compiled: Скомпилированная схема (разделяется между запросами)
+            
+        Returns:
+            Tuple (is_valid, errors)
+        """
+        with compiled.lock:
+            return self.validate_against(xml_output, compiled.schema)
+    
+    def validate_against(self, xml_output: str, schema: etree.XMLSchema) -> tuple[bool, List[ValidationError]]:
+        """
+        Валидация выходного XML против скомпилированной XSD схемы
+        
+        Args:
+            xml_output: Сгенерированный XML
+            schema: Скомпилированная схема (не используется другими потоками)
+            
         Returns:
             Tuple (is_valid, errors)
         """
@@ -100,10 +142,6 @@ class TemplateValidator:
             # Парсим XML
             xml_doc = etree.fromstring(xml_output.encode('utf-8'))
             
-            # Парсим XSD схему
-            xsd_doc = etree.fromstring(xsd_schema.encode('utf-8'))
-            schema = etree.XMLSchema(xsd_doc)
-            
             # Валидация
             is_valid = schema.validate(xml_doc)
             
@@ -142,17 +180,26 @@ class TemplateValidator:
         Returns:
             Результат трансформации (XML)
         """
-        # Преобразуем Velocity синтаксис в Jinja2 (для тестирования)
-        jinja_template = self._convert_velocity_to_jinja(template)
-        
+        # Шаблон компилируется один раз (кэш по хэшу), затем рендерится
         try:
-            env = Environment(autoescape=False)
-            tmpl = env.from_string(jinja_template)
-            result = tmpl.render(request=test_data)
-            return result
+            compiled = velocity_engine.compile(template)
+            return compiled.render(self.build_context(test_data))
         except Exception as e:
             raise ValueError(f"Template rendering failed: {str(e)}")
     
+    @staticmethod
+    def build_context(test_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Контекст рендеринга для тестовых данных
+        
+        Данные доступны как $request.<поле> (так читает сгенерированный
+        шаблон) и как переменные верхнего уровня ($c43 в шаблонах ЕПГУ).
+        """
+        context: Dict[str, Any] = dict(test_data) if isinstance(test_data, dict) else {}
+        context["request"] = test_data
+        context.setdefault("dateTool", DateTool())
+        return context
+    
     def _check_velocity_syntax(self, template: str) -> List[ValidationError]:
         """Проверка базового синтаксиса Velocity"""
         errors = []
@@ -256,26 +303,3 @@ class TemplateValidator:
         used.update(matches2)
         
         return used
-    
-    def _convert_velocity_to_jinja(self, template: str) -> str:
-        """Конвертация Velocity синтаксиса в Jinja2 для тестирования"""
-        jinja = template
-        
-        # #set($var = $value) -> {% set var = value %}
-        jinja = re.sub(r'#set\s*\(\s*\$(\w+)\s*=\s*\$request\.(\w+)\s*\)',
-                      r'{% set \1 = request.\2 %}', jinja)
-        
-        # #if($var) -> {% if var %}
-        jinja = re.sub(r'#if\s*\(\s*\$(\w+)\s*\)', r'{% if \1 %}', jinja)
-        
-        # #end -> {% endif %}
-        jinja = re.sub(r'#end', r'{% endif %}', jinja)
-        
-        # ${var} и $!{var} -> {{ var }}
-        jinja = re.sub(r'\$!?\{(\w+)\}', r'{{ \1 }}', jinja)
-        
-        # Убираем комментарии ##
-        jinja = re.sub(r'##.*?\n', '\n', jinja)
-        
-        return jinja
-
@@ -0,0 +1,1224 @@
+import hashlib
+import re
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from app.core.cache import LRUCache
+from app.core.config import settings
+
+
+class VelocitySyntaxError(ValueError):
+    """Ошибка синтаксиса VM-шаблона"""
+
+    def __init__(self, message: str, line: Optional[int] = None):
+        self.line = line
+        super().__init__(f"{message} (line {line})" if line else message)
+
+
+# ============ AST ============
+
+@dataclass
+class _Text:
+    text: str
+
+
+@dataclass
+class _Ref:
+    """Ссылка в тексте: $x, $!x, ${x}, $!{x}, $x.a.b(...)"""
+    expr: "_Expr"
+    quiet: bool
+    source: str
+
+
+@dataclass
+class _Set:
+    target: "_Expr"
+    value: "_Expr"
+
+
+@dataclass
+class _If:
+    branches: List[Tuple["_Expr", List[Any]]]
+    otherwise: Optional[List[Any]] = None
+
+
+@dataclass
+class _Foreach:
+    var: str
+    iterable: "_Expr"
+    body: List[Any]
+
+
+@dataclass
+class _Break:
+    pass
+
+
+@dataclass
+class _Stop:
+    pass
+
+
+# Выражения: кортежи (вид, ...)
+#   ("var", name) ("prop", obj, name) ("call", obj, name, args) ("index", obj, key)
+#   ("lit", value) ("str", parts) ("list", items) ("range", start, end) ("map", pairs)
+#   ("not", e) ("neg", e) ("and", a, b) ("or", a, b) ("cmp", op, a, b) ("arith", op, a, b)
+_Expr = tuple
+
+
+# ============ Лексер выражений ============
+
+_IDENT = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_NUMBER = re.compile(r"-?\d+(\.\d+)?")
+_WORD_OPS = {"and": "&&", "or": "||", "not": "!", "eq": "==", "ne": "!=",
+             "lt": "<", "gt": ">", "le": "<=", "ge": ">="}
+_SYMBOL_OPS = ("==", "!=", "<=", ">=", "&&", "||", "..", "<", ">", "!", "+", "-", "*", "/", "%",
+               "=", "(", ")", "[", "]", "{", "}", ",", ":")
+
+
+class _Lexer:
+    """Токены выражений внутри директив и аргументов методов"""
+
+    def __init__(self, source: str, pos: int, line_of: Callable[[int], int]):
+        self.source = source
+        self.pos = pos
+        self.line_of = line_of
+
+    def error(self, message: str) -> VelocitySyntaxError:
+        return VelocitySyntaxError(message, self.line_of(self.pos))
+
+    def skip_ws(self):
+        while self.pos < len(self.source) and self.source[self.pos] in " \t\r\n":
+            self.pos += 1
+
+    def peek(self) -> Tuple[str, Any]:
+        saved = self.pos
+        token = self.next()
+        self.pos = saved
+        return token
+
+    def next(self) -> Tuple[str, Any]:
+        """Следующий токен: (вид, значение); вид - num, str, ident, ref, op, eof"""
+        self.skip_ws()
+        src = self.source
+        if self.pos >= len(src):
+            return ("eof", None)
+
+        ch = src[self.pos]
+        if ch == "$":
+            return ("ref", None)
+
+        if ch in "'\"":
+            end = self.pos + 1
+            while end < len(src) and src[end] != ch:
+                end += 1
+            if end >= len(src):
+                raise self.error("Unterminated string literal")
+            value = src[self.pos + 1:end]
+            self.pos = end + 1
+            return ("str", (ch, value))
+
+        if ch.isdigit():
+            match = _NUMBER.match(src, self.pos)
+            # 1..3 - диапазон, а не дробное число
+            text = match.group(0)
+            if match.group(1) and src.startswith("..", self.pos + len(text) - len(match.group(1))):
+                text = text[:len(text) - len(match.group(1))]
+            self.pos += len(text)
+            return ("num", float(text) if "." in text else int(text))
+
+        match = _IDENT.match(src, self.pos)
+        if match:
+            self.pos = match.end()
+            word = match.group(0)
+            if word in _WORD_OPS:
+                return ("op", _WORD_OPS[word])
+            return ("ident", word)
+
+        for op in _SYMBOL_OPS:
+            if src.startswith(op, self.pos):
+                self.pos += len(op)
+                return ("op", op)
+
+        raise self.error(f"Unexpected character {ch!r}")
+
+    def expect(self, op: str):
+        kind, value = self.next()
+        if kind != "op" or value != op:
+            raise self.error(f"Expected '{op}'")
+
+
+# ============ Парсер ============
+
+class _Parser:
+    """
+    Разбор шаблона в AST
+
+    Текст сканируется до '$' или '#'; аргументы директив и методов
+    разбираются рекурсивным спуском по токенам _Lexer. Строки, где есть
+    только директива (или комментарий ##), удаляются целиком вместе с
+    отступом и переводом строки - как режим space gobbling "lines" в
+    Velocity 2.
+    """
+
+    # Директивы, для которых действует удаление строки
+    LINE_DIRECTIVES = {"set", "if", "elseif", "else", "end", "foreach", "break", "stop"}
+
+    def __init__(self, source: str):
+        self.source = source
+        self.pos = 0
+        # Условие последнего #elseif (передается из _parse_hash в _parse_if)
+        self._pending_condition: Optional[_Expr] = None
+        self._line_starts = [0] + [m.end() for m in re.finditer("\n", source)]
+
+    def line_of(self, pos: int) -> int:
+        lo, hi = 0, len(self._line_starts) - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self._line_starts[mid] <= pos:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo + 1
+
+    def error(self, message: str, pos: Optional[int] = None) -> VelocitySyntaxError:
+        return VelocitySyntaxError(message, self.line_of(self.pos if pos is None else pos))
+
+    def _name(self, match: "re.Match", pos: int) -> str:
+        """Имя переменной, свойства или метода (служебные '_' имена Python запрещены)"""
+        name = match.group(0)
+        if name.startswith("_"):
+            raise self.error(f"Identifier '{name}' is not allowed", pos)
+        return name
+
+    # ---- Шаблон ----
+
+    def parse(self) -> List[Any]:
+        body, terminator = self._parse_block(stop=())
+        if terminator is not None:
+            raise self.error(f"Unexpected #{terminator}")
+        return body
+
+    def _parse_block(self, stop: Tuple[str, ...], opened_at: int = 0) -> Tuple[List[Any], Optional[str]]:
+        """Узлы до одной из директив stop (возвращается ее имя)"""
+        nodes: List[Any] = []
+        text: List[str] = []
+        src = self.source
+
+        def flush():
+            if text:
+                nodes.append(_Text("".join(text)))
+                text.clear()
+
+        while self.pos < len(src):
+            ch = src[self.pos]
+
+            if ch == "\\" and self.pos + 1 < len(src) and src[self.pos + 1] in "$#":
+                # \$x и \#if выводятся как текст
+                start = self.pos + 1
+                self.pos += 2
+                while self.pos < len(src) and (src[self.pos].isalnum() or src[self.pos] in "_{}!"):
+                    self.pos += 1
+                text.append(src[start:self.pos])
+                continue
+
+            if ch == "$":
+                ref = self._parse_text_ref()
+                if ref is None:
+                    text.append(ch)
+                    self.pos += 1
+                else:
+                    flush()
+                    nodes.append(ref)
+                continue
+
+            if ch == "#":
+                start = self.pos
+                result = self._parse_hash(text)
+                if result is None:
+                    text.append(ch)
+                    self.pos = start + 1
+                    continue
+
+                kind, node = result
+                if kind == "node":
+                    flush()
+                    if node is not None:
+                        nodes.append(node)
+                    continue
+
+                # Завершающая директива блока
+                if node in stop:
+                    flush()
+                    return nodes, node
+                raise self.error(f"Unexpected #{node}", start)
+
+            # Обычный текст до следующего спецсимвола
+            end = self.pos + 1
+            while end < len(src) and src[end] not in "$#\\":
+                end += 1
+            text.append(src[self.pos:end])
+            self.pos = end
+
+        flush()
+        if stop:
+            raise self.error("Missing #end", opened_at)
+        return nodes, None
+
+    def _parse_hash(self, text: List[str]):
+        """
+        Директива или комментарий после '#'
+
+        Returns:
+            None - не директива (выводится как текст);
+            ("node", узел или None) - директива/комментарий;
+            ("stop", имя) - #elseif/#else/#end, завершающие блок
+        """
+        src = self.source
+        start = self.pos
+
+        if src.startswith("##", start):
+            end = src.find("\n", start)
+            end = len(src) if end == -1 else end + 1
+            self._gobble_indent(text, start)
+            self.pos = end
+            return ("node", None)
+
+        if src.startswith("#*", start):
+            end = src.find("*#", start + 2)
+            if end == -1:
+                raise self.error("Unterminated block comment")
+            self.pos = end + 2
+            self._gobble_line(text, start)
+            return ("node", None)
+
+        if src.startswith("#[[", start):
+            end = src.find("]]#", start + 3)
+            if end == -1:
+                raise self.error("Unterminated literal block")
+            self.pos = end + 3
+            return ("node", _Text(src[start + 3:end]))
+
+        braced = src.startswith("#{", start)
+        name_start = start + (2 if braced else 1)
+        match = re.compile(r"[A-Za-z]+").match(src, name_start)
+        if not match:
+            return None
+        name = match.group(0)
+        self.pos = match.end()
+        if braced:
+            if not src.startswith("}", self.pos):
+                return None
+            self.pos += 1
+
+        if name not in self.LINE_DIRECTIVES:
+            return None
+
+        if name in ("else", "end", "break", "stop"):
+            self._gobble_line(text, start)
+            if name == "break":
+                return ("node", _Break())
+            if name == "stop":
+                return ("node", _Stop())
+            return ("stop", name)
+
+        # Директивы с аргументами в скобках
+        lexer = _Lexer(src, self.pos, self.line_of)
+        lexer.skip_ws()
+        if not src.startswith("(", lexer.pos):
+            if name == "elseif":
+                raise self.error("Expected '(' after #elseif", start)
+            raise self.error(f"Expected '(' after #{name}", start)
+        lexer.pos += 1
+
+        if name == "set":
+            target = self._parse_expr(lexer)
+            if target[0] not in ("var", "prop", "index"):
+                raise self.error("Invalid #set target", start)
+            lexer.expect("=")
+            value = self._parse_expr(lexer)
+            lexer.expect(")")
+            self.pos = lexer.pos
+            self._gobble_line(text, start)
+            return ("node", _Set(target, value))
+
+        if name == "foreach":
+            kind, _ = lexer.next()
+            if kind != "ref":
+                raise self.error("Expected loop variable in #foreach", start)
+            var = self._parse_ref_expr(lexer)
+            if var[0] != "var":
+                raise self.error("Invalid #foreach variable", start)
+            kind, word = lexer.next()
+            if kind != "ident" or word != "in":
+                raise self.error("Expected 'in' in #foreach", start)
+            iterable = self._parse_expr(lexer)
+            lexer.expect(")")
+            self.pos = lexer.pos
+            self._gobble_line(text, start)
+
+            body, terminator = self._parse_block(stop=("end",), opened_at=start)
+            return ("node", _Foreach(var[1], iterable, body))
+
+        condition = self._parse_expr(lexer)
+        lexer.expect(")")
+        self.pos = lexer.pos
+        self._gobble_line(text, start)
+
+        if name == "elseif":
+            # Продолжение цепочки обрабатывает _parse_if
+            self._pending_condition = condition
+            return ("stop", "elseif")
+
+        return ("node", self._parse_if(condition, start))
+
+    def _parse_if(self, condition: _Expr, opened_at: int) -> _If:
+        node = _If(branches=[])
+        while True:
+            body, terminator = self._parse_block(stop=("elseif", "else", "end"), opened_at=opened_at)
+            node.branches.append((condition, body))
+            if terminator == "elseif":
+                condition = self._pending_condition
+                continue
+            if terminator == "else":
+                node.otherwise, terminator = self._parse_block(stop=("end",), opened_at=opened_at)
+            return node
+
+    # ---- Удаление строк с директивами ----
+
+    def _gobble_indent(self, text: List[str], start: int):
+        """Удаление отступа перед директивой, если она первая в строке"""
+        line_start = self.source.rfind("\n", 0, start) + 1
+        indent = self.source[line_start:start]
+        if indent and not indent.strip(" \t") and text and text[-1].endswith(indent):
+            text[-1] = text[-1][:-len(indent)]
+
+    def _gobble_line(self, text: List[str], start: int):
+        """Строка только с директивой удаляется вместе с отступом и переводом строки"""
+        src = self.source
+        end = self.pos
+        while end < len(src) and src[end] in " \t":
+            end += 1
+        if end < len(src) and src[end] not in "\r\n":
+            return
+
+        line_start = src.rfind("\n", 0, start) + 1
+        if src[line_start:start].strip(" \t"):
+            return
+
+        self._gobble_indent(text, start)
+        if src.startswith("\r\n", end):
+            end += 2
+        elif end < len(src):
+            end += 1
+        self.pos = end
+
+    # ---- Ссылки в тексте ----
+
+    def _parse_text_ref(self) -> Optional[_Ref]:
+        """$x, $!x, ${x}, $!{x}, ${!x}; None если после '$' нет идентификатора"""
+        src = self.source
+        start = self.pos
+        pos = start + 1
+
+        quiet = False
+        if src.startswith("!", pos):
+            quiet = True
+            pos += 1
+        braced = src.startswith("{", pos)
+        if braced:
+            pos += 1
+            # ${!x} - форма, которую выдает VmTemplateGenerator
+            if src.startswith("!", pos):
+                quiet = True
+                pos += 1
+
+        match = _IDENT.match(src, pos)
+        if not match:
+            return None
+
+        expr: _Expr = ("var", self._name(match, pos))
+        pos = match.end()
+        lexer = _Lexer(src, pos, self.line_of)
+        expr = self._parse_trailers(expr, lexer, in_text=True)
+        pos = lexer.pos
+
+        if braced:
+            if not src.startswith("}", pos):
+                return None
+            pos += 1
+
+        self.pos = pos
+        return _Ref(expr, quiet, src[start:pos])
+
+    def _parse_trailers(self, expr: _Expr, lexer: _Lexer, in_text: bool) -> _Expr:
+        """.prop, .method(args), [index] сразу после ссылки"""
+        src = self.source
+        while lexer.pos < len(src):
+            ch = src[lexer.pos]
+            if ch == "." and lexer.pos + 1 < len(src):
+                match = _IDENT.match(src, lexer.pos + 1)
+                if not match:
+                    break
+                name = self._name(match, lexer.pos)
+                lexer.pos = match.end()
+                if src.startswith("(", lexer.pos):
+                    lexer.pos += 1
+                    args = self._parse_args(lexer, ")")
+                    expr = ("call", expr, name, args)
+                else:
+                    expr = ("prop", expr, name)
+            elif ch == "[" and not in_text:
+                lexer.pos += 1
+                key = self._parse_expr(lexer)
+                lexer.expect("]")
+                expr = ("index", expr, key)
+            elif ch == "[" and in_text:
+                # $list[0] в тексте - только если это действительно индекс
+                saved = lexer.pos
+                try:
+                    lexer.pos += 1
+                    key = self._parse_expr(lexer)
+                    lexer.expect("]")
+                    expr = ("index", expr, key)
+                except VelocitySyntaxError:
+                    lexer.pos = saved
+                    break
+            else:
+                break
+        return expr
+
+    def _parse_args(self, lexer: _Lexer, close: str) -> List[_Expr]:
+        args: List[_Expr] = []
+        kind, value = lexer.peek()
+        if kind == "op" and value == close:
+            lexer.next()
+            return args
+        while True:
+            args.append(self._parse_expr(lexer))
+            kind, value = lexer.next()
+            if kind == "op" and value == close:
+                return args
+            if kind != "op" or value != ",":
+                raise lexer.error(f"Expected ',' or '{close}'")
+
+    # ---- Выражения ----
+
+    def _parse_expr(self, lexer: _Lexer) -> _Expr:
+        return self._parse_or(lexer)
+
+    def _parse_or(self, lexer: _Lexer) -> _Expr:
+        left = self._parse_and(lexer)
+        while lexer.peek() == ("op", "||"):
+            lexer.next()
+            left = ("or", left, self._parse_and(lexer))
+        return left
+
+    def _parse_and(self, lexer: _Lexer) -> _Expr:
+        left = self._parse_not(lexer)
+        while lexer.peek() == ("op", "&&"):
+            lexer.next()
+            left = ("and", left, self._parse_not(lexer))
+        return left
+
+    def _parse_not(self, lexer: _Lexer) -> _Expr:
+        if lexer.peek() == ("op", "!"):
+            lexer.next()
+            return ("not", self._parse_not(lexer))
+        return self._parse_cmp(lexer)
+
+    def _parse_cmp(self, lexer: _Lexer) -> _Expr:
+        left = self._parse_add(lexer)
+        kind, value = lexer.peek()
+        if kind == "op" and value in ("==", "!=", "<", ">", "<=", ">="):
+            lexer.next()
+            return ("cmp", value, left, self._parse_add(lexer))
+        return left
+
+    def _parse_add(self, lexer: _Lexer) -> _Expr:
+        left = self._parse_mul(lexer)
+        while True:
+            kind, value = lexer.peek()
+            if kind == "op" and value in ("+", "-"):
+                lexer.next()
+                left = ("arith", value, left, self._parse_mul(lexer))
+            else:
+                return left
+
+    def _parse_mul(self, lexer: _Lexer) -> _Expr:
+        left = self._parse_unary(lexer)
+        while True:
+            kind, value = lexer.peek()
+            if kind == "op" and value in ("*", "/", "%"):
+                lexer.next()
+                left = ("arith", value, left, self._parse_unary(lexer))
+            else:
+                return left
+
+    def _parse_unary(self, lexer: _Lexer) -> _Expr:
+        if lexer.peek() == ("op", "-"):
+            lexer.next()
+            return ("neg", self._parse_unary(lexer))
+        return self._parse_primary(lexer)
+
+    def _parse_primary(self, lexer: _Lexer) -> _Expr:
+        kind, value = lexer.next()
+
+        if kind == "num":
+            return ("lit", value)
+        if kind == "str":
+            quote, text = value
+            if quote == "'":
+                return ("lit", text)
+            return self._parse_interpolated(text, lexer)
+        if kind == "ident":
+            if value == "true":
+                return ("lit", True)
+            if value == "false":
+                return ("lit", False)
+            if value == "null":
+                return ("lit", None)
+            raise lexer.error(f"Unexpected identifier '{value}'")
+        if kind == "ref":
+            return self._parse_ref_expr(lexer)
+        if kind == "op" and value == "(":
+            expr = self._parse_expr(lexer)
+            lexer.expect(")")
+            return expr
+        if kind == "op" and value == "[":
+            if lexer.peek() == ("op", "]"):
+                lexer.next()
+                return ("list", [])
+            first = self._parse_expr(lexer)
+            if lexer.peek() == ("op", ".."):
+                lexer.next()
+                end = self._parse_expr(lexer)
+                lexer.expect("]")
+                return ("range", first, end)
+            items = [first]
+            while True:
+                kind, value = lexer.next()
+                if kind == "op" and value == "]":
+                    return ("list", items)
+                if kind != "op" or value != ",":
+                    raise lexer.error("Expected ',' or ']'")
+                items.append(self._parse_expr(lexer))
+        if kind == "op" and value == "{":
+            pairs = []
+            if lexer.peek() == ("op", "}"):
+                lexer.next()
+                return ("map", pairs)
+            while True:
+                key = self._parse_expr(lexer)
+                lexer.expect(":")
+                pairs.append((key, self._parse_expr(lexer)))
+                kind, value = lexer.next()
+                if kind == "op" and value == "}":
+                    return ("map", pairs)
+                if kind != "op" or value != ",":
+                    raise lexer.error("Expected ',' or '}'")
+
+        raise lexer.error("Unexpected end of expression" if kind == "eof" else f"Unexpected token {value!r}")
+
+    def _parse_ref_expr(self, lexer: _Lexer) -> _Expr:
+        """Ссылка внутри выражения (лексер стоит на '$')"""
+        src = self.source
+        lexer.pos += 1
+        if src.startswith("!", lexer.pos):
+            lexer.pos += 1
+        braced = src.startswith("{", lexer.pos)
+        if braced:
+            lexer.pos += 1
+
+        match = _IDENT.match(src, lexer.pos)
+        if not match:
+            raise lexer.error("Expected variable name after '$'")
+        name = self._name(match, lexer.pos)
+        lexer.pos = match.end()
+        expr = self._parse_trailers(("var", name), lexer, in_text=False)
+
+        if braced:
+            if not src.startswith("}", lexer.pos):
+                raise lexer.error("Expected '}'")
+            lexer.pos += 1
+        return expr
+
+    def _parse_interpolated(self, text: str, lexer: _Lexer) -> _Expr:
+        """Строка в двойных кавычках: ссылки внутри подставляются"""
+        if "$" not in text:
+            return ("lit", text)
+
+        inner = _Parser(text)
+        inner._line_starts = [0]
+        parts: List[Any] = []
+        for node in inner._parse_block(stop=())[0]:
+            if isinstance(node, _Text):
+                parts.append(node.text)
+            elif isinstance(node, _Ref):
+                parts.append(node)
+            else:
+                raise lexer.error("Directives are not allowed inside string literals")
+        return ("str", parts)
+
+
+# ============ Время выполнения ============
+
+class _LoopState:
+    """$foreach внутри цикла"""
+
+    __slots__ = ("index", "size")
+
+    # Свойства, доступные из шаблона
+    FIELDS = frozenset({"index", "size", "count", "hasNext", "first", "last"})
+
+    def __init__(self, size: int):
+        self.index = 0
+        self.size = size
+
+    @property
+    def count(self) -> int:
+        return self.index + 1
+
+    @property
+    def hasNext(self) -> bool:
+        return self.index + 1 < self.size
+
+    @property
+    def first(self) -> bool:
+        return self.index == 0
+
+    @property
+    def last(self) -> bool:
+        return self.index + 1 == self.size
+
+
+class DateTool:
+    """
+    Минимальный аналог $dateTool из шаблонов ЕПГУ
+
+    Шаблоны дат - в формате Java (yyyy-MM-dd, dd.MM.yyyy HH:mm:ss).
+    """
+
+    _JAVA_TO_PYTHON = [("yyyy", "%Y"), ("yy", "%y"), ("MM", "%m"), ("dd", "%d"),
+                       ("HH", "%H"), ("mm", "%M"), ("ss", "%S")]
+
+    def _pattern(self, java_pattern: str) -> str:
+        pattern = java_pattern
+        for java, python in self._JAVA_TO_PYTHON:
+            pattern = pattern.replace(java, python)
+        return pattern
+
+    def toDate(self, pattern: str, value: Any) -> Optional[datetime]:
+        if value is None or isinstance(value, (date, datetime)):
+            return value
+        python_pattern = self._pattern(pattern)
+        text = str(value)
+        # Значения ЕПГУ бывают с хвостом времени ("01.02.2020T00:00:00")
+        for candidate in (text, text[:len(datetime(2000, 1, 1).strftime(python_pattern))]):
+            try:
+                return datetime.strptime(candidate, python_pattern)
+            except ValueError:
+                continue
+        return None
+
+    def format(self, pattern: str, value: Any) -> Optional[str]:
+        if value is None:
+            return None
+        if not isinstance(value, (date, datetime)):
+            return str(value)
+        return value.strftime(self._pattern(pattern))
+
+    def get(self, pattern: str) -> str:
+        return datetime.now().strftime(self._pattern(pattern))
+
+
+# Методы объектов контекста, доступные из шаблона (кроме строк, списков и словарей)
+_OBJECT_METHODS: Dict[type, frozenset] = {
+    DateTool: frozenset({"toDate", "format", "get"}),
+}
+
+
+class _Runtime:
+    """
+    Семантика Velocity для скомпилированного кода
+
+    Шаблоны приходят от клиентов, поэтому доступ ограничен: свойства и
+    индексы - только у словарей, списков, строк и $foreach, методы - из
+    _JAVA_METHODS и _OBJECT_METHODS (произвольные атрибуты Python
+    недоступны).
+    """
+
+    MISSING = object()
+
+    @staticmethod
+    def truth(value: Any) -> bool:
+        # Как directive.if.emptycheck в Velocity 2: null, false, пустые строки
+        # и коллекции, ноль - ложь
+        if value is None or value is False:
+            return False
+        if isinstance(value, (str, list, tuple, dict, set)):
+            return len(value) > 0
+        if isinstance(value, (int, float)):
+            return value != 0
+        return True
+
+    @staticmethod
+    def text(value: Any) -> str:
+        if value is True:
+            return "true"
+        if value is False:
+            return "false"
+        if isinstance(value, str):
+            return value
+        # Коллекции выводятся как toString() в Java
+        if isinstance(value, (list, tuple)):
+            return "[" + ", ".join(_Runtime.text(v) for v in value) + "]"
+        if isinstance(value, dict):
+            return "{" + ", ".join(f"{_Runtime.text(k)}={_Runtime.text(v)}" for k, v in value.items()) + "}"
+        return str(value)
+
+    @staticmethod
+    def prop(obj: Any, name: str) -> Any:
+        if isinstance(obj, dict):
+            return obj.get(name)
+        if isinstance(obj, _LoopState) and name in _LoopState.FIELDS:
+            return getattr(obj, name)
+        return None
+
+    @staticmethod
+    def index(obj: Any, key: Any) -> Any:
+        if not isinstance(obj, (dict, list, tuple, str)):
+            return None
+        try:
+            return obj[key]
+        except (KeyError, IndexError, TypeError):
+            return None
+
+    @classmethod
+    def call(cls, obj: Any, name: str, args: List[Any]) -> Any:
+        if obj is None:
+            return None
+
+        method = _JAVA_METHODS.get(name)
+        if method is not None and isinstance(obj, (str, list, tuple, dict)):
+            try:
+                return method(obj, *args)
+            except (TypeError, ValueError, IndexError, KeyError, AttributeError):
+                return None
+
+        if name == "toString":
+            return cls.text(obj)
+        if name == "equals" and len(args) == 1:
+            return cls.eq(obj, args[0])
+
+        if name in _OBJECT_METHODS.get(type(obj), ()):
+            return getattr(obj, name)(*args)
+        return None
+
+    @classmethod
+    def set_value(cls, ctx: Dict[str, Any], target: _Expr, value: Any, resolve: Callable[[Any], Any]):
+        """Запись для #set($a.b = ...) и #set($a[0] = ...)"""
+        obj = resolve(target[1])
+        if isinstance(obj, dict):
+            key = target[2] if target[0] == "prop" else resolve(target[2])
+            obj[key] = value
+        elif isinstance(obj, list) and target[0] == "index":
+            try:
+                obj[resolve(target[2])] = value
+            except (IndexError, TypeError):
+                pass
+
+    @staticmethod
+    def eq(a: Any, b: Any) -> bool:
+        if a is None or b is None:
+            return a is b
+        if isinstance(a, bool) or isinstance(b, bool):
+            return a is b
+        if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+            return a == b
+        if type(a) is type(b):
+            return a == b
+        # Разные типы сравниваются по строковому представлению
+        return _Runtime.text(a) == _Runtime.text(b)
+
+    @staticmethod
+    def cmp(op: str, a: Any, b: Any) -> bool:
+        if a is None or b is None:
+            return False
+        try:
+            if op == "<":
+                return a < b
+            if op == ">":
+                return a > b
+            if op == "<=":
+                return a <= b
+            return a >= b
+        except TypeError:
+            return False
+
+    @classmethod
+    def arith(cls, op: str, a: Any, b: Any) -> Any:
+        if op == "+" and (isinstance(a, str) or isinstance(b, str)):
+            if a is None or b is None:
+                return None
+            return cls.text(a) + cls.text(b)
+        if not isinstance(a, (int, float)) or not isinstance(b, (int, float)):
+            return None
+        if op == "+":
+            return a + b
+        if op == "-":
+            return a - b
+        if op == "*":
+            return a * b
+        if b == 0:
+            return None
+        if op == "/":
+            return a // b if isinstance(a, int) and isinstance(b, int) else a / b
+        return a % b
+
+    @staticmethod
+    def neg(value: Any) -> Any:
+        return -value if isinstance(value, (int, float)) else None
+
+    @staticmethod
+    def iterable(value: Any) -> list:
+        if value is None:
+            return []
+        if isinstance(value, dict):
+            return list(value.values())
+        if isinstance(value, (str, bytes)):
+            return [value]
+        try:
+            return list(value)
+        except TypeError:
+            return [value]
+
+    @staticmethod
+    def make_range(start: Any, end: Any) -> list:
+        if not isinstance(start, int) or not isinstance(end, int):
+            return []
+        step = 1 if end >= start else -1
+        return list(range(start, end + step, step))
+
+
+def _java_substring(s: str, start: int, end: Optional[int] = None) -> str:
+    return s[start:end] if end is not None else s[start:]
+
+
+_JAVA_METHODS: Dict[str, Callable[..., Any]] = {
+    # Строки, списки и словари
+    "size": lambda o: len(o),
+    "length": lambda o: len(o),
+    "isEmpty": lambda o: len(o) == 0,
+    "get": lambda o, k: o.get(k) if isinstance(o, dict) else o[k],
+    "contains": lambda o, x: x in o,
+    "containsKey": lambda o, k: k in o,
+    "containsValue": lambda o, v: v in o.values(),
+    "keySet": lambda o: list(o.keys()),
+    "values": lambda o: list(o.values()),
+    "indexOf": lambda o, x: o.find(x) if isinstance(o, str) else (o.index(x) if x in o else -1),
+    # Строки
+    "trim": lambda s: s.strip(),
+    "toUpperCase": lambda s: s.upper(),
+    "toLowerCase": lambda s: s.lower(),
+    "substring": _java_substring,
+    "startsWith": lambda s, p: s.startswith(p),
+    "endsWith": lambda s, p: s.endswith(p),
+    "equalsIgnoreCase": lambda s, o: o is not None and s.lower() == str(o).lower(),
+    "replace": lambda s, a, b: s.replace(a, b),
+    "replaceAll": lambda s, a, b: re.sub(a, b, s),
+    "matches": lambda s, p: re.fullmatch(p, s) is not None,
+    "split": lambda s, p: re.split(p, s),
+    "concat": lambda s, o: s + o,
+    "charAt": lambda s, i: s[i],
+}
+
+
+# ============ Компиляция в Python ============
+
+class _CodeGen:
+    """Генерация исходного кода функции render по AST"""
+
+    def __init__(self):
+        self.lines: List[str] = []
+        self.constants: List[Any] = []
+        self._counter = 0
+
+    def const(self, value: Any) -> str:
+        self.constants.append(value)
+        return f"_k[{len(self.constants) - 1}]"
+
+    def emit(self, indent: int, line: str):
+        self.lines.append("    " * indent + line)
+
+    def unique(self, prefix: str) -> str:
+        self._counter += 1
+        return f"{prefix}{self._counter}"
+
+    def compile(self, body: List[Any]) -> str:
+        self.emit(0, "def render(ctx):")
+        self.emit(1, "_out = []")
+        self.emit(1, "_w = _out.append")
+        self.block(body, 1, in_loop=False)
+        self.emit(1, "return ''.join(_out)")
+        return "\n".join(self.lines)
+
+    def block(self, nodes: List[Any], indent: int, in_loop: bool):
+        if not nodes:
+            self.emit(indent, "pass")
+            return
+        for node in nodes:
+            self.node(node, indent, in_loop)
+
+    def node(self, node: Any, indent: int, in_loop: bool):
+        if isinstance(node, _Text):
+            self.emit(indent, f"_w({node.text!r})")
+        elif isinstance(node, _Ref):
+            var = self.unique("_v")
+            self.emit(indent, f"{var} = {self.expr(node.expr)}")
+            if node.quiet:
+                self.emit(indent, f"if {var} is not None: _w(_text({var}))")
+            else:
+                self.emit(indent, f"_w(_text({var}) if {var} is not None else {node.source!r})")
+        elif isinstance(node, _Set):
+            if node.target[0] == "var":
+                self.emit(indent, f"ctx[{node.target[1]!r}] = {self.expr(node.value)}")
+            else:
+                # Вложенные выражения цели вычисляются через _eval
+                self.emit(
+                    indent,
+                    f"_rt.set_value(ctx, {self.const(node.target)}, {self.expr(node.value)}, "
+                    f"lambda e: _eval(e, ctx))"
+                )
+        elif isinstance(node, _If):
+            for i, (condition, body) in enumerate(node.branches):
+                keyword = "if" if i == 0 else "elif"
+                self.emit(indent, f"{keyword} _truth({self.expr(condition)}):")
+                self.block(body, indent + 1, in_loop)
+            if node.otherwise is not None:
+                self.emit(indent, "else:")
+                self.block(node.otherwise, indent + 1, in_loop)
+        elif isinstance(node, _Foreach):
+            items = self.unique("_items")
+            state = self.unique("_loop")
+            saved_var = self.unique("_saved")
+            saved_loop = self.unique("_saved")
+            index = self.unique("_i")
+            self.emit(indent, f"{items} = _rt.iterable({self.expr(node.iterable)})")
+            self.emit(indent, f"{saved_var} = ctx.get({node.var!r}, _MISSING)")
+            self.emit(indent, f"{saved_loop} = ctx.get('foreach', _MISSING)")
+            self.emit(indent, f"{state} = _LoopState(len({items}))")
+            self.emit(indent, f"ctx['foreach'] = {state}")
+            self.emit(indent, f"for {index}, ctx[{node.var!r}] in enumerate({items}):")
+            self.emit(indent + 1, f"{state}.index = {index}")
+            self.emit(indent + 1, f"ctx['velocityCount'] = {index} + 1")
+            self.block(node.body, indent + 1, in_loop=True)
+            # Переменная цикла и $foreach восстанавливаются (как в Velocity 2)
+            for name, saved in ((node.var, saved_var), ("foreach", saved_loop)):
+                self.emit(indent, f"if {saved} is _MISSING: ctx.pop({name!r}, None)")
+                self.emit(indent, f"else: ctx[{name!r}] = {saved}")
+        elif isinstance(node, _Break):
+            self.emit(indent, "break" if in_loop else "return ''.join(_out)")
+        elif isinstance(node, _Stop):
+            self.emit(indent, "return ''.join(_out)")
+
+    def expr(self, e: _Expr) -> str:
+        kind = e[0]
+        if kind == "var":
+            return f"ctx.get({e[1]!r})"
+        if kind == "lit":
+            return repr(e[1])
+        if kind == "prop":
+            return f"_rt.prop({self.expr(e[1])}, {e[2]!r})"
+        if kind == "index":
+            return f"_rt.index({self.expr(e[1])}, {self.expr(e[2])})"
+        if kind == "call":
+            args = ", ".join(self.expr(a) for a in e[3])
+            return f"_rt.call({self.expr(e[1])}, {e[2]!r}, [{args}])"
+        if kind == "str":
+            parts = []
+            for part in e[1]:
+                if isinstance(part, str):
+                    parts.append(repr(part))
+                else:
+                    inner = self.expr(part.expr)
+                    fallback = "''" if part.quiet else repr(part.source)
+                    parts.append(f"_interp({inner}, {fallback})")
+            return "''.join([" + ", ".join(parts) + "])"
+        if kind == "list":
+            return "[" + ", ".join(self.expr(i) for i in e[1]) + "]"
+        if kind == "range":
+            return f"_rt.make_range({self.expr(e[1])}, {self.expr(e[2])})"
+        if kind == "map":
+            return "{" + ", ".join(f"{self.expr(k)}: {self.expr(v)}" for k, v in e[1]) + "}"
+        if kind == "not":
+            return f"(not _truth({self.expr(e[1])}))"
+        if kind == "neg":
+            return f"_rt.neg({self.expr(e[1])})"
+        if kind == "and":
+            return f"(_truth({self.expr(e[1])}) and _truth({self.expr(e[2])}))"
+        if kind == "or":
+            return f"(_truth({self.expr(e[1])}) or _truth({self.expr(e[2])}))"
+        if kind == "cmp":
+            op, a, b = e[1], self.expr(e[2]), self.expr(e[3])
+            if op == "==":
+                return f"_rt.eq({a}, {b})"
+            if op == "!=":
+                return f"(not _rt.eq({a}, {b}))"
+            return f"_rt.cmp({op!r}, {a}, {b})"
+        if kind == "arith":
+            return f"_rt.arith({e[1]!r}, {self.expr(e[2])}, {self.expr(e[3])})"
+        raise VelocitySyntaxError(f"Unknown expression {kind}")
+
+
+def _interp(value: Any, fallback: str) -> str:
+    return _Runtime.text(value) if value is not None else fallback
+
+
+class CompiledTemplate:
+    """
+    Скомпилированный VM-шаблон
+
+    render вызывает сгенерированную Python-функцию; объект неизменяем и
+    может использоваться из нескольких потоков одновременно.
+    """
+
+    def __init__(self, template: str, source_code: str, render_fn: Callable[[Dict[str, Any]], str],
+                 template_hash: str):
+        self.template = template
+        self.source_code = source_code
+        self.template_hash = template_hash
+        self._render = render_fn
+
+    def render(self, context: Dict[str, Any]) -> str:
+        """
+        Рендеринг шаблона
+
+        Args:
+            context: Переменные шаблона (копируется, #set не меняет исходный словарь)
+        """
+        return self._render(dict(context))
+
+    def render_many(self, contexts: Iterable[Dict[str, Any]]) -> Iterator[str]:
+        """Рендеринг для последовательности контекстов (регрессионные прогоны)"""
+        render = self._render
+        for context in contexts:
+            yield render(dict(context))
+
+
+class VelocityEngine:
+    """
+    Компилятор подмножества Apache Velocity
+
+    Поддерживается: $ссылки ($x, $!x, ${x}, $!{x}, пути $a.b.c, методы
+    $a.b(...), индексы $a[0]), #set, #if/#elseif/#else, #foreach ($foreach,
+    $velocityCount), #break, #stop, комментарии ## и #* *#, #[[ ]]#.
+
+    Шаблон разбирается в AST и компилируется в Python-функцию;
+    результаты кэшируются по SHA-256 шаблона.
+    """
+
+    def __init__(self, max_bytes: int, max_entries: Optional[int] = None):
+        self._cache = LRUCache(max_bytes=max_bytes, max_entries=max_entries)
+
+    @staticmethod
+    def template_hash(template: str) -> str:
+        return hashlib.sha256(template.encode("utf-8")).hexdigest()
+
+    def compile(self, template: str) -> CompiledTemplate:
+        """
+        Скомпилированный шаблон (из кэша, если шаблон уже компилировался)
+
+        Raises:
+            VelocitySyntaxError: Ошибка синтаксиса шаблона
+        """
+        key = self.template_hash(template)
+        compiled = self._cache.get(key)
+        if compiled is not None:
+            return compiled
+
+        compiled = self._compile(template, key)
+        # Сгенерированный код примерно в несколько раз больше шаблона
+        self._cache.put(key, compiled, 4 * (len(template) + len(compiled.source_code)))
+        return compiled
+
+    def render(self, template: str, context: Dict[str, Any]) -> str:
+        return self.compile(template).render(context)
+
+    def stats(self):
+        return self._cache.stats()
+
+    def clear(self):
+        self._cache.clear()
+
+    @staticmethod
+    def _compile(template: str, template_hash: str) -> CompiledTemplate:
+        body = _Parser(template).parse()
+
+        codegen = _CodeGen()
+        source_code = codegen.compile(body)
+
+        namespace: Dict[str, Any] = {
+            "_rt": _Runtime,
+            "_truth": _Runtime.truth,
+            "_text": _Runtime.text,
+            "_interp": _interp,
+            "_LoopState": _LoopState,
+            "_MISSING": _Runtime.MISSING,
+            "_k": codegen.constants,
+            "_eval": _evaluate,
+        }
+        exec(compile(source_code, f"<velocity:{template_hash[:12]}>", "exec"), namespace)
+
+        return CompiledTemplate(template, source_code, namespace["render"], template_hash)
+
+
+def _evaluate(e: _Expr, ctx: Dict[str, Any]) -> Any:
+    """Интерпретация выражения (цели #set с путями - редкий случай); семантика как у _CodeGen.expr"""
+    kind = e[0]
+    if kind == "var":
+        return ctx.get(e[1])
+    if kind == "lit":
+        return e[1]
+    if kind == "prop":
+        return _Runtime.prop(_evaluate(e[1], ctx), e[2])
+    if kind == "index":
+        return _Runtime.index(_evaluate(e[1], ctx), _evaluate(e[2], ctx))
+    if kind == "call":
+        return _Runtime.call(_evaluate(e[1], ctx), e[2], [_evaluate(a, ctx) for a in e[3]])
+    if kind == "str":
+        return "".join(
+            part if isinstance(part, str)
+            else _interp(_evaluate(part.expr, ctx), "" if part.quiet else part.source)
+            for part in e[1]
+        )
+    if kind == "list":
+        return [_evaluate(i, ctx) for i in e[1]]
+    if kind == "range":
+        return _Runtime.make_range(_evaluate(e[1], ctx), _evaluate(e[2], ctx))
+    if kind == "map":
+        return {_evaluate(k, ctx): _evaluate(v, ctx) for k, v in e[1]}
+    if kind == "not":
+        return not _Runtime.truth(_evaluate(e[1], ctx))
+    if kind == "neg":
+        return _Runtime.neg(_evaluate(e[1], ctx))
+    if kind == "and":
+        return _Runtime.truth(_evaluate(e[1], ctx)) and _Runtime.truth(_evaluate(e[2], ctx))
+    if kind == "or":
+        return _Runtime.truth(_evaluate(e[1], ctx)) or _Runtime.truth(_evaluate(e[2], ctx))
+    if kind == "cmp":
+        op, a, b = e[1], _evaluate(e[2], ctx), _evaluate(e[3], ctx)
+        if op == "==":
+            return _Runtime.eq(a, b)
+        if op == "!=":
+            return not _Runtime.eq(a, b)
+        return _Runtime.cmp(op, a, b)
+    if kind == "arith":
+        return _Runtime.arith(e[1], _evaluate(e[2], ctx), _evaluate(e[3], ctx))
+    raise VelocitySyntaxError(f"Unknown expression {kind}")
+
+
+velocity_engine = VelocityEngine(
+    max_bytes=settings.TEMPLATE_CACHE_MAX_BYTES,
+    max_entries=settings.TEMPLATE_CACHE_MAX_ENTRIES
+)
@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
 from app.schemas import MappingSuggestion, ParsedXsdSchema, XmlElement, DataType
 
 class VmTemplateGenerator:
@@ -112,8 +112,14 @@ class VmTemplateGenerator:
         if include_comments:
             lines.append("\n## XML output structure")
         
-        # Создаем словарь маппингов для быстрого поиска
-        mapping_dict = {m.xml_element_name: m for m in mappings}
+        # Создаем словарь маппингов для быстрого поиска: по полному пути,
+        # для маппингов без пути - по имени элемента
+        mapping_dict = {}
+        for m in mappings:
+            mapping_dict.setdefault(m.xml_element_name, m)
+        for m in mappings:
+            if m.xml_element_path:
+                mapping_dict[m.xml_element_path] = m
         
         # Строим иерархию элементов
         hierarchy = self._build_hierarchy(xsd_structure.elements)
@@ -155,27 +161,28 @@ class VmTemplateGenerator:
     
     def _generate_element_xml(
         self,
-        element_name: str,
+        element_path: str,
         hierarchy: Dict[str, List[XmlElement]],
         mapping_dict: Dict[str, MappingSuggestion],
         include_null_checks: bool,
         indent: int = 0
     ) -> str:
-        """Рекурсивная генерация XML элемента"""
+        """Рекурсивная генерация XML элемента (иерархия по полному пути)"""
         lines = []
         indent_str = "  " * indent
+        element_name = element_path.rsplit("/", 1)[-1]
         
         # Находим элемент в иерархии
-        children = hierarchy.get(element_name, [])
+        children = hierarchy.get(element_path, [])
         
         if children:
             # Элемент с дочерними элементами
             lines.append(f"{indent_str}<{element_name}>")
             
             for child in children:
-                if child.name in mapping_dict:
+                mapping = self._find_mapping(child.path, child.name, mapping_dict)
+                if mapping:
                     # Элемент с маппингом
-                    mapping = mapping_dict[child.name]
                     child_xml = self._generate_simple_element(
                         mapping,
                         include_null_checks,
@@ -185,7 +192,7 @@ class VmTemplateGenerator:
                 else:
                     # Рекурсивно обрабатываем вложенные элементы
                     child_xml = self._generate_element_xml(
-                        child.name,
+                        child.path,
                         hierarchy,
                         mapping_dict,
                         include_null_checks,
@@ -196,14 +203,30 @@ class VmTemplateGenerator:
             lines.append(f"{indent_str}</{element_name}>")
         else:
             # Конечный элемент
-            if element_name in mapping_dict:
-                mapping = mapping_dict[element_name]
+            mapping = self._find_mapping(element_path, element_name, mapping_dict)
+            if mapping:
                 return self._generate_simple_element(mapping, include_null_checks, indent)
             else:
                 lines.append(f"{indent_str}<{element_name}></{element_name}>")
         
         return "\n".join(lines)
     
+    def _find_mapping(
+        self,
+        element_path: str,
+        element_name: str,
+        mapping_dict: Dict[str, MappingSuggestion]
+    ) -> Optional[MappingSuggestion]:
+        """Маппинг элемента: по полному пути, иначе по имени (маппинги без пути)"""
+        mapping = mapping_dict.get(element_path)
+        if mapping is not None:
+            return mapping
+        
+        mapping = mapping_dict.get(element_name)
+        if mapping is not None and not mapping.xml_element_path:
+            return mapping
+        return None
+    
     def _generate_simple_element(
         self,
         mapping: MappingSuggestion,
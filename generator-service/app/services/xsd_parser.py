@@ -1,40 +1,93 @@
-from typing import List, Dict, Optional
+import os
+from dataclasses import dataclass, field
+from typing import BinaryIO, Callable, Iterator, List, Dict, Optional, Set, Tuple, Union
 from lxml import etree
 from app.schemas import XmlElement, ParsedXsdSchema
 
+# Источник потокового парсинга: путь к файлу или бинарный поток
+StreamSource = Union[str, os.PathLike, BinaryIO]
+
+# XSD namespace
+XSD_NS = "http://www.w3.org/2001/XMLSchema"
+
+
+@dataclass
+class _ElementDecl:
+    """Объявление элемента (xs:element) внутри модели содержимого"""
+    name: Optional[str]
+    type_name: Optional[str] = None
+    type_ref: Optional[str] = None
+    ref: Optional[str] = None
+    min_occurs: int = 1
+    max_occurs: Optional[int] = 1
+    description: Optional[str] = None
+    content: Optional["_ContentModel"] = None
+
+
+@dataclass
+class _ContentModel:
+    """
+    Модель содержимого complexType/group
+
+    particles - объявления элементов и ссылки на группы (имя группы) в
+    порядке документа; base - именованный базовый тип xs:extension.
+    """
+    particles: List[Union[_ElementDecl, str]] = field(default_factory=list)
+    base: Optional[str] = None
+
+
 class XsdSchemaParser:
     """
     Парсер XSD-схем ведомственных систем
-    
+
     Извлекает XML элементы и их структуру из XSD-схемы.
+
+    Документ обходится один раз: глобальные complexType, group и element
+    компилируются в модели содержимого и собираются в таблицу символов.
+    Затем элементы разворачиваются от
+    корневых объявлений с разрешением type, ref, xs:extension и xs:group -
+    каждый элемент выдается один раз со своим полным путем.
     """
-    
+
     # XSD namespace
-    XSD_NS = "http://www.w3.org/2001/XMLSchema"
-    
-    def parse(self, file_content: str) -> ParsedXsdSchema:
+    XSD_NS = XSD_NS
+
+    # Ограничение глубины разворачивания (рекурсивные типы)
+    MAX_DEPTH = 32
+
+    def parse(
+        self,
+        file_content: str,
+        includes: Optional[Dict[str, str]] = None
+    ) -> ParsedXsdSchema:
         """
         Парсинг XSD-схемы
-        
+
         Args:
             file_content: Содержимое XSD файла
-            
+            includes: Содержимое подключаемых схем по schemaLocation
+                (xs:include/xs:import). Не переданные схемы пропускаются.
+
         Returns:
             ParsedXsdSchema с извлеченными элементами
         """
         try:
             # Парсим XML
             root = etree.fromstring(file_content.encode('utf-8'))
-            
+
             # Извлекаем namespace
             namespace = root.get("targetNamespace")
-            
+
+            resolver = None
+            if includes:
+                resolver = lambda location: self._load_include(includes, location)
+
             # Извлекаем элементы
-            elements = self.extract_elements(root)
-            
+            elements = self.extract_elements(root, resolver=resolver)
+
             # Находим корневой элемент
             root_element = self._find_root_element(elements)
-            
+
             return ParsedXsdSchema(
                 elements=elements,
                 total_elements=len(elements),
@@ -45,144 +98,170 @@ class XsdSchemaParser:
             raise ValueError(f"Invalid XSD format: {str(e)}")
         except Exception as e:
             raise ValueError(f"Error parsing XSD schema: {str(e)}")
-    
-    def extract_elements(self, root: etree.Element, parent_path: str = "") -> List[XmlElement]:
+
+    def parse_stream(
+        self,
+        source: StreamSource,
+        includes: Optional[Dict[str, str]] = None
+    ) -> ParsedXsdSchema:
         """
-        Рекурсивное извлечение элементов из XSD
-        
+        Потоковый парсинг XSD-схемы из файла или бинарного потока
+
+        Результат совпадает с parse, но документ целиком в память не
+        загружается (см. iter_elements).
+
         Args:
-            root: Корневой элемент XSD
-            parent_path: Путь родительского элемента
-            
+            source: Путь к файлу или бинарный поток
+            includes: Содержимое подключаемых схем по schemaLocation
+
         Returns:
-            Список XML элементов
+            ParsedXsdSchema с извлеченными элементами
         """
-        elements = []
-        
-        # Ищем все элементы в схеме
-        for element in root.xpath("//xs:element", namespaces={"xs": self.XSD_NS}):
-            xml_element = self._parse_element(element, parent_path)
-            if xml_element:
-                elements.append(xml_element)
-                
-                # Если элемент имеет complexType, парсим вложенные
-                complex_type = element.find(f"{{{self.XSD_NS}}}complexType")
-                if complex_type is not None:
-                    nested_elements = self._parse_complex_type(
-                        complex_type, 
-                        xml_element.name
-                    )
-                    elements.extend(nested_elements)
-        
-        return elements
-    
-    def _parse_element(self, element: etree.Element, parent_path: str = "") -> Optional[XmlElement]:
-        """Парсинг отдельного элемента"""
-        name = element.get("name")
-        if not name:
-            return None
-        
-        # Определяем путь
-        path = f"{parent_path}/{name}" if parent_path else name
-        
-        # Извлекаем атрибуты
-        elem_type = element.get("type")
-        min_occurs = int(element.get("minOccurs", "1"))
-        max_occurs_str = element.get("maxOccurs", "1")
-        
-        # Обработка maxOccurs
-        if max_occurs_str == "unbounded":
-            max_occurs = None
-        else:
-            max_occurs = int(max_occurs_str)
-        
-        # Определяем required
-        required = min_occurs > 0
-        
-        # Извлекаем документацию
-        annotation = element.find(f"{{{self.XSD_NS}}}annotation")
-        description = None
-        if annotation is not None:
-            doc = annotation.find(f"{{{self.XSD_NS}}}documentation")
-            if doc is not None and doc.text:
-                description = doc.text.strip()
-        
-        return XmlElement(
-            name=name,
-            type=elem_type,
-            path=path,
-            required=required,
-            min_occurs=min_occurs,
-            max_occurs=max_occurs,
-            parent=parent_path if parent_path else None,
-            description=description
+        walker, namespace = self._stream_declarations(source, includes)
+        elements = list(walker.expand())
+
+        return ParsedXsdSchema(
+            elements=elements,
+            total_elements=len(elements),
+            root_element=self._find_root_element(elements),
+            namespace=namespace
         )
-    
-    def _parse_complex_type(self, complex_type: etree.Element, parent_name: str) -> List[XmlElement]:
-        """Парсинг вложенных элементов из complexType"""
-        elements = []
-        
-        # Ищем sequence
-        sequence = complex_type.find(f"{{{self.XSD_NS}}}sequence")
-        if sequence is not None:
-            for element in sequence.findall(f"{{{self.XSD_NS}}}element"):
-                xml_element = self._parse_element(element, parent_name)
-                if xml_element:
-                    elements.append(xml_element)
-        
-        # Ищем choice
-        choice = complex_type.find(f"{{{self.XSD_NS}}}choice")
-        if choice is not None:
-            for element in choice.findall(f"{{{self.XSD_NS}}}element"):
-                xml_element = self._parse_element(element, parent_name)
-                if xml_element:
-                    elements.append(xml_element)
-        
-        # Ищем all
-        all_elem = complex_type.find(f"{{{self.XSD_NS}}}all")
-        if all_elem is not None:
-            for element in all_elem.findall(f"{{{self.XSD_NS}}}element"):
-                xml_element = self._parse_element(element, parent_name)
-                if xml_element:
-                    elements.append(xml_element)
-        
-        return elements
-    
+
+    def iter_elements(
+        self,
+        source: StreamSource,
+        includes: Optional[Dict[str, str]] = None
+    ) -> Iterator[XmlElement]:
+        """
+        Потоковое извлечение элементов (lxml.etree.iterparse)
+
+        Каждое объявление верхнего уровня компилируется по событию end и
+        сразу освобождается, поэтому в памяти находятся только модели
+        содержимого, а не дерево документа. Тип может быть объявлен после
+        использования, поэтому элементы выдаются после чтения схемы.
+
+        Args:
+            source: Путь к файлу или бинарный поток
+            includes: Содержимое подключаемых схем по schemaLocation
+
+        Yields:
+            XmlElement в порядке документа (родитель перед детьми)
+        """
+        walker, _ = self._stream_declarations(source, includes)
+        yield from walker.expand()
+
+    def _stream_declarations(
+        self,
+        source: StreamSource,
+        includes: Optional[Dict[str, str]]
+    ) -> Tuple["_SchemaWalker", Optional[str]]:
+        """Таблица символов по событиям iterparse и targetNamespace"""
+        resolver = None
+        if includes:
+            resolver = lambda location: self._load_include(includes, location)
+
+        walker = _SchemaWalker(resolver, self.MAX_DEPTH)
+        namespace = None
+        depth = 0
+
+        try:
+            context = etree.iterparse(
+                source, events=("start", "end"), remove_comments=True, huge_tree=True
+            )
+            for event, node in context:
+                if event == "start":
+                    if depth == 0:
+                        if node.tag != f"{{{self.XSD_NS}}}schema":
+                            raise ValueError("Not a valid XSD schema")
+                        namespace = node.get("targetNamespace")
+                    depth += 1
+                    continue
+
+                depth -= 1
+                if depth != 1:
+                    continue
+
+                # Объявление верхнего уровня прочитано целиком
+                walker.add_declaration(node)
+                node.clear()
+                while node.getprevious() is not None:
+                    del node.getparent()[0]
+        except etree.XMLSyntaxError as e:
+            raise ValueError(f"Invalid XSD format: {str(e)}")
+        except ValueError:
+            raise
+        except Exception as e:
+            raise ValueError(f"Error parsing XSD schema: {str(e)}")
+
+        return walker, namespace
+
+    def _load_include(self, includes: Dict[str, str], location: str) -> Optional[etree._Element]:
+        """Корень подключаемой схемы по schemaLocation (или по имени файла)"""
+        content = includes.get(location)
+        if content is None:
+            content = includes.get(location.replace("\\", "/").rsplit("/", 1)[-1])
+        if content is None:
+            return None
+        return etree.fromstring(content.encode('utf-8'))
+
+    def extract_elements(
+        self,
+        root: etree.Element,
+        parent_path: str = "",
+        resolver: Optional[Callable[[str], Optional[etree._Element]]] = None
+    ) -> List[XmlElement]:
+        """
+        Извлечение элементов из XSD
+
+        Args:
+            root: Корневой элемент XSD (xs:schema)
+            parent_path: Путь, к которому добавляются пути элементов
+            resolver: Загрузка подключаемой схемы по schemaLocation
+
+        Returns:
+            Список XML элементов в порядке документа (родитель перед детьми)
+        """
+        # Таблица символов создается на каждый вызов: парсер - общий объект API
+        return _SchemaWalker(resolver, self.MAX_DEPTH).walk(root, parent_path)
+
     def _find_root_element(self, elements: List[XmlElement]) -> Optional[str]:
-        """Находит корневой элемент (элемент без parent)"""
-        for element in elements:
-            if not element.parent:
+        """Находит корневой элемент (элемент без parent, предпочтительно с дочерними)"""
+        parents = {e.parent for e in elements if e.parent}
+        roots = [e for e in elements if not e.parent]
+
+        for element in roots:
+            if element.path in parents:
                 return element.name
-        return None
-    
+        return roots[0].name if roots else None
+
     def build_hierarchy(self, elements: List[XmlElement]) -> Dict:
         """
         Построение иерархической структуры элементов
-        
+
         Args:
             elements: Список элементов
-            
+
         Returns:
-            Иерархическая структура
+            Иерархическая структура (путь родителя -> дочерние элементы)
         """
         hierarchy = {}
-        
+
         # Группируем по parent
         for element in elements:
             parent = element.parent or "root"
             if parent not in hierarchy:
                 hierarchy[parent] = []
             hierarchy[parent].append(element)
-        
+
         return hierarchy
-    
+
     def validate_schema(self, xsd_content: str) -> bool:
         """
         Валидация XSD схемы
-        
+
         Args:
             xsd_content: Содержимое XSD
-            
+
         Returns:
             True если валидна
         """
@@ -195,3 +274,279 @@ class XsdSchemaParser:
         except Exception as e:
             raise ValueError(f"Invalid XSD schema: {str(e)}")
 
+
+class _SchemaWalker:
+    """
+    Таблица символов и разворачивание элементов одной XSD-схемы
+
+    Объявления верхнего уровня компилируются сразу при добавлении, поэтому
+    после add_declaration узел дерева можно освободить (потоковый режим).
+    """
+
+    XSD_NS = XSD_NS
+
+    def __init__(
+        self,
+        resolver: Optional[Callable[[str], Optional[etree._Element]]],
+        max_depth: int
+    ):
+        self.resolver = resolver
+        self.max_depth = max_depth
+
+        self._type_models: Dict[str, _ContentModel] = {}
+        self._group_models: Dict[str, _ContentModel] = {}
+        self._global_decls: Dict[str, _ElementDecl] = {}
+        self._global_order: List[str] = []
+        self._visited: Set[str] = set()
+
+    def walk(self, root: etree._Element, parent_path: str = "") -> List[XmlElement]:
+        """Элементы схемы от корневых объявлений"""
+        for child in root:
+            self.add_declaration(child)
+        return list(self.expand(parent_path))
+
+    def expand(self, parent_path: str = "") -> Iterator[XmlElement]:
+        """Разворачивание элементов от корневых объявлений (после add_declaration)"""
+        # Корни документа - глобальные элементы, на которые нет ref
+        referenced: Set[str] = set()
+        for model in self._all_models():
+            self._collect_refs(model, referenced)
+        roots = [name for name in self._global_order if name not in referenced] or self._global_order
+
+        for name in roots:
+            yield from self._expand(self._global_decls[name], parent_path, set(), 0)
+
+    # ---- Таблица символов ----
+
+    def add_declaration(self, node: etree._Element):
+        """Компиляция объявления верхнего уровня (и подключаемых схем)"""
+        if not isinstance(node.tag, str):
+            return
+
+        tag = etree.QName(node).localname
+        name = node.get("name")
+
+        if tag == "complexType" and name:
+            self._type_models[name] = self._compile_complex_type(node)
+        elif tag == "group" and name:
+            model = _ContentModel()
+            self._compile_particles(node, model, optional=False)
+            self._group_models[name] = model
+        elif tag == "element" and name:
+            if name not in self._global_decls:
+                self._global_order.append(name)
+            self._global_decls[name] = self._compile_element(node, optional=False)
+        elif tag in ("include", "import", "redefine") and self.resolver:
+            location = node.get("schemaLocation")
+            if not location or location in self._visited:
+                return
+            self._visited.add(location)
+            included = self.resolver(location)
+            if included is not None:
+                for child in included:
+                    self.add_declaration(child)
+
+    def _all_models(self) -> Iterator[_ContentModel]:
+        """Модели всех именованных типов, групп и глобальных элементов"""
+        yield from self._type_models.values()
+        yield from self._group_models.values()
+        for decl in self._global_decls.values():
+            if decl.content:
+                yield decl.content
+
+    def _collect_refs(self, model: _ContentModel, referenced: Set[str]):
+        """Имена глобальных элементов, на которые ссылаются через ref"""
+        for decl in model.particles:
+            if not isinstance(decl, _ElementDecl):
+                continue
+            if decl.ref:
+                referenced.add(self._local_name(decl.ref))
+            if decl.content:
+                self._collect_refs(decl.content, referenced)
+
+    # ---- Компиляция моделей содержимого ----
+
+    def _compile_element(self, element: etree._Element, optional: bool) -> _ElementDecl:
+        """Объявление элемента: атрибуты, документация, inline complexType"""
+        min_occurs = 0 if optional else int(element.get("minOccurs", "1"))
+        max_occurs_str = element.get("maxOccurs", "1")
+
+        # Обработка maxOccurs
+        if max_occurs_str == "unbounded":
+            max_occurs = None
+        else:
+            max_occurs = int(max_occurs_str)
+
+        decl = _ElementDecl(
+            name=element.get("name"),
+            type_name=element.get("type"),
+            type_ref=self._type_ref(element, element.get("type")),
+            ref=element.get("ref"),
+            min_occurs=min_occurs,
+            max_occurs=max_occurs,
+            description=self._documentation(element)
+        )
+
+        complex_type = element.find(f"{{{self.XSD_NS}}}complexType")
+        if complex_type is not None:
+            decl.content = self._compile_complex_type(complex_type)
+
+        return decl
+
+    def _compile_complex_type(self, complex_type: etree._Element) -> _ContentModel:
+        """Модель содержимого complexType (sequence/choice/all, extension, group)"""
+        model = _ContentModel()
+
+        for child in complex_type:
+            if not isinstance(child.tag, str):
+                continue
+            tag = etree.QName(child).localname
+
+            if tag == "complexContent":
+                for derivation in child:
+                    if not isinstance(derivation.tag, str):
+                        continue
+                    kind = etree.QName(derivation).localname
+                    if kind == "extension":
+                        model.base = self._type_ref(derivation, derivation.get("base"))
+                        self._compile_particles(derivation, model, optional=False)
+                    elif kind == "restriction":
+                        # restriction заново перечисляет содержимое базового типа
+                        self._compile_particles(derivation, model, optional=False)
+            elif tag in ("sequence", "choice", "all", "group"):
+                self._compile_particles(complex_type, model, optional=False)
+                break
+
+        return model
+
+    def _compile_particles(self, container: etree._Element, model: _ContentModel, optional: bool):
+        """Частицы sequence/choice/all/group в порядке документа"""
+        for child in container:
+            if not isinstance(child.tag, str):
+                continue
+            tag = etree.QName(child).localname
+
+            if tag == "element":
+                model.particles.append(self._compile_element(child, optional))
+            elif tag == "group" and child.get("ref"):
+                model.particles.append(self._local_name(child.get("ref")))
+            elif tag in ("sequence", "all"):
+                self._compile_particles(child, model, optional or child.get("minOccurs") == "0")
+            elif tag == "choice":
+                # Ветви выбора с несколькими вариантами необязательны
+                branches = [c for c in child if isinstance(c.tag, str)
+                            and etree.QName(c).localname != "annotation"]
+                self._compile_particles(
+                    child, model,
+                    optional or len(branches) > 1 or child.get("minOccurs") == "0"
+                )
+
+    # ---- Разворачивание ----
+
+    def _expand(
+        self,
+        decl: _ElementDecl,
+        parent_path: str,
+        active_types: Set[str],
+        depth: int
+    ) -> Iterator[XmlElement]:
+        """Выдача элемента и (рекурсивно) его содержимого"""
+        if decl.ref:
+            target = self._local_name(decl.ref)
+            referenced = self._global_decls.get(target)
+            if referenced is None:
+                return
+            decl = _ElementDecl(
+                name=referenced.name,
+                type_name=referenced.type_name,
+                type_ref=referenced.type_ref,
+                min_occurs=decl.min_occurs,
+                max_occurs=decl.max_occurs,
+                description=decl.description or referenced.description,
+                content=referenced.content
+            )
+
+        if not decl.name:
+            return
+
+        # Определяем путь
+        path = f"{parent_path}/{decl.name}" if parent_path else decl.name
+
+        yield XmlElement(
+            name=decl.name,
+            type=decl.type_name,
+            path=path,
+            required=decl.min_occurs > 0,
+            min_occurs=decl.min_occurs,
+            max_occurs=decl.max_occurs,
+            parent=parent_path if parent_path else None,
+            description=decl.description
+        )
+
+        if depth >= self.max_depth:
+            return
+
+        # Рекурсивные типы разворачиваются один раз на ветку
+        type_name = decl.type_ref
+        if type_name in active_types:
+            return
+
+        model = decl.content
+        if model is None and type_name:
+            model = self._type_models.get(type_name)
+        if model is None:
+            return
+
+        scope = active_types | {type_name} if type_name else active_types
+        for child in self._flatten(model, scope, set()):
+            yield from self._expand(child, path, scope, depth + 1)
+
+    def _flatten(self, model: _ContentModel, active_types: Set[str], seen: Set[str]) -> List[_ElementDecl]:
+        """Объявления дочерних элементов: базовый тип, затем собственные, группы раскрыты"""
+        children: List[_ElementDecl] = []
+
+        if model.base:
+            base = model.base
+            if base not in seen and base not in active_types:
+                base_model = self._type_models.get(base)
+                if base_model:
+                    children.extend(self._flatten(base_model, active_types, seen | {base}))
+
+        for particle in model.particles:
+            if isinstance(particle, _ElementDecl):
+                children.append(particle)
+                continue
+
+            key = f"group:{particle}"
+            if key in seen:
+                continue
+            group_model = self._group_models.get(particle)
+            if group_model:
+                children.extend(self._flatten(group_model, active_types, seen | {key}))
+
+        return children
+
+    # ---- Вспомогательные ----
+
+    def _documentation(self, element: etree._Element) -> Optional[str]:
+        """Текст xs:annotation/xs:documentation"""
+        annotation = element.find(f"{{{self.XSD_NS}}}annotation")
+        if annotation is not None:
+            doc = annotation.find(f"{{{self.XSD_NS}}}documentation")
+            if doc is not None and doc.text:
+                return doc.text.strip()
+        return None
+
+    @staticmethod
+    def _local_name(qname: str) -> str:
+        """Имя без префикса namespace (soc:AddressType -> AddressType)"""
+        return qname.split(":", 1)[-1]
+
+    def _type_ref(self, node: etree._Element, qname: Optional[str]) -> Optional[str]:
+        """Имя пользовательского типа из QName (None для встроенных типов XSD)"""
+        if not qname:
+            return None
+        prefix = qname.split(":", 1)[0] if ":" in qname else None
+        if node.nsmap.get(prefix) == self.XSD_NS:
+            return None
+        return self._local_name(qname)
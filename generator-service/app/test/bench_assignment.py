@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк режимов назначения FieldMapper.auto_map: greedy vs optimal
+
+- Реальные данные ЕПГУ (JSON схема услуги + XSD ведомства)
+- Синтетические схемы на тысячи полей (проверка ограниченного времени)
+
+Запуск: python app/test/bench_assignment.py
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.schemas import (
+    JsonField, XmlElement, ParsedJsonSchema, ParsedXsdSchema, AssignmentMode
+)
+from app.services.field_mapper import FieldMapper
+from app.test.test_candidate_index import load_epgu_schemas
+
+WORDS = [
+    "applicant", "passport", "series", "number", "issue", "date", "birth",
+    "address", "region", "city", "street", "house", "phone", "email",
+    "snils", "inn", "child", "parent", "document", "organization", "code",
+    "name", "surname", "middle", "payment", "bank", "account", "status",
+]
+
+
+def synthetic_schemas(n_fields: int, n_elements: int, seed: int = 42):
+    """Синтетические схемы из комбинаций доменных слов"""
+    rnd = random.Random(seed)
+
+    def compound(words: int) -> list:
+        return [rnd.choice(WORDS) for _ in range(words)]
+
+    fields = []
+    for i in range(n_fields):
+        parts = compound(rnd.randint(2, 3))
+        field_id = parts[0] + "".join(p.capitalize() for p in parts[1:]) + str(i)
+        fields.append(JsonField(id=field_id, label=" ".join(parts), path=f"$request.{field_id}"))
+
+    elements = []
+    for j in range(n_elements):
+        parts = compound(rnd.randint(2, 3))
+        name = "".join(p.capitalize() for p in parts) + str(j)
+        elements.append(XmlElement(name=name, path=name, description=" ".join(parts)))
+
+    return (
+        ParsedJsonSchema(fields=fields, total_fields=len(fields)),
+        ParsedXsdSchema(elements=elements, total_elements=len(elements))
+    )
+
+
+def run(title: str, parsed_json: ParsedJsonSchema, parsed_xsd: ParsedXsdSchema):
+    """Сравнение режимов на одной паре схем"""
+    mapper = FieldMapper()
+    print(f"\n📊 {title}: {parsed_json.total_fields} полей x {parsed_xsd.total_elements} элементов")
+
+    for mode in (AssignmentMode.GREEDY, AssignmentMode.OPTIMAL):
+        started = time.perf_counter()
+        mappings, _, _ = mapper.auto_map(parsed_json, parsed_xsd, assignment=mode)
+        elapsed = time.perf_counter() - started
+
+        names = [m.xml_element_name for m in mappings]
+        conflicts = len(names) - len(set(names))
+        total = sum(m.confidence_score for m in mappings)
+
+        print(
+            f"  {mode.value:8s} {elapsed * 1000:9.1f} ms | маппингов: {len(mappings):5d} | "
+            f"конфликтов по xml_element_name: {conflicts:5d} | сумма уверенности: {total:8.2f}"
+        )
+
+
+def main():
+    parsed_json, parsed_xsd = load_epgu_schemas()
+    run("ЕПГУ", parsed_json, parsed_xsd)
+
+    for n_fields, n_elements in ((1000, 500), (3000, 1500)):
+        parsed_json, parsed_xsd = synthetic_schemas(n_fields, n_elements)
+        run("Синтетика", parsed_json, parsed_xsd)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк компактного представления схем: Pydantic модели vs CompactXsdSchema
+
+- Реальная XSD ЕПГУ и она же, развернутая N раз (десятки тысяч элементов)
+- Память (tracemalloc), передача в пул процессов (pickle), преобразования
+
+Запуск: python app/test/bench_compact.py
+"""
+
+import pickle
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.schemas import ParsedXsdSchema
+from app.services.compact import compact, expand
+from app.test.test_candidate_index import load_epgu_schemas
+
+
+def scaled(parsed_xsd: ParsedXsdSchema, copies: int) -> ParsedXsdSchema:
+    """XSD из copies копий исходной под разными корнями"""
+    elements = []
+    for k in range(copies):
+        root = f"Root{k}"
+        for element in parsed_xsd.elements:
+            elements.append(element.model_copy(update={
+                "path": f"{root}/{element.path}",
+                "parent": f"{root}/{element.parent}" if element.parent else root
+            }))
+    return ParsedXsdSchema(elements=elements, total_elements=len(elements), root_element="Root0")
+
+
+def allocated(build) -> int:
+    """Память, занятая результатом build (байт)"""
+    tracemalloc.start()
+    try:
+        result = build()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return current
+
+
+def timed(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return (time.perf_counter() - started) * 1000
+
+
+def run(title: str, parsed_xsd: ParsedXsdSchema):
+    raw = parsed_xsd.model_dump_json()
+    compact_xsd = compact(parsed_xsd)
+    print(f"\n📊 {title}: {parsed_xsd.total_elements} элементов, строк в пуле: {len(compact_xsd.elements.pool)}")
+
+    models_memory = allocated(lambda: ParsedXsdSchema.model_validate_json(raw))
+    compact_memory = allocated(lambda: compact(ParsedXsdSchema.model_validate_json(raw)))
+    print(f"  память:   модели {models_memory / 1e6:8.2f} MB | компактно {compact_memory / 1e6:8.2f} MB")
+
+    for name, value in (("модели", parsed_xsd), ("компактно", compact_xsd)):
+        data = pickle.dumps(value)
+        dump = timed(lambda: pickle.dumps(value))
+        load = timed(lambda: pickle.loads(data))
+        print(f"  pickle {name:10s} {len(data) / 1e6:8.2f} MB | dumps {dump:8.1f} ms | loads {load:8.1f} ms")
+
+    print(f"  compact {timed(lambda: compact(parsed_xsd)):8.1f} ms | expand {timed(lambda: expand(compact_xsd)):8.1f} ms")
+
+
+def main():
+    _, parsed_xsd = load_epgu_schemas()
+    run("ЕПГУ", parsed_xsd)
+    run("ЕПГУ x72", scaled(parsed_xsd, 72))
+
+
+if __name__ == "__main__":
+    main()
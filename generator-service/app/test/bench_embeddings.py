@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк векторного матчинга FieldMapper на данных ЕПГУ
+
+- Построение индекса векторов XSD (холодный кэш и повторное обращение)
+- auto_map без векторов и с векторами (индекс кандидатов / полный перебор)
+
+Запуск: python app/test/bench_embeddings.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.config import settings
+from app.services.embedding_matcher import EmbeddingMatcher
+from app.services.field_mapper import FieldMapper
+from app.test.test_candidate_index import load_epgu_schemas
+
+
+def timed(fn, repeat: int = 3):
+    """Лучшее время из repeat запусков (мс) и результат"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parsed_json, parsed_xsd = load_epgu_schemas()
+    print(f"\n📊 ЕПГУ: {parsed_json.total_fields} полей x {parsed_xsd.total_elements} элементов")
+
+    matcher = EmbeddingMatcher(settings.MAPPER_EMBEDDING_DIM, settings.MAPPER_EMBEDDING_CACHE_ENTRIES)
+    mapper = FieldMapper(embeddings=matcher)
+    targets = mapper._target_elements(parsed_xsd.elements)
+
+    cold, _ = timed(lambda: matcher.element_index(targets, mapper.features), repeat=1)
+    warm, _ = timed(lambda: matcher.element_index(targets, mapper.features))
+    fields, _ = timed(lambda: matcher.field_vectors(parsed_json.fields, mapper.features))
+    print(f"  индекс XSD ({len(targets)} элементов, dim={matcher.embedder.dim}): "
+          f"{cold:7.1f} ms холодный | {warm:7.3f} ms из кэша")
+    print(f"  векторы полей ({len(parsed_json.fields)}): {fields:7.1f} ms")
+
+    baseline = FieldMapper()
+    baseline.embeddings = None  # Без векторов независимо от MAPPER_EMBEDDINGS
+    for title, candidate_index in (("индекс кандидатов", True), ("полный перебор", False)):
+        for name, current in (("строки", baseline), ("строки+векторы", mapper)):
+            elapsed, (mappings, _, _) = timed(
+                lambda: current.auto_map(parsed_json, parsed_xsd, use_candidate_index=candidate_index)
+            )
+            print(f"  {title:18s} {name:15s} {elapsed:8.1f} ms | маппингов: {len(mappings):4d}")
+
+
+if __name__ == "__main__":
+    main()
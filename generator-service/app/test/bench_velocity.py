@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк VelocityEngine: компиляция и пакетный рендеринг
+
+- Примерный VM-шаблон ЕПГУ (#if/#elseif, $dateTool, вложенные пути)
+- Шаблон от VmTemplateGenerator по схемам ЕПГУ
+
+Запуск: python app/test/bench_velocity.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.services.field_mapper import FieldMapper
+from app.services.template_validator import TemplateValidator
+from app.services.velocity_engine import VelocityEngine
+from app.services.vm_generator import VmTemplateGenerator
+from app.test.test_candidate_index import DATA_DIR, load_epgu_schemas
+
+RENDERS = 2000
+
+
+def sample_template() -> str:
+    """Примерный VM-шаблон из материалов ЕПГУ"""
+    path = next(p for p in DATA_DIR.iterdir() if "vm" in p.name)
+    return path.read_text(encoding="utf-8")
+
+
+def generated_template() -> tuple:
+    """Шаблон по автоматическому маппингу и тестовые данные к нему"""
+    parsed_json, parsed_xsd = load_epgu_schemas()
+    mappings, _, _ = FieldMapper().auto_map(parsed_json, parsed_xsd)
+    template = VmTemplateGenerator().generate(mappings, parsed_xsd)
+    test_data = {m.json_field_id: f"value-{i}" for i, m in enumerate(mappings)}
+    return template, test_data
+
+
+def run(title: str, template: str, test_data: dict):
+    engine = VelocityEngine(max_bytes=64 * 1024 * 1024)
+
+    started = time.perf_counter()
+    compiled = engine.compile(template)
+    compile_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    engine.compile(template)
+    cached_ms = (time.perf_counter() - started) * 1000
+
+    contexts = [TemplateValidator.build_context(dict(test_data, n=i)) for i in range(RENDERS)]
+    started = time.perf_counter()
+    total = sum(len(output) for output in compiled.render_many(contexts))
+    elapsed = time.perf_counter() - started
+
+    print(f"\n📊 {title}: {len(template)} символов шаблона")
+    print(f"  компиляция:       {compile_ms:9.1f} ms")
+    print(f"  из кэша:          {cached_ms:9.3f} ms")
+    print(
+        f"  рендеринг x{RENDERS}: {elapsed * 1000:9.1f} ms | "
+        f"{RENDERS / elapsed:9.0f} док/с | {total / elapsed / 1024 / 1024:6.1f} МБ/с"
+    )
+
+
+def main():
+    run("Пример ЕПГУ", sample_template(), {})
+    template, test_data = generated_template()
+    run("Сгенерированный шаблон", template, test_data)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Тест режима взаимно-однозначного назначения (assignment="optimal")
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.schemas import AssignmentMode
+from app.services.assignment import AssignmentSolver
+from app.services.field_mapper import FieldMapper
+from app.test.test_candidate_index import load_epgu_schemas
+
+
+def test_solver_beats_greedy_choice():
+    """Оптимум по сумме, а не жадный выбор лучшей пары"""
+    scores = np.array([
+        [0.9, 0.8],
+        [0.85, 0.1],
+    ])
+
+    pairs = AssignmentSolver(min_score=0.5, max_cells=100).solve(scores)
+
+    assert [(r, c) for r, c, _ in pairs] == [(0, 1), (1, 0)]
+
+
+def test_solver_respects_cutoff_and_components():
+    """Пары ниже порога не назначаются, компоненты решаются независимо"""
+    scores = np.array([
+        [0.7, 0.0, 0.0],
+        [0.6, 0.0, 0.0],
+        [0.0, 0.0, 0.4],
+        [0.0, 0.9, 0.0],
+    ])
+
+    pairs = AssignmentSolver(min_score=0.5, max_cells=100).solve(scores)
+
+    assert [(r, c) for r, c, _ in pairs] == [(0, 0), (3, 1)]
+
+
+def test_solver_greedy_fallback_for_large_components():
+    """Компоненты больше max_cells решаются жадно"""
+    scores = np.array([
+        [0.9, 0.8],
+        [0.85, 0.1],
+    ])
+
+    pairs = AssignmentSolver(min_score=0.5, max_cells=1).solve(scores)
+
+    assert [(r, c) for r, c, _ in pairs] == [(0, 0)]
+
+
+def test_optimal_auto_map_is_one_to_one():
+    """На данных ЕПГУ каждое имя XML элемента используется не больше одного раза"""
+    parsed_json, parsed_xsd = load_epgu_schemas()
+    mapper = FieldMapper()
+
+    mappings, unmapped_json, _ = mapper.auto_map(
+        parsed_json, parsed_xsd, assignment=AssignmentMode.OPTIMAL
+    )
+
+    names = [m.xml_element_name for m in mappings]
+    assert mappings
+    assert len(names) == len(set(names))
+    assert all(m.confidence_score >= mapper.min_confidence for m in mappings)
+    assert len(mappings) + len(unmapped_json) == parsed_json.total_fields
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Тест пакетного расчета схожести
+
+Матрица BatchSimilarityScorer должна совпадать с попарным
+FieldMapper.calculate_similarity на реальных данных ЕПГУ.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.schemas import JsonField, XmlElement
+from app.services.field_mapper import FieldMapper
+from app.test.test_candidate_index import load_epgu_schemas
+
+
+def test_score_matrix_matches_pairwise():
+    """Оценки матрицы идентичны попарному расчету"""
+    parsed_json, parsed_xsd = load_epgu_schemas()
+    mapper = FieldMapper()
+    target_elements = mapper._target_elements(parsed_xsd.elements)
+
+    matrix = mapper.build_scorer(parsed_json.fields, target_elements).score_matrix()
+    expected = np.array([
+        [mapper.calculate_similarity(f, e) for e in target_elements]
+        for f in parsed_json.fields
+    ])
+
+    assert matrix.shape == expected.shape
+    assert np.array_equal(matrix, expected)
+
+
+def test_score_matrix_edge_cases():
+    """Точные совпадения, пустые описания и короткие label"""
+    fields = [
+        JsonField(id="lastName", label="Фамилия", path="$request.lastName"),
+        JsonField(id="last_name", path="$request.last_name"),
+        JsonField(id="c1", label="Имя", path="$request.c1"),
+    ]
+    elements = [
+        XmlElement(name="LastName", description="Фамилия заявителя"),
+        XmlElement(name="FirstName"),
+        XmlElement(name="Phone", description="   "),
+    ]
+
+    mapper = FieldMapper()
+    matrix = mapper.build_scorer(fields, elements).score_matrix()
+    expected = np.array([
+        [mapper.calculate_similarity(f, e) for e in elements]
+        for f in fields
+    ])
+
+    assert np.array_equal(matrix, expected)
+    assert matrix[0, 0] == 1.0
+    assert matrix[1, 0] == 0.95
+
+
+def test_auto_map_batch_matches_pairwise():
+    """auto_map в пакетном режиме дает те же маппинги"""
+    parsed_json, parsed_xsd = load_epgu_schemas()
+    mapper = FieldMapper()
+
+    pairwise = mapper.auto_map(parsed_json, parsed_xsd, use_candidate_index=False, batch_scoring=False)
+    batch = mapper.auto_map(parsed_json, parsed_xsd, use_candidate_index=False, batch_scoring=True)
+
+    assert [m.model_dump() for m in batch[0]] == [m.model_dump() for m in pairwise[0]]
+    assert batch[1:] == pairwise[1:]
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Тест индекса кандидатов FieldMapper
+
+Сравнивает маппинг через CandidateIndex с полным перебором
+на реальных данных ЕПГУ (recall по лучшему элементу для каждого поля).
+"""
+
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.schemas import JsonField, XmlElement
+from app.services.json_parser import JsonSchemaParser
+from app.services.xsd_parser import XsdSchemaParser
+from app.services.field_mapper import FieldMapper
+
+DATA_DIR = Path(__file__).parent.parent.parent.parent / "doc/test/files/госуслуги"
+JSON_FILE = DATA_DIR / "бе•ђ† гбЂг£®.json"
+XSD_FILE = DATA_DIR / "бе•ђ† Ґ®§† бҐ•§•≠®©.txt"
+
+
+def load_epgu_schemas():
+    """Парсинг JSON и XSD схем ЕПГУ"""
+    parsed_json = JsonSchemaParser().parse(JSON_FILE.read_text(encoding="utf-8"))
+    parsed_xsd = XsdSchemaParser().parse(XSD_FILE.read_text(encoding="utf-8"))
+    return parsed_json, parsed_xsd
+
+
+def test_candidates_include_semantic_and_short_elements():
+    """Семантические соответствия и короткие имена не теряются индексом"""
+    elements = [
+        XmlElement(name=f"Unrelated{i}Element", description=f"Поле {i}")
+        for i in range(40)
+    ]
+    elements.append(XmlElement(name="FamilyName", description="Surname"))
+    elements.append(XmlElement(name="Sex"))
+
+    mapper = FieldMapper()
+    index = mapper.build_candidate_index(elements)
+    assert index is not None
+
+    field = JsonField(id="c1", label="Фамилия", path="$request.c1")
+    candidates = {index.elements[i].name for i in index.candidates(field, top_k=5)}
+
+    assert "FamilyName" in candidates
+    assert "Sex" in candidates
+
+
+def test_candidate_index_matches_brute_force():
+    """Маппинг через индекс совпадает с полным перебором"""
+    parsed_json, parsed_xsd = load_epgu_schemas()
+    mapper = FieldMapper()
+
+    brute_force, _, _ = mapper.auto_map(parsed_json, parsed_xsd, use_candidate_index=False)
+    indexed, _, _ = mapper.auto_map(parsed_json, parsed_xsd, use_candidate_index=True)
+
+    expected = {m.json_field_id: (m.xml_element_name, m.confidence_score) for m in brute_force}
+    actual = {m.json_field_id: (m.xml_element_name, m.confidence_score) for m in indexed}
+
+    assert actual == expected
+
+
+def test_candidate_index_recall():
+    """Лучший по полному перебору элемент попадает в top-K кандидатов"""
+    parsed_json, parsed_xsd = load_epgu_schemas()
+    mapper = FieldMapper()
+    index = mapper.build_candidate_index(parsed_xsd.elements)
+    root_elements = index.elements
+
+    # Поля с заметной схожестью - те, что могут пройти порог уверенности
+    cutoff = mapper.min_confidence - 0.1
+    relevant = 0
+    found = 0
+
+    for json_field in parsed_json.fields:
+        scores = [mapper.calculate_similarity(json_field, e) for e in root_elements]
+        best = max(range(len(root_elements)), key=lambda i: scores[i])
+        if scores[best] < cutoff:
+            continue
+
+        relevant += 1
+        if best in index.candidates(json_field, mapper.candidate_top_k):
+            found += 1
+
+    assert relevant > 0
+    assert found / relevant >= 0.95
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Тест компактного представления схем (CompactJsonSchema / CompactXsdSchema)
+"""
+
+import pickle
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.services.compact import CompactXsdSchema, compact, expand
+from app.services.parse_cache import ParseCache
+from app.test.test_candidate_index import load_epgu_schemas
+
+
+def test_round_trip_matches_models():
+    """Преобразование туда и обратно не меняет схемы"""
+    parsed_json, parsed_xsd = load_epgu_schemas()
+
+    assert expand(compact(parsed_json)) == parsed_json
+    assert expand(compact(parsed_xsd)) == parsed_xsd
+    assert compact(parsed_xsd).total_elements == parsed_xsd.total_elements
+
+
+def test_strings_are_interned():
+    """Пути родителей и повторяющиеся имена хранятся один раз"""
+    _, parsed_xsd = load_epgu_schemas()
+    table = compact(parsed_xsd).elements
+
+    values = [v for e in parsed_xsd.elements for v in (e.name, e.type, e.path, e.parent, e.description) if v]
+    assert len(table.pool) < len(set(values)) + 1
+    assert len(table.pool) < len(values) / 2
+
+
+def test_pickle_and_cache_size():
+    """Компактная схема переживает передачу в процесс и занимает меньше в кэше"""
+    _, parsed_xsd = load_epgu_schemas()
+    compact_xsd = compact(parsed_xsd)
+
+    restored = pickle.loads(pickle.dumps(compact_xsd))
+    assert isinstance(restored, CompactXsdSchema)
+    assert expand(restored) == parsed_xsd
+    assert restored.elements.pool.add(parsed_xsd.elements[0].name) == 0
+
+    assert len(pickle.dumps(compact_xsd)) < len(pickle.dumps(parsed_xsd))
+    assert ParseCache._estimate_size(compact_xsd) < ParseCache._estimate_size(parsed_xsd) / 2
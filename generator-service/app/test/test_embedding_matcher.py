@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Тест векторного матчинга (EmbeddingMatcher)
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.schemas import JsonField, XmlElement
+from app.services.embedding_matcher import EmbeddingMatcher
+from app.services.field_mapper import FieldMapper
+from app.test.test_candidate_index import load_epgu_schemas
+
+
+def make_mapper():
+    return FieldMapper(embeddings=EmbeddingMatcher(dim=512, cache_entries=4))
+
+
+def test_cross_language_pair_ranks_high():
+    """Русский label находит английское имя элемента"""
+    mapper = make_mapper()
+    field = JsonField(id="c12", label="Дата выдачи паспорта", path="$request.c12")
+    elements = [
+        XmlElement(name=name)
+        for name in ("Phone", "Email", "Snils", "PassportIssueDate", "Gender", "Address")
+    ]
+
+    index = mapper.embeddings.element_index(elements, mapper.features)
+    field_vector = mapper.embeddings.field_vector(field, mapper.features)[None, :]
+    similarity = index.similarity(field_vector)[0]
+
+    assert elements[int(similarity.argmax())].name == "PassportIssueDate"
+    assert mapper.calculate_similarity(field, elements[3]) > FieldMapper().calculate_similarity(field, elements[3])
+
+
+def test_index_cached_per_xsd():
+    """Индекс векторов строится один раз на набор элементов"""
+    mapper = make_mapper()
+    _, parsed_xsd = load_epgu_schemas()
+    targets = mapper._target_elements(parsed_xsd.elements)
+
+    first = mapper.embeddings.element_index(targets, mapper.features)
+    second = mapper.embeddings.element_index(list(targets), mapper.features)
+
+    assert first is second
+    assert mapper.embeddings.stats()["hits"] == 1
+
+
+def test_batch_matches_pairwise_with_embeddings():
+    """С векторами пакетный и попарный расчет дают те же оценки и маппинги"""
+    parsed_json, parsed_xsd = load_epgu_schemas()
+    mapper = make_mapper()
+    targets = mapper._target_elements(parsed_xsd.elements)
+    fields = parsed_json.fields[:40]
+
+    matrix = mapper.build_scorer(fields, targets).score_matrix()
+    expected = np.array([[mapper.calculate_similarity(f, e) for e in targets] for f in fields])
+    assert np.allclose(matrix, expected, atol=1e-6)
+
+    pairwise = mapper.auto_map(parsed_json, parsed_xsd, batch_scoring=False)
+    batch = mapper.auto_map(parsed_json, parsed_xsd, batch_scoring=True)
+    assert [(m.json_field_id, m.xml_element_path) for m in batch[0]] == [
+        (m.json_field_id, m.xml_element_path) for m in pairwise[0]
+    ]
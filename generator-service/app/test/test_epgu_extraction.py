@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Тест извлечения компонентов ЕПГУ: экраны, повторяющиеся группы, orphans
+"""
+
+import io
+import json
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.services.json_parser import JsonSchemaParser
+from app.test.test_candidate_index import load_epgu_schemas
+
+SCHEMA = {
+    "service": "10000000001",
+    "screens": [
+        {"id": "s1", "type": "UNIQUE", "components": ["c2", "group"]},
+        {"id": "s2", "type": "CUSTOM", "components": ["c1", "c2", "missing"]},
+    ],
+    "applicationFields": [
+        {"id": "c1", "type": "StringInput", "label": "Фамилия"},
+        {"id": "c2", "type": "DateInput", "label": "Дата рождения"},
+        {"id": "child1", "type": "StringInput", "label": "Имя ребенка"},
+        {"id": "group", "type": "RepeatableFields", "attrs": {"components": ["child1", "child2"]}},
+        {"id": "child2", "type": "DateInput", "label": "Дата рождения ребенка"},
+        {"id": "c1", "type": "StringInput", "label": "Дубликат"},
+        {"id": "calc", "type": "ValueCalculator"},
+    ],
+}
+
+
+def test_fields_follow_screens_and_groups():
+    """Поля в порядке экранов, элементы группы - сразу за группой, без дубликатов"""
+    parsed = JsonSchemaParser().parse(json.dumps(SCHEMA, ensure_ascii=False))
+
+    assert [(f.id, f.screen, f.group) for f in parsed.fields] == [
+        ("c2", "s1", None),
+        ("group", "s1", None),
+        ("child1", "s1", "group"),
+        ("child2", "s1", "group"),
+        ("c1", "s2", None),
+    ]
+    assert parsed.fields[-1].label == "Фамилия"
+    assert parsed.orphan_components == ["calc"]
+
+
+def test_stream_matches_parse():
+    parser = JsonSchemaParser()
+    content = json.dumps(SCHEMA, ensure_ascii=False)
+
+    assert parser.parse_stream(io.BytesIO(content.encode("utf-8"))) == parser.parse(content)
+
+
+def test_deep_search_deduplicates():
+    """Запасной глубокий поиск отдает каждый ID один раз"""
+    component = {"id": "c1", "type": "TextInput", "label": "Фамилия"}
+    schema = {"service": "1", "data": {"a": component, "b": [component, {"wrap": component}]}}
+    content = json.dumps(schema, ensure_ascii=False)
+    parser = JsonSchemaParser()
+
+    assert [f.id for f in parser.parse(content).fields] == ["c1"]
+    assert parser.parse_stream(io.BytesIO(content.encode("utf-8"))) == parser.parse(content)
+
+
+def test_epgu_fields_referenced_from_screens():
+    """Реальная схема: каждое поле на экране, orphans в поля не попадают"""
+    parsed_json, _ = load_epgu_schemas()
+    ids = [f.id for f in parsed_json.fields]
+
+    assert len(ids) == len(set(ids))
+    assert all(f.screen for f in parsed_json.fields)
+    assert not set(parsed_json.orphan_components) & set(ids)
+    assert any(f.group for f in parsed_json.fields)
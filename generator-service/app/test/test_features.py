@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Тест предвычисленных признаков маппинга (FeatureExtractor)
+"""
+
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.schemas import JsonField, XmlElement
+from app.services.features import FeatureExtractor, normalize_name
+from app.services.field_mapper import FieldMapper
+from app.services.semantic_dictionary import SemanticDictionary
+
+
+def test_normalize_name():
+    assert normalize_name("lastName") == "last name"
+    assert normalize_name("LAST_NAME") == "last name"
+    assert normalize_name("last-name") == "last name"
+    assert normalize_name("DateOfBirth2") == "date of birth2"
+
+
+def test_features_are_cached_by_content():
+    """Элементы одного типа по разным путям получают одну запись признаков"""
+    features = FeatureExtractor(SemanticDictionary(FieldMapper.SEMANTIC_MAP))
+    first = XmlElement(name="FamilyName", path="/a/FamilyName", description="Фамилия")
+    second = XmlElement(name="FamilyName", path="/b/FamilyName", description="Фамилия")
+
+    assert features.element(first) is features.element(second)
+
+
+def test_semantic_concepts_intersect():
+    """Поле и элемент связаны через общий концепт словаря"""
+    features = FeatureExtractor(SemanticDictionary(FieldMapper.SEMANTIC_MAP))
+    field = features.field(JsonField(id="c58", label="Фамилия", path="$request.c58"))
+
+    assert field.concepts & features.element(XmlElement(name="LastName")).concepts
+    assert not field.concepts & features.element(XmlElement(name="Phone")).concepts
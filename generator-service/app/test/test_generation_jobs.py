@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Тест фоновых задач генерации (GenerationJobManager)
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.executor import PipelineExecutor
+from app.schemas import GenerationJobRequest, JobStatus, StageStatus
+from app.services import generation_jobs as jobs_module
+from app.services.files_client import FilesClient
+from app.services.generation_jobs import STAGES, GenerationJobManager, JobStore
+
+SIMPLE_DIR = project_root.parent / "doc" / "test" / "files" / "simple"
+
+
+class CollectingPublisher:
+    """Публикатор, собирающий события вместо отправки в websocket-service"""
+
+    def __init__(self):
+        self.messages = []
+
+    async def publish(self, room, message):
+        self.messages.append((room, message))
+        return True
+
+
+class RecordingProjectsClient:
+    """projects-service: запоминает сохраненные маппинги и статусы"""
+
+    def __init__(self):
+        self.mappings = []
+        self.statuses = []
+
+    async def bulk_create_mappings(self, project_id, mappings):
+        self.mappings.append((project_id, mappings))
+        return {"mappings": mappings, "total": len(mappings)}
+
+    async def update_project_status(self, project_id, project_status):
+        self.statuses.append((project_id, project_status))
+        return {"id": project_id, "status": project_status}
+
+
+class RecordingFilesClient(FilesClient):
+    """files-service: загрузка шаблона без сети (fail_uploads первых загрузок падают)"""
+
+    def __init__(self, fail_uploads=0):
+        super().__init__()
+        self.uploads = []
+        self.fail_uploads = fail_uploads
+
+    async def upload_file(self, project_id, file_name, content, file_type, uploaded_by=None):
+        if self.fail_uploads:
+            self.fail_uploads -= 1
+            raise RuntimeError("files-service unavailable")
+        self.uploads.append((project_id, file_name, file_type, uploaded_by))
+        return {"id": f"file-{len(self.uploads)}"}
+
+
+def make_request(**overrides):
+    fields = {
+        "project_id": "p-1",
+        "json_schema_content": (SIMPLE_DIR / "json_schema_simple.json").read_text(encoding="utf-8"),
+        "xsd_schema_content": (SIMPLE_DIR / "xsd_schema_simple.xsd").read_text(encoding="utf-8"),
+        "test_data": {"birthDate": "1990-01-01"},
+        "include_preview": True,
+        "save_to_project": True,
+        "uploaded_by": "u-1",
+    }
+    fields.update(overrides)
+    return GenerationJobRequest(**fields)
+
+
+def make_manager(tmp_path, publisher, files_client=None, projects_client=None):
+    return GenerationJobManager(
+        store=JobStore(str(tmp_path), ttl_seconds=3600),
+        publisher=publisher,
+        executor=PipelineExecutor(workers=2, max_queue=8, mode="thread"),
+        files_client=files_client or RecordingFilesClient(),
+        projects_client=projects_client or RecordingProjectsClient(),
+        max_concurrent=2
+    )
+
+
+def test_job_runs_all_stages_and_publishes_progress(tmp_path):
+    """Задача проходит все этапы, события приходят в комнату проекта"""
+    publisher = CollectingPublisher()
+    manager = make_manager(tmp_path, publisher)
+
+    async def scenario():
+        job = manager.submit(make_request())
+        await manager.wait(job.job_id)
+        return manager.get(job.job_id)
+
+    job = asyncio.run(scenario())
+    manager.executor.shutdown()
+
+    assert job.status == JobStatus.COMPLETED
+    assert [s.status for s in job.stages] == [StageStatus.COMPLETED] * len(STAGES)
+    assert job.result.template and "1990-01-01" in job.result.preview_output
+    assert job.result.template_file_id == "file-1"
+    assert manager.projects_client.statuses == [("p-1", "COMPLETED")]
+
+    rooms = {room for room, _ in publisher.messages}
+    events = [m["event"] for _, m in publisher.messages]
+    assert rooms == {"project:p-1"}
+    assert events.count("stage_completed") == len(STAGES)
+    assert events[-1] == "job_completed"
+    assert publisher.messages[-1][1]["progress"] == {"completed": len(STAGES), "total": len(STAGES)}
+
+
+def test_failed_job_resumes_from_failed_stage(tmp_path, monkeypatch):
+    """Продолжение после сбоя маппинга не повторяет парсинг"""
+    publisher = CollectingPublisher()
+    manager = make_manager(tmp_path, publisher)
+    original_auto_map = jobs_module.pipeline.auto_map
+
+    def broken_auto_map(*args):
+        raise RuntimeError("mapper crashed")
+
+    async def scenario():
+        monkeypatch.setattr(jobs_module.pipeline, "auto_map", broken_auto_map)
+        job = manager.submit(make_request(test_data=None))
+        await manager.wait(job.job_id)
+        failed = manager.get(job.job_id).model_copy(deep=True)
+
+        monkeypatch.setattr(jobs_module.pipeline, "auto_map", original_auto_map)
+        publisher.messages.clear()
+        manager.resume(job.job_id)
+        await manager.wait(job.job_id)
+        return failed, manager.get(job.job_id)
+
+    failed, resumed = asyncio.run(scenario())
+    manager.executor.shutdown()
+
+    assert failed.status == JobStatus.FAILED
+    assert "mapper crashed" in failed.error
+    assert resumed.status == JobStatus.COMPLETED
+    assert resumed.stages[-2].status == StageStatus.SKIPPED  # preview без тестовых данных
+
+    started = [m["stage"] for _, m in publisher.messages if m["event"] == "stage_started"]
+    assert started == ["auto_map", "generate", "validate", "preview", "save"]
+
+
+def test_resumed_save_does_not_duplicate_project_data(tmp_path):
+    """Сбой загрузки шаблона: продолжение догружает шаблон, маппинги не повторяются"""
+    files_client = RecordingFilesClient(fail_uploads=1)
+    projects_client = RecordingProjectsClient()
+    manager = make_manager(tmp_path, CollectingPublisher(), files_client, projects_client)
+
+    async def scenario():
+        job = manager.submit(make_request())
+        await manager.wait(job.job_id)
+        failed = manager.get(job.job_id).model_copy(deep=True)
+
+        manager.resume(job.job_id)
+        await manager.wait(job.job_id)
+        return failed, manager.get(job.job_id)
+
+    failed, resumed = asyncio.run(scenario())
+    manager.executor.shutdown()
+
+    assert failed.status == JobStatus.FAILED
+    assert failed.stages[-1].name == "save" and failed.result.saved_mappings
+    assert projects_client.statuses == [("p-1", "COMPLETED")]
+
+    assert resumed.status == JobStatus.COMPLETED
+    assert len(projects_client.mappings) == 1
+    assert files_client.uploads == [("p-1", "generated_template.vm", "VM_TEMPLATE", "u-1")]
+    assert resumed.result.template_file_id == "file-1"
+
+
+def test_save_is_skipped_without_project(tmp_path):
+    projects_client = RecordingProjectsClient()
+    manager = make_manager(tmp_path, CollectingPublisher(), projects_client=projects_client)
+
+    async def scenario():
+        job = manager.submit(make_request(save_to_project=False))
+        await manager.wait(job.job_id)
+        return manager.get(job.job_id)
+
+    job = asyncio.run(scenario())
+    manager.executor.shutdown()
+
+    assert job.status == JobStatus.COMPLETED
+    assert job.stages[-1].status == StageStatus.SKIPPED
+    assert projects_client.mappings == [] and projects_client.statuses == []
+
+
+def test_running_job_is_interrupted_after_restart(tmp_path):
+    """Снимок незавершенной задачи после перезапуска читается как interrupted"""
+    store = JobStore(str(tmp_path), ttl_seconds=3600)
+    manager = make_manager(tmp_path, CollectingPublisher())
+
+    async def scenario():
+        job = manager.submit(make_request())
+        # Снимок сохранен до запуска первого этапа
+        await manager.shutdown()
+        return job.job_id
+
+    job_id = asyncio.run(scenario())
+    manager.executor.shutdown()
+
+    job, request = store.get(job_id)
+    assert job.status == JobStatus.INTERRUPTED
+    assert request.project_id == "p-1"
+    assert store.get("../etc/passwd") is None
+
+
+
+def test_purge_keeps_snapshots_of_running_jobs(tmp_path, monkeypatch):
+    """Постановка новой задачи не удаляет снимок задачи, этап которой идет дольше TTL"""
+    manager = make_manager(tmp_path, CollectingPublisher())
+    manager.store.ttl_seconds = 60
+    release = threading.Event()
+    original_auto_map = jobs_module.pipeline.auto_map
+
+    def slow_auto_map(*args):
+        release.wait(10)
+        return original_auto_map(*args)
+
+    monkeypatch.setattr(jobs_module.pipeline, "auto_map", slow_auto_map)
+
+    async def scenario():
+        slow = manager.submit(make_request())
+        snapshot = tmp_path / f"{slow.job_id}.json"
+        while manager.get(slow.job_id).stages[2].status != StageStatus.RUNNING:
+            await asyncio.sleep(0.01)
+
+        old = time.time() - 3600
+        os.utime(snapshot, (old, old))
+        stale = tmp_path / ("0" * 32 + ".json")
+        stale.write_text(snapshot.read_text(encoding="utf-8"), encoding="utf-8")
+        os.utime(stale, (old, old))
+
+        manager.submit(make_request(save_to_project=False))  # purge_expired
+        kept = snapshot.exists(), stale.exists()
+
+        release.set()
+        await manager.wait(slow.job_id)
+        return kept, manager.get(slow.job_id)
+
+    (kept_running, kept_stale), job = asyncio.run(scenario())
+    manager.executor.shutdown()
+
+    assert kept_running and not kept_stale
+    assert job.status == JobStatus.COMPLETED
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Тест общих клиентов внутренних сервисов (HttpClientRegistry)
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.http_clients import HttpClientRegistry
+from app.services import files_client as files_module
+from app.services.files_client import FilesClient
+
+
+def make_registry():
+    return HttpClientRegistry(
+        timeouts={"files": 5.0, "projects": 3.0},
+        max_connections=4,
+        max_keepalive_connections=2,
+        keepalive_expiry=10.0
+    )
+
+
+def test_one_client_per_service():
+    """Повторные обращения получают тот же клиент, таймауты - из настроек сервиса"""
+    registry = make_registry()
+
+    async def scenario():
+        registry.start()
+        files = registry.client("files")
+        assert registry.client("files") is files
+        assert registry.client("projects") is not files
+        assert files.timeout.read == 5.0
+        assert registry.client("projects").timeout.read == 3.0
+        with pytest.raises(KeyError):
+            registry.client("unknown")
+
+        await registry.aclose()
+        assert files.is_closed
+        # После остановки клиент создается заново
+        reopened = registry.client("files")
+        assert reopened is not files and not reopened.is_closed
+        await registry.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_files_client_reuses_pooled_client(monkeypatch):
+    """Метаданные и скачивание идут через один клиент реестра"""
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        if request.url.path.endswith("/download"):
+            return httpx.Response(200, content=b"a;b\n1;2\n")
+        return httpx.Response(200, json={"id": "f1", "checksum": "abc"})
+
+    registry = make_registry()
+    shared = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    registry._clients["files"] = shared
+    monkeypatch.setattr(files_module, "http_clients", registry)
+
+    async def scenario():
+        client = FilesClient()
+        metadata = await client.get_metadata("f1")
+        spool = await client.download_to_spool("f1")
+        try:
+            content = spool.read()
+        finally:
+            spool.close()
+        assert registry.client("files") is shared
+        assert not shared.is_closed
+        await registry.aclose()
+        return metadata, content
+
+    metadata, content = asyncio.run(scenario())
+    assert metadata["checksum"] == "abc"
+    assert content == b"a;b\n1;2\n"
+    assert calls == ["/files/f1", "/files/f1/download"]
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Тест кэша результатов парсинга (ParseCache)
+"""
+
+import hashlib
+import sys
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.services.json_parser import JsonSchemaParser
+from app.services.parse_cache import ParseCache
+
+SCHEMA = '{"fields": [{"id": "lastName", "label": "Фамилия"}]}'
+
+
+def test_hit_after_miss_returns_same_result():
+    """Повторный парсинг того же содержимого берется из кэша"""
+    cache = ParseCache(max_bytes=1024 * 1024)
+    parser = JsonSchemaParser()
+
+    first, key = cache.get_or_parse("json", SCHEMA, parser.parse)
+    second, same_key = cache.get_or_parse("json", SCHEMA, parser.parse)
+
+    assert second is first
+    assert same_key == key
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_files_service_checksum_matches_content_hash():
+    """checksum из files-service (MD5 байтов файла) дает тот же ключ"""
+    cache = ParseCache(max_bytes=1024 * 1024)
+    parser = JsonSchemaParser()
+    checksum = hashlib.md5(SCHEMA.encode("utf-8")).hexdigest()
+
+    cache.get_or_parse("json", SCHEMA, parser.parse)
+    calls = []
+    cache.get_or_parse("json", SCHEMA, lambda c: calls.append(c), checksum=checksum)
+
+    assert calls == []
+    assert cache.stats()["hits"] == 1
+
+
+def test_memory_bound_evicts_least_recently_used():
+    """При превышении лимита памяти вытесняется самая старая запись"""
+    parser = JsonSchemaParser()
+    size = ParseCache._estimate_size(parser.parse(SCHEMA))
+    cache = ParseCache(max_bytes=2 * size + size // 2)
+
+    contents = [SCHEMA.replace("lastName", f"field{i}") for i in range(3)]
+    keys = [cache.get_or_parse("json", c, parser.parse)[1] for c in contents]
+
+    assert cache.stats()["evictions"] == 1
+    assert keys[0] not in cache._cache
+    assert keys[2] in cache._cache
+
+
+def test_parse_errors_are_not_cached():
+    """Ошибки парсинга пробрасываются и не кэшируются"""
+    cache = ParseCache(max_bytes=1024 * 1024)
+    parser = JsonSchemaParser()
+
+    with pytest.raises(ValueError):
+        cache.get_or_parse("json", "{broken", parser.parse)
+
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Тест пула для CPU-тяжелых этапов (PipelineExecutor)
+"""
+
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.executor import PipelineExecutor
+from app.main import app
+
+SIMPLE_DIR = project_root.parent / "doc" / "test" / "files" / "simple"
+
+
+def test_overload_is_rejected_with_503():
+    """Сверх workers + max_queue этап сразу получает 503"""
+    executor = PipelineExecutor(workers=1, max_queue=1, mode="thread")
+    release = threading.Event()
+
+    async def scenario():
+        running = [asyncio.create_task(executor.run("slow", release.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await executor.run("slow", release.wait, 5)
+
+        release.set()
+        await asyncio.gather(*running)
+        return exc_info.value
+
+    try:
+        error = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+    assert error.status_code == 503
+    assert error.headers == {"Retry-After": "1"}
+    assert executor.stats()["rejected"] == 1
+    assert executor.stats()["completed"] == 2
+
+
+def test_stage_timings_accumulate():
+    """Замеры этапа и ожидания пула попадают в timings"""
+    executor = PipelineExecutor(workers=1, max_queue=0, mode="thread")
+    timings = {}
+
+    try:
+        result = asyncio.run(executor.run("sum", sum, [1, 2, 3], timings=timings))
+    finally:
+        executor.shutdown()
+
+    assert result == 6
+    assert set(timings) == {"sum", "queue_wait"}
+
+
+def test_complete_generation_reports_stage_timings():
+    """Полный цикл в пуле процессов возвращает замеры по этапам"""
+    with TestClient(app) as client:
+        response = client.post("/api/complete/generate", json={
+            "json_schema_content": (SIMPLE_DIR / "json_schema_simple.json").read_text(encoding="utf-8"),
+            "xsd_schema_content": (SIMPLE_DIR / "xsd_schema_simple.xsd").read_text(encoding="utf-8"),
+            "test_data": {"birthDate": "1990-01-01"},
+            "include_preview": True,
+        })
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["success"] and body["template"]
+    assert "1990-01-01" in body["preview_output"]
+    assert {"parse_json", "parse_xsd", "auto_map", "generate", "validate", "preview"} <= set(body["timings"])
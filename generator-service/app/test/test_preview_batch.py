@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Тест пакетного рендеринга /api/generate/preview-batch
+"""
+
+import asyncio
+import io
+import json
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.main import app
+from app.schemas import PreviewBatchHeader
+from app.services.batch_preview import BatchPreviewRunner, batch_preview_runner, render_chunk
+
+TEMPLATE = (
+    "#set($name = $request.lastName)\n"
+    "<Person>\n"
+    "  <FamilyName>$!name</FamilyName>\n"
+    "  <Age>$!request.age</Age>\n"
+    "</Person>"
+)
+
+XSD = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+  <xs:element name="Person">
+    <xs:complexType>
+      <xs:sequence>
+        <xs:element name="FamilyName" type="xs:string"/>
+        <xs:element name="Age" type="xs:integer"/>
+      </xs:sequence>
+    </xs:complexType>
+  </xs:element>
+</xs:schema>"""
+
+
+def ndjson(*objects) -> bytes:
+    return b"".join(json.dumps(o, ensure_ascii=False).encode("utf-8") + b"\n" for o in objects)
+
+
+def read_lines(content: bytes):
+    return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+
+def test_records_stream_back_in_order_with_validation(monkeypatch):
+    """Результаты в порядке входа, ошибки записей не прерывают пакет"""
+    monkeypatch.setattr(batch_preview_runner, "workers", 0)
+    monkeypatch.setattr(batch_preview_runner, "chunk_size", 2)
+    body = ndjson(
+        {"template": TEMPLATE, "xsd_schema": XSD},
+        {"lastName": "Иванов", "age": 30},
+        {"lastName": "Петров", "age": "не число"},
+        [1, 2],
+        {"lastName": "Сидоров", "age": 41},
+    ) + b"{broken\n"
+
+    response = TestClient(app).post(
+        "/api/generate/preview-batch", content=body,
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+
+    assert response.status_code == 200
+    *records, summary = read_lines(response.content)
+    assert [r["index"] for r in records] == [0, 1, 2, 3, 4]
+    assert [r["success"] for r in records] == [True, True, False, True, False]
+    assert [r["is_valid"] for r in records] == [True, False, None, True, None]
+    assert "<FamilyName>Иванов</FamilyName>" in records[0]["output"]
+    assert summary == {**summary, "total": 5, "rendered": 3, "failed": 2, "invalid": 1}
+
+
+def test_bad_header_is_rejected_before_streaming():
+    """Ошибка синтаксиса шаблона - 400 до начала ответа"""
+    body = ndjson({"template": "#if($x)"}, {"x": 1})
+
+    response = TestClient(app).post("/api/generate/preview-batch", content=body)
+
+    assert response.status_code == 400
+    assert "Missing #end" in response.json()["detail"]
+
+
+def test_malicious_template_cannot_reach_python_internals():
+    """Шаблон клиента не выходит за данные записи: дандер-пути - 400, чужие методы - пусто"""
+    escape = '#foreach($x in [1])$foreach.__init__.__globals__.get("os").getcwd()#end'
+    rejected = TestClient(app).post(
+        "/api/generate/preview-batch", content=ndjson({"template": escape}, {"x": 1})
+    )
+
+    probing = "[$!request.lastName.encode('utf-8')][$!request.items.copy()][$!foreach.slots]"
+    records = render_chunk(probing, None, True, ndjson({"lastName": "Иванов", "items": [1]}).splitlines(), 0)
+
+    assert rejected.status_code == 400
+    assert "not allowed" in rejected.json()["detail"]
+    assert [(r.success, r.output) for r in records] == [(True, "[][][]")]
+
+
+def test_process_pool_matches_inline_rendering():
+    """Рендеринг в пуле процессов совпадает с рендерингом в потоке"""
+    header = PreviewBatchHeader(template=TEMPLATE, include_output=True)
+    lines = ndjson(*({"lastName": f"Фамилия{i}", "age": i} for i in range(50)))
+
+    async def collect(runner):
+        try:
+            return b"".join([part async for part in runner.run(header, io.BytesIO(lines))])
+        finally:
+            runner.shutdown()
+
+    inline = read_lines(asyncio.run(collect(BatchPreviewRunner(0, 7, 2))))
+    pooled = read_lines(asyncio.run(collect(BatchPreviewRunner(2, 7, 2))))
+
+    assert inline[:-1] == pooled[:-1]
+    assert pooled[-1]["rendered"] == 50
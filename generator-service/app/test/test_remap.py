@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Тест инкрементального пересчета маппинга (FieldMapper.remap)
+"""
+
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.schemas import AssignmentMode, JsonField, ParsedXsdSchema, XmlElement
+from app.services.field_mapper import FieldMapper
+from app.test.test_candidate_index import load_epgu_schemas
+
+
+def make_mapper():
+    mapper = FieldMapper()
+    mapper.use_candidate_index = False
+    return mapper
+
+
+def edit_xsd(parsed_xsd, step=7):
+    """Новая версия XSD: часть элементов удалена, часть изменена, добавлены новые"""
+    elements = []
+    for i, element in enumerate(parsed_xsd.elements):
+        if i % (step * 3) == 0:
+            continue
+        if i % step == 0:
+            element = element.model_copy(update={"description": "Фамилия заявителя"})
+        elements.append(element)
+
+    parent = parsed_xsd.elements[0].path
+    elements.append(XmlElement(name="ContactPhone", path=f"{parent}/ContactPhone", parent=parent,
+                               description="Телефон"))
+    return ParsedXsdSchema(elements=elements, total_elements=len(elements),
+                           root_element=parsed_xsd.root_element)
+
+
+def test_greedy_remap_matches_full_auto_map():
+    """Greedy: результат пересчета совпадает с полным маппингом новой версии"""
+    mapper = make_mapper()
+    parsed_json, parsed_xsd = load_epgu_schemas()
+    new_xsd = edit_xsd(parsed_xsd)
+
+    previous, _, _ = mapper.auto_map(parsed_json, parsed_xsd, assignment=AssignmentMode.GREEDY)
+    expected, _, expected_unmapped_xml = mapper.auto_map(parsed_json, new_xsd, assignment=AssignmentMode.GREEDY)
+    mappings, _, unmapped_xml, summary = mapper.remap(
+        parsed_json, parsed_xsd, parsed_json, new_xsd, previous, assignment=AssignmentMode.GREEDY
+    )
+
+    def pairs(items):
+        return {(m.json_field_id, m.xml_element_path) for m in items}
+
+    assert pairs(mappings) == pairs(expected)
+    assert sorted(unmapped_xml) == sorted(expected_unmapped_xml)
+    # Элементы без оставшихся дочерних тоже становятся целями маппинга
+    assert summary.added_elements >= 1 and summary.removed_elements > 0
+    assert summary.rescored_fields < len(parsed_json.fields)
+    assert summary.kept_mappings > 0
+
+
+def test_unchanged_schemas_keep_mappings_without_rescoring():
+    """Без изменений схем маппинг переносится целиком"""
+    mapper = make_mapper()
+    parsed_json, parsed_xsd = load_epgu_schemas()
+    previous, _, _ = mapper.auto_map(parsed_json, parsed_xsd, assignment=AssignmentMode.OPTIMAL)
+
+    mappings, _, _, summary = mapper.remap(
+        parsed_json, parsed_xsd, parsed_json, parsed_xsd, previous, assignment=AssignmentMode.OPTIMAL
+    )
+
+    assert mappings == previous
+    assert summary.rescored_fields == 0
+    assert summary.kept_mappings == len(previous)
+
+
+def test_manual_mappings_survive_until_target_removed():
+    """Ручной маппинг сохраняется, пока его поле и элемент есть в схемах"""
+    mapper = make_mapper()
+    parsed_json, parsed_xsd = load_epgu_schemas()
+    previous, _, _ = mapper.auto_map(parsed_json, parsed_xsd, assignment=AssignmentMode.GREEDY)
+
+    field = parsed_json.fields[0]
+    target = mapper._target_elements(parsed_xsd.elements)[-1]
+    manual = mapper._make_mapping(field, target, 1.0).model_copy(update={"is_auto_mapped": False})
+    previous = [m for m in previous if m.json_field_id != field.id] + [manual]
+
+    # Изменилось только описание поля - ручной маппинг не пересчитывается
+    changed_field = field.model_copy(update={"description": "Новое описание"})
+    new_json = parsed_json.model_copy(update={"fields": [changed_field] + parsed_json.fields[1:]})
+    mappings, _, _, summary = mapper.remap(parsed_json, parsed_xsd, new_json, parsed_xsd, previous)
+
+    assert manual in mappings
+    assert summary.manual_mappings == 1
+
+    # Элемент удален из XSD - поле оценивается заново
+    new_xsd = ParsedXsdSchema(
+        elements=[e for e in parsed_xsd.elements if e.path != target.path],
+        total_elements=parsed_xsd.total_elements - 1
+    )
+    mappings, _, _, summary = mapper.remap(parsed_json, parsed_xsd, parsed_json, new_xsd, previous)
+
+    assert manual not in mappings
+    assert summary.dropped_manual_mappings == [field.id]
+    assert all(m.is_auto_mapped for m in mappings if m.json_field_id == field.id)
+
+
+def test_new_field_is_scored_against_all_elements():
+    """Новое поле JSON схемы оценивается по всем элементам"""
+    mapper = make_mapper()
+    parsed_json, parsed_xsd = load_epgu_schemas()
+    previous, _, _ = mapper.auto_map(parsed_json, parsed_xsd, assignment=AssignmentMode.GREEDY)
+
+    field = JsonField(id="applicantPhone", label="Телефон", path="$request.applicantPhone")
+    new_json = parsed_json.model_copy(update={"fields": parsed_json.fields + [field]})
+
+    mappings, _, _, summary = mapper.remap(
+        parsed_json, parsed_xsd, new_json, parsed_xsd, previous, assignment=AssignmentMode.GREEDY
+    )
+    expected, _, _ = mapper.auto_map(new_json, parsed_xsd, assignment=AssignmentMode.GREEDY)
+
+    assert summary.added_fields == 1 and summary.rescored_fields == 1
+    assert [m for m in mappings if m.json_field_id == field.id] == [
+        m for m in expected if m.json_field_id == field.id
+    ]
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Тест кэша скомпилированных XSD схем (SchemaCache)
+"""
+
+import hashlib
+import io
+import sys
+import threading
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.api import validator as validator_api
+from app.main import app
+from app.services import schema_cache as schema_cache_module
+from app.services.schema_cache import SchemaCache
+from app.services.template_validator import TemplateValidator
+
+XSD = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+  <xs:element name="Age" type="xs:integer"/>
+</xs:schema>"""
+
+
+def test_text_and_stream_share_entry():
+    """Схема текстом и та же схема потоком (с checksum) - одна запись"""
+    cache = SchemaCache(max_bytes=1024 * 1024)
+    checksum = hashlib.md5(XSD.encode("utf-8")).hexdigest()
+
+    first = cache.get_or_compile(XSD)
+    second = cache.get_or_compile_stream(io.BytesIO(XSD.encode("utf-8")), checksum)
+    third = cache.get_or_compile_stream(io.BytesIO(XSD.encode("utf-8")))
+
+    assert first is second is third
+    stats = cache.stats()
+    assert (stats["entries"], stats["misses"], stats["hits"]) == (1, 1, 2)
+
+
+def test_concurrent_requests_compile_once(monkeypatch):
+    """Одновременные запросы одной схемы компилируют ее один раз"""
+    compiled = []
+    original = schema_cache_module.etree.XMLSchema
+
+    def slow_schema(doc):
+        compiled.append(doc)
+        time.sleep(0.05)
+        return original(doc)
+
+    monkeypatch.setattr(schema_cache_module.etree, "XMLSchema", slow_schema)
+    cache = SchemaCache(max_bytes=1024 * 1024)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compile(XSD)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(compiled) == 1
+    assert all(r is results[0] for r in results)
+
+
+def test_ttl_expires_entries():
+    """Устаревшая запись компилируется заново"""
+    cache = SchemaCache(max_bytes=1024 * 1024, ttl_seconds=0.01)
+
+    first = cache.get_or_compile(XSD)
+    time.sleep(0.02)
+
+    assert cache.get_or_compile(XSD) is not first
+    assert cache.stats()["expirations"] == 1
+
+
+def test_validate_output_reuses_compiled_schema(monkeypatch):
+    """validate_output не компилирует схему повторно"""
+    cache = SchemaCache(max_bytes=1024 * 1024)
+    monkeypatch.setattr("app.services.template_validator.schema_cache", cache)
+    validator = TemplateValidator()
+
+    assert validator.validate_output("<Age>5</Age>", XSD) == (True, [])
+    is_valid, errors = validator.validate_output("<Age>пять</Age>", XSD)
+
+    assert not is_valid and errors
+    assert cache.stats()["hits"] == 1
+
+
+def test_validate_by_file_id_skips_download_on_hit(monkeypatch):
+    """По file_id: при попадании по checksum файл не скачивается"""
+    cache = SchemaCache(max_bytes=1024 * 1024)
+    monkeypatch.setattr(validator_api, "schema_cache", cache)
+    downloads = []
+
+    async def get_metadata(file_id):
+        return {"id": file_id, "checksum": hashlib.md5(XSD.encode("utf-8")).hexdigest()}
+
+    async def download_to_spool(file_id):
+        downloads.append(file_id)
+        return io.BytesIO(XSD.encode("utf-8"))
+
+    monkeypatch.setattr(validator_api.files_client, "get_metadata", get_metadata)
+    monkeypatch.setattr(validator_api.files_client, "download_to_spool", download_to_spool)
+    client = TestClient(app)
+
+    for xml_output, expected in (("<Age>1</Age>", True), ("<Age>x</Age>", False)):
+        response = client.post(
+            "/api/validate/output/file", json={"xml_output": xml_output, "xsd_file_id": "xsd-1"}
+        )
+        assert response.status_code == 200
+        assert response.json()["is_valid"] is expected
+
+    assert downloads == ["xsd-1"]
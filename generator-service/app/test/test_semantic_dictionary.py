@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Тест загружаемого семантического словаря (SemanticDictionary)
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.schemas import JsonField, XmlElement
+from app.services.field_mapper import FieldMapper
+from app.services.semantic_dictionary import (
+    DEFAULT_DICTIONARY_DIR, SemanticDictionary, SemanticDictionaryRegistry, stem
+)
+
+
+def concepts(dictionary, text):
+    return {dictionary.concepts[i] for i in dictionary.concepts_of(text)}
+
+
+def test_russian_word_forms_share_stem():
+    assert stem("фамилия") == stem("фамилии") == stem("фамилией")
+    assert stem("рождения") == stem("рождении")
+    assert stem("имя") == "имя"
+
+
+def test_lookup_by_tokens_and_phrases():
+    """Термины ищутся по словам, а не подстрокам; фразы - по последовательности основ"""
+    dictionary = SemanticDictionary({
+        "дата рождения": ["birthdate"],
+        "пол": ["gender"],
+        "email": ["e-mail"],
+    })
+
+    assert concepts(dictionary, "Даты рождения ребенка") == {"дата рождения"}
+    assert concepts(dictionary, "DateOfBirth") == set()
+    assert concepts(dictionary, "BirthDate") == {"дата рождения"}
+    assert concepts(dictionary, "Полный адрес") == set()
+    assert concepts(dictionary, "Пол заявителя") == {"пол"}
+    assert concepts(dictionary, "EMail") == {"email"}
+
+
+def test_default_dictionary_loads():
+    dictionary = SemanticDictionary.load(FieldMapper.SEMANTIC_MAP, DEFAULT_DICTIONARY_DIR)
+
+    assert dictionary.version != "builtin"
+    assert concepts(dictionary, "ИНН организации") == {"инн", "организация"}
+
+
+def test_registry_hot_reloads_term_files(tmp_path):
+    """Новые термины подхватываются без перезапуска, ошибочный файл не ломает словарь"""
+    registry = SemanticDictionaryRegistry({"фамилия": ["lastname"]}, tmp_path, reload_interval=0)
+    mapper = FieldMapper(dictionaries=registry)
+    field = JsonField(id="c12", label="ИНН", path="$request.c12")
+    element = XmlElement(name="TaxpayerId")
+
+    mapper.refresh_dictionary()
+    assert not mapper.features.field(field).concepts & mapper.features.element(element).concepts
+
+    terms = tmp_path / "tax.json"
+    terms.write_text(json.dumps({"инн": ["taxpayerid"]}, ensure_ascii=False), encoding="utf-8")
+    mapper.refresh_dictionary()
+    assert mapper.features.field(field).concepts & mapper.features.element(element).concepts
+    version = registry.current().version
+
+    broken = tmp_path / "broken.json"
+    broken.write_text("[1, 2", encoding="utf-8")
+    os.utime(broken)
+    assert registry.current().version == version
+    assert "broken.json" in registry.stats()["last_error"]
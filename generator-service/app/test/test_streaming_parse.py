@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Тест потокового парсинга (iterparse / ijson)
+
+Результат должен совпадать с parse, а пиковая память при проходе по
+полям не должна расти вместе с размером документа.
+"""
+
+import io
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.services.json_parser import JsonSchemaParser
+from app.services.xsd_parser import XsdSchemaParser
+from app.test.test_candidate_index import JSON_FILE, XSD_FILE
+
+
+def test_epgu_stream_matches_parse():
+    """Потоковый и обычный парсинг реальных файлов дают одинаковый результат"""
+    json_parser = JsonSchemaParser()
+    xsd_parser = XsdSchemaParser()
+
+    assert json_parser.parse_stream(JSON_FILE) == json_parser.parse(JSON_FILE.read_text(encoding="utf-8"))
+    assert xsd_parser.parse_stream(XSD_FILE) == xsd_parser.parse(XSD_FILE.read_text(encoding="utf-8"))
+
+    with open(XSD_FILE, "rb") as stream:
+        names = [e.name for e in xsd_parser.iter_elements(stream)]
+    assert names[:2] == ["CustomControlsValue", "AppDataRequest"]
+
+
+@pytest.mark.parametrize("schema", [
+    {"fields": [{"id": "lastName", "label": "Фамилия", "type": "string"}, {"name": "birthDate", "type": "date"}]},
+    {"properties": {"snils": {"type": "string", "title": "СНИЛС"}, "age": {"type": "integer"}}},
+    {
+        "service": "10000000001",
+        "screens": [{"id": "s1", "components": ["c1"], "hint": {"id": "h1", "type": "TextInput"}}],
+        "data": {"a": {"id": "c1", "type": "TextInput", "label": "Фамилия",
+                       "nested": {"id": "c2", "type": "DateInput", "name": "Дата"}}},
+        "list": [{"id": "info", "type": "INFO"}, {"type": "CheckBox", "id": "c3"}],
+        "version": 3
+    },
+])
+def test_stream_formats_match_parse(schema):
+    """Все форматы схем, включая глубокий поиск компонентов ЕПГУ"""
+    parser = JsonSchemaParser()
+    content = json.dumps(schema, ensure_ascii=False)
+
+    assert parser.parse_stream(io.BytesIO(content.encode("utf-8"))) == parser.parse(content)
+
+
+def test_invalid_input_raises_value_error():
+    with pytest.raises(ValueError):
+        JsonSchemaParser().parse_stream(io.BytesIO(b'{"fields": [1,'))
+    with pytest.raises(ValueError):
+        XsdSchemaParser().parse_stream(io.BytesIO(b"<xs:schema"))
+
+
+def test_json_stream_memory_bounded():
+    """Пиковая память прохода по полям много меньше размера документа"""
+    filler = "x" * 2000
+    components = [
+        {"id": f"c{i}", "type": "TextInput", "label": f"Поле {i}", "attrs": {"hint": filler}}
+        for i in range(5000)
+    ]
+    content = json.dumps({"service": "1", "screens": [], "applicationFields": components}).encode("utf-8")
+
+    tracemalloc.start()
+    try:
+        count = sum(1 for _ in JsonSchemaParser().iter_fields(io.BytesIO(content)))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert count == 5000
+    assert peak < len(content) / 4
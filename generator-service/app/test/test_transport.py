@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Тест транспорта generator-service: сжатие тел и handle результатов парсинга
+"""
+
+import gzip
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.transport import choose_encoding, decompress
+from app.main import app
+
+SIMPLE_DIR = project_root.parent / "doc" / "test" / "files" / "simple"
+JSON_CONTENT = (SIMPLE_DIR / "json_schema_simple.json").read_text(encoding="utf-8")
+XSD_CONTENT = (SIMPLE_DIR / "xsd_schema_simple.xsd").read_text(encoding="utf-8")
+
+
+def _gzip_json(payload) -> bytes:
+    return gzip.compress(json.dumps(payload).encode("utf-8"))
+
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0, deflate") is None
+    assert choose_encoding("br") is None
+    assert choose_encoding(None) is None
+
+
+def test_decompress_rejects_oversized_body():
+    """Распакованное тело ограничено (защита от gzip-бомб)"""
+    body = gzip.compress(b"0" * 10_000)
+
+    assert decompress(body, "gzip", 10_000) == b"0" * 10_000
+    with pytest.raises(ValueError):
+        decompress(body, "gzip", 9_999)
+
+
+def test_gzip_request_and_response():
+    """Сжатый запрос распаковывается, крупный ответ сжимается по Accept-Encoding"""
+    with TestClient(app) as client:
+        response = client.post(
+            "/api/parse/xsd-schema",
+            content=_gzip_json({"file_content": XSD_CONTENT}),
+            headers={"Content-Type": "application/json", "Content-Encoding": "gzip", "Accept-Encoding": "gzip"}
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    body = response.json()
+    assert body["success"] and body["data"]["elements"]
+    assert body["handle"].startswith("xsd:")
+
+
+def test_invalid_and_unsupported_bodies():
+    with TestClient(app) as client:
+        broken = client.post(
+            "/api/parse/json-schema", content=b"not gzip",
+            headers={"Content-Type": "application/json", "Content-Encoding": "gzip"}
+        )
+        unsupported = client.post(
+            "/api/parse/json-schema", content=b"{}",
+            headers={"Content-Type": "application/json", "Content-Encoding": "br"}
+        )
+
+    assert broken.status_code == 400
+    assert unsupported.status_code == 415
+
+
+def test_auto_map_by_handles_matches_full_schemas():
+    """Маппинг по handle дает тот же результат, что и по переданным схемам"""
+    with TestClient(app) as client:
+        parsed_json = client.post("/api/parse/json-schema", json={"file_content": JSON_CONTENT}).json()
+        parsed_xsd = client.post("/api/parse/xsd-schema", json={"file_content": XSD_CONTENT}).json()
+        handles = client.post(
+            "/api/parse/json-schema", json={"file_content": JSON_CONTENT, "include_data": False}
+        ).json()
+
+        by_schemas = client.post("/api/mapper/auto-map", json={
+            "json_schema": parsed_json["data"], "xsd_schema": parsed_xsd["data"]
+        }).json()
+        by_handles = client.post("/api/mapper/auto-map", json={
+            "json_schema_handle": handles["handle"], "xsd_schema_handle": parsed_xsd["handle"]
+        }).json()
+        template = client.post("/api/generate/template", json={
+            "mappings": by_handles["mappings"], "xsd_structure_handle": parsed_xsd["handle"]
+        }).json()
+
+    assert handles["data"] is None
+    assert handles["handle"] == parsed_json["handle"]
+    assert handles["total_fields"] == parsed_json["data"]["total_fields"]
+    assert by_handles["mappings"] == by_schemas["mappings"]
+    assert template["success"] and template["template"]
+
+
+def test_expired_handle():
+    """Неизвестный handle - 410, если схема не передана; иначе используется схема"""
+    with TestClient(app) as client:
+        parsed_json = client.post("/api/parse/json-schema", json={"file_content": JSON_CONTENT}).json()
+        parsed_xsd = client.post("/api/parse/xsd-schema", json={"file_content": XSD_CONTENT}).json()
+
+        expired = client.post("/api/mapper/auto-map", json={
+            "json_schema_handle": "json:" + "0" * 32, "xsd_schema_handle": parsed_xsd["handle"]
+        })
+        fallback = client.post("/api/mapper/auto-map", json={
+            "json_schema": parsed_json["data"], "json_schema_handle": "json:" + "0" * 32,
+            "xsd_schema_handle": parsed_xsd["handle"]
+        })
+        wrong_kind = client.post("/api/mapper/auto-map", json={
+            "json_schema_handle": parsed_xsd["handle"], "xsd_schema_handle": parsed_xsd["handle"]
+        })
+
+    assert expired.status_code == 410
+    assert fallback.status_code == 200 and fallback.json()["success"]
+    assert wrong_kind.status_code == 400
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Тест компилятора VM-шаблонов (VelocityEngine)
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.services.field_mapper import FieldMapper
+from app.services.json_parser import JsonSchemaParser
+from app.services.template_validator import TemplateValidator
+from app.services.velocity_engine import DateTool, VelocityEngine, VelocitySyntaxError
+from app.services.vm_generator import VmTemplateGenerator
+from app.services.xsd_parser import XsdSchemaParser
+
+SIMPLE_DIR = project_root.parent / "doc" / "test" / "files" / "simple"
+
+
+def render(template, context):
+    return VelocityEngine(max_bytes=1024 * 1024).render(template, context)
+
+
+def test_foreach_with_loop_state():
+    """#foreach, $foreach.* и восстановление переменной цикла"""
+    template = (
+        "#set($item = 'before')\n"
+        "#foreach($item in $request.items)\n"
+        "$foreach.count:$item.name#if($foreach.hasNext),#end\n"
+        "#end\n"
+        "$item"
+    )
+    context = {"request": {"items": [{"name": "a"}, {"name": "b"}]}}
+
+    assert render(template, context) == "1:a,\n2:b\nbefore"
+
+
+def test_if_elseif_else_chain():
+    """#elseif/#else и сравнение значений разных типов"""
+    template = (
+        "#if($code == 1)one\n"
+        "#elseif($code == \"2\" && !$flag)two\n"
+        "#else\nother\n"
+        "#end\n"
+    )
+
+    assert render(template, {"code": "1"}) == "one\n"
+    assert render(template, {"code": 2, "flag": False}) == "two\n"
+    assert render(template, {"code": 2, "flag": True}) == "other\n"
+
+
+def test_nested_paths_methods_and_quiet_references():
+    """Вложенные пути, методы, $!, ${!x} и неопределенные ссылки"""
+    template = (
+        "<a>$request.person.name.trim()</a>"
+        "<b>$!request.person.missing</b>"
+        "<c>${!alias}</c>"
+        "<d>$request.person.missing</d>"
+        "<e>$request.list.size()</e>"
+    )
+    context = {"request": {"person": {"name": " Иван "}, "list": [1, 2, 3]}}
+
+    assert render(template, context) == (
+        "<a>Иван</a><b></b><c></c><d>$request.person.missing</d><e>3</e>"
+    )
+
+
+def test_compiled_template_is_cached_by_hash():
+    """Повторная компиляция того же шаблона берется из кэша"""
+    engine = VelocityEngine(max_bytes=1024 * 1024)
+    template = "#set($x = $request.a)$!x"
+
+    first = engine.compile(template)
+    second = engine.compile(template)
+
+    assert second is first
+    assert list(first.render_many([{"request": {"a": i}} for i in range(3)])) == ["0", "1", "2"]
+    assert (engine.stats()["hits"], engine.stats()["misses"]) == (1, 1)
+
+
+@pytest.mark.parametrize("template,line", [
+    ("<a/>\n#if($x)\n<b/>", 2),
+    ("<a/>\n#end", 2),
+    ("#set($x = )", 1),
+])
+def test_syntax_errors_report_line(template, line):
+    """Ошибки синтаксиса - VelocitySyntaxError с номером строки"""
+    with pytest.raises(VelocitySyntaxError) as exc_info:
+        render(template, {})
+
+    assert exc_info.value.line == line
+
+
+@pytest.mark.parametrize("template", [
+    '#foreach($x in [1])$foreach.__init__.__globals__.get("re").enum.sys.modules.get("os").getcwd()#end',
+    "$request.__class__",
+    "#set($y = $request._private)",
+    "#set($__builtins__ = 1)",
+    "#foreach($_x in [1])#end",
+    "$!{_out}",
+])
+def test_underscore_identifiers_are_rejected(template):
+    """Служебные атрибуты Python недоступны из шаблона"""
+    with pytest.raises(VelocitySyntaxError):
+        render(template, {"request": {}})
+
+
+def test_only_whitelisted_attributes_and_methods():
+    """Свойства и методы - только у данных контекста, $foreach и $dateTool"""
+    template = (
+        "#foreach($x in [1])$foreach.index/$!foreach.slots#end|"
+        "$!dateTool.now|$!dateTool.toDate('yyyy-MM-dd', '2020-01-02').strftime('%Y')|"
+        "$dateTool.format('dd.MM.yyyy', $dateTool.toDate('yyyy-MM-dd', '2020-01-02'))|"
+        "$!name.format_map($request)|$!name.encode('utf-8')|$name.toUpperCase()"
+    )
+    context = {"request": {}, "name": "ab", "dateTool": DateTool()}
+
+    assert render(template, context) == "0/|||02.01.2020|||AB"
+
+
+def test_set_with_path_target():
+    """#set($a.b[...] = ...) вычисляет цель без eval"""
+    template = "#set($m = {'a': [1, 2]})#set($m.a[$i - 1] = \"v$i\")$m.a"
+
+    assert render(template, {"i": 2}) == "[1, v2]"
+
+
+def test_generated_template_preview():
+    """Шаблон от VmTemplateGenerator рендерится по тестовым данным"""
+    json_schema = JsonSchemaParser().parse((SIMPLE_DIR / "json_schema_simple.json").read_text(encoding="utf-8"))
+    xsd_schema = XsdSchemaParser().parse((SIMPLE_DIR / "xsd_schema_simple.xsd").read_text(encoding="utf-8"))
+    mappings, _, _ = FieldMapper().auto_map(json_schema, xsd_schema)
+    template = VmTemplateGenerator().generate(mappings, xsd_schema)
+
+    birth_date = next(m for m in mappings if m.json_field_id == "birthDate")
+    output = TemplateValidator().test_transformation(template, {"birthDate": "1990-01-01"})
+
+    element = birth_date.xml_element_name
+    assert f"<{element}>1990-01-01</{element}>" in output
+    assert "$" not in output
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Тест парсера XSD: таблица символов и полные пути элементов
+"""
+
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.services.xsd_parser import XsdSchemaParser
+from app.test.test_candidate_index import XSD_FILE
+
+SCHEMA = """<?xml version="1.0" encoding="UTF-8"?>
+<xsd:schema xmlns:xsd="http://www.w3.org/2001/XMLSchema"
+            xmlns:soc="soc" targetNamespace="soc">
+    <xsd:include schemaLocation="common/address.xsd"/>
+    <xsd:complexType name="BaseRequestType">
+        <xsd:sequence>
+            <xsd:element name="orderId" type="xsd:string"/>
+        </xsd:sequence>
+    </xsd:complexType>
+    <xsd:complexType name="PersonType">
+        <xsd:sequence>
+            <xsd:element name="lastName" type="xsd:string">
+                <xsd:annotation><xsd:documentation>Фамилия</xsd:documentation></xsd:annotation>
+            </xsd:element>
+            <xsd:group ref="soc:ContactsGroup"/>
+            <xsd:element name="address" type="soc:AddressType" minOccurs="0"/>
+            <xsd:element name="representative" type="soc:PersonType" minOccurs="0"/>
+        </xsd:sequence>
+    </xsd:complexType>
+    <xsd:group name="ContactsGroup">
+        <xsd:sequence>
+            <xsd:element name="phone" type="xsd:string"/>
+            <xsd:element name="email" type="xsd:string" minOccurs="0"/>
+        </xsd:sequence>
+    </xsd:group>
+    <xsd:element name="Request">
+        <xsd:complexType>
+            <xsd:complexContent>
+                <xsd:extension base="soc:BaseRequestType">
+                    <xsd:sequence>
+                        <xsd:element name="applicant" type="soc:PersonType"/>
+                        <xsd:choice>
+                            <xsd:element name="child" type="soc:PersonType"/>
+                            <xsd:element ref="soc:Organization"/>
+                        </xsd:choice>
+                    </xsd:sequence>
+                </xsd:extension>
+            </xsd:complexContent>
+        </xsd:complexType>
+    </xsd:element>
+    <xsd:element name="Organization">
+        <xsd:complexType>
+            <xsd:sequence>
+                <xsd:element name="inn" type="xsd:string"/>
+            </xsd:sequence>
+        </xsd:complexType>
+    </xsd:element>
+</xsd:schema>
+"""
+
+ADDRESS_SCHEMA = """<?xml version="1.0" encoding="UTF-8"?>
+<xsd:schema xmlns:xsd="http://www.w3.org/2001/XMLSchema" targetNamespace="soc">
+    <xsd:complexType name="AddressType">
+        <xsd:sequence>
+            <xsd:element name="town" type="xsd:string"/>
+        </xsd:sequence>
+    </xsd:complexType>
+</xsd:schema>
+"""
+
+
+def by_path(parsed):
+    return {e.path: e for e in parsed.elements}
+
+
+def test_types_groups_extension_and_refs_resolved():
+    """Именованные типы, группы, extension и ref разворачиваются с полными путями"""
+    parsed = XsdSchemaParser().parse(SCHEMA, includes={"address.xsd": ADDRESS_SCHEMA})
+    elements = by_path(parsed)
+
+    assert parsed.root_element == "Request"
+    assert parsed.namespace == "soc"
+    assert list(elements)[:3] == ["Request", "Request/orderId", "Request/applicant"]
+
+    assert elements["Request/applicant/lastName"].description == "Фамилия"
+    assert elements["Request/applicant/lastName"].parent == "Request/applicant"
+    assert "Request/applicant/phone" in elements
+    assert "Request/applicant/address/town" in elements
+    assert "Request/Organization/inn" in elements
+
+    # Ветви choice необязательны
+    assert not elements["Request/child"].required
+    assert not elements["Request/Organization"].required
+    assert elements["Request/applicant"].required
+
+    # Глобальный элемент, на который есть ref, не считается корнем
+    assert not any(e.parent is None and e.name == "Organization" for e in parsed.elements)
+
+
+def test_recursive_type_expanded_once_per_branch():
+    """Рекурсивный тип не разворачивается бесконечно"""
+    elements = by_path(XsdSchemaParser().parse(SCHEMA))
+
+    assert "Request/applicant/representative" in elements
+    assert "Request/applicant/representative/lastName" not in elements
+
+
+def test_missing_include_skipped():
+    """Без содержимого подключаемой схемы ссылки на ее типы не разворачиваются"""
+    elements = by_path(XsdSchemaParser().parse(SCHEMA))
+
+    assert "Request/applicant/address" in elements
+    assert "Request/applicant/address/town" not in elements
+
+
+def test_epgu_elements_emitted_once():
+    """На реальной XSD каждый путь встречается один раз, родители предшествуют детям"""
+    parsed = XsdSchemaParser().parse(XSD_FILE.read_text(encoding="utf-8"))
+    paths = [e.path for e in parsed.elements]
+
+    assert len(paths) == len(set(paths))
+    assert parsed.root_element == "AppDataRequest"
+
+    seen = set()
+    for element in parsed.elements:
+        if element.parent:
+            assert element.parent in seen
+        seen.add(element.path)
+
+    assert "AppDataRequest/SetRequest/orderId" in seen
+    assert "AppDataRequest/SetRequest/userData/lastName" in seen
@@ -0,0 +1,92 @@
+"""initial schema
+
+Таблицы в том виде, в котором их создавал Base.metadata.create_all до
+появления миграций. В базе, созданной create_all, таблицы уже есть -
+миграция их пропускает, и alembic продолжает с 0002.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(name: str) -> bool:
+    if context.is_offline_mode():
+        return False
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    if not _has_table("projects"):
+        op.create_table(
+            "projects",
+            sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column(
+                "status",
+                sa.Enum("DRAFT", "IN_PROGRESS", "COMPLETED", "ARCHIVED", name="projectstatus"),
+                nullable=False
+            ),
+            sa.Column("created_by", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        )
+
+    if not _has_table("field_mappings"):
+        op.create_table(
+            "field_mappings",
+            sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+            sa.Column(
+                "project_id",
+                postgresql.UUID(as_uuid=True),
+                sa.ForeignKey("projects.id", ondelete="CASCADE"),
+                nullable=False
+            ),
+            sa.Column("json_field_id", sa.String(), nullable=False),
+            sa.Column("json_field_path", sa.String(), nullable=False),
+            sa.Column("json_field_label", sa.String(), nullable=True),
+            sa.Column("xml_element_name", sa.String(), nullable=False),
+            sa.Column("xml_element_path", sa.String(), nullable=True),
+            sa.Column("variable_name", sa.String(), nullable=False),
+            sa.Column("is_auto_mapped", sa.Boolean(), nullable=False),
+            sa.Column("confidence_score", sa.Float(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        )
+
+    if not _has_table("project_history"):
+        op.create_table(
+            "project_history",
+            sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+            sa.Column(
+                "project_id",
+                postgresql.UUID(as_uuid=True),
+                sa.ForeignKey("projects.id", ondelete="CASCADE"),
+                nullable=False
+            ),
+            sa.Column("action", sa.String(), nullable=False),
+            sa.Column("user_id", sa.String(), nullable=True),
+            sa.Column("changes", postgresql.JSON(), nullable=True),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("timestamp", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("project_history")
+    op.drop_table("field_mappings")
+    op.drop_table("projects")
+    sa.Enum(name="projectstatus").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,34 @@
+"""project file stats
+
+Размер VM_TEMPLATE и число файлов проекта от files-service
+(PUT /projects/{id}/file-stats). IF NOT EXISTS - для баз, где колонки
+уже добавлены вручную по README.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE projects ADD COLUMN IF NOT EXISTS total_size BIGINT NOT NULL DEFAULT 0")
+    op.execute("ALTER TABLE projects ADD COLUMN IF NOT EXISTS file_counts JSON")
+    op.execute("ALTER TABLE projects ADD COLUMN IF NOT EXISTS file_stats_updated_at TIMESTAMPTZ")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_projects_total_size_created_at ON projects (total_size, created_at)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_projects_total_size_created_at")
+    op.drop_column("projects", "file_stats_updated_at")
+    op.drop_column("projects", "file_counts")
+    op.drop_column("projects", "total_size")
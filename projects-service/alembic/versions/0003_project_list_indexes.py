@@ -0,0 +1,53 @@
+"""project list indexes
+
+Составные индексы под keyset пагинацию списка проектов (колонка
+сортировки + created_at, id) и индекс префиксного поиска по
+lower(name). Индексы строятся CONCURRENTLY - без блокировки записи
+в projects на время построения.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    "ix_projects_created_at_id": ["created_at", "id"],
+    "ix_projects_created_by_created_at_id": ["created_by", "created_at", "id"],
+    "ix_projects_status_created_at_id": ["status", "created_at", "id"],
+    "ix_projects_name_created_at_id": ["name", "created_at", "id"],
+    "ix_projects_total_size_created_at_id": ["total_size", "created_at", "id"],
+    "ix_projects_lower_name_pattern": [sa.text("lower(name) text_pattern_ops")],
+}
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY нельзя выполнять в транзакции
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            op.create_index(name, "projects", columns, postgresql_concurrently=True, if_not_exists=True)
+        # Заменен ix_projects_total_size_created_at_id
+        op.drop_index(
+            "ix_projects_total_size_created_at", table_name="projects",
+            postgresql_concurrently=True, if_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_projects_total_size_created_at", "projects", ["total_size", "created_at"],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        for name in INDEXES:
+            op.drop_index(name, table_name="projects", postgresql_concurrently=True, if_exists=True)
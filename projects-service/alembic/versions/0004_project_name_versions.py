@@ -0,0 +1,63 @@
+"""project name versions
+
+base_name и version проекта: версия выделяется в базе (INSERT ... SELECT
+max(version) + 1), уникальный индекс (base_name, version) исключает
+одинаковые версии при одновременном создании.
+
+Существующие проекты разбираются по названию "Имя (версия N)". Проекты
+с уже совпадающими (base_name, version) - кроме самого раннего - получают
+следующие свободные версии, и их названия меняются соответственно.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("projects", sa.Column("base_name", sa.String(), nullable=True))
+    op.add_column("projects", sa.Column("version", sa.Integer(), server_default="1", nullable=False))
+
+    op.execute(r"""
+        UPDATE projects SET
+            base_name = regexp_replace(name, '\s+\(версия\s+\d+\)$', ''),
+            version = COALESCE(substring(name from '\(версия\s+(\d+)\)$')::int, 1)
+    """)
+
+    op.execute(r"""
+        WITH ranked AS (
+            SELECT id, base_name, created_at,
+                   ROW_NUMBER() OVER (PARTITION BY base_name, version ORDER BY created_at, id) AS duplicate,
+                   MAX(version) OVER (PARTITION BY base_name) AS max_version
+            FROM projects
+        ), moved AS (
+            SELECT id, max_version + ROW_NUMBER() OVER (PARTITION BY base_name ORDER BY created_at, id) AS version
+            FROM ranked
+            WHERE duplicate > 1
+        )
+        UPDATE projects SET
+            version = moved.version,
+            name = projects.base_name || ' (версия ' || moved.version || ')'
+        FROM moved
+        WHERE projects.id = moved.id
+    """)
+
+    op.alter_column("projects", "base_name", nullable=False)
+    op.create_index("ux_projects_base_name_version", "projects", ["base_name", "version"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ux_projects_base_name_version", table_name="projects")
+    op.drop_column("projects", "version")
+    op.drop_column("projects", "base_name")
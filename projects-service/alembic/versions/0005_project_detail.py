@@ -0,0 +1,48 @@
+"""project detail revision and indexes
+
+revision проекта - ETag детальной информации (GET /projects/{id}
+отвечает 304 по одной колонке). Индексы внешних ключей маппингов и
+истории: детальная информация читает их по project_id.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("projects", sa.Column("revision", sa.Integer(), server_default="1", nullable=False))
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_field_mappings_project_id", "field_mappings", ["project_id"],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            "ix_project_history_project_id_timestamp", "project_history", ["project_id", "timestamp"],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_project_history_project_id_timestamp", table_name="project_history",
+            postgresql_concurrently=True, if_exists=True
+        )
+        op.drop_index(
+            "ix_field_mappings_project_id", table_name="field_mappings",
+            postgresql_concurrently=True, if_exists=True
+        )
+    op.drop_column("projects", "revision")
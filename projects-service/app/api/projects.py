@@ -1,25 +1,46 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Query
+from fastapi import APIRouter, HTTPException, Depends, status, Query, Header, Response
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 from uuid import UUID
+from datetime import datetime, timezone
 from typing import Optional, List
 from app.database import get_db
+from app.models import Project
 from app.schemas import (
     ProjectCreate, ProjectUpdate, ProjectResponse, ProjectListResponse,
     ProjectDetailedResponse, FieldMappingResponse, ProjectHistoryResponse,
-    ProjectStatus
+    ProjectStatus, ProjectFileStatsUpdate, ProjectFileStatsResyncResponse
 )
 import app.crud as crud
-from app.services.files_client import FilesClient
+from app.services.files_client import files_client
+from app.core.config import get_settings
+
+settings = get_settings()
 
 router = APIRouter()
 
+def _project_response(p: Project) -> ProjectResponse:
+    return ProjectResponse(
+        id=str(p.id),
+        name=p.name,
+        base_name=p.base_name,
+        version=p.version,
+        description=p.description,
+        status=p.status.value,
+        created_by=p.created_by,
+        created_at=p.created_at,
+        updated_at=p.updated_at,
+        total_size=p.total_size or 0,
+        file_counts=p.file_counts or {}
+    )
+
 @router.post("/", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
 async def create_project(
     project: ProjectCreate,
     created_by: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Создать новый проект"""
+    """Создать новый проект (если название занято - следующая версия: "Имя (версия N)")"""
     try:
         db_project = crud.create_project(
             db=db,
@@ -27,17 +48,13 @@ async def create_project(
             created_by=created_by
         )
 
-        return ProjectResponse(
-            id=str(db_project.id),
-            name=db_project.name,
-            description=db_project.description,
-            status=db_project.status.value,
-            created_by=db_project.created_by,
-            created_at=db_project.created_at,
-            updated_at=db_project.updated_at,
-            total_size=0
-        )
+        return _project_response(db_project)
 
+    except IntegrityError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Failed to allocate project version, retry the request"
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -49,6 +66,69 @@ async def create_project(
             detail=f"Failed to create project: {str(e)}"
         )
 
+def _list_projects(
+    db: Session,
+    created_by: Optional[str],
+    status_filter: Optional[ProjectStatus],
+    search: Optional[str],
+    skip: int,
+    limit: int,
+    sort_by: Optional[str],
+    sort_order: Optional[str],
+    cursor: Optional[str],
+    count: str
+) -> ProjectListResponse:
+    """
+    Страница списка проектов
+
+    cursor - keyset пагинация (next_cursor предыдущей страницы): стоимость
+    страницы не зависит от ее номера, skip при этом не используется.
+    count: exact - COUNT(*), estimate - оценка планировщика (точный подсчет,
+    если оценка меньше PROJECTS_COUNT_EXACT_THRESHOLD), none - без подсчета.
+    """
+    try:
+        after = crud.decode_cursor(cursor, sort_by, sort_order) if cursor else None
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    filters = {"created_by": created_by, "status": status_filter, "search": search}
+
+    total = None
+    total_is_estimate = False
+    if count == "estimate":
+        total = crud.estimate_projects_count(db, **filters)
+        total_is_estimate = total >= settings.PROJECTS_COUNT_EXACT_THRESHOLD
+        if not total_is_estimate:
+            total = crud.count_projects(db, **filters)
+    elif count == "exact":
+        total = crud.count_projects(db, **filters)
+
+    # Лишняя строка - признак следующей страницы
+    db_projects = crud.get_projects(
+        db=db,
+        **filters,
+        skip=skip,
+        limit=limit + 1,
+        sort_by=sort_by,
+        sort_order=sort_order,
+        after=after
+    )
+
+    next_cursor = None
+    if len(db_projects) > limit:
+        db_projects = db_projects[:limit]
+        next_cursor = crud.encode_cursor(db_projects[-1], sort_by, sort_order)
+
+    return ProjectListResponse(
+        projects=[_project_response(p) for p in db_projects],
+        total=total,
+        total_is_estimate=total_is_estimate,
+        next_cursor=next_cursor
+    )
+
 @router.get("/", response_model=ProjectListResponse)
 async def get_projects(
     created_by: Optional[str] = Query(None),
@@ -58,50 +138,18 @@ async def get_projects(
     limit: int = Query(100, ge=1, le=1000),
     sort_by: Optional[str] = Query(None, description="Поле для сортировки"),
     sort_order: Optional[str] = Query(None, description="Направление сортировки"),
+    cursor: Optional[str] = Query(None, description="next_cursor предыдущей страницы"),
+    count: str = Query("exact", pattern="^(exact|estimate|none)$", description="Подсчет total"),
     db: Session = Depends(get_db)
 ):
     """Получить список проектов с сортировкой"""
     try:
-        total = crud.count_projects(
-            db=db,
-            created_by=created_by,
-            status=status_filter,
-            search=search
-        )
-
-        db_projects = crud.get_projects(
-            db=db,
-            created_by=created_by,
-            status=status_filter,
-            search=search,
-            skip=skip,
-            limit=limit,
-            sort_by=sort_by,
-            sort_order=sort_order
+        return _list_projects(
+            db, created_by, status_filter, search, skip, limit, sort_by, sort_order, cursor, count
         )
 
-        files_client = FilesClient()
-        projects = []
-        for p in db_projects:
-            total_size = await files_client.get_project_total_size(str(p.id))
-            projects.append(ProjectResponse(
-                id=str(p.id),
-                name=p.name,
-                description=p.description,
-                status=p.status.value,
-                created_by=p.created_by,
-                created_at=p.created_at,
-                updated_at=p.updated_at,
-                total_size=total_size
-            ))
-
-        # Сортировка по total_size на уровне приложения
-        if sort_by == "total_size":
-            reverse = (sort_order == "desc")
-            projects.sort(key=lambda x: x.total_size, reverse=reverse)
-
-        return ProjectListResponse(projects=projects, total=total)
-
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -117,69 +165,83 @@ async def get_user_projects(
     limit: int = Query(100, ge=1, le=1000),
     sort_by: Optional[str] = Query(None, description="Поле для сортировки"),
     sort_order: Optional[str] = Query(None, description="Направление сортировки"),
+    cursor: Optional[str] = Query(None, description="next_cursor предыдущей страницы"),
+    count: str = Query("exact", pattern="^(exact|estimate|none)$", description="Подсчет total"),
     db: Session = Depends(get_db)
 ):
     """Получить все проекты конкретного пользователя с сортировкой"""
     try:
-        total = crud.count_projects(
-            db=db,
-            created_by=user_email,
-            status=status_filter,
-            search=search
-        )
-
-        db_projects = crud.get_projects(
-            db=db,
-            created_by=user_email,
-            status=status_filter,
-            search=search,
-            skip=skip,
-            limit=limit,
-            sort_by=sort_by,
-            sort_order=sort_order
+        return _list_projects(
+            db, user_email, status_filter, search, skip, limit, sort_by, sort_order, cursor, count
         )
 
-        files_client = FilesClient()
-        projects = []
-        for p in db_projects:
-            total_size = await files_client.get_project_total_size(str(p.id))
-            projects.append(ProjectResponse(
-                id=str(p.id),
-                name=p.name,
-                description=p.description,
-                status=p.status.value,
-                created_by=p.created_by,
-                created_at=p.created_at,
-                updated_at=p.updated_at,
-                total_size=total_size
-            ))
-
-        # Сортировка по total_size на уровне приложения
-        if sort_by == "total_size":
-            reverse = (sort_order == "desc")
-            projects.sort(key=lambda x: x.total_size, reverse=reverse)
-
-        return ProjectListResponse(projects=projects, total=total)
-
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to get user projects: {str(e)}"
         )
 
+def _detail_etag(
+    project_id: UUID,
+    revision: int,
+    include_mappings: bool,
+    include_history: bool,
+    include_files: bool,
+    history_limit: int
+) -> str:
+    """ETag детальной информации: ревизия проекта + состав ответа"""
+    parts = f"{int(include_mappings)}{int(include_history)}{int(include_files)}-{history_limit}"
+    return f'"{project_id}-{revision}-{parts}"'
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
 @router.get("/{project_id}", response_model=ProjectDetailedResponse)
 async def get_project(
     project_id: str,
+    response: Response,
     include_mappings: bool = Query(True),
     include_history: bool = Query(False),
     include_files: bool = Query(True),
+    history_limit: int = Query(20, ge=1, le=200),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ):
-    """Получить детальную информацию о проекте"""
+    """
+    Получить детальную информацию о проекте
+
+    Ответ содержит ETag (ревизия проекта). С If-None-Match неизмененный
+    проект возвращает 304 после чтения одной колонки - без маппингов,
+    истории и запроса к files-service.
+    """
     try:
         project_uuid = UUID(project_id)
 
-        db_project = crud.get_project(db, project_uuid)
+        if if_none_match:
+            revision = crud.get_project_revision(db, project_uuid)
+            if revision is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Project not found"
+                )
+            etag = _detail_etag(
+                project_uuid, revision, include_mappings, include_history, include_files, history_limit
+            )
+            if _etag_matches(if_none_match, etag):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        db_project, history = crud.get_project_detail(
+            db,
+            project_uuid,
+            include_mappings=include_mappings,
+            include_history=include_history,
+            history_limit=history_limit
+        )
         if not db_project:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -189,18 +251,21 @@ async def get_project(
         response_data = {
             "id": str(db_project.id),
             "name": db_project.name,
+            "base_name": db_project.base_name,
+            "version": db_project.version,
             "description": db_project.description,
             "status": db_project.status.value,
             "created_by": db_project.created_by,
             "created_at": db_project.created_at,
             "updated_at": db_project.updated_at,
+            "total_size": db_project.total_size or 0,
+            "file_counts": db_project.file_counts or {},
             "mappings": [],
             "history": [],
             "files": []
         }
 
         if include_mappings:
-            mappings = crud.get_project_mappings(db, project_uuid)
             response_data["mappings"] = [
                 FieldMappingResponse(
                     id=str(m.id),
@@ -216,11 +281,10 @@ async def get_project(
                     created_at=m.created_at,
                     updated_at=m.updated_at
                 )
-                for m in mappings
+                for m in db_project.mappings
             ]
 
         if include_history:
-            history = crud.get_project_history(db, project_uuid, limit=20)
             response_data["history"] = [
                 ProjectHistoryResponse(
                     id=str(h.id),
@@ -235,7 +299,6 @@ async def get_project(
             ]
 
         if include_files:
-            files_client = FilesClient()
             project_files = await files_client.get_project_files(project_id)
             response_data["files"] = [
                 {
@@ -249,6 +312,10 @@ async def get_project(
                 for f in project_files
             ]
 
+        # Ревизия загруженного проекта: изменение после проверки If-None-Match даст новый ETag
+        response.headers["ETag"] = _detail_etag(
+            project_uuid, db_project.revision, include_mappings, include_history, include_files, history_limit
+        )
         return ProjectDetailedResponse(**response_data)
 
     except ValueError:
@@ -281,26 +348,91 @@ async def update_project(
                 detail="Project not found"
             )
 
-        files_client = FilesClient()
-        total_size = await files_client.get_project_total_size(project_id)
-
-        return ProjectResponse(
-            id=str(db_project.id),
-            name=db_project.name,
-            description=db_project.description,
-            status=db_project.status.value,
-            created_by=db_project.created_by,
-            created_at=db_project.created_at,
-            updated_at=db_project.updated_at,
-            total_size=total_size
-        )
+        return _project_response(db_project)
 
+    except IntegrityError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Failed to allocate project version, retry the request"
+        )
     except ValueError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid UUID format"
         )
 
+@router.put("/{project_id}/file-stats", status_code=status.HTTP_204_NO_CONTENT)
+async def update_project_file_stats(
+    project_id: str,
+    stats: ProjectFileStatsUpdate,
+    db: Session = Depends(get_db)
+):
+    """Обновить размер и число файлов проекта (уведомление от files-service)"""
+    try:
+        project_uuid = UUID(project_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid project_id format"
+        )
+
+    found = crud.update_project_file_stats(
+        db,
+        project_uuid,
+        total_size=stats.template_size,
+        file_counts=stats.file_counts,
+        as_of=stats.as_of
+    )
+    if not found:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+
+    return None
+
+@router.post("/file-stats/resync", response_model=ProjectFileStatsResyncResponse)
+async def resync_project_file_stats(
+    batch_size: int = Query(500, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """
+    Пересчитать размеры и число файлов всех проектов по files-service
+
+    Для проектов, созданных до хранения статистики, и после пропущенных
+    уведомлений (files-service был недоступен для projects-service).
+    """
+    updated = 0
+    failed = 0
+    last_id = None
+
+    while True:
+        project_ids = crud.get_project_ids(db, after=last_id, limit=batch_size)
+        if not project_ids:
+            break
+        last_id = project_ids[-1]
+
+        as_of = datetime.now(timezone.utc)
+        try:
+            sizes = await files_client.get_projects_sizes([str(p) for p in project_ids])
+        except Exception as e:
+            print(f"Error getting project sizes: {e}")
+            failed += len(project_ids)
+            continue
+
+        for project_uuid in project_ids:
+            size = sizes.get(str(project_uuid), {})
+            crud.update_project_file_stats(
+                db,
+                project_uuid,
+                total_size=size.get("template_size", 0),
+                file_counts=size.get("file_counts", {}),
+                as_of=as_of
+            )
+            updated += 1
+
+    return ProjectFileStatsResyncResponse(updated=updated, failed=failed)
+
 @router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_project(
     project_id: str,
@@ -317,7 +449,6 @@ async def delete_project(
                 detail="Project not found"
             )
 
-        files_client = FilesClient()
         project_files = await files_client.get_project_files(project_id)
 
         deleted_files = []
@@ -9,6 +9,9 @@ class Settings(BaseSettings):
     FILES_SERVICE_URL: str = "http://files-service:8006"
     AUTH_SERVICE_URL: str = "http://auth-service:8002"
     
+    # Списки проектов: при count=estimate точный COUNT(*) только если оценка меньше
+    PROJECTS_COUNT_EXACT_THRESHOLD: int = 10000
+    
     class Config:
         env_file = ".env"
 
@@ -1,27 +1,93 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, asc
-from uuid import UUID
-from typing import List, Optional
+from sqlalchemy.orm import Session, Query, aliased, selectinload, noload, load_only
+from sqlalchemy import desc, asc, or_, update, insert, select, func, tuple_, literal, case, cast, String
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime
+from uuid import UUID, uuid4
+from typing import Any, Dict, List, Optional, Tuple
+import base64
+import enum
+import json
+import re
 from app.models import Project, FieldMapping, ProjectHistory, ProjectStatus
 from app.schemas import ProjectCreate, ProjectUpdate, FieldMappingCreate, FieldMappingUpdate
 
 # ============ PROJECT CRUD ============
 
+VERSION_SUFFIX = re.compile(r"\s+\(версия\s+(\d+)\)$")
+
+# Одновременные создания с одним base_name: проигравший получает нарушение
+# уникального индекса (base_name, version) и повторяет с новым max(version)
+VERSION_ATTEMPTS = 5
+
+def split_versioned_name(name: str) -> Tuple[str, int]:
+    """Базовое имя и версия из названия вида "Имя (версия N)" (без суффикса - 1)"""
+    match = VERSION_SUFFIX.search(name)
+    if not match:
+        return name, 1
+    return name[:match.start()], int(match.group(1))
+
+def _next_version(base_name: str, requested_version: int, exclude_id: Optional[UUID] = None):
+    """
+    Версия для base_name: max(version) + 1 среди проектов с этим base_name,
+    или requested_version, если таких нет
+    """
+    other = aliased(Project)
+    query = select(
+        func.coalesce(func.max(other.version) + 1, requested_version).label("version")
+    ).where(other.base_name == base_name)
+    if exclude_id is not None:
+        query = query.where(other.id != exclude_id)
+    return query
+
+def _versioned_name(base_name: str, version):
+    """SQL выражение названия: base_name для версии 1, иначе "base_name (версия N)" """
+    return case(
+        (version == 1, literal(base_name)),
+        else_=literal(base_name) + " (версия " + cast(version, String) + ")"
+    )
+
+def _with_version_retry(db: Session, statement) -> Any:
+    """Выполнить INSERT/UPDATE с выделением версии, повторяя при гонке за (base_name, version)"""
+    for attempt in range(VERSION_ATTEMPTS):
+        try:
+            result = db.execute(statement).scalar_one_or_none()
+            db.commit()
+            return result
+        except IntegrityError:
+            db.rollback()
+            if attempt == VERSION_ATTEMPTS - 1:
+                raise
+
 def create_project(
     db: Session,
     project: ProjectCreate,
     created_by: Optional[str] = None
 ) -> Project:
-    """Создать новый проект"""
-    db_project = Project(
-        name=project.name,
-        description=project.description,
-        created_by=created_by,  # Теперь это email
-        status=ProjectStatus.DRAFT
-    )
-    db.add(db_project)
-    db.commit()
-    db.refresh(db_project)
+    """
+    Создать новый проект
+
+    Если проект с таким названием (без суффикса версии) уже есть, название
+    получает следующую версию: "Имя" -> "Имя (версия 2)". Версия выделяется
+    одним INSERT ... SELECT max(version) + 1 в базе.
+    """
+    base_name, requested_version = split_versioned_name(project.name)
+    next_version = _next_version(base_name, requested_version).subquery("next_version")
+
+    statement = insert(Project).from_select(
+        ["id", "base_name", "version", "name", "description", "created_by", "status"],
+        select(
+            literal(uuid4(), Project.id.type),
+            literal(base_name),
+            next_version.c.version,
+            _versioned_name(base_name, next_version.c.version),
+            literal(project.description, Project.description.type),
+            literal(created_by, Project.created_by.type),  # email
+            literal(ProjectStatus.DRAFT, Project.status.type)
+        )
+    ).returning(Project.id)
+
+    project_id = _with_version_retry(db, statement)
+    db_project = get_project(db, project_id)
 
     # Добавить запись в историю
     create_history_entry(
@@ -29,7 +95,7 @@ def create_project(
         project_id=db_project.id,
         action="CREATED",
         user_id=created_by,  # email
-        description=f"Project '{project.name}' created"
+        description=f"Project '{db_project.name}' created"
     )
 
     return db_project
@@ -38,19 +104,65 @@ def get_project(db: Session, project_id: UUID) -> Optional[Project]:
     """Получить проект по ID"""
     return db.query(Project).filter(Project.id == project_id).first()
 
-def get_projects(
+def get_project_revision(db: Session, project_id: UUID) -> Optional[int]:
+    """Ревизия проекта (для ETag) - одна колонка по первичному ключу"""
+    return db.query(Project.revision).filter(Project.id == project_id).scalar()
+
+def get_project_detail(
     db: Session,
+    project_id: UUID,
+    include_mappings: bool = True,
+    include_history: bool = False,
+    history_limit: int = 20
+) -> Tuple[Optional[Project], List[ProjectHistory]]:
+    """
+    Проект с маппингами и последними записями истории
+
+    Маппинги - одним selectinload запросом, история - одним запросом с
+    limit (relationship history не загружается целиком), у проекта
+    читаются только колонки ответа.
+
+    Returns:
+        (проект или None, история от новых к старым)
+    """
+    query = db.query(Project).options(
+        load_only(
+            Project.name, Project.base_name, Project.version, Project.description,
+            Project.status, Project.created_by, Project.created_at, Project.updated_at,
+            Project.total_size, Project.file_counts, Project.revision
+        ),
+        noload(Project.history),
+        selectinload(Project.mappings) if include_mappings else noload(Project.mappings)
+    )
+    db_project = query.filter(Project.id == project_id).first()
+    if db_project is None or not include_history:
+        return db_project, []
+    return db_project, get_project_history(db, project_id, limit=history_limit)
+
+def _touch_project(db: Session, project_id: UUID):
+    """Увеличить ревизию проекта (меняется ETag детальной информации); коммит - у вызывающего"""
+    db.execute(
+        update(Project)
+        .where(Project.id == project_id)
+        .values(revision=Project.revision + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+# Колонки сортировки списка; за ними всегда (created_at, id) - уникальный
+# порядок для курсора, совпадающий с составными индексами ix_projects_*_created_at_id
+SORT_COLUMNS = {
+    "name": Project.name,
+    "status": Project.status,
+    "total_size": Project.total_size,
+}
+
+def _filter_projects(
+    query: Query,
     created_by: Optional[str] = None,
     status: Optional[ProjectStatus] = None,
-    search: Optional[str] = None,
-    skip: int = 0,
-    limit: int = 100,
-    sort_by: Optional[str] = None,
-    sort_order: Optional[str] = None
-) -> List[Project]:
-    """Получить список проектов с фильтрацией и сортировкой"""
-    query = db.query(Project)
-
+    search: Optional[str] = None
+) -> Query:
+    """Фильтры списка проектов (общие для выборки и подсчета)"""
     if created_by:
         query = query.filter(Project.created_by == created_by)
 
@@ -58,24 +170,103 @@ def get_projects(
         query = query.filter(Project.status == status)
 
     if search:
-        query = query.filter(Project.name.ilike(f"{search}%"))
+        # Префиксный поиск без учета регистра по индексу lower(name) text_pattern_ops
+        pattern = search.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        query = query.filter(func.lower(Project.name).like(f"{pattern}%", escape="\\"))
 
-    # Сортировка
-    order_func = desc if sort_order == "desc" else asc
+    return query
 
+def _sort_spec(sort_by: Optional[str], sort_order: Optional[str]) -> Tuple[List[Any], bool]:
+    """Колонки сортировки и направление (True - по убыванию)"""
+    if sort_by in SORT_COLUMNS:
+        return [SORT_COLUMNS[sort_by], Project.created_at, Project.id], sort_order == "desc"
     if sort_by == "created_at":
-        query = query.order_by(order_func(Project.created_at))
-    elif sort_by == "name":
-        query = query.order_by(order_func(Project.name))
-    elif sort_by == "status":
-        query = query.order_by(order_func(Project.status))
-    elif sort_by == "total_size":
-        # total_size не хранится в БД, поэтому сортируем по created_at по умолчанию
-        # Сортировка по размеру будет на уровне приложения после получения размеров
-        query = query.order_by(desc(Project.created_at))
-    else:
-        # По умолчанию сортируем по дате создания (от новых к старым)
-        query = query.order_by(desc(Project.created_at))
+        return [Project.created_at, Project.id], sort_order == "desc"
+    # По умолчанию сортируем по дате создания (от новых к старым)
+    return [Project.created_at, Project.id], True
+
+def encode_cursor(project: Project, sort_by: Optional[str], sort_order: Optional[str]) -> str:
+    """Курсор страницы, следующей за project"""
+    columns, descending = _sort_spec(sort_by, sort_order)
+    values = []
+    for column in columns:
+        value = getattr(project, column.key)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, (UUID, ProjectStatus)):
+            value = str(value.value if isinstance(value, ProjectStatus) else value)
+        values.append(value)
+    key = [column.key for column in columns] + ["desc" if descending else "asc"]
+    payload = json.dumps({"k": key, "v": values}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, sort_by: Optional[str], sort_order: Optional[str]) -> List[Any]:
+    """
+    Значения колонок сортировки из курсора
+
+    Raises:
+        ValueError: Курсор поврежден или выдан для другой сортировки
+    """
+    columns, descending = _sort_spec(sort_by, sort_order)
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        key, raw_values = payload["k"], payload["v"]
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("Invalid cursor")
+    if key != [column.key for column in columns] + ["desc" if descending else "asc"]:
+        raise ValueError("Cursor does not match sort order")
+    # Граница сравнивается кортежем: значение нужно для каждой колонки
+    if not isinstance(raw_values, list) or len(raw_values) != len(columns):
+        raise ValueError("Invalid cursor")
+
+    values = []
+    try:
+        for column, value in zip(columns, raw_values):
+            if column is Project.created_at:
+                value = datetime.fromisoformat(value)
+            elif column is Project.id:
+                value = UUID(value)
+            elif column is Project.status:
+                value = ProjectStatus(value)
+            elif column is Project.name and not isinstance(value, str):
+                raise TypeError(column.key)
+            elif column is Project.total_size and (not isinstance(value, int) or isinstance(value, bool)):
+                raise TypeError(column.key)
+            values.append(value)
+    except (ValueError, TypeError, AttributeError):
+        raise ValueError("Invalid cursor")
+    return values
+
+def get_projects(
+    db: Session,
+    created_by: Optional[str] = None,
+    status: Optional[ProjectStatus] = None,
+    search: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    sort_by: Optional[str] = None,
+    sort_order: Optional[str] = None,
+    after: Optional[List[Any]] = None
+) -> List[Project]:
+    """
+    Получить список проектов с фильтрацией и сортировкой
+
+    Args:
+        after: Значения колонок сортировки последнего проекта предыдущей
+            страницы (decode_cursor) - keyset пагинация вместо skip: страница
+            читается по индексу с нужного места, без пропуска skip строк
+    """
+    query = _filter_projects(db.query(Project), created_by, status, search)
+
+    columns, descending = _sort_spec(sort_by, sort_order)
+    if after is not None:
+        # Сравнение строк (a, b, c) < (x, y, z) - диапазон составного индекса
+        boundary = tuple_(*[literal(value, column.type) for column, value in zip(columns, after)])
+        query = query.filter(tuple_(*columns) < boundary if descending else tuple_(*columns) > boundary)
+        skip = 0
+
+    order_func = desc if descending else asc
+    query = query.order_by(*[order_func(column) for column in columns])
 
     return query.offset(skip).limit(limit).all()
 
@@ -86,18 +277,31 @@ def count_projects(
     search: Optional[str] = None
 ) -> int:
     """Подсчитать общее количество проектов с учетом фильтров"""
-    query = db.query(Project)
-
-    if created_by:
-        query = query.filter(Project.created_by == created_by)
-
-    if status:
-        query = query.filter(Project.status == status)
+    query = _filter_projects(db.query(func.count(Project.id)), created_by, status, search)
+    return query.scalar()
 
-    if search:
-        query = query.filter(Project.name.ilike(f"{search}%"))
-
-    return query.count()
+def estimate_projects_count(
+    db: Session,
+    created_by: Optional[str] = None,
+    status: Optional[ProjectStatus] = None,
+    search: Optional[str] = None
+) -> int:
+    """
+    Оценка количества проектов с учетом фильтров по статистике планировщика
+
+    EXPLAIN без выполнения запроса: стоимость не зависит от числа проектов,
+    точность - как у статистики PostgreSQL (обновляется autovacuum/ANALYZE).
+    """
+    statement = _filter_projects(db.query(Project.id), created_by, status, search).statement
+    compiled = statement.compile(dialect=db.get_bind().dialect)
+    params = {
+        name: value.value if isinstance(value, enum.Enum) else value
+        for name, value in compiled.params.items()
+    }
+    plan = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
 
 def update_project(
     db: Session,
@@ -113,6 +317,28 @@ def update_project(
     update_data = project_update.dict(exclude_unset=True)
     changes = {}
 
+    # Переименование - с версией, как при создании (текущий проект не учитывается)
+    name = update_data.pop("name", None)
+    if name is not None and name != db_project.name:
+        old_name = db_project.name
+        base_name, requested_version = split_versioned_name(name)
+        # Подзапрос дважды (версия и название) - UPDATE без FROM по одной строке
+        next_version = _next_version(base_name, requested_version, exclude_id=project_id).scalar_subquery()
+        _with_version_retry(
+            db,
+            update(Project)
+            .where(Project.id == project_id)
+            .values(
+                base_name=base_name,
+                version=next_version,
+                name=_versioned_name(base_name, next_version)
+            )
+            .returning(Project.name)
+            .execution_options(synchronize_session=False)
+        )
+        db.refresh(db_project)
+        changes["name"] = {"old": old_name, "new": db_project.name}
+
     for field, value in update_data.items():
         old_value = getattr(db_project, field)
         if old_value != value:
@@ -135,6 +361,48 @@ def update_project(
 
     return db_project
 
+def update_project_file_stats(
+    db: Session,
+    project_id: UUID,
+    total_size: int,
+    file_counts: Dict[str, int],
+    as_of: datetime
+) -> bool:
+    """
+    Обновить статистику файлов проекта
+
+    Уведомления files-service могут прийти не по порядку: статистика,
+    посчитанная раньше уже сохраненной, не применяется.
+
+    Returns:
+        False если проекта нет
+    """
+    result = db.execute(
+        update(Project)
+        .where(
+            Project.id == project_id,
+            or_(Project.file_stats_updated_at.is_(None), Project.file_stats_updated_at <= as_of)
+        )
+        .values(
+            total_size=total_size,
+            file_counts=file_counts,
+            file_stats_updated_at=as_of,
+            revision=Project.revision + 1
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    if result.rowcount:
+        return True
+    return db.query(Project.id).filter(Project.id == project_id).first() is not None
+
+def get_project_ids(db: Session, after: Optional[UUID] = None, limit: int = 1000) -> List[UUID]:
+    """ID проектов по порядку (пакетами, начиная после after)"""
+    query = db.query(Project.id)
+    if after is not None:
+        query = query.filter(Project.id > after)
+    return [row.id for row in query.order_by(Project.id).limit(limit).all()]
+
 def delete_project(db: Session, project_id: UUID) -> bool:
     """Удалить проект"""
     db_project = get_project(db, project_id)
@@ -158,6 +426,7 @@ def create_field_mapping(
         **mapping.dict()
     )
     db.add(db_mapping)
+    _touch_project(db, project_id)
     db.commit()
     db.refresh(db_mapping)
     return db_mapping
@@ -184,6 +453,7 @@ def update_field_mapping(
     for field, value in update_data.items():
         setattr(db_mapping, field, value)
 
+    _touch_project(db, db_mapping.project_id)
     db.commit()
     db.refresh(db_mapping)
     return db_mapping
@@ -195,6 +465,7 @@ def delete_field_mapping(db: Session, mapping_id: UUID) -> bool:
         return False
 
     db.delete(db_mapping)
+    _touch_project(db, db_mapping.project_id)
     db.commit()
     return True
 
@@ -209,6 +480,7 @@ def bulk_create_mappings(
         for mapping in mappings
     ]
     db.add_all(db_mappings)
+    _touch_project(db, project_id)
     db.commit()
 
     for mapping in db_mappings:
@@ -235,6 +507,7 @@ def create_history_entry(
         description=description
     )
     db.add(db_history)
+    _touch_project(db, project_id)
     db.commit()
     db.refresh(db_history)
     return db_history
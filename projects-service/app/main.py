@@ -1,17 +1,28 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api import projects, mappings
-from app.database import engine, Base
+from app.database import run_migrations
+from app.services.files_client import files_client
 
-# Создание таблиц
-Base.metadata.create_all(bind=engine)
+# Создание и обновление таблиц (alembic/versions)
+run_migrations()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Запуск и остановка сервиса"""
+    # Соединения с files-service (keep-alive)
+    files_client.start()
+    yield
+    await files_client.aclose()
 
 app = FastAPI(
     title="Projects Service",
     description="Project Management Service for VM Template Generator",
     version="1.0.0",
     docs_url="/docs",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    lifespan=lifespan
 )
 
 # CORS middleware
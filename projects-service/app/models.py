@@ -1,7 +1,7 @@
-from sqlalchemy import Column, String, DateTime, Text, Boolean, Float, Enum as SQLEnum, ForeignKey
+from sqlalchemy import Column, String, DateTime, Text, Boolean, Float, Integer, BigInteger, Index, Enum as SQLEnum, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID, JSON
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 import uuid
 import enum
 from app.database import Base
@@ -17,21 +17,45 @@ class Project(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
+    # name = base_name для версии 1, иначе "base_name (версия N)" (см. crud.create_project)
+    base_name = Column(String, nullable=False)
+    version = Column(Integer, default=1, server_default="1", nullable=False)
     description = Column(Text, nullable=True)
     status = Column(SQLEnum(ProjectStatus), default=ProjectStatus.DRAFT, nullable=False)
     created_by = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Статистика файлов из files-service (обновляется уведомлениями PUT /projects/{id}/file-stats)
+    total_size = Column(BigInteger, default=0, server_default="0", nullable=False)  # Размер VM_TEMPLATE файла
+    file_counts = Column(JSON, nullable=True)  # Тип файла -> количество
+    file_stats_updated_at = Column(DateTime(timezone=True), nullable=True)  # as_of последнего уведомления
+
+    # Растет при любом изменении детальной информации (проект, маппинги, история, файлы) - ETag
+    revision = Column(Integer, default=1, server_default="1", nullable=False)
     
     # Связи
     mappings = relationship("FieldMapping", back_populates="project", cascade="all, delete-orphan")
     history = relationship("ProjectHistory", back_populates="project", cascade="all, delete-orphan")
 
+    # Keyset пагинация списка: колонка сортировки + (created_at, id), см. crud.get_projects
+    __table_args__ = (
+        # Версия выделяется по max(version) для base_name, повтор невозможен
+        Index("ux_projects_base_name_version", "base_name", "version", unique=True),
+        Index("ix_projects_created_at_id", "created_at", "id"),
+        Index("ix_projects_created_by_created_at_id", "created_by", "created_at", "id"),
+        Index("ix_projects_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_projects_name_created_at_id", "name", "created_at", "id"),
+        Index("ix_projects_total_size_created_at_id", "total_size", "created_at", "id"),
+        # Префиксный поиск lower(name) LIKE 'abc%'
+        Index("ix_projects_lower_name_pattern", text("lower(name) text_pattern_ops")),
+    )
+
 class FieldMapping(Base):
     __tablename__ = "field_mappings"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
     
     # JSON поле
     json_field_id = Column(String, nullable=False)  # Например: "lastName"
@@ -71,3 +95,8 @@ class ProjectHistory(Base):
     # Связь с проектом
     project = relationship("Project", back_populates="history")
 
+    # Последние записи истории проекта (crud.get_project_history)
+    __table_args__ = (
+        Index("ix_project_history_project_id_timestamp", "project_id", "timestamp"),
+    )
+
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 from enum import Enum
 
@@ -23,19 +23,34 @@ class ProjectUpdate(BaseModel):
 class ProjectResponse(BaseModel):
     id: str
     name: str
+    base_name: Optional[str] = Field(None, description="Название без суффикса версии")
+    version: int = 1
     description: Optional[str] = None
     status: str
     created_by: Optional[str] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
     total_size: int = Field(default=0, description="Размер VM_TEMPLATE файла в байтах")
+    file_counts: Dict[str, int] = Field(default_factory=dict, description="Количество файлов проекта по типам")
 
     class Config:
         from_attributes = True
 
+class ProjectFileStatsUpdate(BaseModel):
+    """Статистика файлов проекта от files-service"""
+    template_size: int = Field(0, ge=0)
+    file_counts: Dict[str, int] = {}
+    as_of: datetime = Field(..., description="Момент подсчета в files-service")
+
+class ProjectFileStatsResyncResponse(BaseModel):
+    updated: int
+    failed: int
+
 class ProjectListResponse(BaseModel):
     projects: List[ProjectResponse]
-    total: int
+    total: Optional[int] = Field(None, description="Количество проектов с учетом фильтров (None при count=none)")
+    total_is_estimate: bool = False
+    next_cursor: Optional[str] = Field(None, description="Курсор следующей страницы (None - страница последняя)")
 
 # ============ FIELD MAPPING SCHEMAS ============
 
@@ -1,51 +1,78 @@
 import httpx
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from app.core.config import get_settings
 
 settings = get_settings()
 
 class FilesClient:
-    """HTTP клиент для общения с files-service"""
+    """
+    HTTP клиент для общения с files-service
+
+    Один httpx.AsyncClient (keep-alive соединения) на весь сервис:
+    создается при старте (lifespan в main.py) и закрывается при остановке.
+    """
 
     def __init__(self):
         self.files_service_url = settings.FILES_SERVICE_URL
         self.timeout = 10.0
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def start(self):
+        """Создание клиента (при старте сервиса)"""
+        self._get_client()
+
+    async def aclose(self):
+        """Закрытие клиента (соединения пула закрываются)"""
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Вне lifespan (скрипты) - создается при первом запросе
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+        return self._client
 
     async def get_project_files(self, project_id: str) -> List[Dict[str, Any]]:
         """Получить все файлы проекта"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.files_service_url}/files/project/{project_id}"
-                )
-                if response.status_code == 200:
-                    data = response.json()
-                    return data.get("files", [])
-                return []
+            response = await self._get_client().get(
+                f"{self.files_service_url}/files/project/{project_id}"
+            )
+            if response.status_code == 200:
+                data = response.json()
+                return data.get("files", [])
+            return []
         except Exception as e:
             print(f"Error getting project files: {e}")
             return []
 
-    async def get_project_total_size(self, project_id: str) -> int:
-        """Получить размер VM_TEMPLATE файла проекта"""
-        try:
-            files = await self.get_project_files(project_id)
-            # Ищем VM_TEMPLATE файл
-            vm_file = next((f for f in files if f.get("file_type") == "VM_TEMPLATE"), None)
-            return vm_file.get("file_size", 0) if vm_file else 0
-        except Exception as e:
-            print(f"Error getting project files size: {e}")
-            return 0
+    async def get_projects_sizes(self, project_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Размеры и число файлов нескольких проектов одним запросом POST /files/sizes
+
+        Returns:
+            project_id -> {"template_size", "total_size", "file_counts"}
+
+        Raises:
+            httpx.HTTPError: files-service недоступен или вернул ошибку
+        """
+        response = await self._get_client().post(
+            f"{self.files_service_url}/files/sizes",
+            json={"project_ids": project_ids}
+        )
+        response.raise_for_status()
+        return response.json().get("sizes", {})
 
     async def delete_file(self, file_id: str) -> bool:
         """Удалить файл"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.delete(
-                    f"{self.files_service_url}/files/{file_id}"
-                )
-                return response.status_code == 204
+            response = await self._get_client().delete(
+                f"{self.files_service_url}/files/{file_id}"
+            )
+            return response.status_code == 204
         except Exception as e:
             print(f"Error deleting file {file_id}: {e}")
             return False
 
+files_client = FilesClient()
@@ -0,0 +1,81 @@
+"""
+Общие фикстуры тестов projects-service
+
+Таблицы создаются в SQLite в памяти: UUID колонки хранятся как CHAR(32),
+индекс lower(name) text_pattern_ops (только PostgreSQL) не создается.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.api import projects, mappings
+from app.database import Base, get_db
+from app.models import Project
+
+
+@compiles(postgresql.UUID, "sqlite")
+def _uuid_as_char(type_, compiler, **kw):
+    return "CHAR(32)"
+
+
+POSTGRES_ONLY_INDEXES = {"ix_projects_lower_name_pattern"}
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    removed = [index for index in Project.__table__.indexes if index.name in POSTGRES_ONLY_INDEXES]
+    for index in removed:
+        Project.__table__.indexes.discard(index)
+    try:
+        Base.metadata.create_all(engine)
+    finally:
+        Project.__table__.indexes.update(removed)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client(session_factory):
+    """Роутеры сервиса без lifespan (миграций и клиента files-service)"""
+    app = FastAPI()
+    app.include_router(projects.router, prefix="/projects")
+    app.include_router(mappings.router, prefix="/mappings")
+
+    def override_get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    return TestClient(app)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Тест keyset пагинации списка проектов (encode_cursor / decode_cursor)
+"""
+
+import base64
+import json
+import uuid
+from datetime import datetime
+
+import pytest
+
+import app.crud as crud
+from app.models import Project, ProjectStatus
+
+
+CREATED_AT = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def make_project(
+    db, name="Проект", version=1, total_size=0, status=ProjectStatus.DRAFT, created_at=CREATED_AT
+):
+    # Одинаковое name у разных версий - совпадающие ключи сортировки по name
+    project = Project(
+        id=uuid.uuid4(),
+        name=name,
+        base_name=name,
+        version=version,
+        status=status,
+        total_size=total_size,
+        created_at=created_at
+    )
+    db.add(project)
+    db.commit()
+    return project
+
+
+def collect_pages(client, limit, **params):
+    """Все страницы списка по next_cursor: ID проектов в порядке выдачи"""
+    ids, cursor = [], None
+    for _ in range(100):
+        query = dict(params, limit=limit, count="none")
+        if cursor:
+            query["cursor"] = cursor
+        response = client.get("/projects/", params=query)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        assert len(page["projects"]) <= limit
+        ids.extend(p["id"] for p in page["projects"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids
+    raise AssertionError("pagination did not terminate")
+
+
+@pytest.mark.parametrize("sort_by, sort_order", [
+    (None, None),
+    ("created_at", "asc"),
+    ("name", "asc"),
+    ("status", "desc"),
+    ("total_size", "desc"),
+])
+def test_cursor_round_trip(db, sort_by, sort_order):
+    """decode_cursor(encode_cursor(p)) - значения колонок сортировки p"""
+    project = make_project(db, name="Отчет", total_size=42, status=ProjectStatus.IN_PROGRESS)
+
+    cursor = crud.encode_cursor(project, sort_by, sort_order)
+    values = crud.decode_cursor(cursor, sort_by, sort_order)
+
+    columns, _ = crud._sort_spec(sort_by, sort_order)
+    assert values == [getattr(project, column.key) for column in columns]
+    # Курсор безопасен для query string
+    assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+
+
+def test_cursor_for_other_sort_is_rejected(db):
+    project = make_project(db)
+    cursor = crud.encode_cursor(project, "name", "asc")
+
+    with pytest.raises(ValueError, match="sort order"):
+        crud.decode_cursor(cursor, "name", "desc")
+    with pytest.raises(ValueError, match="sort order"):
+        crud.decode_cursor(cursor, "total_size", "asc")
+
+
+def encode_payload(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii")
+
+
+KEY = ["total_size", "created_at", "id", "asc"]
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-a-cursor!",
+    base64.urlsafe_b64encode(b"\xff\xfe").decode("ascii"),
+    encode_payload([1, 2, 3]),
+    encode_payload({"k": KEY}),
+    encode_payload({"k": KEY, "v": "1"}),
+    encode_payload({"k": KEY, "v": [1, CREATED_AT.isoformat()]}),
+    encode_payload({"k": KEY, "v": ["1", CREATED_AT.isoformat(), str(uuid.uuid4())]}),
+    encode_payload({"k": KEY, "v": [True, CREATED_AT.isoformat(), str(uuid.uuid4())]}),
+    encode_payload({"k": KEY, "v": [1, "yesterday", str(uuid.uuid4())]}),
+    encode_payload({"k": KEY, "v": [1, CREATED_AT.isoformat(), "not-a-uuid"]}),
+])
+def test_malformed_cursor_returns_400(client, cursor):
+    response = client.get(
+        "/projects/", params={"cursor": cursor, "sort_by": "total_size", "sort_order": "asc"}
+    )
+
+    assert response.status_code == 400
+    assert "cursor" in response.json()["detail"].lower()
+
+
+def test_cursor_of_other_sort_returns_400(client, db):
+    cursor = crud.encode_cursor(make_project(db), "name", "asc")
+
+    response = client.get("/projects/", params={"cursor": cursor, "sort_by": "name", "sort_order": "desc"})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cursor does not match sort order"
+
+
+@pytest.mark.parametrize("sort_by, sort_order", [
+    ("total_size", "asc"),
+    ("total_size", "desc"),
+    ("name", "asc"),
+    ("status", "desc"),
+    (None, None),
+])
+@pytest.mark.parametrize("limit", [1, 2, 3])
+def test_page_boundaries_with_tied_sort_keys(client, db, sort_by, sort_order, limit):
+    """
+    Одинаковые значения колонки сортировки (и created_at) на границе страниц:
+    проекты не теряются и не повторяются - порядок добивает id
+    """
+    for version in range(1, 5):
+        make_project(db, name="Одинаковое", version=version, total_size=100)
+    for version in range(1, 4):
+        make_project(db, name="Другое", version=version, total_size=5, status=ProjectStatus.COMPLETED)
+    make_project(db, name="Позже", total_size=100, created_at=datetime(2026, 1, 2))
+
+    ids = collect_pages(client, limit, **({"sort_by": sort_by, "sort_order": sort_order} if sort_by else {}))
+
+    expected = [str(p.id) for p in crud.get_projects(db, limit=1000, sort_by=sort_by, sort_order=sort_order)]
+    assert len(expected) == 8
+    assert len(set(ids)) == len(ids)
+    assert ids == expected
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Тест ETag детальной информации о проекте (ревизия проекта, If-None-Match -> 304)
+"""
+
+import uuid
+
+import pytest
+
+import app.crud as crud
+from app.api.projects import _detail_etag, _etag_matches
+from app.schemas import ProjectCreate
+
+
+ETAG = '"3f2a-7-101-20"'
+
+
+@pytest.mark.parametrize("if_none_match, expected", [
+    (None, False),
+    ("", False),
+    (ETAG, True),
+    (f"W/{ETAG}", True),
+    ("*", True),
+    (f'"other-1-101-20", {ETAG}', True),
+    (f'"other-1-101-20",W/{ETAG}', True),
+    ('"3f2a-6-101-20"', False),
+    ('W/"3f2a-6-101-20"', False),
+    # Без кавычек - другой тег
+    ("3f2a-7-101-20", False),
+])
+def test_etag_matches(if_none_match, expected):
+    assert _etag_matches(if_none_match, ETAG) is expected
+
+
+def test_detail_etag_depends_on_response_shape():
+    project_id = uuid.uuid4()
+    base = _detail_etag(project_id, 1, True, False, True, 20)
+
+    assert base.startswith('"') and base.endswith('"')
+    assert _detail_etag(project_id, 2, True, False, True, 20) != base
+    assert _detail_etag(project_id, 1, False, False, True, 20) != base
+    assert _detail_etag(project_id, 1, True, True, True, 20) != base
+    assert _detail_etag(project_id, 1, True, False, False, 20) != base
+    assert _detail_etag(project_id, 1, True, False, True, 50) != base
+
+
+@pytest.fixture
+def project(db):
+    return crud.create_project(db, ProjectCreate(name="Отчет"), created_by="user@example.com")
+
+
+def fetch(client, project_id, if_none_match=None, **params):
+    params.setdefault("include_files", False)
+    headers = {"If-None-Match": if_none_match} if if_none_match else {}
+    return client.get(f"/projects/{project_id}", params=params, headers=headers)
+
+
+def assert_changed(client, project_id, etag):
+    """Старый ETag больше не дает 304; возвращает новый"""
+    response = fetch(client, project_id, if_none_match=etag)
+    assert response.status_code == 200
+    new_etag = response.headers["etag"]
+    assert new_etag != etag
+    assert fetch(client, project_id, if_none_match=new_etag).status_code == 304
+    return new_etag
+
+
+def test_unchanged_project_returns_304(client, project):
+    response = fetch(client, project.id)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    for if_none_match in (etag, f"W/{etag}", "*", f'"stale", {etag}'):
+        not_modified = fetch(client, project.id, if_none_match=if_none_match)
+        assert not_modified.status_code == 304
+        assert not_modified.headers["etag"] == etag
+        assert not_modified.content == b""
+
+    # Другой состав ответа - другой ETag
+    assert fetch(client, project.id, if_none_match=etag, include_history=True).status_code == 200
+
+
+def test_missing_project_with_if_none_match_returns_404(client):
+    response = fetch(client, uuid.uuid4(), if_none_match="*")
+    assert response.status_code == 404
+
+
+def test_history_entry_changes_etag(client, db, project):
+    etag = fetch(client, project.id).headers["etag"]
+
+    crud.create_history_entry(db, project.id, action="GENERATED", description="Template generated")
+
+    assert_changed(client, project.id, etag)
+
+
+def test_mapping_changes_change_etag(client, project):
+    etag = fetch(client, project.id).headers["etag"]
+    mapping = {
+        "json_field_id": "lastName",
+        "json_field_path": "$request.lastName",
+        "xml_element_name": "FamilyName",
+        "variable_name": "lastName"
+    }
+
+    created = client.post("/mappings/", params={"project_id": str(project.id)}, json=mapping)
+    assert created.status_code == 201
+    etag = assert_changed(client, project.id, etag)
+
+    mapping_id = created.json()["id"]
+    assert client.put(f"/mappings/{mapping_id}", json={"variable_name": "familyName"}).status_code == 200
+    etag = assert_changed(client, project.id, etag)
+
+    bulk = client.post("/mappings/bulk", params={"project_id": str(project.id)}, json=[mapping])
+    assert bulk.status_code == 201
+    etag = assert_changed(client, project.id, etag)
+
+    assert client.delete(f"/mappings/{mapping_id}").status_code == 204
+    assert_changed(client, project.id, etag)
+
+
+def test_project_update_changes_etag(client, project):
+    etag = fetch(client, project.id).headers["etag"]
+
+    assert client.put(f"/projects/{project.id}", json={"description": "Новое описание"}).status_code == 200
+
+    assert_changed(client, project.id, etag)
+
+
+def test_file_stats_update_changes_etag(client, project):
+    etag = fetch(client, project.id).headers["etag"]
+    url = f"/projects/{project.id}/file-stats"
+
+    stats = {"template_size": 512, "file_counts": {"VM_TEMPLATE": 1}, "as_of": "2026-01-01T10:00:00"}
+    assert client.put(url, json=stats).status_code == 204
+    response = fetch(client, project.id, if_none_match=etag)
+    assert response.status_code == 200
+    assert response.json()["total_size"] == 512
+    etag = response.headers["etag"]
+
+    # Устаревшее уведомление не применяется - ETag тот же
+    stale = {"template_size": 1, "file_counts": {}, "as_of": "2026-01-01T09:00:00"}
+    assert client.put(url, json=stale).status_code == 204
+    assert fetch(client, project.id, if_none_match=etag).status_code == 304
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Тест версий проектов: разбор названия "Имя (версия N)" и повтор при
+нарушении уникального индекса (base_name, version)
+"""
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+import app.crud as crud
+from app.models import Project
+from app.schemas import ProjectCreate, ProjectUpdate
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("Отчет", ("Отчет", 1)),
+    ("Отчет (версия 3)", ("Отчет", 3)),
+    ("Отчет   (версия 12)", ("Отчет", 12)),
+    ("Отчет (версия 2) (версия 5)", ("Отчет (версия 2)", 5)),
+    # Суффикс только в конце, через пробел и с числом
+    ("Отчет (версия 2) черновик", ("Отчет (версия 2) черновик", 1)),
+    ("Отчет(версия 2)", ("Отчет(версия 2)", 1)),
+    ("Отчет (версия два)", ("Отчет (версия два)", 1)),
+    ("Отчет (version 2)", ("Отчет (version 2)", 1)),
+    ("", ("", 1)),
+])
+def test_split_versioned_name(name, expected):
+    assert crud.split_versioned_name(name) == expected
+
+
+def create(db, name):
+    return crud.create_project(db, ProjectCreate(name=name), created_by="user@example.com")
+
+
+def test_create_allocates_next_version(db):
+    names = [create(db, "Отчет").name for _ in range(3)]
+
+    assert names == ["Отчет", "Отчет (версия 2)", "Отчет (версия 3)"]
+    # Явная версия в названии: новый base_name - она и берется, иначе max + 1
+    assert create(db, "Новый (версия 5)").version == 5
+    assert create(db, "Отчет (версия 10)").name == "Отчет (версия 4)"
+
+
+def test_rename_allocates_version_excluding_itself(db):
+    first = create(db, "Отчет")
+    other = create(db, "Черновик")
+
+    renamed = crud.update_project(db, other.id, ProjectUpdate(name="Отчет"))
+
+    assert (renamed.base_name, renamed.version, renamed.name) == ("Отчет", 2, "Отчет (версия 2)")
+    # Повторное переименование в то же название - не сдвигает версию
+    again = crud.update_project(db, first.id, ProjectUpdate(name="Отчет"))
+    assert again.name == "Отчет"
+
+
+def fail_first_inserts(db, monkeypatch, failures, on_failure=None):
+    """
+    Первые failures выполнений INSERT в projects завершаются нарушением
+    уникального индекса - как у проигравшего в гонке за версию
+    """
+    execute = db.execute
+    attempts = []
+
+    def flaky_execute(statement, *args, **kwargs):
+        if getattr(statement, "is_insert", False) and statement.table.name == Project.__tablename__:
+            attempts.append(statement)
+            if len(attempts) <= failures:
+                if on_failure is not None:
+                    on_failure()
+                raise IntegrityError(str(statement), {}, Exception("duplicate key value violates unique constraint"))
+        return execute(statement, *args, **kwargs)
+
+    monkeypatch.setattr(db, "execute", flaky_execute)
+    return attempts
+
+
+def test_create_retries_on_unique_conflict(db, session_factory, monkeypatch):
+    """Конкурент занял версию между попытками - повтор берет следующую"""
+    create(db, "Отчет")
+
+    def competitor_wins():
+        other = session_factory()
+        try:
+            create(other, "Отчет")
+        finally:
+            other.close()
+
+    attempts = fail_first_inserts(db, monkeypatch, failures=1, on_failure=competitor_wins)
+    project = create(db, "Отчет")
+
+    assert len(attempts) == 2
+    assert project.name == "Отчет (версия 3)"
+    assert sorted(p.version for p in db.query(Project).filter(Project.base_name == "Отчет")) == [1, 2, 3]
+
+
+def test_create_gives_up_after_max_attempts(db, monkeypatch):
+    attempts = fail_first_inserts(db, monkeypatch, failures=crud.VERSION_ATTEMPTS)
+
+    with pytest.raises(IntegrityError):
+        create(db, "Отчет")
+
+    assert len(attempts) == crud.VERSION_ATTEMPTS
+    # Каждая попытка откатывается - сессия остается рабочей
+    assert db.query(Project).count() == 0
+
+
+def test_api_returns_409_when_version_is_not_allocated(client, monkeypatch):
+    def always_conflict(db, statement):
+        raise IntegrityError(str(statement), {}, Exception("duplicate key value violates unique constraint"))
+
+    monkeypatch.setattr(crud, "_with_version_retry", always_conflict)
+
+    response = client.post("/projects/", json={"name": "Отчет"})
+
+    assert response.status_code == 409
+    assert "retry" in response.json()["detail"]
@@ -1,4 +1,6 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+import hmac
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, Header, HTTPException, status
 import jwt
 from app.core.connection_manager import ConnectionManager
 from app.core.config import get_settings
@@ -15,6 +17,29 @@ async def get_connections():
         "rooms": list(manager.rooms.keys())
     }
 
+def verify_internal_token(x_internal_token: Optional[str] = Header(None)):
+    """Проверка общего секрета внутренних сервисов"""
+    if not settings.INTERNAL_API_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Internal API is disabled: INTERNAL_API_TOKEN is not set"
+        )
+    if not x_internal_token or not hmac.compare_digest(x_internal_token, settings.INTERNAL_API_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid internal token"
+        )
+
+@router.post("/rooms/{room}/broadcast", dependencies=[Depends(verify_internal_token)])
+async def broadcast_to_room(room: str, message: Dict[str, Any]):
+    """Отправить сообщение всем в комнате (для внутренних сервисов, заголовок X-Internal-Token)"""
+    recipients = len(manager.rooms.get(room, ()))
+    await manager.send_message_to_room(room, {**message, "room": room})
+    return {
+        "room": room,
+        "recipients": recipients
+    }
+
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint с JWT аутентификацией"""
@@ -9,6 +9,10 @@ class Settings(BaseSettings):
     # WebSocket настройки
     WEBSOCKET_PORT: int = 8008
 
+    # Общий секрет внутренних сервисов (заголовок X-Internal-Token) для
+    # POST /rooms/{room}/broadcast; не задан - рассылка отключена
+    INTERNAL_API_TOKEN: Optional[str] = None
+
     # RabbitMQ настройки (для интеграции с notification service)
     RABBITMQ_HOST: str = "rabbitmq"
     RABBITMQ_USER: str = "admin"